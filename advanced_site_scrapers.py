@@ -4,10 +4,14 @@ import re
 import time
 import json
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright
 from typing import Dict, List, Optional, Any
 import random
 
+from browser_pool import browser_pool
+from domain_throttle import BLOCK_STATUSES, DomainPausedError, domain_throttle
+from http_fetcher import is_blocked_title
+from resource_blocker import resource_blocker
+
 # Logging ayarları
 logging.basicConfig(
     level=logging.INFO,
@@ -411,36 +415,48 @@ class AdvancedSiteScrapers:
         if not config:
             return {"error": f"Site {domain} için konfigürasyon bulunamadı"}
         
-        async with async_playwright() as p:
-            # Render.com için browser ayarları
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu',
-                    '--disable-background-timer-throttling',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-renderer-backgrounding',
-                    '--disable-features=TranslateUI',
-                    '--disable-ipc-flooding-protection'
-                ]
-            )
-            page = await browser.new_page()
+        # Domain nezaket limiti (bekleme bloklayıcı olduğu için thread'de)
+        try:
+            await asyncio.to_thread(domain_throttle.acquire, domain)
+        except DomainPausedError as e:
+            logging.warning(f"Skipping {url}: {e}")
+            return {"error": str(e)}
+        
+        # Sayfa paylaşımlı tarayıcı havuzundan kiralanır (çağrı başına Chromium başlatılmaz)
+        return await browser_pool.run(self._scrape_page(url, domain, config))
+    
+    async def _scrape_page(self, url: str, domain: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Havuzun loop'unda çalışır: sayfayı aç, sonucu domain_throttle'a bildir, alanları çek"""
+        async with browser_pool.lease() as lease:
+            page = lease.page
             
             try:
+                # Görsel/font/medya/tracker isteklerini engelle (sadece DOM okunuyor)
+                await resource_blocker.install(
+                    page,
+                    allow=config.get("resource_allow"),
+                    deny=config.get("resource_deny")
+                )
+
                 # User agent ayarla
                 await page.set_extra_http_headers({
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                 })
                 
-                await page.goto(url, wait_until="networkidle", timeout=config["timeout"])
+                response = await page.goto(url, wait_until="networkidle", timeout=config["timeout"])
+                status = response.status if response else None
+                if status in BLOCK_STATUSES:
+                    retry_after = response.headers.get("retry-after")
+                    domain_throttle.report(domain, status=status,
+                                           retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+                    return {"error": f"HTTP {status}"}
                 await page.wait_for_timeout(config["wait_time"])
                 
+                if is_blocked_title(await page.title()):
+                    domain_throttle.report(domain, status=status, blocked=True)
+                    return {"error": "Bot koruma sayfası"}
+                domain_throttle.report(domain, status=status)
+                
                 # Özel işleyicileri çalıştır
                 if config.get("special_handlers"):
                     for handler in config["special_handlers"]:
@@ -465,8 +481,6 @@ class AdvancedSiteScrapers:
             except Exception as e:
                 logging.error(f"Scraping hatası: {e}")
                 return {"error": str(e)}
-            finally:
-                await browser.close()
     
     async def _extract_text(self, page, selectors: List[str]) -> str:
         """
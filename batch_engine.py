@@ -0,0 +1,170 @@
+"""
+Eşzamanlı toplu scraping motoru
+
+URL'leri tek tek sırayla ve aralarında sleep(1) ile çekmek yerine hepsini
+aynı anda başlatır; global ve domain bazlı semaphore'lar ile aynı anda
+çalışan iş sayısını sınırlar. Her URL kendi sonucunu veya hatasını
+üretir, bir URL'nin hatası diğerlerini etkilemez. Sonuçlar bittikleri
+sırada akış (stream) olarak döner.
+
+Kullanım (async):
+    async for item in batch_engine.stream(urls, scrape_async):
+        print(item.url, item.ok)
+
+Kullanım (sync, Flask/Celery):
+    for item in batch_engine.iter_sync(urls, scraping_service.scrape_product):
+        ...
+
+Worker async fonksiyon ise event loop'ta, değilse thread havuzunda çalışır.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+
+class BatchItem:
+    """Tek bir URL'nin sonucu"""
+
+    __slots__ = ('index', 'url', 'result', 'error', 'elapsed_ms')
+
+    def __init__(self, index: int, url: str, result: Any = None,
+                 error: Optional[str] = None, elapsed_ms: float = 0.0):
+        self.index = index
+        self.url = url
+        self.result = result
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.result)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'url': self.url,
+            'success': self.ok,
+            'data': self.result if self.ok else None,
+            'error': None if self.ok else (self.error or 'Ürün bilgileri çekilemedi'),
+            'elapsed_ms': round(self.elapsed_ms, 1),
+        }
+
+
+def _domain(url: str) -> str:
+    domain = (urlparse(url).netloc or '').lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def _is_async(worker: Callable) -> bool:
+    return asyncio.iscoroutinefunction(worker) or asyncio.iscoroutinefunction(
+        getattr(worker, 'func', None)  # functools.partial
+    )
+
+
+class BatchEngine:
+    """Global + domain bazlı eşzamanlılık sınırlı toplu çalıştırıcı"""
+
+    def __init__(self, max_concurrency: int = 8, per_domain_limit: int = 2):
+        self.max_concurrency = max_concurrency
+        self.per_domain_limit = per_domain_limit
+
+    async def stream(self, urls: Iterable[str], worker: Callable,
+                     max_concurrency: Optional[int] = None,
+                     per_domain_limit: Optional[int] = None):
+        """Her URL bittiğinde BatchItem üreten async generator"""
+        urls = list(urls)
+        if not urls:
+            return
+
+        limit = max_concurrency or self.max_concurrency
+        domain_limit = per_domain_limit or self.per_domain_limit
+        global_sem = asyncio.Semaphore(limit)
+        domain_sems: Dict[str, asyncio.Semaphore] = {}
+
+        is_async = _is_async(worker)
+        executor = None if is_async else ThreadPoolExecutor(
+            max_workers=min(limit, len(urls)), thread_name_prefix='batch-worker'
+        )
+        loop = asyncio.get_running_loop()
+
+        async def _run(index: int, url: str) -> BatchItem:
+            domain_sem = domain_sems.setdefault(_domain(url), asyncio.Semaphore(domain_limit))
+            async with domain_sem, global_sem:
+                started = time.perf_counter()
+                try:
+                    if is_async:
+                        result = await worker(url)
+                    else:
+                        result = await loop.run_in_executor(executor, worker, url)
+                    error = None
+                except Exception as e:
+                    logging.error(f"[BatchEngine] {url} failed: {e}")
+                    result, error = None, str(e)
+                return BatchItem(index, url, result, error, (time.perf_counter() - started) * 1000)
+
+        tasks = [asyncio.ensure_future(_run(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    async def run(self, urls: Iterable[str], worker: Callable, **limits) -> List[BatchItem]:
+        """Tüm URL'leri çalıştır, sonuçları giriş sırasıyla döndür"""
+        items = [item async for item in self.stream(urls, worker, **limits)]
+        return sorted(items, key=lambda item: item.index)
+
+    def iter_sync(self, urls: Iterable[str], worker: Callable, **limits) -> Iterator[BatchItem]:
+        """
+        Senkron kod için akış: motor ayrı bir thread'deki kendi event loop'unda
+        çalışır, biten her sonuç hemen yield edilir.
+        """
+        results: queue.Queue = queue.Queue()
+        done = object()
+
+        async def _pump():
+            async for item in self.stream(urls, worker, **limits):
+                results.put(item)
+
+        def _runner():
+            try:
+                asyncio.run(_pump())
+            except Exception as e:
+                logging.error(f"[BatchEngine] Batch failed: {e}")
+            finally:
+                results.put(done)
+
+        threading.Thread(target=_runner, name='batch-engine', daemon=True).start()
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            yield item
+
+    def run_sync(self, urls: Iterable[str], worker: Callable, **limits) -> List[BatchItem]:
+        """iter_sync'in giriş sırasına dizilmiş liste hali"""
+        return sorted(self.iter_sync(urls, worker, **limits), key=lambda item: item.index)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Global motor (ScrapingService, RenderScraper ve IntegratedScraper paylaşır)
+batch_engine = BatchEngine(
+    max_concurrency=_env_int('BATCH_MAX_CONCURRENCY', 8),
+    per_domain_limit=_env_int('BATCH_PER_DOMAIN_LIMIT', 2),
+)
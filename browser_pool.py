@@ -0,0 +1,397 @@
+"""
+Paylaşımlı Playwright tarayıcı havuzu
+
+Her scrape için yeni bir Chromium başlatmak yerine uzun ömürlü bir tarayıcıyı
+paylaşır. Her istek kendi izole context'ini (cookie/storage ayrı) kiralar,
+iş bitince context kapatılır. Tarayıcı belirli sayıda sayfadan sonra veya
+bellek eşiği aşıldığında yenisiyle değiştirilir.
+
+Kullanım (async):
+    async with browser_pool.lease(locale="tr-TR") as lease:
+        await lease.page.goto(url)
+
+Kullanım (sync, Flask/Celery):
+    result = browser_pool.run_sync(fetch_data(url))
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from playwright.async_api import async_playwright
+
+# psutil opsiyonel: yoksa bellek eşiği devre dışı kalır
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+
+DEFAULT_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-infobars',
+    '--window-position=0,0',
+    '--ignore-certificate-errors',
+    '--ignore-certificate-errors-spki-list',
+    '--disable-accelerated-2d-canvas',
+    '--disable-dev-shm-usage',
+    '--no-zygote',
+    '--no-first-run',
+    '--disable-gpu',
+    '--disable-blink-features=AutomationControlled'
+]
+
+
+class LeaseTimings:
+    """Tek bir kiralamanın süre ölçümleri (milisaniye)"""
+
+    __slots__ = ('wait_ms', 'setup_ms', 'held_ms', 'browser_generation')
+
+    def __init__(self):
+        self.wait_ms = 0.0
+        self.setup_ms = 0.0
+        self.held_ms = 0.0
+        self.browser_generation = 0
+
+    @property
+    def total_ms(self):
+        return self.wait_ms + self.setup_ms + self.held_ms
+
+    def to_dict(self):
+        return {
+            'wait_ms': round(self.wait_ms, 1),
+            'setup_ms': round(self.setup_ms, 1),
+            'held_ms': round(self.held_ms, 1),
+            'total_ms': round(self.total_ms, 1),
+            'browser_generation': self.browser_generation
+        }
+
+
+class BrowserLease:
+    """Kiralanan izole context + sayfa"""
+
+    def __init__(self, context, page, timings: LeaseTimings):
+        self.context = context
+        self.page = page
+        self.timings = timings
+
+
+class _PooledBrowser:
+    """Havuzdaki tek bir tarayıcı örneği ve sayaçları"""
+
+    def __init__(self, browser, generation: int):
+        self.browser = browser
+        self.generation = generation
+        self.pages_served = 0
+        self.active_leases = 0
+        self.retired = False
+        self.started_at = time.monotonic()
+
+
+class BrowserPool:
+    """
+    Uzun ömürlü, paylaşımlı Chromium havuzu.
+
+    Havuz ilk kullanıldığı event loop'a bağlanır; Playwright nesneleri
+    loop'lar arasında taşınamadığı için senkron çağıranlar run_sync ile
+    havuzun kendi arka plan loop'una iş gönderir. Havuzu kendi loop'unda
+    (asyncio.run) kullanan, loop kapanmadan `await browser_pool.close()`
+    çağırmalıdır; açık tarayıcı bırakılmış kapalı bir loop'tan yenisine
+    geçiş reddedilir (aksi halde Chromium süreçleri sahipsiz kalırdı).
+    """
+
+    def __init__(self, max_pages_per_browser: int = 50,
+                 max_memory_mb: Optional[int] = 1024,
+                 max_concurrency: int = 4,
+                 launch_args=None,
+                 history_size: int = 200):
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_memory_mb = max_memory_mb
+        self.max_concurrency = max_concurrency
+        self.launch_args = list(launch_args or DEFAULT_LAUNCH_ARGS)
+
+        self._loop = None
+        self._playwright = None
+        self._current: Optional[_PooledBrowser] = None
+        self._retiring = []
+        self._generation = 0
+        self._semaphore = None
+        self._launch_lock = None
+
+        self._history = deque(maxlen=history_size)
+        self._leases_total = 0
+        self._recycles = 0
+
+        self._thread = None
+        self._thread_loop = None
+        self._thread_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Loop yönetimi
+    # ------------------------------------------------------------------
+    def _has_handles(self) -> bool:
+        return self._playwright is not None or self._current is not None or bool(self._retiring)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            raise RuntimeError("BrowserPool başka bir event loop'a bağlı; run_sync kullanın")
+        if self._has_handles():
+            # Eski loop'un Playwright nesneleri yeni loop'ta await edilemez,
+            # kapatılamazlar; bırakmak Chromium sızdırır
+            raise RuntimeError(
+                "BrowserPool'un önceki event loop'u açık tarayıcılarla kapandı; "
+                "loop bitmeden 'await browser_pool.close()' çağırın veya run_sync kullanın"
+            )
+
+        # İlk kullanım veya önceki loop temiz kapandı: loop'a bağlı durumu kur
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._launch_lock = asyncio.Lock()
+
+    def _ensure_thread_loop(self):
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread_loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _runner():
+                asyncio.set_event_loop(loop)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_runner, name='browser-pool-loop', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._thread_loop = loop
+            return loop
+
+    def run_sync(self, coro, timeout: Optional[float] = None):
+        """Coroutine'i havuzun arka plan loop'unda çalıştır ve sonucu bekle"""
+        loop = self._ensure_thread_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    async def run(self, coro):
+        """
+        Coroutine'i havuzun bağlı olduğu loop'ta çalıştır ve sonucu await et.
+        Başka bir loop'tan (batch_engine, asyncio.run) havuzu kullanmanın yolu;
+        zaten havuzun loop'undaysak doğrudan await edilir.
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            loop = self._loop
+        else:
+            loop = self._ensure_thread_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    # ------------------------------------------------------------------
+    # Tarayıcı yaşam döngüsü
+    # ------------------------------------------------------------------
+    async def _launch(self) -> _PooledBrowser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        started = time.perf_counter()
+        browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        self._generation += 1
+        logging.info(
+            f"[BrowserPool] Browser #{self._generation} launched in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return _PooledBrowser(browser, self._generation)
+
+    async def _get_browser(self) -> _PooledBrowser:
+        async with self._launch_lock:
+            current = self._current
+            if current is not None and (current.retired or not current.browser.is_connected()):
+                self._retire(current, reason='disconnected' if not current.browser.is_connected() else 'retired')
+                current = None
+            if current is None:
+                current = await self._launch()
+                self._current = current
+            return current
+
+    def _retire(self, pooled: _PooledBrowser, reason: str):
+        if pooled is self._current:
+            self._current = None
+        if pooled not in self._retiring:
+            pooled.retired = True
+            self._retiring.append(pooled)
+            self._recycles += 1
+            logging.info(
+                f"[BrowserPool] Recycling browser #{pooled.generation} "
+                f"({reason}, pages={pooled.pages_served})"
+            )
+
+    async def _close_retired(self):
+        for pooled in list(self._retiring):
+            if pooled.active_leases == 0:
+                self._retiring.remove(pooled)
+                try:
+                    await pooled.browser.close()
+                except Exception as e:
+                    logging.debug(f"[BrowserPool] Browser close failed: {e}")
+
+    def _memory_mb(self) -> Optional[float]:
+        """Bu process'in alt process'lerinin (Chromium) toplam RSS'i"""
+        if not PSUTIL_AVAILABLE:
+            return None
+        try:
+            total = 0
+            for child in psutil.Process().children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _check_recycle(self, pooled: _PooledBrowser):
+        if pooled.retired:
+            return
+        if self.max_pages_per_browser and pooled.pages_served >= self.max_pages_per_browser:
+            self._retire(pooled, reason='page limit')
+            return
+        if self.max_memory_mb:
+            memory_mb = self._memory_mb()
+            if memory_mb is not None and memory_mb >= self.max_memory_mb:
+                self._retire(pooled, reason=f'memory {memory_mb:.0f} MB')
+
+    # ------------------------------------------------------------------
+    # Kiralama
+    # ------------------------------------------------------------------
+    @asynccontextmanager
+    async def lease(self, init_scripts=None, **context_options):
+        """
+        İzole bir context ve sayfa kirala.
+        context_options doğrudan browser.new_context'e iletilir.
+        """
+        self._bind_loop()
+        timings = LeaseTimings()
+
+        requested = time.perf_counter()
+        await self._semaphore.acquire()
+        timings.wait_ms = (time.perf_counter() - requested) * 1000
+
+        pooled = None
+        context = None
+        held_from = None
+        try:
+            setup_started = time.perf_counter()
+            pooled = await self._get_browser()
+            pooled.active_leases += 1
+            timings.browser_generation = pooled.generation
+
+            context = await pooled.browser.new_context(**context_options)
+            for script in init_scripts or []:
+                await context.add_init_script(script)
+            page = await context.new_page()
+            timings.setup_ms = (time.perf_counter() - setup_started) * 1000
+
+            held_from = time.perf_counter()
+            yield BrowserLease(context, page, timings)
+        finally:
+            if held_from is not None:
+                timings.held_ms = (time.perf_counter() - held_from) * 1000
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logging.debug(f"[BrowserPool] Context close failed: {e}")
+            if pooled is not None:
+                pooled.active_leases -= 1
+                pooled.pages_served += 1
+                self._check_recycle(pooled)
+                await self._close_retired()
+            self._semaphore.release()
+
+            self._leases_total += 1
+            self._history.append(timings)
+            logging.info(f"[BrowserPool] Lease timings: {timings.to_dict()}")
+
+    async def close(self):
+        """Tüm tarayıcıları ve Playwright sürücüsünü kapat"""
+        if self._current is not None:
+            self._retire(self._current, reason='shutdown')
+        for pooled in list(self._retiring):
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        self._retiring = []
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def shutdown(self):
+        """Arka plan loop'u çalışıyorsa havuzu kapat (atexit için)"""
+        if self._thread_loop is not None and self._loop is self._thread_loop and self._thread.is_alive():
+            try:
+                self.run_sync(self.close(), timeout=10)
+            except Exception:
+                pass
+            self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+
+    def stats(self) -> Dict[str, Any]:
+        """Havuz durumu ve son kiralamaların ortalama süreleri"""
+        history = list(self._history)
+        count = len(history)
+
+        def _avg(attr):
+            if not count:
+                return 0.0
+            return round(sum(getattr(t, attr) for t in history) / count, 1)
+
+        current = self._current
+        return {
+            'leases_total': self._leases_total,
+            'recycles': self._recycles,
+            'browser_generation': current.generation if current else None,
+            'pages_on_current_browser': current.pages_served if current else 0,
+            'active_leases': current.active_leases if current else 0,
+            'retiring_browsers': len(self._retiring),
+            'memory_mb': self._memory_mb(),
+            'avg_wait_ms': _avg('wait_ms'),
+            'avg_setup_ms': _avg('setup_ms'),
+            'avg_held_ms': _avg('held_ms'),
+            'avg_total_ms': _avg('total_ms'),
+        }
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Global havuz (scraper.py ve servisler bunu paylaşır)
+browser_pool = BrowserPool(
+    max_pages_per_browser=_env_int('BROWSER_POOL_MAX_PAGES', 50),
+    max_memory_mb=_env_int('BROWSER_POOL_MAX_MEMORY_MB', 1024),
+    max_concurrency=_env_int('BROWSER_POOL_MAX_CONCURRENCY', 4),
+)
+
+atexit.register(browser_pool.shutdown)
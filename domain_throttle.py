@@ -0,0 +1,248 @@
+"""
+Domain bazlı nezaket (politeness) zamanlayıcısı
+
+Aynı mağazaya giden istekler (API istekleri, Celery worker'ları, periyodik
+fiyat kontrolü) tek bir token bucket'tan geçer. Bucket'lar Redis varsa
+orada tutulur, böylece tüm process'ler aynı limiti paylaşır; Redis yoksa
+veya bağlantı koparsa process içi bucket'a düşülür.
+
+429 / 403 / 503 yanıtları veya bot tespiti sayfaları domain'i üstel artan
+bir süre (backoff) bekletir. Art arda `breaker_threshold` kez engellenen
+domain için devre kesici açılır ve `breaker_cooldown` boyunca hiç istek
+gönderilmez; başarılı ilk istek sayaçları sıfırlar.
+
+    throttle.acquire("zara.com", rate=0.2, burst=1)   # gerekirse bekler
+    throttle.report("zara.com", status=429, retry_after=30)
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+BLOCK_STATUSES = frozenset({403, 429, 503})
+
+DEFAULT_RATE = 1.0      # saniyede token
+DEFAULT_BURST = 3
+
+
+class DomainPausedError(Exception):
+    """Domain backoff / devre kesici nedeniyle şu an istek kabul etmiyor"""
+
+    def __init__(self, domain: str, retry_after: float):
+        super().__init__(f"{domain} {retry_after:.0f} sn boyunca duraklatıldı")
+        self.domain = domain
+        self.retry_after = retry_after
+
+
+class _MemoryBackend:
+    """Process içi bucket / blok durumu"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, tuple] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._strikes: Dict[str, int] = {}
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Token al; alınamıyorsa kaç saniye beklenmesi gerektiğini döndür"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def blocked_until(self, key: str) -> float:
+        with self._lock:
+            return self._blocked_until.get(key, 0.0)
+
+    def block(self, key: str, until: float):
+        with self._lock:
+            self._blocked_until[key] = max(until, self._blocked_until.get(key, 0.0))
+
+    def strike(self, key: str) -> int:
+        with self._lock:
+            self._strikes[key] = self._strikes.get(key, 0) + 1
+            return self._strikes[key]
+
+    def reset(self, key: str):
+        with self._lock:
+            self._strikes.pop(key, None)
+            self._blocked_until.pop(key, None)
+
+    def strikes(self, key: str) -> int:
+        with self._lock:
+            return self._strikes.get(key, 0)
+
+
+# KEYS[1]=bucket, ARGV: rate, burst, now -> bekleme süresi (sn, string)
+_TAKE_SCRIPT = """
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(data[1]) or burst
+local updated = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+class _RedisBackend:
+    """Tüm process'lerin paylaştığı Redis durumu"""
+
+    PREFIX = "throttle"
+
+    def __init__(self, client, strike_ttl: int):
+        self.client = client
+        self.strike_ttl = strike_ttl
+        self._take = client.register_script(_TAKE_SCRIPT)
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.PREFIX}:{kind}:{key}"
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        return float(self._take(keys=[self._key("bucket", key)], args=[rate, burst, now]))
+
+    def blocked_until(self, key: str) -> float:
+        value = self.client.get(self._key("blocked", key))
+        return float(value) if value else 0.0
+
+    def block(self, key: str, until: float):
+        ttl = max(1, int(until - time.time()) + 1)
+        current = self.blocked_until(key)
+        if until > current:
+            self.client.setex(self._key("blocked", key), ttl, repr(until))
+
+    def strike(self, key: str) -> int:
+        pipe = self.client.pipeline()
+        pipe.incr(self._key("strikes", key))
+        pipe.expire(self._key("strikes", key), self.strike_ttl)
+        return int(pipe.execute()[0])
+
+    def reset(self, key: str):
+        self.client.delete(self._key("strikes", key), self._key("blocked", key))
+
+    def strikes(self, key: str) -> int:
+        return int(self.client.get(self._key("strikes", key)) or 0)
+
+
+class DomainThrottle:
+    """Token bucket + üstel backoff + devre kesici"""
+
+    def __init__(self, redis_url: Optional[str] = None,
+                 base_backoff: float = 5.0, max_backoff: float = 300.0,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 900.0):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self._memory = _MemoryBackend()
+        self._redis = None
+        if REDIS_AVAILABLE and redis_url:
+            try:
+                client = redis.from_url(redis_url, decode_responses=True, socket_timeout=2)
+                client.ping()
+                self._redis = _RedisBackend(client, strike_ttl=int(breaker_cooldown * 2))
+            except Exception as e:
+                logging.info(f"[Throttle] Redis kullanılamıyor, process içi bucket: {e}")
+                self._redis = None
+
+    def _call(self, method: str, *args):
+        """Redis varsa onu, hata olursa process içi durumu kullan"""
+        if self._redis is not None:
+            try:
+                return getattr(self._redis, method)(*args)
+            except Exception as e:
+                logging.warning(f"[Throttle] Redis hatası, process içi bucket'a düşülüyor: {e}")
+        return getattr(self._memory, method)(*args)
+
+    def paused_for(self, domain: str) -> float:
+        """Domain için kalan backoff / devre kesici süresi (sn)"""
+        return max(0.0, self._call("blocked_until", domain) - time.time())
+
+    def acquire(self, domain: str, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                max_wait: float = 60.0) -> float:
+        """
+        Domain için bir istek hakkı al, gerekirse bekle. Beklenen süreyi döndürür.
+        Bekleme max_wait'i aşacaksa DomainPausedError fırlatır.
+        """
+        waited = 0.0
+        while True:
+            paused = self.paused_for(domain)
+            if paused > 0:
+                if waited + paused > max_wait:
+                    raise DomainPausedError(domain, paused)
+                time.sleep(paused)
+                waited += paused
+                continue
+
+            wait = self._call("take", domain, rate, burst, time.time())
+            if wait <= 0:
+                if waited:
+                    logging.debug(f"[Throttle] {domain} waited {waited:.1f}s")
+                return waited
+            if waited + wait > max_wait:
+                raise DomainPausedError(domain, wait)
+            time.sleep(wait)
+            waited += wait
+
+    def report(self, domain: str, status: Optional[int] = None, blocked: bool = False,
+               retry_after: Optional[float] = None):
+        """
+        Bir isteğin sonucunu bildir. 2xx ve engellenmemiş sonuç sayaçları sıfırlar;
+        403/429/503 veya bot sayfası backoff'u (gerekirse devre kesiciyi) tetikler.
+        """
+        if not blocked and status not in BLOCK_STATUSES:
+            if status is None or status < 400:
+                if self._call("strikes", domain):
+                    self._call("reset", domain)
+            return
+
+        strikes = self._call("strike", domain)
+        if strikes >= self.breaker_threshold:
+            pause = self.breaker_cooldown
+            logging.warning(f"[Throttle] Circuit open for {domain} after {strikes} blocks ({pause:.0f}s)")
+        else:
+            pause = min(self.max_backoff, self.base_backoff * (2 ** (strikes - 1)))
+            pause *= random.uniform(0.8, 1.2)
+            if retry_after:
+                pause = max(pause, float(retry_after))
+            logging.info(f"[Throttle] Backing off {domain} for {pause:.0f}s (status={status}, strikes={strikes})")
+        self._call("block", domain, time.time() + pause)
+
+    def stats(self, domain: str) -> Dict[str, Any]:
+        strikes = self._call("strikes", domain)
+        paused = self.paused_for(domain)
+        if paused and strikes >= self.breaker_threshold:
+            state = "open"
+        elif paused:
+            state = "backoff"
+        else:
+            state = "closed"
+        return {"domain": domain, "state": state, "strikes": strikes, "paused_for": round(paused, 1)}
+
+
+# Global zamanlayıcı (scraper.py tüm çağıranlar için bunu kullanır)
+domain_throttle = DomainThrottle(redis_url=os.environ.get("REDIS_URL"))
@@ -0,0 +1,285 @@
+"""
+HTTP-first ürün verisi çekme
+
+Birçok mağaza Product JSON-LD, microdata veya OG/product meta etiketlerini
+sunucu tarafında render edilen HTML'e koyuyor. Bu modül tarayıcı açmadan,
+havuzlu bir requests.Session ile sayfayı indirip bu verileri ayrıştırır.
+Hangi domain'de hangi katmanın (http / browser) başarılı olduğu TierTracker
+ile tutulur; sürekli başarısız olan katman sonraki isteklerde atlanır.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BeautifulSoup = None
+    BS4_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+HTTP_TIMEOUT_SECONDS = 8
+MAX_HTML_BYTES = 5 * 1024 * 1024
+
+_JSONLD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+BLOCKED_TITLES = ('ACCESS DENIED', 'FORBIDDEN', 'BOT DETECTED', 'ATTENTION REQUIRED', 'JUST A MOMENT')
+# Sayfa kalıcı olarak yok; tekrar denemenin anlamı yok
+NOT_FOUND_STATUSES = frozenset({404, 410})
+
+
+class PermanentScrapeError(Exception):
+    """
+    Kesin hata: tarayıcı katmanında doğrulanmış 404/410 (sayfa yok).
+    Geçici hatalar (timeout, engel, domain duraklatma, ürün verisi çıkmayan
+    sayfa) bu istisnayı kullanmaz; yalnızca bu negatif cache'lenir.
+    """
+
+    def __init__(self, url: str, reason: str, status: Optional[int] = None):
+        detail = f" (HTTP {status})" if status else ''
+        super().__init__(f"{reason}{detail}: {url}")
+        self.url = url
+        self.reason = reason
+        self.status = status
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+# Havuzlu bağlantılar (keep-alive) tüm çağrılarda paylaşılır
+http_session = _build_session()
+
+
+def is_blocked_title(title: Optional[str]) -> bool:
+    """Sayfa başlığı bot tespiti / erişim engeli sayfasına mı ait"""
+    upper = (title or '').upper()
+    return any(t in upper for t in BLOCKED_TITLES)
+
+
+def fetch_page(url: str, timeout: float = HTTP_TIMEOUT_SECONDS) -> Tuple[Optional[int], Optional[str], Dict[str, str]]:
+    """
+    Sayfayı düz HTTP ile indir.
+    (status, html, headers) döner; html engel/hata durumunda None'dır,
+    status bağlantı hatasında None'dır. Bot sayfası status 403 sayılır.
+    """
+    try:
+        response = http_session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+    except requests.RequestException as e:
+        logging.debug(f"[HTTP] GET failed for {url}: {e}")
+        return None, None, {}
+
+    status = response.status_code
+    headers = dict(response.headers)
+    try:
+        if status != 200:
+            logging.debug(f"[HTTP] {url} returned {status}")
+            return status, None, headers
+        content_type = response.headers.get('Content-Type', '')
+        if 'html' not in content_type.lower():
+            return status, None, headers
+
+        body = response.raw.read(MAX_HTML_BYTES, decode_content=True)
+        encoding = response.encoding or 'utf-8'
+        if encoding.lower() == 'iso-8859-1':
+            # requests varsayılanı; çoğu mağaza utf-8 dönüyor
+            encoding = response.apparent_encoding or 'utf-8'
+        html = body.decode(encoding, errors='replace')
+    except Exception as e:
+        logging.debug(f"[HTTP] Read failed for {url}: {e}")
+        return status, None, headers
+    finally:
+        response.close()
+
+    title_match = _TITLE_RE.search(html)
+    if title_match and is_blocked_title(title_match.group(1)):
+        logging.debug(f"[HTTP] Bot page detected for {url}")
+        return 403, None, headers
+    return status, html, headers
+
+
+def fetch_html(url: str, timeout: float = HTTP_TIMEOUT_SECONDS) -> Optional[str]:
+    """Sayfayı düz HTTP ile indir; engel/hata durumunda None döner"""
+    return fetch_page(url, timeout)[1]
+
+
+def _is_product(node) -> bool:
+    node_type = node.get('@type') if isinstance(node, dict) else None
+    if isinstance(node_type, list):
+        return 'Product' in node_type
+    return node_type == 'Product'
+
+
+def _find_product(data):
+    if isinstance(data, list):
+        for item in data:
+            found = _find_product(item)
+            if found:
+                return found
+        return None
+    if not isinstance(data, dict):
+        return None
+    if _is_product(data):
+        return data
+    if '@graph' in data:
+        return _find_product(data['@graph'])
+    return None
+
+
+def extract_jsonld_from_html(html: str) -> Optional[Dict[str, Any]]:
+    """HTML içindeki ilk Product JSON-LD objesini döndür"""
+    for raw in _JSONLD_RE.findall(html or ''):
+        try:
+            data = json.loads(raw.strip())
+        except ValueError:
+            continue
+        product = _find_product(data)
+        if product:
+            return product
+    return None
+
+
+def _meta_content(soup, **attrs):
+    tag = soup.find('meta', attrs=attrs)
+    if tag and tag.get('content'):
+        return tag['content'].strip()
+    return None
+
+
+def extract_meta_from_soup(soup) -> Dict[str, Any]:
+    """OG / product meta etiketleri (scraper.extract_meta_tags ile aynı alanlar)"""
+    data = {}
+    title = _meta_content(soup, property='og:title')
+    if title:
+        data['title'] = title
+    image = _meta_content(soup, property='og:image')
+    if image:
+        data['image'] = image
+    price = _meta_content(soup, property='product:price:amount') or _meta_content(soup, name='price')
+    if price:
+        data['price'] = price
+    return data
+
+
+def _itemprop_value(el):
+    for attr in ('content', 'src', 'href'):
+        if el.get(attr):
+            return el[attr].strip()
+    text = el.get_text(' ', strip=True)
+    return text or None
+
+
+def extract_microdata_from_soup(soup) -> Dict[str, Any]:
+    """schema.org/Product microdata alanları"""
+    scope = soup.find(attrs={'itemtype': re.compile(r'schema\.org/Product', re.IGNORECASE)})
+    if scope is None:
+        return {}
+
+    data = {}
+    for el in scope.find_all(attrs={'itemprop': True}):
+        prop = el['itemprop']
+        if prop == 'name' and 'title' not in data and el.find_parent(attrs={'itemprop': 'brand'}) is None:
+            data['title'] = _itemprop_value(el)
+        elif prop in ('price', 'lowPrice') and 'price' not in data:
+            data['price'] = _itemprop_value(el)
+        elif prop == 'highPrice' and 'original_price' not in data:
+            data['original_price'] = _itemprop_value(el)
+        elif prop == 'image' and 'image' not in data:
+            data['image'] = _itemprop_value(el)
+        elif prop == 'brand' and 'brand' not in data:
+            name = el.find(attrs={'itemprop': 'name'})
+            data['brand'] = _itemprop_value(name) if name else _itemprop_value(el)
+    return {k: v for k, v in data.items() if v}
+
+
+def parse_product_html(html: str) -> Dict[str, Any]:
+    """
+    HTML'den JSON-LD, microdata ve meta verilerini ayrı ayrı döndür.
+    Alanları birleştirmek çağıranın işi (scraper aynı öncelik sırasını uygular).
+    """
+    parsed = {
+        'jsonld': extract_jsonld_from_html(html),
+        'microdata': {},
+        'meta': {}
+    }
+    if BS4_AVAILABLE:
+        soup = BeautifulSoup(html, HTML_PARSER)
+        parsed['microdata'] = extract_microdata_from_soup(soup)
+        parsed['meta'] = extract_meta_from_soup(soup)
+    return parsed
+
+
+class TierTracker:
+    """
+    Domain bazında hangi katmanın (http / browser) başarılı olduğunu tutar.
+
+    Son `window` denemenin hepsi başarısızsa katman atlanır; ancak
+    `reprobe_seconds` geçtikten sonra tekrar bir kez denenir ki site
+    davranışı değişirse kendiliğinden toparlansın.
+    """
+
+    def __init__(self, window: int = 5, reprobe_seconds: int = 3600):
+        self.window = window
+        self.reprobe_seconds = reprobe_seconds
+        self._history: Dict[str, Dict[str, deque]] = {}
+        self._last_attempt: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, domain: str, tier: str, success: bool):
+        with self._lock:
+            tiers = self._history.setdefault(domain, {})
+            tiers.setdefault(tier, deque(maxlen=self.window)).append(bool(success))
+            self._last_attempt.setdefault(domain, {})[tier] = time.monotonic()
+
+    def should_try(self, domain: str, tier: str) -> bool:
+        with self._lock:
+            history = self._history.get(domain, {}).get(tier)
+            if not history or len(history) < self.window or any(history):
+                return True
+            last = self._last_attempt.get(domain, {}).get(tier, 0)
+            return time.monotonic() - last >= self.reprobe_seconds
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for domain, tiers in self._history.items():
+                result[domain] = {
+                    tier: {
+                        'recent_successes': sum(history),
+                        'recent_attempts': len(history),
+                    }
+                    for tier, history in tiers.items()
+                }
+            return result
+
+
+# Global katman istatistikleri
+tier_tracker = TierTracker()
@@ -6,7 +6,9 @@ Bu dosya, yeni site spesifik scraper'ları mevcut universal scraper sistemine en
 
 import asyncio
 import logging
+from functools import partial
 from typing import Dict, Any, Optional
+from batch_engine import batch_engine
 from site_specific_scrapers import SiteSpecificScrapers
 from advanced_site_scrapers import AdvancedSiteScrapers
 
@@ -104,31 +106,26 @@ class IntegratedScraper:
             }
     
     async def scrape_multiple_products(self, urls: list, use_advanced: bool = True) -> list:
-        """Birden fazla ürünü scrape eder"""
-        results = []
+        """Birden fazla ürünü eşzamanlı scrape eder (sonuçlar giriş sırasıyla)"""
+        results = [None] * len(urls)
+        worker = partial(self.scrape_product, use_advanced=use_advanced)
         
-        for i, url in enumerate(urls, 1):
-            print(f"[{i}/{len(urls)}] Scraping: {url}")
-            
-            try:
-                result = await self.scrape_product(url, use_advanced)
-                results.append(result)
-                
-                if "error" in result:
-                    print(f"❌ Hata: {result['error']}")
-                else:
-                    print(f"✅ Başarılı: {result.get('site', 'N/A')} - {result.get('title', 'N/A')[:30]}...")
-                
-            except Exception as e:
-                print(f"❌ Beklenmeyen hata: {e}")
-                results.append({
-                    "error": str(e),
-                    "url": url,
+        async for item in batch_engine.stream(urls, worker):
+            # Başarısız öğede result None olabilir; hata sözlüğüne çevir
+            if item.ok:
+                result = item.result
+            else:
+                result = {
+                    "error": item.error or "Ürün bilgileri çekilemedi",
+                    "url": item.url,
                     "scraper_type": "none"
-                })
+                }
+            results[item.index] = result
             
-            # Rate limiting
-            await asyncio.sleep(1)
+            if "error" in result:
+                print(f"❌ Hata: {item.url} - {result['error']}")
+            else:
+                print(f"✅ Başarılı: {result.get('site', 'N/A')} - {(result.get('title') or 'N/A')[:30]}...")
         
         return results
     
@@ -78,6 +78,10 @@ def create_app(config_name='development'):
     from app.utils.error_tracking import init_error_tracking
     init_error_tracking(app)
     
+    # Request-scoped identity map (istek sonunda atılır)
+    from app.utils.identity_map import init_identity_map
+    init_identity_map(app)
+    
     # Register blueprints
     from app.api.v1 import auth, products, collections, scraping, users, background_tasks, export, search
     from app.routes import main, dashboard, profile, notifications, price_tracking, product_routes, collections as collections_ui, admin, users as users_ui, messages
@@ -102,12 +106,12 @@ def create_app(config_name='development'):
     app.register_blueprint(export.bp)
     app.register_blueprint(search.bp)
     
-    # User loader
-    from app.models.user import User
+    # User loader: kısa TTL'li oturum önbelleği (User.save / set_password düşürür)
+    from app.services.user_session_cache import user_session_cache
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.get_by_id(user_id)
+        return user_session_cache.load(user_id)
     
     # Store socketio in app context
     app.socketio = socketio
@@ -3,7 +3,11 @@ Collections API endpoints
 """
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
+from app.models.collection import Collection
 from app.services.collection_service import CollectionService
+from app.services.discovery_index import discovery_index
+from app.services.search_index import search_index
+from app.utils.pagination import InvalidCursor, page_size, wants_page
 
 bp = Blueprint('collections', __name__)
 collection_service = CollectionService()
@@ -11,14 +15,32 @@ collection_service = CollectionService()
 @bp.route('', methods=['GET'])
 @login_required
 def get_collections():
-    """Tüm koleksiyonları getir"""
+    """Koleksiyonları getir; ?limit= veya ?cursor= verilirse sayfa sayfa (?limit=20&cursor=...)"""
     try:
-        collections = collection_service.get_user_collections(current_user.id)
+        if not wants_page(request.args):
+            # Parametresiz istek eskisi gibi tüm listeyi döner (mevcut istemciler)
+            collections = collection_service.get_user_collections(current_user.id)
+            return jsonify({
+                'success': True,
+                'data': [c.to_dict() for c in collections],
+                'count': len(collections)
+            }), 200
+        collections, next_cursor = Collection.get_page_for_user(
+            current_user.id,
+            limit=page_size(request.args.get('limit')),
+            cursor=request.args.get('cursor'),
+        )
         return jsonify({
             'success': True,
             'data': [c.to_dict() for c in collections],
-            'count': len(collections)
+            'count': len(collections),
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -234,11 +256,12 @@ def save_collection_to_profile(collection_id):
                 'success': False,
                 'message': 'Koleksiyon oluşturulamadı'
             }), 500
+        search_index.invalidate(current_user.id, search_index.COLLECTIONS)
         
         # Copy products from original collection
         original_products = original_collection.get_products()
-        for product in original_products:
-            repo.add_product_to_collection(new_collection_id, product.id)
+        repo.add_products_to_collection(new_collection_id, [product.id for product in original_products])
+        discovery_index.collection_changed(new_collection_id)
         
         return jsonify({
             'success': True,
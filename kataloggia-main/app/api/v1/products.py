@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app.models.product import Product
 from app.services.product_service import ProductService
+from app.utils.pagination import InvalidCursor, page_size, wants_page
 
 bp = Blueprint('products', __name__)
 product_service = ProductService()
@@ -13,14 +14,32 @@ product_service = ProductService()
 @bp.route('', methods=['GET'])
 @login_required
 def get_products():
-    """Tüm ürünleri getir"""
+    """Ürünleri getir; ?limit= veya ?cursor= verilirse sayfa sayfa (?limit=20&cursor=...)"""
     try:
-        products = product_service.get_user_products(current_user.id)
+        if not wants_page(request.args):
+            # Parametresiz istek eskisi gibi tüm listeyi döner (mevcut istemciler)
+            products = product_service.get_user_products(current_user.id)
+            return jsonify({
+                'success': True,
+                'data': [p.to_dict() for p in products],
+                'count': len(products)
+            }), 200
+        products, next_cursor = Product.get_page_by_user_id(
+            current_user.id,
+            limit=page_size(request.args.get('limit')),
+            cursor=request.args.get('cursor'),
+        )
         return jsonify({
             'success': True,
             'data': [p.to_dict() for p in products],
-            'count': len(products)
+            'count': len(products),
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
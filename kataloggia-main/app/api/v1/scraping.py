@@ -1,7 +1,9 @@
 """
 Scraping API endpoints
 """
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from app.services.scraping_service import ScrapingService
 
@@ -61,6 +63,13 @@ def scrape_batch():
                 'error': 'Maksimum 10 URL gönderebilirsiniz'
             }), 400
         
+        if data.get('stream'):
+            # Her URL bittiğinde bir satır (NDJSON) gönder
+            def generate():
+                for outcome in scraping_service.iter_scrape_multiple(urls):
+                    yield json.dumps(outcome, ensure_ascii=False) + "\n"
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
         results = scraping_service.scrape_multiple(urls)
         
         return jsonify({
@@ -75,3 +84,13 @@ def scrape_batch():
             'error': str(e)
         }), 500
 
+
+
+@bp.route('/cache/stats', methods=['GET'])
+@login_required
+def scrape_cache_stats():
+    """Scrape cache hit/miss/stale sayaçları"""
+    return jsonify({
+        'success': True,
+        'data': scraping_service.cache_stats()
+    }), 200
@@ -4,12 +4,12 @@ Product and collection search
 """
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from app.services.product_service import ProductService
-from app.services.collection_service import CollectionService
+from app.services.discovery_index import COLLECTION, USER, discovery_index
+from app.services.search_index import FACET_BRAND_LIMIT, search_index
+from app.utils.pagination import InvalidCursor, page_size
+from price_parser import to_minor_units
 
 bp = Blueprint('search', __name__, url_prefix='/api/v1/search')
-product_service = ProductService()
-collection_service = CollectionService()
 
 @bp.route('/products', methods=['GET'])
 @login_required
@@ -27,43 +27,68 @@ def search_products():
                 'error': 'Search query or brand required'
             }), 400
         
-        # Get all user products
-        products = product_service.get_user_products(current_user.id, use_cache=False)
-        
-        # Filter products
-        results = []
-        for product in products:
-            match = True
-            
-            # Text search
-            if query:
-                query_lower = query.lower()
-                if query_lower not in product.name.lower() and query_lower not in product.brand.lower():
-                    match = False
-            
-            # Brand filter
-            if brand and brand.lower() not in product.brand.lower():
-                match = False
-            
-            # Price filter
-            if min_price or max_price:
-                try:
-                    price_num = float(str(product.price).replace('₺', '').replace('TL', '').replace(',', '').strip())
-                    
-                    if min_price and price_num < float(min_price):
-                        match = False
-                    if max_price and price_num > float(max_price):
-                        match = False
-                except:
-                    pass
-            
-            if match:
-                results.append(product.to_dict())
+        min_minor = to_minor_units(min_price) if min_price else None
+        max_minor = to_minor_units(max_price) if max_price else None
+        
+        # Kullanıcının inverted index'inden (katalog boyutundan bağımsız), alaka sırasıyla
+        results, total = search_index.search(
+            current_user.id,
+            query=query,
+            brand=brand,
+            min_minor=min_minor,
+            max_minor=max_minor,
+            limit=page_size(request.args.get('limit'), default=50),
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': results,
+            'count': len(results),
+            'total': total,
+            'query': query,
+            'filters': {
+                'brand': brand,
+                'min_price': min_price,
+                'max_price': max_price
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@bp.route('/facets', methods=['GET'])
+@login_required
+def search_facets():
+    """Search products with brand / price / discount facets (q and brand optional)"""
+    try:
+        query = request.args.get('q', '').strip()
+        brand = request.args.get('brand', '').strip()
+        min_price = request.args.get('min_price')
+        max_price = request.args.get('max_price')
+        
+        min_minor = to_minor_units(min_price) if min_price else None
+        max_minor = to_minor_units(max_price) if max_price else None
+        
+        # Facet'ler eşleşen küme üzerinden; filtresizse index sayaçlarından (katalog taranmaz)
+        results, total, facets = search_index.search_with_facets(
+            current_user.id,
+            query=query,
+            brand=brand,
+            min_minor=min_minor,
+            max_minor=max_minor,
+            limit=page_size(request.args.get('limit')),
+            brand_limit=page_size(request.args.get('brands'), default=FACET_BRAND_LIMIT),
+        )
         
         return jsonify({
             'success': True,
             'data': results,
             'count': len(results),
+            'total': total,
+            'facets': facets,
             'query': query,
             'filters': {
                 'brand': brand,
@@ -91,18 +116,18 @@ def search_collections():
                 'error': 'Search query required'
             }), 400
         
-        collections = collection_service.get_user_collections(current_user.id)
-        
-        results = []
-        for collection in collections:
-            if query.lower() in collection.name.lower() or \
-               (collection.description and query.lower() in collection.description.lower()):
-                results.append(collection.to_dict())
+        # Ad/açıklama index'i; tam eşleşme yoksa yazım hatası toleranslı (trigram)
+        results, total = search_index.search_collections(
+            current_user.id,
+            query,
+            limit=page_size(request.args.get('limit'), default=50),
+        )
         
         return jsonify({
             'success': True,
             'data': results,
             'count': len(results),
+            'total': total,
             'query': query
         }), 200
         
@@ -112,3 +137,44 @@ def search_collections():
             'error': str(e)
         }), 500
 
+
+@bp.route('/discover', methods=['GET'])
+@login_required
+def discover():
+    """Search public collections (name, description, products) and usernames of all users"""
+    try:
+        query = request.args.get('q', '').strip()
+        kind = {'users': USER, 'collections': COLLECTION}.get(request.args.get('type', ''))
+        
+        if not query:
+            return jsonify({
+                'success': False,
+                'error': 'Search query required'
+            }), 400
+        
+        try:
+            results, next_cursor = discovery_index.search(
+                query,
+                kind=kind,
+                limit=page_size(request.args.get('limit')),
+                cursor=request.args.get('cursor'),
+            )
+        except InvalidCursor as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': results,
+            'count': len(results),
+            'next_cursor': next_cursor,
+            'query': query
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
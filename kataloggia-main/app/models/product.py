@@ -17,6 +17,8 @@ def to_dict(self):
         'user_id': self.user_id,
         'name': self.name,
         'price': self.price,
+        'price_minor': self.price_minor,
+        'currency': self.currency,
         'image': self.image,
         'brand': self.brand,
         'url': self.url,
@@ -34,59 +36,22 @@ BaseProduct.to_dict = to_dict
 def get_by_user_id(cls, user_id):
     """Kullanıcı ID'sine göre ürünleri getir (Repository pattern)"""
     from app.repositories import get_repository
-    from datetime import datetime
-    import json
     
     repo = get_repository()
-    products_data = repo.get_products_by_user_id(user_id)
-    
-    products = []
-    for product_data in products_data:
-        # Handle images
-        images_data = product_data.get('images')
-        if isinstance(images_data, str):
-            try:
-                images_data = json.loads(images_data)
-            except:
-                images_data = [product_data.get('image')] if product_data.get('image') else []
-        elif not images_data:
-            images_data = [product_data.get('image')] if product_data.get('image') else []
-        
-        # Handle timestamp
-        created_at = product_data.get('created_at')
-        if hasattr(created_at, 'timestamp'):  # Firestore Timestamp
-            created_at = created_at
-        elif isinstance(created_at, str):
-            try:
-                created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-            except ValueError:
-                try:
-                    created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                except:
-                    created_at = datetime.now()
-        elif created_at is None:
-            created_at = datetime.now()
-        
-        product = cls(
-            product_data.get('id'),
-            product_data.get('user_id'),
-            product_data.get('name'),
-            product_data.get('price'),
-            product_data.get('image'),
-            product_data.get('brand'),
-            product_data.get('url'),
-            created_at,
-            product_data.get('old_price'),
-            product_data.get('current_price'),
-            product_data.get('discount_percentage'),
-            images_data,
-            product_data.get('discount_info')
-        )
-        products.append(product)
-    
-    return products
+    return [cls._from_data(product_data) for product_data in repo.get_products_by_user_id(user_id)]
 
 BaseProduct.get_by_user_id = get_by_user_id
 
+# Cursor tabanlı sayfa: (ürünler, next_cursor)
+@classmethod
+def get_page_by_user_id(cls, user_id, limit=20, cursor=None):
+    """Kullanıcının ürünlerinden bir sayfa getir (created_at DESC, keyset)"""
+    from app.repositories import get_repository
+    
+    page = get_repository().get_products_page(user_id, limit=limit, cursor=cursor)
+    return [cls._from_data(product_data) for product_data in page['items']], page['next_cursor']
+
+BaseProduct.get_page_by_user_id = get_page_by_user_id
+
 Product = BaseProduct
 
@@ -21,6 +21,10 @@ class BaseRepository(ABC):
         """Get user by ID"""
         pass
     
+    def get_users_by_ids(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get many users at once, in input order (missing IDs are skipped)"""
+        return [user for user in (self.get_user_by_id(user_id) for user_id in user_ids) if user]
+    
     @abstractmethod
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get user by username"""
@@ -60,6 +64,18 @@ class BaseRepository(ABC):
         """Get product by ID"""
         pass
     
+    def get_products_by_ids(self, product_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get many products at once, in input order (missing IDs are skipped).
+        Varsayılan: tek tek okur; backend'ler toplu okumayla override eder.
+        """
+        products = []
+        for product_id in product_ids:
+            product = self.get_product_by_id(product_id)
+            if product:
+                products.append(product)
+        return products
+    
     @abstractmethod
     def get_product_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """Get product by URL (returns the most recent one if multiple exist)"""
@@ -97,6 +113,10 @@ class BaseRepository(ABC):
         """Get collection by ID"""
         pass
     
+    def get_collections_by_ids(self, collection_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get many collections at once, in input order (missing IDs are skipped)"""
+        return [col for col in (self.get_collection_by_id(col_id) for col_id in collection_ids) if col]
+    
     @abstractmethod
     def get_collection_by_share_url(self, share_url: str) -> Optional[Dict[str, Any]]:
         """Get collection by share URL"""
@@ -124,6 +144,10 @@ class BaseRepository(ABC):
         """Add product to collection"""
         pass
     
+    def add_products_to_collection(self, collection_id: str, product_ids: List[str]) -> bool:
+        """Add many products to a collection (backends override with a bulk write)"""
+        return all([self.add_product_to_collection(collection_id, product_id) for product_id in product_ids])
+    
     @abstractmethod
     def remove_product_from_collection(self, collection_id: str, product_id: str) -> bool:
         """Remove product from collection"""
@@ -197,9 +221,66 @@ class BaseRepository(ABC):
     
     @abstractmethod
     def get_price_history_by_product_id(self, product_id: str, limit: int = 60) -> List[Dict[str, Any]]:
-        """Get price history for a product"""
+        """Get price history for a product (newest `limit` samples, oldest first)"""
         pass
-    
+
+    @abstractmethod
+    def append_price_samples(self, samples: List[Dict[str, Any]]) -> int:
+        """Append {product_id, price, recorded_at} samples to monthly price buckets, returns count"""
+        pass
+
+    @abstractmethod
+    def get_price_series(self, product_id: str, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None, limit: Optional[int] = None) -> Dict[str, List[int]]:
+        """Get {'timestamps': [epoch sn], 'prices': [kuruş]} for a product, oldest first"""
+        pass
+    
+    def record_price_checks(self, tracking_updates: List[Dict[str, Any]],
+                            history_entries: List[Dict[str, Any]],
+                            notifications: List[Dict[str, Any]]) -> bool:
+        """
+        Bir fiyat taramasının sonuçlarını toplu yaz.
+        tracking_updates: {id, last_checked, [current_price, price_change]}
+        history_entries: {product_id, price, recorded_at}
+        notifications: create_notification argümanları
+        Varsayılan: tek tek yazar; backend'ler toplu yazımla override eder.
+        """
+        for update in tracking_updates:
+            if 'current_price' in update:
+                self.update_price_tracking(update['id'], new_price=update['current_price'],
+                                           price_change=update.get('price_change'))
+        for entry in history_entries:
+            self.add_price_history(entry['product_id'], entry['price'], entry['recorded_at'])
+        for notification in notifications:
+            self.create_notification(**notification)
+        return True
+
+    # Cursor pagination: {'items': [...], 'next_cursor': str | None}, created_at DESC
+    @abstractmethod
+    def get_users_page(self, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of users (newest first) after an opaque cursor"""
+        pass
+
+    @abstractmethod
+    def get_products_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of a user's products (newest first) after an opaque cursor"""
+        pass
+
+    @abstractmethod
+    def get_collections_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of a user's collections (newest first) after an opaque cursor"""
+        pass
+
+    @abstractmethod
+    def get_notifications_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of a user's notifications (newest first) after an opaque cursor"""
+        pass
+
+    @abstractmethod
+    def get_import_issues_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of a user's import issues (newest first) after an opaque cursor"""
+        pass
+
     # Notification operations
     @abstractmethod
     def create_notification(self, user_id: str, product_id: Optional[str], 
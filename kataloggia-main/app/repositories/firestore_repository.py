@@ -1,8 +1,10 @@
 """
 Firebase Firestore repository implementation
 """
+import os
 import uuid
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -15,6 +17,18 @@ except ImportError:
 
 from app.repositories.base_repository import BaseRepository
 from app.config import Config
+from app.utils.price_series import (
+    append_to_bucket, bucket_id, group_samples, merge_buckets,
+    merge_samples, month_of, months_between, overlay_samples, to_epoch,
+)
+from app.utils import identity_map
+from app.utils.pagination import decode_cursor, make_page
+from app.utils.url_canonical import product_key
+from price_parser import format_price, parse_price, to_minor_units
+
+# get_all başına doküman sayısı ve eşzamanlı get_all çağrısı
+GET_ALL_CHUNK_SIZE = 100
+GET_ALL_WORKERS = int(os.environ.get('FIRESTORE_GET_ALL_WORKERS', 8))
 
 
 class FirestoreRepository(BaseRepository):
@@ -111,6 +125,9 @@ class FirestoreRepository(BaseRepository):
             return data
         return None
     
+    def get_users_by_ids(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return self._get_all_by_ids('users', user_ids)
+    
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         docs = self.db.collection('users').where('username', '==', username).limit(1).stream()
         for doc in docs:
@@ -138,14 +155,9 @@ class FirestoreRepository(BaseRepository):
     def get_all_users(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all users with pagination"""
         users = []
-        # Firestore doesn't support offset with order_by, so we'll get all and slice
-        # For better performance with large datasets, consider using cursor-based pagination
-        query = self.db.collection('users').order_by('created_at', direction='DESCENDING').limit(limit + offset)
-        docs = query.stream()
-        
-        all_docs = list(docs)
-        # Apply offset manually
-        for doc in all_docs[offset:]:
+        # offset ile atlanan dokümanlar da okuma sayılır; derin sayfalar için get_users_page (cursor)
+        query = self.db.collection('users').order_by('created_at', direction='DESCENDING').offset(offset).limit(limit)
+        for doc in query.stream():
             data = doc.to_dict()
             data['id'] = doc.id
             users.append(data)
@@ -173,6 +185,7 @@ class FirestoreRepository(BaseRepository):
         return user_id
     
     def update_user(self, user_id: str, **kwargs) -> bool:
+        identity_map.forget('users', user_id)
         try:
             updates = {}
             for key, value in kwargs.items():
@@ -204,31 +217,54 @@ class FirestoreRepository(BaseRepository):
             return data
         return None
     
+    def _get_all_by_ids(self, collection_name: str, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Dokümanları batched get_all ile oku: chunk'lar eşzamanlı çekilir, sonuç
+        giriş sırasında döner (bulunamayanlar atlanır).
+        """
+        unique_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id]
+        if not unique_ids:
+            return []
+        
+        collection = self.db.collection(collection_name)
+        chunks = [unique_ids[i:i + GET_ALL_CHUNK_SIZE] for i in range(0, len(unique_ids), GET_ALL_CHUNK_SIZE)]
+        
+        def fetch(chunk):
+            return list(self.db.get_all([collection.document(doc_id) for doc_id in chunk]))
+        
+        if len(chunks) == 1:
+            snapshot_lists = [fetch(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(GET_ALL_WORKERS, len(chunks))) as executor:
+                snapshot_lists = list(executor.map(fetch, chunks))
+        
+        found = {}
+        for snapshots in snapshot_lists:
+            for snap in snapshots:
+                if snap.exists:
+                    data = snap.to_dict()
+                    data['id'] = snap.id
+                    found[snap.id] = data
+        return [found[doc_id] for doc_id in ids if doc_id in found]
+    
+    def get_products_by_ids(self, product_ids: List[str]) -> List[Dict[str, Any]]:
+        return self._get_all_by_ids('products', product_ids)
+    
     def get_product_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """Get product by URL (returns the most recent one if multiple exist)"""
+        # Tracking parametresi / www / sondaki / farkları aynı url_key'e düşer
+        key = product_key(url)
         try:
-            # Normalize URL - remove trailing slashes and query params for better matching
-            normalized_url = url.strip().rstrip('/')
-            # Try exact match first
-            docs = self.db.collection('products').where('url', '==', normalized_url).order_by('created_at', direction=firestore.Query.DESCENDING).limit(1).stream()
+            docs = self.db.collection('products').where('url_key', '==', key).order_by('created_at', direction=firestore.Query.DESCENDING).limit(1).stream()
             for doc in docs:
                 data = doc.to_dict()
                 data['id'] = doc.id
                 return data
-            
-            # If no exact match, try with original URL
-            if normalized_url != url:
-                docs = self.db.collection('products').where('url', '==', url).order_by('created_at', direction=firestore.Query.DESCENDING).limit(1).stream()
-                for doc in docs:
-                    data = doc.to_dict()
-                    data['id'] = doc.id
-                    return data
-            
             return None
         except Exception as e:
             # Fallback to memory sort if index not ready yet
             print(f"[WARNING] Index not ready for URL search, using memory sort: {e}")
-            docs = self.db.collection('products').where('url', '==', url).stream()
+            docs = self.db.collection('products').where('url_key', '==', key).stream()
             products = []
             for doc in docs:
                 data = doc.to_dict()
@@ -238,6 +274,62 @@ class FirestoreRepository(BaseRepository):
                 products.sort(key=lambda x: x.get('created_at') or datetime.min, reverse=True)
                 return products[0]
             return None
+
+    def backfill_url_keys(self, batch_size: int = 400) -> int:
+        """url_key alanı olmayan/eskimiş ürünlere kanonik anahtar yaz (tek seferlik migration)"""
+        updated = 0
+        batch = self.db.batch()
+        pending = 0
+        for doc in self.db.collection('products').stream():
+            data = doc.to_dict()
+            key = product_key(data.get('url') or '')
+            if data.get('url_key') == key:
+                continue
+            batch.update(doc.reference, {'url_key': key})
+            pending += 1
+            updated += 1
+            if pending >= batch_size:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+        return updated
+    
+    def backfill_price_minor_units(self, batch_size: int = 400) -> int:
+        """Sayısal fiyat alanları (kuruş) eksik ürün ve takiplere display string'den yaz (tek seferlik migration)"""
+        updated = 0
+        batch = self.db.batch()
+        pending = 0
+        sources = (
+            ('products', {'price_minor': 'price'}),
+            ('price_tracking', {'current_price_minor': 'current_price', 'alert_price_minor': 'alert_price'}),
+        )
+        for collection, fields in sources:
+            for doc in self.db.collection(collection).stream():
+                data = doc.to_dict()
+                updates = {}
+                for target, source in fields.items():
+                    if data.get(target) is not None:
+                        continue
+                    parsed = parse_price(data.get(source))
+                    if parsed is None:
+                        continue
+                    updates[target] = parsed.minor
+                    if collection == 'products':
+                        updates['currency'] = parsed.currency
+                if not updates:
+                    continue
+                batch.update(doc.reference, updates)
+                pending += 1
+                updated += 1
+                if pending >= batch_size:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending = 0
+        if pending:
+            batch.commit()
+        return updated
     
     def get_products_by_user_id(self, user_id: str) -> List[Dict[str, Any]]:
         # Use order_by now that index is created (faster than memory sort)
@@ -270,13 +362,17 @@ class FirestoreRepository(BaseRepository):
                       discount_info: Optional[str] = None) -> str:
         try:
             product_id = str(uuid.uuid4())
+            parsed = parse_price(price)
             product_data = {
                 'user_id': user_id,
                 'name': name,
                 'price': price,
+                'price_minor': parsed.minor if parsed else None,
+                'currency': parsed.currency if parsed else None,
                 'image': image,
                 'brand': brand,
                 'url': url,
+                'url_key': product_key(url),
                 'old_price': old_price,
                 'current_price': current_price,
                 'discount_percentage': discount_percentage,
@@ -295,6 +391,7 @@ class FirestoreRepository(BaseRepository):
             raise
     
     def update_product(self, product_id: str, user_id: str, **kwargs) -> bool:
+        identity_map.forget('products', product_id)
         try:
             # Verify ownership
             product = self.get_product_by_id(product_id)
@@ -308,6 +405,12 @@ class FirestoreRepository(BaseRepository):
                         updates[key] = value
                     else:
                         updates[key] = value
+            if updates.get('url'):
+                updates['url_key'] = product_key(updates['url'])
+            if 'price' in updates:
+                parsed = parse_price(updates['price'])
+                updates['price_minor'] = parsed.minor if parsed else None
+                updates['currency'] = parsed.currency if parsed else None
             
             if updates:
                 self.db.collection('products').document(product_id).update(updates)
@@ -317,6 +420,7 @@ class FirestoreRepository(BaseRepository):
             return False
     
     def delete_product(self, product_id: str, user_id: str) -> bool:
+        identity_map.forget('products', product_id)
         try:
             # Verify ownership
             product = self.get_product_by_id(product_id)
@@ -359,6 +463,13 @@ class FirestoreRepository(BaseRepository):
             except Exception as e:
                 print(f"[WARNING] Error deleting price_history: {e}")
             
+            try:
+                for ref in self.db.collection('price_series').where('product_id', '==', product_id).stream():
+                    batch.delete(ref.reference)
+                    delete_count += 1
+            except Exception as e:
+                print(f"[WARNING] Error deleting price_series: {e}")
+            
             # Favorites
             try:
                 favorite_refs = self.db.collection('favorites').where('product_id', '==', product_id).stream()
@@ -394,6 +505,9 @@ class FirestoreRepository(BaseRepository):
             return data
         return None
     
+    def get_collections_by_ids(self, collection_ids: List[str]) -> List[Dict[str, Any]]:
+        return self._get_all_by_ids('collections', collection_ids)
+    
     def get_collection_by_share_url(self, share_url: str) -> Optional[Dict[str, Any]]:
         docs = self.db.collection('collections').where('share_url', '==', share_url).limit(1).stream()
         for doc in docs:
@@ -440,20 +554,7 @@ class FirestoreRepository(BaseRepository):
             cp_refs = self.db.collection('collection_products').where('collection_id', '==', collection_id).stream()
             product_ids = [ref.to_dict()['product_id'] for ref in cp_refs]
             
-            if not product_ids:
-                return []
-            
-            # Get products (Firestore 'in' query limit is 10, so we need to batch)
-            products = []
-            for i in range(0, len(product_ids), 10):
-                batch_ids = product_ids[i:i+10]
-                docs = self.db.collection('products').where('__name__', 'in', batch_ids).stream()
-                for doc in docs:
-                    data = doc.to_dict()
-                    data['id'] = doc.id
-                    products.append(data)
-            
-            return products
+            return self.get_products_by_ids(product_ids)
         except Exception as e:
             print(f"[ERROR] Get products by collection id error: {e}")
             return []
@@ -492,6 +593,27 @@ class FirestoreRepository(BaseRepository):
             print(f"[ERROR] Add product to collection error: {e}")
             return False
     
+    def add_products_to_collection(self, collection_id: str, product_ids: List[str]) -> bool:
+        """Koleksiyonda olmayanları tek batch ile ekle (ürün başına sorgu yerine tek okuma)"""
+        try:
+            existing = {
+                doc.to_dict().get('product_id')
+                for doc in self.db.collection('collection_products').where('collection_id', '==', collection_id).stream()
+            }
+            new_ids = [product_id for product_id in dict.fromkeys(product_ids) if product_id not in existing]
+            for i in range(0, len(new_ids), 500):
+                batch = self.db.batch()
+                for product_id in new_ids[i:i + 500]:
+                    batch.set(self.db.collection('collection_products').document(str(uuid.uuid4())), {
+                        'collection_id': collection_id,
+                        'product_id': product_id
+                    })
+                batch.commit()
+            return True
+        except Exception as e:
+            print(f"[ERROR] Add products to collection error: {e}")
+            return False
+    
     def remove_product_from_collection(self, collection_id: str, product_id: str) -> bool:
         try:
             refs = self.db.collection('collection_products').where('collection_id', '==', collection_id).where('product_id', '==', product_id).stream()
@@ -503,6 +625,7 @@ class FirestoreRepository(BaseRepository):
             return False
     
     def delete_collection(self, collection_id: str, user_id: str) -> bool:
+        identity_map.forget('collections', collection_id)
         try:
             collection = self.get_collection_by_id(collection_id)
             if not collection or collection.get('user_id') != user_id:
@@ -522,6 +645,7 @@ class FirestoreRepository(BaseRepository):
 
     def update_collection(self, collection_id: str, user_id: str, **kwargs) -> bool:
         """Update collection fields (name, description, type, is_public) for a user."""
+        identity_map.forget('collections', collection_id)
         try:
             collection = self.get_collection_by_id(collection_id)
             if not collection or collection.get('user_id') != user_id:
@@ -604,20 +728,7 @@ class FirestoreRepository(BaseRepository):
         favorite_refs = self.db.collection('favorites').where('user_id', '==', user_id).stream()
         product_ids = [ref.to_dict()['product_id'] for ref in favorite_refs]
         
-        if not product_ids:
-            return []
-        
-        # Get products (Firestore 'in' query limit is 10, so we need to batch)
-        products = []
-        for i in range(0, len(product_ids), 10):
-            batch_ids = product_ids[i:i+10]
-            docs = self.db.collection('products').where('__name__', 'in', batch_ids).stream()
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                products.append(data)
-        
-        return products
+        return self.get_products_by_ids(product_ids)
     
     def is_favorite(self, user_id: str, product_id: str) -> bool:
         refs = self.db.collection('favorites').where('user_id', '==', user_id).where('product_id', '==', product_id).limit(1).stream()
@@ -637,8 +748,10 @@ class FirestoreRepository(BaseRepository):
                 'product_id': product_id,
                 'user_id': user_id,
                 'current_price': current_price,
+                'current_price_minor': to_minor_units(current_price),
                 'original_price': original_price or current_price,
                 'alert_price': alert_price,
+                'alert_price_minor': to_minor_units(alert_price),
                 'is_active': True,
                 'price_change': '0',
                 'created_at': self._datetime_to_timestamp(created_at),
@@ -696,16 +809,17 @@ class FirestoreRepository(BaseRepository):
             for doc in docs:
                 data = doc.to_dict()
                 data['id'] = doc.id
-                # Fetch product info
-                product_id = data.get('product_id')
-                if product_id:
-                    product = self.get_product_by_id(product_id)
-                    if product:
-                        data['product_name'] = product.get('name')
-                        data['product_brand'] = product.get('brand')
-                        data['product_image'] = product.get('image')
                 trackings.append(data)
 
+            # Ürün bilgileri tek bir toplu okumayla
+            products = {p['id']: p for p in self.get_products_by_ids([t.get('product_id') for t in trackings])}
+            for data in trackings:
+                product = products.get(data.get('product_id'))
+                if product:
+                    data['product_name'] = product.get('name')
+                    data['product_brand'] = product.get('brand')
+                    data['product_image'] = product.get('image')
+
             # Sort in memory by created_at (newest first) if available
             def _created_at_key(item: Dict[str, Any]):
                 ts = item.get('created_at')
@@ -749,6 +863,7 @@ class FirestoreRepository(BaseRepository):
             updates = {}
             if new_price is not None:
                 updates['current_price'] = new_price
+                updates['current_price_minor'] = to_minor_units(new_price)
             if price_change is not None:
                 updates['price_change'] = price_change
             if is_active is not None:
@@ -772,19 +887,173 @@ class FirestoreRepository(BaseRepository):
             return False
     
     # Price history operations
+    def append_price_samples(self, samples: List[Dict[str, Any]], max_buckets: int = 400,
+                             dedupe: bool = False) -> int:
+        """
+        Örnekleri aylık bucket'lara ekle: bucket başına tek okuma + tek yazma (transaction).
+        dedupe=True: bucket'ta zaten olan zaman damgaları atlanır (taşıma tekrar çalışabilir).
+        """
+        grouped = list(group_samples(samples).items())
+        append = merge_samples if dedupe else append_to_bucket
+        collection = self.db.collection('price_series')
+        for start in range(0, len(grouped), max_buckets):
+            chunk = grouped[start:start + max_buckets]
+            refs = [collection.document(bucket_id(product_id, month)) for (product_id, month), _ in chunk]
+
+            @firestore.transactional
+            def _append(transaction):
+                snapshots = {snap.id: snap for snap in self.db.get_all(refs, transaction=transaction)}
+                for ref, ((product_id, month), items) in zip(refs, chunk):
+                    snap = snapshots.get(ref.id)
+                    current = snap.to_dict() if snap is not None and snap.exists else None
+                    transaction.set(ref, append(current, product_id, month, items))
+
+            _append(self.db.transaction())
+        return sum(len(items) for _, items in grouped)
+
+    def get_price_series(self, product_id: str, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None, limit: Optional[int] = None) -> Dict[str, List[int]]:
+        start_ts = to_epoch(start) if start else None
+        end_ts = to_epoch(end) if end else None
+        collection = self.db.collection('price_series')
+
+        buckets = []
+        if start_ts is not None:
+            # Aralık biliniyorsa bucket ID'leri de biliniyor: tek get_all
+            months = months_between(start_ts, end_ts or int(datetime.now().timestamp()))
+            refs = [collection.document(bucket_id(product_id, month)) for month in months]
+            buckets = [snap.to_dict() for snap in self.db.get_all(refs) if snap.exists]
+        else:
+            query = collection.where('product_id', '==', product_id)
+            if end_ts is not None:
+                query = query.where('month', '<=', month_of(end_ts))
+            count = 0
+            for doc in query.order_by('month', direction=firestore.Query.DESCENDING).limit(24).stream():
+                bucket = doc.to_dict()
+                buckets.append(bucket)
+                count += bucket.get('n', 0)
+                if limit and count >= limit:
+                    break
+
+        # Bucket'lara henüz taşınmamış eski kayıtlar (scripts/migrate_price_history.py çalışana kadar)
+        docs = self.db.collection('price_history').where('product_id', '==', product_id).stream()
+        legacy = group_samples(dict(doc.to_dict(), product_id=product_id) for doc in docs)
+        return merge_buckets(overlay_samples(buckets, legacy), start_ts, end_ts, limit)
+
     def add_price_history(self, product_id: str, price: str, recorded_at: datetime) -> str:
-        history_id = str(uuid.uuid4())
-        history_data = {
-            'product_id': product_id,
-            'price': price,
-            'recorded_at': self._datetime_to_timestamp(recorded_at)
-        }
-        self.db.collection('price_history').document(history_id).set(history_data)
-        return history_id
-    
+        self.append_price_samples([{'product_id': product_id, 'price': price, 'recorded_at': recorded_at}])
+        return bucket_id(product_id, month_of(to_epoch(recorded_at or datetime.now())))
+
     def get_price_history_by_product_id(self, product_id: str, limit: int = 60) -> List[Dict[str, Any]]:
-        docs = self.db.collection('price_history').where('product_id', '==', product_id).order_by('recorded_at', direction=firestore.Query.ASCENDING).limit(limit).stream()
-        return [{'price': doc.to_dict()['price'], 'recorded_at': doc.to_dict()['recorded_at']} for doc in docs]
+        """Geçmiş, ürünün gösterim formatında ('1.299,99 TL')"""
+        series = self.get_price_series(product_id, limit=limit)
+        if not series['prices']:
+            return []
+        product = self.get_product_by_id(product_id) or {}
+        parsed = parse_price(product.get('price'))
+        currency = product.get('currency') or (parsed.currency if parsed else 'TRY')
+        return [
+            {'price': format_price(price, currency), 'recorded_at': datetime.fromtimestamp(ts)}
+            for ts, price in zip(series['timestamps'], series['prices'])
+        ]
+
+    def migrate_legacy_price_history(self, batch_size: int = 400) -> int:
+        """
+        Eski price_history dokümanlarını aylık bucket'lara taşı ve sil.
+        Yazma ile silme arasında kesilirse tekrar çalıştırmak güvenlidir:
+        bucket'ta zaten olan zaman damgaları atlanır.
+        """
+        docs = list(self.db.collection('price_history').stream())
+        count = self.append_price_samples([doc.to_dict() for doc in docs], dedupe=True)
+        for start in range(0, len(docs), batch_size):
+            batch = self.db.batch()
+            for doc in docs[start:start + batch_size]:
+                batch.delete(doc.reference)
+            batch.commit()
+        return count
+    
+    def record_price_checks(self, tracking_updates: List[Dict[str, Any]],
+                            history_entries: List[Dict[str, Any]],
+                            notifications: List[Dict[str, Any]],
+                            batch_size: int = 400) -> bool:
+        """Fiyat taraması sonuçlarını WriteBatch'lerle yaz (batch başına en fazla 500 işlem)"""
+        try:
+            writes = []
+            for update in tracking_updates:
+                fields = {'last_checked': self._datetime_to_timestamp(update['last_checked'])}
+                if 'current_price' in update:
+                    fields['current_price'] = update['current_price']
+                    fields['current_price_minor'] = update.get('current_price_minor', to_minor_units(update['current_price']))
+                    fields['price_change'] = update.get('price_change', '0')
+                writes.append(('update', self.db.collection('price_tracking').document(update['id']), fields))
+
+            for notification in notifications:
+                writes.append(('set', self.db.collection('notifications').document(str(uuid.uuid4())), {
+                    'user_id': notification['user_id'],
+                    'product_id': notification.get('product_id'),
+                    'type': notification['notification_type'],
+                    'message': notification['message'],
+                    'payload': notification.get('payload'),
+                    'read_at': None,
+                    'created_at': self._datetime_to_timestamp(notification.get('created_at') or datetime.now())
+                }))
+
+            for start in range(0, len(writes), batch_size):
+                batch = self.db.batch()
+                for op, ref, data in writes[start:start + batch_size]:
+                    getattr(batch, op)(ref, data)
+                batch.commit()
+            if history_entries:
+                self.append_price_samples(history_entries)
+            return True
+        except Exception as e:
+            print(f"[ERROR] Record price checks error: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    # Cursor pagination
+    def _keyset_page(self, collection: str, limit: int, cursor: Optional[str],
+                     user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        (created_at DESC, __name__ DESC) sırasında start_after ile sayfa;
+        sayfa başına limit+1 doküman okunur (offset yok).
+        """
+        ref = self.db.collection(collection)
+        query = ref
+        if user_id is not None:
+            query = query.where('user_id', '==', user_id)
+        query = (query.order_by('created_at', direction=firestore.Query.DESCENDING)
+                      .order_by('__name__', direction=firestore.Query.DESCENDING))
+        position = decode_cursor(cursor)
+        if position:
+            created_at, item_id = position
+            query = query.start_after({
+                'created_at': datetime.fromisoformat(created_at) if created_at else None,
+                '__name__': ref.document(item_id),
+            })
+        
+        rows = []
+        for doc in query.limit(limit + 1).stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            rows.append(data)
+        return make_page(rows, limit)
+    
+    def get_users_page(self, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('users', limit, cursor)
+    
+    def get_products_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('products', limit, cursor, user_id=user_id)
+    
+    def get_collections_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('collections', limit, cursor, user_id=user_id)
+    
+    def get_notifications_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('notifications', limit, cursor, user_id=user_id)
+    
+    def get_import_issues_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('product_import_issues', limit, cursor, user_id=user_id)
     
     # Notification operations
     def create_notification(self, user_id: str, product_id: Optional[str], 
@@ -1097,14 +1366,14 @@ class FirestoreRepository(BaseRepository):
             for follow in follows:
                 data = follow.to_dict()
                 data['id'] = follow.id
-                # Fetch user info
-                follower_id = data.get('follower_id')
-                if follower_id:
-                    user = self.get_user_by_id(follower_id)
-                    if user:
-                        data['username'] = user.get('username')
-                        data['email'] = user.get('email')
                 followers.append(data)
+            # Kullanıcı bilgileri tek toplu okumayla
+            users = {user['id']: user for user in self.get_users_by_ids([f.get('follower_id') for f in followers])}
+            for data in followers:
+                user = users.get(data.get('follower_id'))
+                if user:
+                    data['username'] = user.get('username')
+                    data['email'] = user.get('email')
             return followers
         except Exception as e:
             print(f"[ERROR] Get followers error: {e}")
@@ -1118,14 +1387,14 @@ class FirestoreRepository(BaseRepository):
             for follow in follows:
                 data = follow.to_dict()
                 data['id'] = follow.id
-                # Fetch user info
-                following_id = data.get('following_id')
-                if following_id:
-                    user = self.get_user_by_id(following_id)
-                    if user:
-                        data['username'] = user.get('username')
-                        data['email'] = user.get('email')
                 following.append(data)
+            # Kullanıcı bilgileri tek toplu okumayla
+            users = {user['id']: user for user in self.get_users_by_ids([f.get('following_id') for f in following])}
+            for data in following:
+                user = users.get(data.get('following_id'))
+                if user:
+                    data['username'] = user.get('username')
+                    data['email'] = user.get('email')
             return following
         except Exception as e:
             print(f"[ERROR] Get following error: {e}")
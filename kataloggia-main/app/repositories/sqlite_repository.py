@@ -9,7 +9,15 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 from app.repositories.base_repository import BaseRepository
-from app.utils.db_path import get_db_connection
+from app.utils.db_path import db_connection
+from app.utils import identity_map
+from app.utils.pagination import decode_cursor, make_page
+from app.utils.price_series import (
+    append_to_bucket, bucket_id, group_samples, merge_buckets,
+    merge_samples, month_of, overlay_samples, to_epoch,
+)
+from app.utils.url_canonical import product_key
+from price_parser import format_price, parse_price, to_minor_units
 
 
 class SQLiteRepository(BaseRepository):
@@ -22,188 +30,173 @@ class SQLiteRepository(BaseRepository):
     
     # User operations
     def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
+    
+    def get_users_by_ids(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return self._get_rows_by_ids('users', user_ids)
     
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
     
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
     
     def get_user_by_profile_url(self, profile_url: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users WHERE profile_url = ?', (profile_url,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM users WHERE profile_url = ?', (profile_url,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
     
     def get_all_users(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all users with pagination"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users ORDER BY created_at DESC LIMIT ? OFFSET ?', (limit, offset))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        users = []
-        if rows and cursor.description:
-            columns = [desc[0] for desc in cursor.description]
-            for row in rows:
-                users.append(dict(zip(columns, row)))
-        return users
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM users ORDER BY created_at DESC LIMIT ? OFFSET ?', (limit, offset))
+            rows = cursor.fetchall()
+        
+            return [dict(row) for row in rows]
     
     def create_user(self, username: str, email: str, password_hash: str, 
                    profile_url: str, created_at: datetime, 
                    last_read_notifications_at: Optional[datetime] = None,
                    avatar_url: Optional[str] = None) -> str:
         user_id = str(uuid.uuid4())
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            cursor = conn.cursor()
         
-        try:
-            # Add new columns if they don't exist (for backward compatibility)
             try:
-                cursor.execute('ALTER TABLE users ADD COLUMN email_verified INTEGER DEFAULT 0')
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+                # Add new columns if they don't exist (for backward compatibility)
+                try:
+                    cursor.execute('ALTER TABLE users ADD COLUMN email_verified INTEGER DEFAULT 0')
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
             
-            try:
-                cursor.execute('ALTER TABLE users ADD COLUMN email_verification_token TEXT')
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+                try:
+                    cursor.execute('ALTER TABLE users ADD COLUMN email_verification_token TEXT')
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
             
-            try:
-                cursor.execute('ALTER TABLE users ADD COLUMN email_verification_token_expires_at TIMESTAMP')
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+                try:
+                    cursor.execute('ALTER TABLE users ADD COLUMN email_verification_token_expires_at TIMESTAMP')
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
             
-            try:
-                cursor.execute('ALTER TABLE users ADD COLUMN locked_until REAL')
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+                try:
+                    cursor.execute('ALTER TABLE users ADD COLUMN locked_until REAL')
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
             
-            conn.commit()
+                conn.commit()
             
-            # Insert user with new fields
-            cursor.execute('''
-                INSERT INTO users (id, username, email, password_hash, profile_url, created_at, 
-                                 last_read_notifications_at, avatar_url, email_verified,
-                                 email_verification_token, email_verification_token_expires_at, locked_until)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, username, email, password_hash, profile_url, created_at, 
-                  last_read_notifications_at, avatar_url, 1, None, None, None))
-            conn.commit()
-            return user_id
-        except sqlite3.IntegrityError:
-            conn.rollback()
-            raise Exception("Bu kullanıcı adı veya email zaten kullanılıyor")
-        finally:
-            conn.close()
+                # Insert user with new fields
+                cursor.execute('''
+                    INSERT INTO users (id, username, email, password_hash, profile_url, created_at, 
+                                     last_read_notifications_at, avatar_url, email_verified,
+                                     email_verification_token, email_verification_token_expires_at, locked_until)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, username, email, password_hash, profile_url, created_at, 
+                      last_read_notifications_at, avatar_url, 1, None, None, None))
+                conn.commit()
+                return user_id
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                raise Exception("Bu kullanıcı adı veya email zaten kullanılıyor")
     
     def update_user(self, user_id: str, **kwargs) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        allowed_fields = ['username', 'email', 'password_hash', 'profile_url', 
-                         'last_read_notifications_at', 'avatar_url', 'email_verified',
-                         'email_verification_token', 'email_verification_token_expires_at', 'locked_until']
-        updates = []
-        values = []
-        
-        for field, value in kwargs.items():
-            if field in allowed_fields and value is not None:
-                updates.append(f"{field} = ?")
-                values.append(value)
-        
-        if not updates:
-            conn.close()
-            return False
+        identity_map.forget('users', user_id)
+        with db_connection() as conn:
+            cursor = conn.cursor()
         
-        values.append(user_id)
-        query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
+            allowed_fields = ['username', 'email', 'password_hash', 'profile_url', 
+                             'last_read_notifications_at', 'avatar_url', 'email_verified',
+                             'email_verification_token', 'email_verification_token_expires_at', 'locked_until']
+            updates = []
+            values = []
         
-        try:
-            cursor.execute(query, values)
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] User update error: {e}")
-            return False
-        finally:
-            conn.close()
+            for field, value in kwargs.items():
+                if field in allowed_fields and value is not None:
+                    updates.append(f"{field} = ?")
+                    values.append(value)
+        
+            if not updates:
+                return False
+        
+            values.append(user_id)
+            query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
+        
+            try:
+                cursor.execute(query, values)
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] User update error: {e}")
+                return False
     
     # Product operations
     def get_product_by_id(self, product_id: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
+            row = cursor.fetchone()
+        
+            return dict(row) if row else None
+    
+    def _get_rows_by_ids(self, table: str, ids: List[str], chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Tek IN sorgusuyla (SQLite parametre limiti için chunk'lı) oku, giriş sırasını koru"""
+        unique_ids = [item_id for item_id in dict.fromkeys(ids) if item_id]
+        if not unique_ids:
+            return []
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            found = {}
+            for i in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[i:i + chunk_size]
+                placeholders = ', '.join('?' for _ in chunk)
+                cursor.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', chunk)
+                for row in cursor.fetchall():
+                    found[row['id']] = dict(row)
+            return [found[item_id] for item_id in ids if item_id in found]
+    
+    def get_products_by_ids(self, product_ids: List[str], chunk_size: int = 500) -> List[Dict[str, Any]]:
+        return self._get_rows_by_ids('products', product_ids, chunk_size)
     
     def get_product_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """Get product by URL (returns the most recent one if multiple exist)"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # Normalize URL - remove trailing slashes for better matching
-        normalized_url = url.strip().rstrip('/')
-        # Try exact match first, then try original URL
-        cursor.execute('SELECT * FROM products WHERE url = ? OR url = ? ORDER BY created_at DESC LIMIT 1', 
-                      (normalized_url, url))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            # Tracking parametresi / www / sondaki / farkları aynı url_key'e düşer
+            cursor.execute('SELECT * FROM products WHERE url_key = ? ORDER BY created_at DESC LIMIT 1',
+                          (product_key(url),))
+            row = cursor.fetchone()
+        
+            return dict(row) if row else None
     
     def get_products_by_user_id(self, user_id: str) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM products WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM products WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
+            rows = cursor.fetchall()
         
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+            return [dict(row) for row in rows]
     
     def create_product(self, user_id: str, name: str, price: str, image: Optional[str],
                       brand: str, url: str, created_at: datetime,
@@ -214,287 +207,284 @@ class SQLiteRepository(BaseRepository):
                       discount_info: Optional[str] = None) -> str:
         product_id = str(uuid.uuid4())
         images_json = json.dumps(images) if images else (json.dumps([image]) if image else None)
+        parsed = parse_price(price)
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO products (id, user_id, name, price, image, brand, url, old_price, current_price, discount_percentage, images, discount_info, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (product_id, user_id, name, price, image, brand, url, old_price, current_price, discount_percentage, images_json, discount_info, created_at))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO products (id, user_id, name, price, price_minor, currency, image, brand, url, url_key, old_price, current_price, discount_percentage, images, discount_info, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (product_id, user_id, name, price, parsed.minor if parsed else None, parsed.currency if parsed else None,
+                  image, brand, url, product_key(url), old_price, current_price, discount_percentage, images_json, discount_info, created_at))
+            conn.commit()
         
-        return product_id
+            return product_id
     
     def update_product(self, product_id: str, user_id: str, **kwargs) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        allowed_fields = ['name', 'price', 'image', 'brand', 'url', 'old_price', 
-                         'current_price', 'discount_percentage', 'images', 'discount_info']
-        updates = []
-        values = []
-        
-        for field, value in kwargs.items():
-            if field in allowed_fields and value is not None:
-                if field == 'images' and isinstance(value, list):
-                    value = json.dumps(value)
-                updates.append(f"{field} = ?")
-                values.append(value)
-        
-        if not updates:
-            conn.close()
-            return False
+        identity_map.forget('products', product_id)
+        with db_connection() as conn:
+            cursor = conn.cursor()
         
-        values.extend([product_id, user_id])
-        query = f"UPDATE products SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
+            allowed_fields = ['name', 'price', 'image', 'brand', 'url', 'old_price', 
+                             'current_price', 'discount_percentage', 'images', 'discount_info']
+            updates = []
+            values = []
         
-        try:
-            cursor.execute(query, values)
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Product update error: {e}")
-            return False
-        finally:
-            conn.close()
+            for field, value in kwargs.items():
+                if field in allowed_fields and value is not None:
+                    if field == 'images' and isinstance(value, list):
+                        value = json.dumps(value)
+                    updates.append(f"{field} = ?")
+                    values.append(value)
+                    if field == 'url':
+                        updates.append("url_key = ?")
+                        values.append(product_key(value))
+                    elif field == 'price':
+                        parsed = parse_price(value)
+                        updates.extend(["price_minor = ?", "currency = ?"])
+                        values.extend([parsed.minor if parsed else None, parsed.currency if parsed else None])
+        
+            if not updates:
+                return False
+        
+            values.extend([product_id, user_id])
+            query = f"UPDATE products SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
+        
+            try:
+                cursor.execute(query, values)
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Product update error: {e}")
+                return False
     
     def delete_product(self, product_id: str, user_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('SELECT id FROM products WHERE id = ? AND user_id = ?', (product_id, user_id))
-            if not cursor.fetchone():
-                return False
+        identity_map.forget('products', product_id)
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT id FROM products WHERE id = ? AND user_id = ?', (product_id, user_id))
+                if not cursor.fetchone():
+                    return False
             
-            cursor.execute('DELETE FROM collection_products WHERE product_id = ?', (product_id,))
-            cursor.execute('DELETE FROM price_tracking WHERE product_id = ?', (product_id,))
-            cursor.execute('DELETE FROM price_history WHERE product_id = ?', (product_id,))
-            cursor.execute('DELETE FROM favorites WHERE product_id = ?', (product_id,))
-            cursor.execute('DELETE FROM products WHERE id = ? AND user_id = ?', (product_id, user_id))
+                cursor.execute('DELETE FROM collection_products WHERE product_id = ?', (product_id,))
+                cursor.execute('DELETE FROM price_tracking WHERE product_id = ?', (product_id,))
+                cursor.execute('DELETE FROM price_history WHERE product_id = ?', (product_id,))
+                cursor.execute('DELETE FROM price_series WHERE product_id = ?', (product_id,))
+                cursor.execute('DELETE FROM favorites WHERE product_id = ?', (product_id,))
+                cursor.execute('DELETE FROM products WHERE id = ? AND user_id = ?', (product_id, user_id))
             
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Product delete error: {e}")
-            return False
-        finally:
-            conn.close()
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Product delete error: {e}")
+                return False
     
     # Collection operations
     def get_collection_by_id(self, collection_id: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM collections WHERE id = ?', (collection_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM collections WHERE id = ?', (collection_id,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
+    
+    def get_collections_by_ids(self, collection_ids: List[str]) -> List[Dict[str, Any]]:
+        return self._get_rows_by_ids('collections', collection_ids)
     
     def get_collection_by_share_url(self, share_url: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM collections WHERE share_url = ?', (share_url,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM collections WHERE share_url = ?', (share_url,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
     
     def get_collections_by_user_id(self, user_id: str) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM collections WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM collections WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
+            rows = cursor.fetchall()
         
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+            return [dict(row) for row in rows]
     
     def create_collection(self, user_id: str, name: str, description: Optional[str],
                          collection_type: str, is_public: bool, share_url: str,
                          created_at: datetime, cover_image: Optional[str] = None) -> str:
         collection_id = str(uuid.uuid4())
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO collections (id, user_id, name, description, type, is_public, share_url, created_at, cover_image)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (collection_id, user_id, name, description, collection_type, is_public, share_url, created_at, cover_image))
-        conn.commit()
-        conn.close()
-        return collection_id
-    
-    def add_product_to_collection(self, collection_id: str, product_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                INSERT OR IGNORE INTO collection_products (collection_id, product_id)
-                VALUES (?, ?)
-            ''', (collection_id, product_id))
+                INSERT INTO collections (id, user_id, name, description, type, is_public, share_url, created_at, cover_image)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (collection_id, user_id, name, description, collection_type, is_public, share_url, created_at, cover_image))
             conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Add product to collection error: {e}")
-            return False
-        finally:
-            conn.close()
+            return collection_id
+    
+    def add_product_to_collection(self, collection_id: str, product_id: str) -> bool:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO collection_products (collection_id, product_id)
+                    VALUES (?, ?)
+                ''', (collection_id, product_id))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Add product to collection error: {e}")
+                return False
+    
+    def add_products_to_collection(self, collection_id: str, product_ids: List[str]) -> bool:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(
+                    'INSERT OR IGNORE INTO collection_products (collection_id, product_id) VALUES (?, ?)',
+                    [(collection_id, product_id) for product_id in dict.fromkeys(product_ids)]
+                )
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Add products to collection error: {e}")
+                return False
     
     def remove_product_from_collection(self, collection_id: str, product_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('DELETE FROM collection_products WHERE collection_id = ? AND product_id = ?', 
-                          (collection_id, product_id))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Remove product from collection error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('DELETE FROM collection_products WHERE collection_id = ? AND product_id = ?', 
+                              (collection_id, product_id))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Remove product from collection error: {e}")
+                return False
     
     def delete_collection(self, collection_id: str, user_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('DELETE FROM collection_products WHERE collection_id = ?', (collection_id,))
-            cursor.execute('DELETE FROM collections WHERE id = ? AND user_id = ?', (collection_id, user_id))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Collection delete error: {e}")
-            return False
-        finally:
-            conn.close()
+        identity_map.forget('collections', collection_id)
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('DELETE FROM collection_products WHERE collection_id = ?', (collection_id,))
+                cursor.execute('DELETE FROM collections WHERE id = ? AND user_id = ?', (collection_id, user_id))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Collection delete error: {e}")
+                return False
 
     def update_collection(self, collection_id: str, user_id: str, **kwargs) -> bool:
         """Update collection fields (name, description, type, is_public) for a user."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            # Check if collection is copied (cannot be edited)
-            cursor.execute('SELECT description FROM collections WHERE id = ?', (collection_id,))
-            result = cursor.fetchone()
-            if result and result[0] and "[KOPYALANMIŞ]" in result[0]:
-                print(f"[WARNING] Attempted to edit copied collection: {collection_id}")
-                conn.close()
-                return False
+        identity_map.forget('collections', collection_id)
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Check if collection is copied (cannot be edited)
+                cursor.execute('SELECT description FROM collections WHERE id = ?', (collection_id,))
+                result = cursor.fetchone()
+                if result and result[0] and "[KOPYALANMIŞ]" in result[0]:
+                    print(f"[WARNING] Attempted to edit copied collection: {collection_id}")
+                    return False
             
-            allowed_fields = ['name', 'description', 'type', 'is_public']
-            updates = []
-            values = []
+                allowed_fields = ['name', 'description', 'type', 'is_public']
+                updates = []
+                values = []
 
-            for field, value in kwargs.items():
-                if field in allowed_fields and value is not None:
-                    # Prevent removing [KOPYALANMIŞ] marker from description
-                    if field == 'description' and result and result[0] and "[KOPYALANMIŞ]" in result[0]:
-                        # Keep the marker even if user tries to remove it
-                        if "[KOPYALANMIŞ]" not in str(value):
-                            # Extract original marker and preserve it
-                            original_desc = result[0]
-                            marker_part = original_desc.split("] ", 1)[0] + "] "
-                            value = marker_part + str(value)
-                    updates.append(f"{field} = ?")
-                    values.append(value)
+                for field, value in kwargs.items():
+                    if field in allowed_fields and value is not None:
+                        # Prevent removing [KOPYALANMIŞ] marker from description
+                        if field == 'description' and result and result[0] and "[KOPYALANMIŞ]" in result[0]:
+                            # Keep the marker even if user tries to remove it
+                            if "[KOPYALANMIŞ]" not in str(value):
+                                # Extract original marker and preserve it
+                                original_desc = result[0]
+                                marker_part = original_desc.split("] ", 1)[0] + "] "
+                                value = marker_part + str(value)
+                        updates.append(f"{field} = ?")
+                        values.append(value)
 
-            if not updates:
-                return False
+                if not updates:
+                    return False
 
-            values.extend([collection_id, user_id])
-            query = f"UPDATE collections SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
-            cursor.execute(query, values)
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Collection update error: {e}")
-            return False
-        finally:
-            conn.close()
+                values.extend([collection_id, user_id])
+                query = f"UPDATE collections SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
+                cursor.execute(query, values)
+                conn.commit()
+                return cursor.rowcount > 0
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Collection update error: {e}")
+                return False
     
     def get_products_by_collection_id(self, collection_id: str) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT p.* FROM products p
-            INNER JOIN collection_products cp ON p.id = cp.product_id
-            WHERE cp.collection_id = ?
-            ORDER BY cp.added_at DESC
-        ''', (collection_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.* FROM products p
+                INNER JOIN collection_products cp ON p.id = cp.product_id
+                WHERE cp.collection_id = ?
+                ORDER BY cp.added_at DESC
+            ''', (collection_id,))
+            rows = cursor.fetchall()
+        
+            return [dict(row) for row in rows]
     
     # Favorite operations
     def add_favorite(self, user_id: str, product_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO favorites (user_id, product_id)
-                VALUES (?, ?)
-            ''', (user_id, product_id))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Add favorite error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO favorites (user_id, product_id)
+                    VALUES (?, ?)
+                ''', (user_id, product_id))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Add favorite error: {e}")
+                return False
     
     def remove_favorite(self, user_id: str, product_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('DELETE FROM favorites WHERE user_id = ? AND product_id = ?', 
-                          (user_id, product_id))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Remove favorite error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('DELETE FROM favorites WHERE user_id = ? AND product_id = ?', 
+                              (user_id, product_id))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Remove favorite error: {e}")
+                return False
     
     def get_favorites_by_user_id(self, user_id: str) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT p.* FROM products p
-            INNER JOIN favorites f ON p.id = f.product_id
-            WHERE f.user_id = ?
-            ORDER BY p.created_at DESC
-        ''', (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.* FROM products p
+                INNER JOIN favorites f ON p.id = f.product_id
+                WHERE f.user_id = ?
+                ORDER BY p.created_at DESC
+            ''', (user_id,))
+            rows = cursor.fetchall()
+        
+            return [dict(row) for row in rows]
     
     def is_favorite(self, user_id: str, product_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT 1 FROM favorites WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
-        result = cursor.fetchone()
-        conn.close()
-        return result is not None
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1 FROM favorites WHERE user_id = ? AND product_id = ?', 
+                          (user_id, product_id))
+            result = cursor.fetchone()
+            return result is not None
     
     # Price tracking operations
     def create_price_tracking(self, user_id: str, product_id: str, current_price: str,
@@ -505,172 +495,323 @@ class SQLiteRepository(BaseRepository):
         if created_at is None:
             created_at = datetime.now()
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO price_tracking (id, product_id, user_id, current_price, original_price, alert_price, created_at, is_active)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (tracking_id, product_id, user_id, current_price, original_price, alert_price, created_at, True))
-        conn.commit()
-        conn.close()
-        return tracking_id
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO price_tracking (id, product_id, user_id, current_price, current_price_minor, original_price, alert_price, alert_price_minor, created_at, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (tracking_id, product_id, user_id, current_price, to_minor_units(current_price), original_price,
+                  alert_price, to_minor_units(alert_price), created_at, True))
+            conn.commit()
+            return tracking_id
     
     def get_price_tracking_by_id(self, tracking_id: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM price_tracking WHERE id = ?', (tracking_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM price_tracking WHERE id = ?', (tracking_id,))
+            row = cursor.fetchone()
         
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+            return dict(row) if row else None
     
     def get_price_tracking_by_product_and_user(self, product_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM price_tracking 
-            WHERE product_id = ? AND user_id = ? AND is_active = 1
-            LIMIT 1
-        ''', (product_id, user_id))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            return dict(zip(columns, row)) if columns else None
-        return None
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM price_tracking 
+                WHERE product_id = ? AND user_id = ? AND is_active = 1
+                LIMIT 1
+            ''', (product_id, user_id))
+            row = cursor.fetchone()
+        
+            return dict(row) if row else None
     
     def get_price_trackings_by_user_id(self, user_id: str) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT pt.*, p.name, p.brand, p.image
-            FROM price_tracking pt
-            LEFT JOIN products p ON pt.product_id = p.id
-            WHERE pt.user_id = ? AND pt.is_active = 1
-            ORDER BY pt.created_at DESC
-        ''', (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT pt.*, p.name, p.brand, p.image
+                FROM price_tracking pt
+                LEFT JOIN products p ON pt.product_id = p.id
+                WHERE pt.user_id = ? AND pt.is_active = 1
+                ORDER BY pt.created_at DESC
+            ''', (user_id,))
+            rows = cursor.fetchall()
+        
+            return [dict(row) for row in rows]
     
     def get_all_active_price_trackings(self) -> List[Dict[str, Any]]:
         """Return all active price tracking records."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id,
-                   product_id,
-                   user_id,
-                   current_price,
-                   original_price,
-                   price_change,
-                   is_active,
-                   alert_price,
-                   created_at,
-                   last_checked
-            FROM price_tracking
-            WHERE is_active = 1
-        ''')
-        rows = cursor.fetchall()
-        conn.close()
-        
-        results: List[Dict[str, Any]] = []
-        for row in rows:
-            results.append({
-                'id': row[0],
-                'product_id': row[1],
-                'user_id': row[2],
-                'current_price': row[3],
-                'original_price': row[4],
-                'price_change': row[5],
-                'is_active': bool(row[6]),
-                'alert_price': row[7],
-                'created_at': row[8],
-                'last_checked': row[9],
-            })
-        return results
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id,
+                       product_id,
+                       user_id,
+                       current_price,
+                       original_price,
+                       price_change,
+                       is_active,
+                       alert_price,
+                       created_at,
+                       last_checked,
+                       current_price_minor,
+                       alert_price_minor
+                FROM price_tracking
+                WHERE is_active = 1
+            ''')
+            rows = cursor.fetchall()
+        
+            results: List[Dict[str, Any]] = []
+            for row in rows:
+                results.append({
+                    'id': row[0],
+                    'product_id': row[1],
+                    'user_id': row[2],
+                    'current_price': row[3],
+                    'original_price': row[4],
+                    'price_change': row[5],
+                    'is_active': bool(row[6]),
+                    'alert_price': row[7],
+                    'created_at': row[8],
+                    'last_checked': row[9],
+                    'current_price_minor': row[10],
+                    'alert_price_minor': row[11],
+                })
+            return results
     
     def update_price_tracking(self, tracking_id: str, new_price: Optional[str] = None, price_change: Optional[str] = None, is_active: Optional[bool] = None) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            updates = []
-            values = []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                updates = []
+                values = []
             
-            if new_price is not None:
-                updates.append('current_price = ?')
-                values.append(new_price)
+                if new_price is not None:
+                    updates.append('current_price = ?')
+                    values.append(new_price)
+                    updates.append('current_price_minor = ?')
+                    values.append(to_minor_units(new_price))
             
-            if price_change is not None:
-                updates.append('price_change = ?')
-                values.append(price_change)
+                if price_change is not None:
+                    updates.append('price_change = ?')
+                    values.append(price_change)
             
-            if is_active is not None:
-                updates.append('is_active = ?')
-                values.append(1 if is_active else 0)
+                if is_active is not None:
+                    updates.append('is_active = ?')
+                    values.append(1 if is_active else 0)
             
-            if not updates:
-                return False
+                if not updates:
+                    return False
             
-            values.append(tracking_id)
-            query = f"UPDATE price_tracking SET {', '.join(updates)} WHERE id = ?"
-            cursor.execute(query, values)
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Update price tracking error: {e}")
-            return False
-        finally:
-            conn.close()
+                values.append(tracking_id)
+                query = f"UPDATE price_tracking SET {', '.join(updates)} WHERE id = ?"
+                cursor.execute(query, values)
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Update price tracking error: {e}")
+                return False
     
     def remove_price_tracking(self, tracking_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('UPDATE price_tracking SET is_active = 0 WHERE id = ?', (tracking_id,))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Remove price tracking error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('UPDATE price_tracking SET is_active = 0 WHERE id = ?', (tracking_id,))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Remove price tracking error: {e}")
+                return False
     
-    # Price history operations
+    # Price history operations (aylık delta kodlu bucket'lar, bkz. app/utils/price_series.py)
+    def _append_price_samples(self, cursor, samples: List[Dict[str, Any]], chunk_size: int = 400,
+                              dedupe: bool = False) -> int:
+        grouped = group_samples(samples)
+        append = merge_samples if dedupe else append_to_bucket
+        keys = list(grouped)
+        existing = {}
+        # Mevcut bucket'lar chunk başına tek sorguyla, yazımlar tek executemany ile
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            pairs = ' OR '.join('(product_id = ? AND month = ?)' for _ in chunk)
+            cursor.execute(f'SELECT product_id, month, data FROM price_series WHERE {pairs}',
+                           [value for key in chunk for value in key])
+            for row in cursor.fetchall():
+                existing[(row['product_id'], row['month'])] = json.loads(row['data'])
+        cursor.executemany(
+            'INSERT OR REPLACE INTO price_series (product_id, month, data) VALUES (?, ?, ?)',
+            [(product_id, month,
+              json.dumps(append(existing.get((product_id, month)), product_id, month, items)))
+             for (product_id, month), items in grouped.items()]
+        )
+        return sum(len(items) for items in grouped.values())
+
+    def append_price_samples(self, samples: List[Dict[str, Any]]) -> int:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                count = self._append_price_samples(cursor, samples)
+                conn.commit()
+                return count
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Append price samples error: {e}")
+                return 0
+
+    def get_price_series(self, product_id: str, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None, limit: Optional[int] = None) -> Dict[str, List[int]]:
+        start_ts = to_epoch(start) if start else None
+        end_ts = to_epoch(end) if end else None
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            query = 'SELECT data FROM price_series WHERE product_id = ?'
+            params: List[Any] = [product_id]
+            if start_ts is not None:
+                query += ' AND month >= ?'
+                params.append(month_of(start_ts))
+            if end_ts is not None:
+                query += ' AND month <= ?'
+                params.append(month_of(end_ts))
+            cursor.execute(query + ' ORDER BY month DESC', params)
+
+            buckets = []
+            count = 0
+            for (data,) in cursor:
+                bucket = json.loads(data)
+                buckets.append(bucket)
+                count += bucket.get('n', 0)
+                if limit and start_ts is None and count >= limit:
+                    break
+
+            # Bucket'lara henüz taşınmamış eski kayıtlar (taşıma çalışana kadar her zaman birleştirilir)
+            cursor.execute(
+                'SELECT price, recorded_at FROM price_history WHERE product_id = ? ORDER BY datetime(recorded_at) ASC',
+                (product_id,)
+            )
+            legacy = group_samples({'product_id': product_id, 'price': price, 'recorded_at': recorded_at}
+                                   for price, recorded_at in cursor.fetchall())
+            return merge_buckets(overlay_samples(buckets, legacy), start_ts, end_ts, limit)
+
     def add_price_history(self, product_id: str, price: str, recorded_at: datetime) -> str:
-        history_id = str(uuid.uuid4())
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO price_history (id, product_id, price, recorded_at)
-            VALUES (?, ?, ?, ?)
-        ''', (history_id, product_id, price, recorded_at))
-        conn.commit()
-        conn.close()
-        return history_id
-    
+        self.append_price_samples([{'product_id': product_id, 'price': price, 'recorded_at': recorded_at}])
+        return bucket_id(product_id, month_of(to_epoch(recorded_at or datetime.now())))
+
     def get_price_history_by_product_id(self, product_id: str, limit: int = 60) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT price, recorded_at
-            FROM price_history
-            WHERE product_id = ?
-            ORDER BY datetime(recorded_at) ASC
-            LIMIT ?
-        ''', (product_id, limit))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [{'price': row[0], 'recorded_at': row[1]} for row in rows]
+        """Geçmiş, ürünün gösterim formatında ('1.299,99 TL')"""
+        series = self.get_price_series(product_id, limit=limit)
+        if not series['prices']:
+            return []
+        with db_connection() as conn:
+            row = conn.execute('SELECT currency FROM products WHERE id = ?', (product_id,)).fetchone()
+        currency = (row[0] if row else None) or 'TRY'
+        return [
+            {'price': format_price(price, currency), 'recorded_at': datetime.fromtimestamp(ts)}
+            for ts, price in zip(series['timestamps'], series['prices'])
+        ]
+
+    def migrate_legacy_price_history(self) -> int:
+        """
+        Eski price_history satırlarını bucket'lara taşı ve sil (tek transaction).
+        Bucket'ta aynı zaman damgası varsa örnek tekrar eklenmez.
+        """
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT product_id, price, recorded_at FROM price_history')
+                rows = cursor.fetchall()
+                count = self._append_price_samples(cursor, [
+                    {'product_id': product_id, 'price': price, 'recorded_at': recorded_at}
+                    for product_id, price, recorded_at in rows
+                ], dedupe=True)
+                cursor.execute('DELETE FROM price_history')
+                conn.commit()
+                return count
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Migrate price history error: {e}")
+                return 0
+
+    def record_price_checks(self, tracking_updates: List[Dict[str, Any]],
+                            history_entries: List[Dict[str, Any]],
+                            notifications: List[Dict[str, Any]]) -> bool:
+        """Fiyat taraması sonuçlarını tek transaction'da yaz"""
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                changed = [u for u in tracking_updates if 'current_price' in u]
+                checked = [u for u in tracking_updates if 'current_price' not in u]
+                if changed:
+                    cursor.executemany(
+                        'UPDATE price_tracking SET current_price = ?, current_price_minor = ?, price_change = ?, last_checked = ? WHERE id = ?',
+                        [(u['current_price'], u.get('current_price_minor', to_minor_units(u['current_price'])),
+                          u.get('price_change', '0'), u['last_checked'], u['id']) for u in changed]
+                    )
+                if checked:
+                    cursor.executemany(
+                        'UPDATE price_tracking SET last_checked = ? WHERE id = ?',
+                        [(u['last_checked'], u['id']) for u in checked]
+                    )
+                if history_entries:
+                    self._append_price_samples(cursor, history_entries)
+                if notifications:
+                    cursor.executemany('''
+                        INSERT INTO notifications (id, user_id, product_id, type, message, payload, created_at, read_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', [
+                        (str(uuid.uuid4()), n['user_id'], n.get('product_id'), n['notification_type'],
+                         n['message'], n.get('payload'), n.get('created_at') or datetime.now(), None)
+                        for n in notifications
+                    ])
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Record price checks error: {e}")
+                return False
+
+    # Cursor pagination
+    def _keyset_page(self, table: str, limit: int, cursor: Optional[str],
+                     user_id: Optional[str] = None) -> Dict[str, Any]:
+        """(created_at DESC, id DESC) sırasında cursor'dan sonraki limit kayıt (limit+1 okunur)
+
+        created_at'i NULL olan eski kayıtlar '' sayılır: listenin sonunda, id sırasıyla
+        gelirler ve cursor karşılaştırmasından düşmezler.
+        """
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append('user_id = ?')
+            params.append(user_id)
+        position = decode_cursor(cursor)
+        if position:
+            created_at, item_id = position
+            created_at = created_at or ''
+            conditions.append("(COALESCE(created_at, '') < ? OR (COALESCE(created_at, '') = ? AND id < ?))")
+            params.extend([created_at, created_at, item_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        with db_connection() as conn:
+            cursor_ = conn.cursor()
+            cursor_.execute(f"SELECT * FROM {table} {where} ORDER BY COALESCE(created_at, '') DESC, id DESC LIMIT ?",
+                            params + [limit + 1])
+            rows = cursor_.fetchall()
+            return make_page([dict(row) for row in rows], limit)
+    
+    def get_users_page(self, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('users', limit, cursor)
+    
+    def get_products_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('products', limit, cursor, user_id=user_id)
+    
+    def get_collections_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('collections', limit, cursor, user_id=user_id)
+    
+    def get_notifications_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('notifications', limit, cursor, user_id=user_id)
+    
+    def get_import_issues_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self._keyset_page('product_import_issues', limit, cursor, user_id=user_id)
     
     # Notification operations
     def create_notification(self, user_id: str, product_id: Optional[str], 
@@ -681,75 +822,69 @@ class SQLiteRepository(BaseRepository):
         if created_at is None:
             created_at = datetime.now()
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO notifications (id, user_id, product_id, type, message, payload, created_at, read_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (notification_id, user_id, product_id, notification_type, message, payload, created_at, None))
-        conn.commit()
-        conn.close()
-        return notification_id
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO notifications (id, user_id, product_id, type, message, payload, created_at, read_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (notification_id, user_id, product_id, notification_type, message, payload, created_at, None))
+            conn.commit()
+            return notification_id
     
     def get_notifications_by_user_id(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, user_id, product_id, type, message, payload, created_at, read_at
-            FROM notifications
-            WHERE user_id = ?
-            ORDER BY datetime(created_at) DESC
-            LIMIT ?
-        ''', (user_id, limit))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            'id': row[0],
-            'user_id': row[1],
-            'product_id': row[2],
-            'type': row[3],
-            'message': row[4],
-            'payload': row[5],
-            'created_at': row[6],
-            'read_at': row[7]
-        } for row in rows]
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, user_id, product_id, type, message, payload, created_at, read_at
+                FROM notifications
+                WHERE user_id = ?
+                ORDER BY datetime(created_at) DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            rows = cursor.fetchall()
+        
+            return [{
+                'id': row[0],
+                'user_id': row[1],
+                'product_id': row[2],
+                'type': row[3],
+                'message': row[4],
+                'payload': row[5],
+                'created_at': row[6],
+                'read_at': row[7]
+            } for row in rows]
     
     def mark_notifications_read(self, user_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                UPDATE notifications
-                SET read_at = ?
-                WHERE user_id = ? AND read_at IS NULL
-            ''', (datetime.now(), user_id))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Mark notifications read error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    UPDATE notifications
+                    SET read_at = ?
+                    WHERE user_id = ? AND read_at IS NULL
+                ''', (datetime.now(), user_id))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Mark notifications read error: {e}")
+                return False
     
     def mark_notification_read_by_id(self, notification_id: str) -> bool:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                UPDATE notifications
-                SET read_at = ?
-                WHERE id = ? AND read_at IS NULL
-            ''', (datetime.now(), notification_id))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Mark notification read by ID error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    UPDATE notifications
+                    SET read_at = ?
+                    WHERE id = ? AND read_at IS NULL
+                ''', (datetime.now(), notification_id))
+                conn.commit()
+                return cursor.rowcount > 0
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Mark notification read by ID error: {e}")
+                return False
     
     # Product import issues operations
     def create_import_issue(self, user_id: str, url: str, status: str,
@@ -763,88 +898,82 @@ class SQLiteRepository(BaseRepository):
         if isinstance(raw_data, dict):
             raw_data = json.dumps(raw_data)
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO product_import_issues (id, user_id, url, status, reason, raw_data, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (issue_id, user_id, url, status, reason, raw_data, created_at))
-        conn.commit()
-        conn.close()
-        return issue_id
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO product_import_issues (id, user_id, url, status, reason, raw_data, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (issue_id, user_id, url, status, reason, raw_data, created_at))
+            conn.commit()
+            return issue_id
     
     def get_import_issues_by_user_id(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, user_id, url, status, reason, raw_data, created_at
-            FROM product_import_issues
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (user_id, limit))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            'id': row[0],
-            'user_id': row[1],
-            'url': row[2],
-            'status': row[3],
-            'reason': row[4],
-            'raw_data': row[5],
-            'created_at': row[6]
-        } for row in rows]
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, user_id, url, status, reason, raw_data, created_at
+                FROM product_import_issues
+                WHERE user_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            rows = cursor.fetchall()
+        
+            return [{
+                'id': row[0],
+                'user_id': row[1],
+                'url': row[2],
+                'status': row[3],
+                'reason': row[4],
+                'raw_data': row[5],
+                'created_at': row[6]
+            } for row in rows]
     
     def get_all_import_issues(self, limit: int = 200) -> List[Dict[str, Any]]:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT pii.id, pii.user_id, u.username, pii.url, pii.status, pii.reason, pii.created_at
-            FROM product_import_issues pii
-            LEFT JOIN users u ON pii.user_id = u.id
-            ORDER BY datetime(pii.created_at) DESC
-            LIMIT ?
-        ''', (limit,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            'id': row[0],
-            'user_id': row[1],
-            'username': row[2],
-            'url': row[3],
-            'status': row[4],
-            'reason': row[5],
-            'created_at': row[6]
-        } for row in rows]
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT pii.id, pii.user_id, u.username, pii.url, pii.status, pii.reason, pii.created_at
+                FROM product_import_issues pii
+                LEFT JOIN users u ON pii.user_id = u.id
+                ORDER BY datetime(pii.created_at) DESC
+                LIMIT ?
+            ''', (limit,))
+            rows = cursor.fetchall()
+        
+            return [{
+                'id': row[0],
+                'user_id': row[1],
+                'username': row[2],
+                'url': row[3],
+                'status': row[4],
+                'reason': row[5],
+                'created_at': row[6]
+            } for row in rows]
     
     def delete_import_issue(self, issue_id: str, user_id: str) -> bool:
         """Delete an import issue (only if it belongs to the user)"""
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
+            with db_connection() as conn:
+                cursor = conn.cursor()
             
-            # First check if the issue belongs to the user
-            cursor.execute('SELECT user_id FROM product_import_issues WHERE id = ?', (issue_id,))
-            row = cursor.fetchone()
+                # First check if the issue belongs to the user
+                cursor.execute('SELECT user_id FROM product_import_issues WHERE id = ?', (issue_id,))
+                row = cursor.fetchone()
             
-            if not row:
-                conn.close()
-                print(f"[ERROR] Import issue not found: {issue_id}")
-                return False
+                if not row:
+                    print(f"[ERROR] Import issue not found: {issue_id}")
+                    return False
             
-            if row[0] != user_id:
-                conn.close()
-                print(f"[ERROR] User {user_id} cannot delete issue {issue_id} (belongs to {row[0]})")
-                return False
+                if row[0] != user_id:
+                    print(f"[ERROR] User {user_id} cannot delete issue {issue_id} (belongs to {row[0]})")
+                    return False
             
-            # Delete the issue
-            cursor.execute('DELETE FROM product_import_issues WHERE id = ? AND user_id = ?', (issue_id, user_id))
-            conn.commit()
-            conn.close()
+                # Delete the issue
+                cursor.execute('DELETE FROM product_import_issues WHERE id = ? AND user_id = ?', (issue_id, user_id))
+                conn.commit()
             
-            return True
+                return True
         except Exception as e:
             print(f"[ERROR] Delete import issue error: {e}")
             return False
@@ -855,149 +984,132 @@ class SQLiteRepository(BaseRepository):
         if follower_id == following_id:
             return False  # Can't follow yourself
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            # Check if already following
-            cursor.execute('SELECT id FROM follows WHERE follower_id = ? AND following_id = ?', 
-                          (follower_id, following_id))
-            if cursor.fetchone():
-                conn.close()
-                return False  # Already following
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Check if already following
+                cursor.execute('SELECT id FROM follows WHERE follower_id = ? AND following_id = ?', 
+                              (follower_id, following_id))
+                if cursor.fetchone():
+                    return False  # Already following
             
-            follow_id = str(uuid.uuid4())
-            cursor.execute('''
-                INSERT INTO follows (id, follower_id, following_id, created_at)
-                VALUES (?, ?, ?, ?)
-            ''', (follow_id, follower_id, following_id, datetime.now()))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Follow user error: {e}")
-            return False
-        finally:
-            conn.close()
+                follow_id = str(uuid.uuid4())
+                cursor.execute('''
+                    INSERT INTO follows (id, follower_id, following_id, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (follow_id, follower_id, following_id, datetime.now()))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Follow user error: {e}")
+                return False
     
     def unfollow_user(self, follower_id: str, following_id: str) -> bool:
         """Unfollow a user"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('DELETE FROM follows WHERE follower_id = ? AND following_id = ?', 
-                          (follower_id, following_id))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Unfollow user error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('DELETE FROM follows WHERE follower_id = ? AND following_id = ?', 
+                              (follower_id, following_id))
+                conn.commit()
+                return cursor.rowcount > 0
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Unfollow user error: {e}")
+                return False
     
     def is_following(self, follower_id: str, following_id: str) -> bool:
         """Check if user is following another user"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM follows WHERE follower_id = ? AND following_id = ?', 
-                      (follower_id, following_id))
-        result = cursor.fetchone() is not None
-        conn.close()
-        return result
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM follows WHERE follower_id = ? AND following_id = ?', 
+                          (follower_id, following_id))
+            result = cursor.fetchone() is not None
+            return result
     
     def get_followers(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all followers of a user"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT f.id, f.follower_id, f.created_at, u.username, u.email
-            FROM follows f
-            JOIN users u ON f.follower_id = u.id
-            WHERE f.following_id = ?
-            ORDER BY f.created_at DESC
-        ''', (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT f.id, f.follower_id, f.created_at, u.username, u.email
+                FROM follows f
+                JOIN users u ON f.follower_id = u.id
+                WHERE f.following_id = ?
+                ORDER BY f.created_at DESC
+            ''', (user_id,))
+            rows = cursor.fetchall()
+        
+            return [dict(row) for row in rows]
     
     def get_following(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all users that a user is following"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT f.id, f.following_id, f.created_at, u.username, u.email
-            FROM follows f
-            JOIN users u ON f.following_id = u.id
-            WHERE f.follower_id = ?
-            ORDER BY f.created_at DESC
-        ''', (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        return [dict(zip(columns, row)) for row in rows] if columns else []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT f.id, f.following_id, f.created_at, u.username, u.email
+                FROM follows f
+                JOIN users u ON f.following_id = u.id
+                WHERE f.follower_id = ?
+                ORDER BY f.created_at DESC
+            ''', (user_id,))
+            rows = cursor.fetchall()
+        
+            return [dict(row) for row in rows]
     
     # Collection like operations
     def like_collection(self, user_id: str, collection_id: str) -> bool:
         """Like a collection"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            # Check if already liked
-            cursor.execute('SELECT id FROM likes WHERE user_id = ? AND collection_id = ?', 
-                          (user_id, collection_id))
-            if cursor.fetchone():
-                conn.close()
-                return False  # Already liked
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Check if already liked
+                cursor.execute('SELECT id FROM likes WHERE user_id = ? AND collection_id = ?', 
+                              (user_id, collection_id))
+                if cursor.fetchone():
+                    return False  # Already liked
             
-            like_id = str(uuid.uuid4())
-            cursor.execute('''
-                INSERT INTO likes (id, user_id, collection_id, created_at)
-                VALUES (?, ?, ?, ?)
-            ''', (like_id, user_id, collection_id, datetime.now()))
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Like collection error: {e}")
-            return False
-        finally:
-            conn.close()
+                like_id = str(uuid.uuid4())
+                cursor.execute('''
+                    INSERT INTO likes (id, user_id, collection_id, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (like_id, user_id, collection_id, datetime.now()))
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Like collection error: {e}")
+                return False
     
     def unlike_collection(self, user_id: str, collection_id: str) -> bool:
         """Unlike a collection"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('DELETE FROM likes WHERE user_id = ? AND collection_id = ?', 
-                          (user_id, collection_id))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Unlike collection error: {e}")
-            return False
-        finally:
-            conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('DELETE FROM likes WHERE user_id = ? AND collection_id = ?', 
+                              (user_id, collection_id))
+                conn.commit()
+                return cursor.rowcount > 0
+            except Exception as e:
+                conn.rollback()
+                print(f"[ERROR] Unlike collection error: {e}")
+                return False
     
     def is_collection_liked(self, user_id: str, collection_id: str) -> bool:
         """Check if collection is liked by user"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM likes WHERE user_id = ? AND collection_id = ?', 
-                      (user_id, collection_id))
-        result = cursor.fetchone() is not None
-        conn.close()
-        return result
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM likes WHERE user_id = ? AND collection_id = ?', 
+                          (user_id, collection_id))
+            result = cursor.fetchone() is not None
+            return result
     
     def get_collection_likes_count(self, collection_id: str) -> int:
         """Get total likes count for a collection"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM likes WHERE collection_id = ?', (collection_id,))
-        result = cursor.fetchone()[0]
-        conn.close()
-        return result
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM likes WHERE collection_id = ?', (collection_id,))
+            result = cursor.fetchone()[0]
+            return result
 
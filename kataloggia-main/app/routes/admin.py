@@ -3,7 +3,7 @@ Admin Routes
 """
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
 from flask_login import login_required, current_user
-from app.utils.db_path import get_db_connection
+from app.utils.db_path import get_read_connection
 
 bp = Blueprint('admin', __name__)
 
@@ -54,7 +54,8 @@ def users():
 def products():
     """Basit ürün listesi (admin görünümü) ve hafif filtreler."""
     # TODO: Gerçek admin kontrolü eklenebilir
-    conn = get_db_connection()
+    # Raporlama sorgusu: okuma kopyası (varsa) üzerinden
+    conn = get_read_connection()
     cursor = conn.cursor()
 
     # Basit filtreler: q (isimde arama), brand, user_id
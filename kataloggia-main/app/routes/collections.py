@@ -5,6 +5,8 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from app.models.collection import Collection
 from app.repositories import get_repository
+from app.services.discovery_index import discovery_index
+from app.services.search_index import search_index
 import uuid
 
 bp = Blueprint('collections_ui', __name__)
@@ -117,14 +119,7 @@ def edit(collection_id):
         if "[KOPYALANMIŞ]" in collection.description:
             is_copied = True
     
-    # Also check in repository data for additional safety
     from app.repositories import get_repository
-    repo = get_repository()
-    collection_data = repo.get_collection_by_id(collection_id)
-    if collection_data:
-        desc = collection_data.get('description', '')
-        if desc and "[KOPYALANMIŞ]" in desc:
-            is_copied = True
     
     if is_copied:
         flash('Bu koleksiyon başka bir kullanıcıdan kopyalanmıştır ve düzenlenemez', 'error')
@@ -146,21 +141,9 @@ def edit(collection_id):
             return redirect(url_for('collections_ui.edit', collection_id=collection_id))
 
         try:
-            # Final check: prevent editing copied collections
-            # Re-fetch collection to ensure we have latest data
-            current_collection = Collection.get_by_id(collection_id)
-            if current_collection and current_collection.description and "[KOPYALANMIŞ]" in current_collection.description:
-                flash('Bu koleksiyon başka bir kullanıcıdan kopyalanmıştır ve düzenlenemez', 'error')
-                return redirect(url_for('profile.collections'))
-            
+            # Kopyalanmış koleksiyon kontrolü yukarıda aynı kayıt üzerinden yapıldı
+            # (Collection.get_by_id bu istek içinde tek okuma)
             repo = get_repository()
-            # Also check repository data
-            collection_data = repo.get_collection_by_id(collection_id)
-            if collection_data:
-                desc = collection_data.get('description', '')
-                if desc and "[KOPYALANMIŞ]" in desc:
-                    flash('Bu koleksiyon başka bir kullanıcıdan kopyalanmıştır ve düzenlenemez', 'error')
-                    return redirect(url_for('profile.collections'))
             
             success = repo.update_collection(
                 collection_id,
@@ -176,6 +159,13 @@ def edit(collection_id):
                 flash('Koleksiyon güncellenemedi', 'error')
                 return redirect(url_for('collections_ui.edit', collection_id=collection_id))
 
+            collection.name = name
+            collection.description = description
+            collection.type = collection_type
+            collection.is_public = is_public
+            search_index.collection_saved(collection)
+            discovery_index.collection_changed(collection_id)
+
             flash('Koleksiyon güncellendi', 'success')
             return redirect(url_for('profile.collections'))
         except Exception as e:
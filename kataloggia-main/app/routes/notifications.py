@@ -7,6 +7,7 @@ from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 
 from models import Notification
+from app.utils.pagination import InvalidCursor, page_size
 
 bp = Blueprint('notifications', __name__)
 
@@ -19,7 +20,19 @@ def get_notifications():
         notifications = []
         unread_count = 0
 
-        items = Notification.get_for_user(current_user.id, limit=50)
+        try:
+            items, next_cursor = Notification.get_page_for_user(
+                current_user.id,
+                limit=page_size(request.args.get('limit'), default=50),
+                cursor=request.args.get('cursor'),
+            )
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Bildirimlerin ürünleri tek toplu okumayla
+        from app.repositories import get_repository
+        products = {p['id']: p for p in get_repository().get_products_by_ids(
+            [n.product_id for n in items if n.product_id])}
 
         for n in items:
             ts_str = str(n.created_at)
@@ -32,6 +45,8 @@ def get_notifications():
                 'type': n.type.lower(),
                 'message': n.message,
                 'product_id': n.product_id,
+                'product_name': products.get(n.product_id, {}).get('name'),
+                'product_image': products.get(n.product_id, {}).get('image'),
                 'timestamp': ts_str,
                 'is_read': is_read,
             })
@@ -40,6 +55,7 @@ def get_notifications():
             'success': True,
             'notifications': notifications,
             'unread_count': unread_count,
+            'next_cursor': next_cursor,
         }), 200
 
     except Exception as e:
@@ -2,13 +2,13 @@
 Price Tracking routes
 """
 from datetime import datetime, timedelta
-import re
 
 from flask import Blueprint, jsonify, request, render_template
 from flask_login import login_required, current_user
 from app.services.price_tracking_service import PriceTrackingService
 from app.models.price_tracking import PriceTracking
 from app.utils.db_path import get_db_connection
+from price_parser import to_float, to_minor_units
 
 bp = Blueprint('price_tracking', __name__, url_prefix='/price-tracking')
 price_tracking_service = PriceTrackingService()
@@ -32,19 +32,14 @@ def index():
         if item[7]:
             stats['active_alerts'] += 1
             
-        # item[4] is price_change
-        # item[4] is price_change
-        if item[4]:
-            try:
-                price_change = float(str(item[4]).replace(',', '.'))
-                if price_change < 0:
-                    stats['price_drops'] += 1
-                    stats['total_savings'] += abs(price_change)
-            except ValueError:
-                pass
+        # item[4] is price_change (kuruş üzerinden topla, float birikimi olmasın)
+        change_minor = to_minor_units(item[4]) if item[4] else None
+        if change_minor is not None and change_minor < 0:
+            stats['price_drops'] += 1
+            stats['total_savings'] -= change_minor
             
     # Format total savings
-    stats['total_savings'] = f"{stats['total_savings']:.2f}"
+    stats['total_savings'] = f"{stats['total_savings'] / 100:.2f}"
     
     return render_template('price_tracking.html', tracking_items=trackings, tracking_stats=stats)
 
@@ -64,6 +59,9 @@ def update_prices():
         updated = 0
         notifications = []
         
+        # Takip edilen ürünleri tek toplu okumayla yükle; döngüdeki Product.get_by_id bellekten döner
+        Product.get_many([tracking[1] for tracking in user_trackings if len(tracking) >= 3])
+        
         for tracking in user_trackings:
             try:
                 if len(tracking) >= 3:
@@ -123,51 +121,17 @@ def get_price_history(tracking_id):
         from app.repositories import get_repository
         repo = get_repository()
         
-        # Get price history for product_id
-        history_data = repo.get_price_history_by_product_id(str(product_id), limit=60)
-        
-        # Convert to rows format for backward compatibility
-        rows = [(item.get('price'), item.get('recorded_at')) for item in history_data]
-
-        def _parse_price(value):
-            if value is None:
-                return 0.0
-            s = str(value)
-            s = s.replace('₺', '').replace('TL', '').replace(' ', '')
-            s = s.replace('.', '').replace(',', '.')
-            try:
-                return float(s)
-            except Exception:
-                cleaned = re.sub(r'[^0-9\.-]', '', s)
-                try:
-                    return float(cleaned)
-                except Exception:
-                    return 0.0
-
-        labels = []
-        prices = []
-
-        for price_value, ts in rows:
-            ts_str = str(ts)
-            dt = None
-            try:
-                # Python 3.11+ supports fromisoformat for "YYYY-MM-DD HH:MM:SS[.ffffff]"
-                dt = datetime.fromisoformat(ts_str)
-            except Exception:
-                try:
-                    dt = datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    dt = None
+        # Aylık bucket'lardan son 60 örnek (tek-iki okuma, diziler halinde)
+        series = repo.get_price_series(str(product_id), limit=60)
 
-            label = dt.strftime('%d.%m') if dt else ts_str
-            labels.append(label)
-            prices.append(_parse_price(price_value))
+        labels = [datetime.fromtimestamp(ts).strftime('%d.%m') for ts in series['timestamps']]
+        prices = [minor / 100 for minor in series['prices']]
 
         # Eğer hiç gerçek veri yoksa, önceki davranışa benzer basit bir fallback kullan
         if not labels:
             labels = []
             prices = []
-            base_price = _parse_price(current_price)
+            base_price = to_float(current_price) or 0.0
             for i in range(6, -1, -1):
                 date = datetime.now() - timedelta(days=i)
                 labels.append(date.strftime('%d.%m'))
@@ -1,8 +1,9 @@
 """
 Profile routes
 """
-from flask import Blueprint, render_template, request, session, flash, redirect, url_for, current_app, jsonify
+from flask import Blueprint, render_template, request, session, flash, redirect, url_for, current_app, jsonify, abort
 from flask_login import login_required, current_user
+from app.utils.pagination import InvalidCursor, page_size
 from werkzeug.utils import secure_filename
 import os
 
@@ -116,12 +117,21 @@ def import_issues():
     domain_filter = request.args.get('domain', '')
     error_category_filter = request.args.get('error_category', '')
     limit = int(request.args.get('limit', 100))
+    cursor = request.args.get('cursor')
     
-    # Tüm issue'ları al
+    # İstatistikler için son 1000 issue
     all_issues = ProductImportIssue.get_by_user_id(current_user.id, limit=1000)
     
     # Filtreleme
     filtered_issues = all_issues
+    next_cursor = None
+    if status_filter == 'all' and not domain_filter and not error_category_filter:
+        # Filtre yoksa liste cursor ile sayfalanır
+        try:
+            filtered_issues, next_cursor = ProductImportIssue.get_page_by_user_id(
+                current_user.id, limit=page_size(limit), cursor=cursor)
+        except InvalidCursor:
+            abort(400)
     if status_filter != 'all':
         filtered_issues = [i for i in filtered_issues if i.status == status_filter]
     if domain_filter:
@@ -155,6 +165,7 @@ def import_issues():
     return render_template('profile_import_issues.html', 
                          user=current_user, 
                          issues=filtered_issues,
+                         next_cursor=next_cursor,
                          stats=stats,
                          status_filter=status_filter,
                          domain_filter=domain_filter,
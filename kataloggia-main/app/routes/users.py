@@ -4,6 +4,8 @@ Public user routes - Browse and view user profiles
 from flask import Blueprint, render_template, request, abort
 from flask_login import login_required, current_user
 from models import User, Collection
+from app.services.discovery_index import USER, discovery_index
+from app.utils.pagination import InvalidCursor
 
 bp = Blueprint('users', __name__)
 
@@ -11,46 +13,28 @@ bp = Blueprint('users', __name__)
 @login_required
 def list_users():
     """Kullanıcı listesi sayfası"""
-    from app.repositories import get_repository
-    
-    # Pagination
-    page = request.args.get('page', 1, type=int)
+    # Cursor pagination (sayfa derinliğinden bağımsız sabit maliyet)
     per_page = 20
-    offset = (page - 1) * per_page
+    cursor = request.args.get('cursor') or None
     
     # Search query
     search_query = request.args.get('q', '').strip()
     
-    # Get users from repository
-    repo = get_repository()
-    all_users_data = repo.get_all_users(limit=per_page, offset=offset)
-    
-    # Convert to User objects and filter by search if needed
-    users = []
-    for user_data in all_users_data:
-        user = User.get_by_id(user_data.get('id'))
-        if user:
-            # Filter by search query if provided
-            if search_query:
-                if search_query.lower() in user.username.lower() or search_query.lower() in user.email.lower():
-                    users.append(user)
-            else:
-                users.append(user)
-    
-    # If search query, filter all users (not just current page)
-    if search_query and not users:
-        # Get more users for search
-        all_users_data = repo.get_all_users(limit=500, offset=0)
-        for user_data in all_users_data:
-            user = User.get_by_id(user_data.get('id'))
-            if user and (search_query.lower() in user.username.lower() or search_query.lower() in user.email.lower()):
-                users.append(user)
+    try:
+        if search_query:
+            # Global keşif index'inden kullanıcı adı araması (tüm kullanıcılar, bellekten)
+            hits, next_cursor = discovery_index.search(search_query, kind=USER, limit=per_page, cursor=cursor)
+            users = User.get_many([hit['id'] for hit in hits])
+        else:
+            users, next_cursor = User.get_page(limit=per_page, cursor=cursor)
+    except InvalidCursor:
+        abort(400)
     
     return render_template('users_list.html', 
                          users=users, 
                          current_user=current_user,
                          search_query=search_query,
-                         page=page)
+                         next_cursor=next_cursor)
 
 @bp.route('/user/<username>')
 @login_required
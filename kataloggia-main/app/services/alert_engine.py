@@ -0,0 +1,172 @@
+"""
+Alert Engine
+Fiyat alarmları (alert_price) için indeksli değerlendirme
+
+- Her ürün için takipler alert_price (kuruş) değerine göre sıralı tutulur.
+- Yeni fiyat geldiğinde eşiği geçilen takipler tek bir aralık aramasıyla
+  (bisect) bulunur: eski fiyat > alarm >= yeni fiyat. İzleyici sayısı ne
+  olursa olsun sadece tetiklenenler dolaşılır.
+- Bildirimler tek bir toplu yazımla (record_price_checks) kaydedilir.
+- İndeks process içidir; bu process'teki create/remove anında yansır,
+  diğer process'lerin değişiklikleri periyodik yeniden yüklemeyle gelir.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+
+from price_parser import format_price, to_minor_units
+
+# İndeksin repository'den yeniden yüklenme aralığı (sn)
+ALERT_INDEX_REFRESH = int(os.environ.get('ALERT_INDEX_REFRESH_SECONDS', 300))
+
+
+class AlertIndex:
+    """product_id -> alert_price'a göre sıralı [(kuruş, tracking_id)]"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_product = {}
+        self._trackings = {}
+
+    def load(self, trackings):
+        """Aktif takiplerden indeksi baştan kur"""
+        by_product, by_tracking = {}, {}
+        for tracking in trackings:
+            alert_minor = tracking.get('alert_price_minor')
+            if alert_minor is None:
+                alert_minor = to_minor_units(tracking.get('alert_price'))
+            if alert_minor is None or not tracking.get('is_active', True):
+                continue
+            entry = (alert_minor, tracking['id'])
+            by_product.setdefault(tracking['product_id'], []).append(entry)
+            by_tracking[tracking['id']] = (tracking['product_id'], alert_minor, tracking.get('user_id'))
+        for entries in by_product.values():
+            entries.sort()
+        with self._lock:
+            self._by_product, self._trackings = by_product, by_tracking
+
+    def upsert(self, tracking_id, product_id, user_id, alert_minor):
+        with self._lock:
+            self._discard(tracking_id)
+            if alert_minor is None:
+                return
+            insort(self._by_product.setdefault(product_id, []), (alert_minor, tracking_id))
+            self._trackings[tracking_id] = (product_id, alert_minor, user_id)
+
+    def discard(self, tracking_id):
+        with self._lock:
+            self._discard(tracking_id)
+
+    def _discard(self, tracking_id):
+        known = self._trackings.pop(tracking_id, None)
+        if not known:
+            return
+        product_id, alert_minor, _ = known
+        entries = self._by_product.get(product_id, [])
+        i = bisect_left(entries, (alert_minor, tracking_id))
+        if i < len(entries) and entries[i] == (alert_minor, tracking_id):
+            entries.pop(i)
+        if not entries:
+            self._by_product.pop(product_id, None)
+
+    def crossed(self, product_id, old_minor, new_minor):
+        """old_minor > alert >= new_minor olan takipler: [(tracking_id, user_id, alert_minor)]"""
+        if new_minor is None:
+            return []
+        with self._lock:
+            entries = self._by_product.get(product_id)
+            if not entries:
+                return []
+            lo = bisect_left(entries, (new_minor,))
+            hi = len(entries) if old_minor is None else bisect_left(entries, (old_minor,))
+            return [(tracking_id, self._trackings[tracking_id][2], alert_minor)
+                    for alert_minor, tracking_id in entries[lo:hi]]
+
+    def __len__(self):
+        return len(self._trackings)
+
+
+class AlertEngine:
+    """Fiyat değişimlerini alarm indeksine karşı değerlendirir"""
+
+    def __init__(self, refresh_interval=ALERT_INDEX_REFRESH):
+        self.index = AlertIndex()
+        self.refresh_interval = refresh_interval
+        self._loaded_at = None
+        self._load_lock = threading.Lock()
+
+    def _repo(self):
+        from app.repositories import get_repository
+        return get_repository()
+
+    def ensure_loaded(self, force=False):
+        """İndeks hiç kurulmadıysa veya süresi dolduysa repository'den yükle"""
+        if not force and self._loaded_at is not None and time.time() - self._loaded_at < self.refresh_interval:
+            return
+        with self._load_lock:
+            if not force and self._loaded_at is not None and time.time() - self._loaded_at < self.refresh_interval:
+                return
+            try:
+                self.index.load(self._repo().get_all_active_price_trackings())
+                self._loaded_at = time.time()
+            except Exception as e:
+                print(f"[ERROR] Alert index load error: {e}")
+
+    def track(self, tracking_id, product_id, user_id, alert_price):
+        """Yeni/güncellenen takip (alert_price yoksa indeksten çıkar)"""
+        self.index.upsert(tracking_id, product_id, user_id, to_minor_units(alert_price))
+
+    def untrack(self, tracking_id):
+        self.index.discard(tracking_id)
+
+    def evaluate(self, product_id, old_price, new_price, name=None, now=None):
+        """
+        Eşiği geçilen takipler için bildirim argümanlarını döndür (yazmaz).
+        Fiyatlar kuruş (int) veya fiyat metni olabilir.
+        """
+        old_minor = old_price if isinstance(old_price, int) or old_price is None else to_minor_units(old_price)
+        new_minor = new_price if isinstance(new_price, int) else to_minor_units(new_price)
+        if new_minor is None or (old_minor is not None and new_minor >= old_minor):
+            return []
+
+        self.ensure_loaded()
+        now = now or datetime.now()
+        notifications = []
+        for tracking_id, user_id, alert_minor in self.index.crossed(product_id, old_minor, new_minor):
+            if not user_id:
+                continue
+            notifications.append({
+                'user_id': user_id,
+                'product_id': product_id,
+                'notification_type': 'PRICE_ALERT',
+                'message': f"{name or 'Takip ettiğiniz ürün'} hedef fiyatınıza ulaştı: "
+                           f"{format_price(new_minor)} (hedef: {format_price(alert_minor)})",
+                'payload': json.dumps({
+                    'tracking_id': tracking_id,
+                    'alert_price_minor': alert_minor,
+                    'new_price_minor': new_minor,
+                    'old_price_minor': old_minor,
+                }, ensure_ascii=False),
+                'created_at': now,
+            })
+        return notifications
+
+    def dispatch(self, notifications):
+        """Bildirimleri tek toplu yazımla kaydet"""
+        if not notifications:
+            return True
+        return self._repo().record_price_checks([], [], notifications)
+
+    def stats(self):
+        return {
+            'indexed_trackings': len(self.index),
+            'loaded_at': self._loaded_at,
+            'refresh_interval': self.refresh_interval,
+        }
+
+
+# Global alarm motoru (PriceTrackingService ve PriceTracking modeli kullanır)
+alert_engine = AlertEngine()
@@ -1,10 +1,26 @@
 """
 Cache Service
 Redis cache implementation with fallback to in-memory cache
+
+In-memory katman (Redis yokken veya Redis hatasında):
+- Toplam boyut CACHE_MEMORY_MAX_BYTES ile sınırlı (anahtar + JSON değer,
+  UTF-8 bayt); sınır aşılınca en eski kullanılan kayıt atılır (LRU).
+- Her kaydın kendi TTL'i var: okumada süresi geçmişse düşürülür, ayrıca
+  yazımlar en geç CACHE_MEMORY_SWEEP_SECONDS'ta bir bitiş zamanı heap'inden
+  süresi dolanları toplar (hiç okunmayan kayıtlar da bellekte kalmaz).
+- Değerler Redis'teki gibi JSON olarak saklanır; her okuma ayrı bir kopya
+  döndürür.
+- clear('onek:*') sıralı anahtar listesinde bisect ile yalnızca o öneki siler.
 """
+import fnmatch
+import heapq
 import json
 import hashlib
 import os
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
 from functools import wraps
 
 # Try to import Redis, fallback to simple cache
@@ -15,12 +31,142 @@ except ImportError:
     REDIS_AVAILABLE = False
     print("[INFO] Redis yüklü değil, in-memory cache kullanılacak")
 
+CACHE_MEMORY_MAX_BYTES = int(os.environ.get('CACHE_MEMORY_MAX_BYTES', 64 * 1024 * 1024))
+CACHE_MEMORY_SWEEP_SECONDS = int(os.environ.get('CACHE_MEMORY_SWEEP_SECONDS', 60))
+
+
+class MemoryCache:
+    """Process içi cache: bayt sınırlı LRU + kayıt başına TTL + önek silme"""
+    
+    def __init__(self, max_bytes=CACHE_MEMORY_MAX_BYTES, sweep_interval=CACHE_MEMORY_SWEEP_SECONDS):
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        # key -> (JSON değer, bitiş zamanı, bayt)
+        self._entries = OrderedDict()
+        self._keys = []
+        self._expiry = []
+        self._bytes = 0
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+    
+    def _sweep(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == expires_at:
+                self._drop(key)
+                self.stats['expirations'] += 1
+        self._next_sweep = now + self.sweep_interval
+    
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                self._drop(key)
+                self.stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            serialized = entry[0]
+        return json.loads(serialized)
+    
+    def set(self, key, serialized, expiration):
+        """JSON'a çevrilmiş değeri yaz; tek başına sınırı aşan değer yazılmaz"""
+        size = len(key.encode('utf-8')) + len(serialized.encode('utf-8'))
+        now = time.monotonic()
+        expires_at = now + expiration
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = (serialized, expires_at, size)
+            insort(self._keys, key)
+            self._bytes += size
+            heapq.heappush(self._expiry, (expires_at, key))
+            
+            if now >= self._next_sweep:
+                self._sweep(now)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+            # Üzerine yazılan / silinen kayıtların heap'te kalan eski bitiş zamanları
+            if len(self._expiry) > 2 * len(self._entries) + 64:
+                self._expiry = [(entry[1], k) for k, entry in self._entries.items()]
+                heapq.heapify(self._expiry)
+        return True
+    
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+    
+    def exists(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+    
+    def delete_prefix(self, prefix):
+        """Öneki taşıyan tüm anahtarları sil (sıralı listede tek aralık)"""
+        with self._lock:
+            start = bisect_left(self._keys, prefix)
+            end = start
+            while end < len(self._keys) and self._keys[end].startswith(prefix):
+                end += 1
+            for key in self._keys[start:end]:
+                self._bytes -= self._entries.pop(key)[2]
+            del self._keys[start:end]
+            return end - start
+    
+    def delete_matching(self, pattern):
+        """Redis KEYS gibi glob deseni (önek dışı desenler için, lineer)"""
+        if pattern.endswith('*') and not any(ch in pattern[:-1] for ch in '*?['):
+            return self.delete_prefix(pattern[:-1])
+        with self._lock:
+            matched = [key for key in self._keys if fnmatch.fnmatchcase(key, pattern)]
+            for key in matched:
+                self._drop(key)
+            return len(matched)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys = []
+            self._expiry = []
+            self._bytes = 0
+    
+    def get_stats(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_ratio': self.stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+
 class CacheService:
     """Cache service with Redis support"""
     
     def __init__(self):
         self.redis_client = None
-        self.memory_cache = {}
+        self.memory_cache = MemoryCache()
         
         if REDIS_AVAILABLE:
             try:
@@ -35,9 +181,9 @@ class CacheService:
                 self.redis_client = None
     
     def _get_key(self, prefix, *args, **kwargs):
-        """Cache key oluştur"""
+        """Cache key oluştur (önek korunur: clear('prefix:*') ile toplu silinebilir)"""
         key_data = f"{prefix}:{args}:{kwargs}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        return f"{prefix}:{hashlib.md5(key_data.encode()).hexdigest()}"
     
     def get(self, key):
         """Cache'den değer al"""
@@ -65,8 +211,7 @@ class CacheService:
                     print(f"[ERROR] Redis set error: {e}")
             
             # Fallback to memory cache
-            self.memory_cache[key] = value
-            return True
+            return self.memory_cache.set(key, serialized, expiration)
         except Exception as e:
             print(f"[ERROR] Cache set error: {e}")
             return False
@@ -80,8 +225,7 @@ class CacheService:
                 print(f"[ERROR] Redis delete error: {e}")
         
         # Fallback to memory cache
-        if key in self.memory_cache:
-            del self.memory_cache[key]
+        self.memory_cache.delete(key)
     
     def clear(self, pattern=None):
         """Cache'i temizle"""
@@ -95,10 +239,7 @@ class CacheService:
         
         # Clear memory cache
         if pattern:
-            # Simple pattern matching for memory cache
-            keys_to_delete = [k for k in self.memory_cache.keys() if pattern.replace('*', '') in k]
-            for key in keys_to_delete:
-                del self.memory_cache[key]
+            self.memory_cache.delete_matching(pattern)
         else:
             self.memory_cache.clear()
     
@@ -110,7 +251,14 @@ class CacheService:
             except Exception as e:
                 print(f"[ERROR] Redis exists error: {e}")
         
-        return key in self.memory_cache
+        return self.memory_cache.exists(key)
+    
+    def get_stats(self):
+        """Cache katmanı ve in-memory istatistikleri"""
+        return {
+            'backend': 'redis' if self.redis_client else 'memory',
+            'memory': self.memory_cache.get_stats(),
+        }
 
 # Global cache instance
 cache_service = CacheService()
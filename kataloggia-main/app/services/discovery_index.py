@@ -0,0 +1,412 @@
+"""
+Discovery Index
+Herkese açık koleksiyonlar, içlerindeki ürünler ve kullanıcı adları üzerinde
+global keşif araması (/api/v1/search/discover, /users?q=)
+
+- Kayıtlar DISCOVERY_INDEX_SHARDS parçaya (crc32(anahtar) % n) dağıtılır; her
+  parça kendi kilidiyle search_index.TextIndex'tir (token/önek posting'leri +
+  trigram sözlüğü). Bir yazım yalnızca kendi parçasını kilitler; sorgu her
+  parçadan ilk k adayı alıp birleştirir.
+- Koleksiyon metni: ad, açıklama, sahibinin kullanıcı adı ve ürün ad/markaları
+  (koleksiyon başına en fazla DISCOVERY_MAX_PRODUCTS ürün).
+- Index repository'den offline üretilen JSON snapshot'tan yüklenir
+  (Celery beat 'discovery.rebuild_index' görevi veya rebuild_discovery_index.py,
+  DISCOVERY_INDEX_PATH); sorgular Firestore'a gitmez. Snapshot dosyası
+  yenilenince process'ler en geç DISCOVERY_RELOAD_SECONDS içinde yeniden
+  yükler, böylece diğer worker'ların yazımları da görünür. Snapshot yoksa
+  web isteği index kurmaz: sonuç boş döner ve uyarı loglanır.
+- Kullanıcı/koleksiyon/ürün yazımları yüklü index'i anında günceller.
+- Sonuçlar alaka, sonra yenilik sırasıyla; sayfalama (skor, created_at, anahtar)
+  cursor'ı ile (bkz. encode_rank_cursor).
+"""
+import heapq
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from app.services.search_index import TextIndex, NAME_EXACT, NAME_PREFIX, DESCRIPTION_EXACT, DESCRIPTION_PREFIX
+from app.utils.pagination import decode_rank_cursor, encode_rank_cursor
+from app.utils.turkish_text import tokenize
+
+DISCOVERY_INDEX_SHARDS = int(os.environ.get('DISCOVERY_INDEX_SHARDS', 8))
+DISCOVERY_RELOAD_SECONDS = int(os.environ.get('DISCOVERY_RELOAD_SECONDS', 30))
+DISCOVERY_MAX_PRODUCTS = int(os.environ.get('DISCOVERY_MAX_PRODUCTS', 200))
+DISCOVERY_INDEX_PATH = os.environ.get(
+    'DISCOVERY_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                 'discovery_index.json'),
+)
+
+USER = 'user'
+COLLECTION = 'collection'
+SNAPSHOT_VERSION = 1
+
+
+def _ts(value):
+    return value.isoformat(sep=' ') if isinstance(value, datetime) else str(value or '')
+
+
+def user_entry(user_data):
+    """Repository kullanıcı kaydı -> index kaydı (email vb. özel alanlar hariç)"""
+    return {
+        'key': f"{USER}:{user_data['id']}",
+        'kind': USER,
+        'title': user_data.get('username') or '',
+        'created_at': _ts(user_data.get('created_at')),
+        'data': {
+            'id': user_data['id'],
+            'username': user_data.get('username'),
+            'profile_url': user_data.get('profile_url'),
+            'avatar_url': user_data.get('avatar_url'),
+        },
+    }
+
+
+def collection_entry(collection_data, owner_data, products):
+    """Herkese açık koleksiyon + sahibi + ürünleri -> index kaydı"""
+    products = list(products)[:DISCOVERY_MAX_PRODUCTS]
+    owner = (owner_data or {}).get('username') or ''
+    return {
+        'key': f"{COLLECTION}:{collection_data['id']}",
+        'kind': COLLECTION,
+        'title': collection_data.get('name') or '',
+        'body': collection_data.get('description') or '',
+        'owner': owner,
+        'products': ' '.join(f"{p.get('name') or ''} {p.get('brand') or ''}" for p in products),
+        'product_ids': [p['id'] for p in products if p.get('id')],
+        'created_at': _ts(collection_data.get('created_at')),
+        'data': {
+            'id': collection_data['id'],
+            'name': collection_data.get('name'),
+            'description': collection_data.get('description'),
+            'type': collection_data.get('type'),
+            'share_url': collection_data.get('share_url'),
+            'cover_image': collection_data.get('cover_image'),
+            'user_id': collection_data.get('user_id'),
+            'username': owner,
+            'product_count': len(products),
+        },
+    }
+
+
+def build_snapshot(repo, page_size=500):
+    """Repository'den tam snapshot (offline; kullanıcılar keyset sayfalarıyla okunur)"""
+    entries = []
+    cursor = None
+    while True:
+        page = repo.get_users_page(limit=page_size, cursor=cursor)
+        for user_data in page['items']:
+            entries.append(user_entry(user_data))
+            for collection_data in repo.get_collections_by_user_id(user_data['id']):
+                if collection_data.get('is_public'):
+                    products = repo.get_products_by_collection_id(collection_data['id'])
+                    entries.append(collection_entry(collection_data, user_data, products))
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    return {'version': SNAPSHOT_VERSION, 'built_at': datetime.now().isoformat(), 'entries': entries}
+
+
+def save_snapshot(snapshot, path=DISCOVERY_INDEX_PATH):
+    """Atomik yazım (okuyan process yarım dosya görmez)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def rebuild_snapshot(repo=None, path=DISCOVERY_INDEX_PATH):
+    """Snapshot'ı repository'den üret ve yaz; tür başına kayıt sayıları"""
+    if repo is None:
+        from app.repositories import get_repository
+        repo = get_repository()
+    snapshot = build_snapshot(repo)
+    save_snapshot(snapshot, path)
+    counts = {USER: 0, COLLECTION: 0}
+    for entry in snapshot['entries']:
+        counts[entry['kind']] = counts.get(entry['kind'], 0) + 1
+    return counts
+
+
+def read_snapshot(path=DISCOVERY_INDEX_PATH):
+    with open(path, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported discovery snapshot version: {snapshot.get('version')}")
+    return snapshot
+
+
+class _EntryDoc:
+    """Index kaydını TextIndex'in beklediği nesne arayüzüyle sarar"""
+
+    __slots__ = ('entry',)
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    @property
+    def id(self):
+        return self.entry['key']
+
+    def __getattr__(self, name):
+        return self.entry.get(name)
+
+    def to_dict(self):
+        return {**self.entry['data'], 'kind': self.entry['kind'], 'created_at': self.entry['created_at']}
+
+
+class DiscoveryShard(TextIndex):
+    """Tek parça: başlık (kullanıcı/koleksiyon adı) > açıklama, sahip > ürün metni"""
+
+    FIELDS = (
+        ('title', NAME_EXACT, NAME_PREFIX),
+        ('body', DESCRIPTION_EXACT, DESCRIPTION_PREFIX),
+        ('owner', DESCRIPTION_EXACT, DESCRIPTION_PREFIX),
+        ('products', 1, 1),
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def _add_extra(self, doc):
+        self.entries[doc.id] = doc.entry
+
+    def _remove_extra(self, key):
+        self.entries.pop(key, None)
+
+    def top(self, query, kind=None, fuzzy=False, limit=20, after=None):
+        """[(sıralama anahtarı, sonuç dict'i)] - after'dan sonraki ilk limit kayıt"""
+        with self.lock:
+            scores = self.fuzzy_scores(query) if fuzzy else self.text_match(query)
+            ranked = (
+                ((score, self.docs[key]['created_at'], key), key)
+                for key, score in scores.items()
+                if kind is None or key.startswith(f"{kind}:")
+            )
+            if after is not None:
+                ranked = (item for item in ranked if item[0] < after)
+            return [(rank, self.docs[key]) for rank, key in heapq.nlargest(limit, ranked)]
+
+
+class DiscoveryIndex:
+    """Parçalı global keşif index'i (snapshot'tan yüklenir, yazımlarla güncellenir)"""
+
+    def __init__(self, shards=DISCOVERY_INDEX_SHARDS, snapshot_path=DISCOVERY_INDEX_PATH):
+        self.shard_count = shards
+        self.snapshot_path = snapshot_path
+        self._shards = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Koleksiyon kayıtlarının sahip ve ürün ters indeksleri (yeniden indeksleme için)
+        self._owned = {}
+        self._product_collections = {}
+        self._snapshot_mtime = None
+        self._checked_at = None
+        self._warned_missing = False
+        self.stats = {'loads': 0, 'updates': 0, 'queries': 0}
+
+    def _shard_of(self, key):
+        return zlib.crc32(key.encode('utf-8')) % self.shard_count
+
+    def _track(self, entry, owned, product_collections):
+        if entry['kind'] != COLLECTION:
+            return
+        owned.setdefault(entry['data'].get('user_id'), set()).add(entry['key'])
+        for product_id in entry.get('product_ids', ()):
+            product_collections.setdefault(product_id, set()).add(entry['key'])
+
+    def _untrack(self, entry):
+        if entry['kind'] != COLLECTION:
+            return
+        for mapping, ids in ((self._owned, [entry['data'].get('user_id')]),
+                             (self._product_collections, entry.get('product_ids', ()))):
+            for item_id in ids:
+                keys = mapping.get(item_id)
+                if keys is not None:
+                    keys.discard(entry['key'])
+                    if not keys:
+                        del mapping[item_id]
+
+    @property
+    def loaded(self):
+        return self._shards is not None
+
+    def load_snapshot(self, snapshot):
+        """Yeni parçaları kurup tek seferde değiştir (sorgular eski index'le devam eder)"""
+        shards = [DiscoveryShard() for _ in range(self.shard_count)]
+        owned, product_collections = {}, {}
+        for entry in snapshot.get('entries', ()):
+            shards[self._shard_of(entry['key'])].add(_EntryDoc(entry))
+            self._track(entry, owned, product_collections)
+        with self._lock:
+            self._shards = shards
+            self._owned = owned
+            self._product_collections = product_collections
+
+    def _snapshot_mtime_now(self):
+        try:
+            return os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return None
+
+    def _recently_checked(self):
+        return self._checked_at is not None and time.monotonic() - self._checked_at < DISCOVERY_RELOAD_SECONDS
+
+    def ensure_loaded(self):
+        """
+        Snapshot'ı yükle / değiştiyse yeniden yükle (en fazla
+        DISCOVERY_RELOAD_SECONDS'ta bir kontrol). Snapshot yoksa index boş
+        kalır; repository taraması istek içinde yapılmaz.
+        """
+        if self._recently_checked():
+            return
+        with self._load_lock:
+            if self._recently_checked():
+                return
+            self._checked_at = time.monotonic()
+            mtime = self._snapshot_mtime_now()
+            if mtime is None:
+                if self._shards is None and not self._warned_missing:
+                    print(f"[WARNING] Discovery index snapshot not found at {self.snapshot_path}; "
+                          f"discovery search returns no results until 'discovery.rebuild_index' runs")
+                    self._warned_missing = True
+                return
+            if mtime == self._snapshot_mtime:
+                return
+            try:
+                self.load_snapshot(read_snapshot(self.snapshot_path))
+                self._snapshot_mtime = mtime
+                self._warned_missing = False
+                self.stats['loads'] += 1
+            except Exception as e:
+                print(f"[ERROR] Discovery snapshot load error: {e}")
+
+    def put(self, entry):
+        shards = self._shards
+        if shards is None:
+            return
+        shard = shards[self._shard_of(entry['key'])]
+        with shard.lock:
+            old = shard.entries.get(entry['key'])
+            shard.add(_EntryDoc(entry))
+        with self._lock:
+            if old is not None:
+                self._untrack(old)
+            self._track(entry, self._owned, self._product_collections)
+            self.stats['updates'] += 1
+
+    def delete(self, key):
+        shards = self._shards
+        if shards is None:
+            return
+        shard = shards[self._shard_of(key)]
+        with shard.lock:
+            old = shard.entries.get(key)
+            shard.remove(key)
+        if old is not None:
+            with self._lock:
+                self._untrack(old)
+                self.stats['updates'] += 1
+
+    def _entry(self, key):
+        shards = self._shards
+        return shards[self._shard_of(key)].entries.get(key) if shards is not None else None
+
+    # --- Yazım kancaları (index yüklü değilse bir şey yapmaz) ---
+
+    def user_saved(self, user):
+        """Kullanıcı oluşturuldu / kullanıcı adı değişti (koleksiyonlarındaki sahip adı da)"""
+        if self._shards is None or user is None:
+            return
+        self.put(user_entry({
+            'id': user.id,
+            'username': user.username,
+            'profile_url': user.profile_url,
+            'avatar_url': user.avatar_url,
+            'created_at': user.created_at,
+        }))
+        with self._lock:
+            keys = list(self._owned.get(user.id, ()))
+        for key in keys:
+            entry = self._entry(key)
+            if entry is not None and entry['owner'] != user.username:
+                self.put({**entry, 'owner': user.username, 'data': {**entry['data'], 'username': user.username}})
+
+    def collection_changed(self, collection_id):
+        """Koleksiyon oluşturuldu/düzenlendi/ürünleri değişti: repository'den tazele"""
+        if self._shards is None or not collection_id:
+            return
+        from app.repositories import get_repository
+
+        try:
+            repo = get_repository()
+            collection_data = repo.get_collection_by_id(collection_id)
+            if not collection_data or not collection_data.get('is_public'):
+                self.delete(f"{COLLECTION}:{collection_id}")
+                return
+            owner_data = repo.get_user_by_id(collection_data.get('user_id'))
+            products = repo.get_products_by_collection_id(collection_id)
+            self.put(collection_entry(collection_data, owner_data, products))
+        except Exception as e:
+            print(f"[ERROR] Discovery index collection update error: {e}")
+
+    def collection_removed(self, collection_id):
+        self.delete(f"{COLLECTION}:{collection_id}")
+
+    def product_changed(self, product_id):
+        """Ürün adı/markası değişti veya silindi: içeren herkese açık koleksiyonları tazele"""
+        if self._shards is None:
+            return
+        with self._lock:
+            keys = list(self._product_collections.get(product_id, ()))
+        for key in keys:
+            self.collection_changed(key.split(':', 1)[1])
+
+    # --- Sorgu ---
+
+    def search(self, query, kind=None, limit=20, cursor=None):
+        """(sonuç dict'leri, next_cursor); tam/önek eşleşme yoksa bulanık (trigram)"""
+        after, mode = None, None
+        decoded = decode_rank_cursor(cursor)
+        if decoded is not None:
+            score, created_at, key, mode = decoded
+            after = (score, created_at, key)
+        if not tokenize(query):
+            return [], None
+
+        self.ensure_loaded()
+        self.stats['queries'] += 1
+        shards = self._shards
+        if shards is None:
+            return [], None
+
+        def collect(fuzzy):
+            items = []
+            for shard in shards:
+                items.extend(shard.top(query, kind, fuzzy, limit + 1, after))
+            return heapq.nlargest(limit + 1, items, key=lambda item: item[0])
+
+        if mode is None:
+            top = collect(False)
+            mode = 'exact'
+            if not top:
+                top = collect(True)
+                mode = 'fuzzy'
+        else:
+            top = collect(mode == 'fuzzy')
+
+        page = top[:limit]
+        next_cursor = None
+        if len(top) > limit:
+            score, created_at, key = page[-1][0]
+            next_cursor = encode_rank_cursor(score, created_at, key, mode)
+        return [doc for _, doc in page], next_cursor
+
+
+# Global keşif index'i (modeller, /users ve search API kullanır)
+discovery_index = DiscoveryIndex()
@@ -2,11 +2,18 @@
 Price Tracking Service
 Background price checking service
 """
+import functools
 import json
+import os
+from datetime import datetime
 
-from app.models.price_tracking import PriceTracking
+from app.services.alert_engine import alert_engine
+from app.services.refresh_scheduler import refresh_scheduler
 from app.services.scraping_service import ScrapingService
-from models import Notification
+from price_parser import to_float, to_minor_units
+
+# Celery'ye / yerel işleme verilen chunk başına URL grubu
+PRICE_SWEEP_CHUNK_SIZE = int(os.environ.get('PRICE_SWEEP_CHUNK_SIZE', 25))
 
 class PriceTrackingService:
     """Price tracking business logic"""
@@ -15,155 +22,305 @@ class PriceTrackingService:
         self.scraping_service = ScrapingService()
 
     def _parse_price(self, value):
-        """Fiyat string'ini güvenli şekilde floata çevirir."""
-        if value is None:
-            return None
-
-        import re
+        """Fiyat string'ini floata çevirir (price_parser); çözülemezse None"""
+        return to_float(value)
+    
+    def plan_price_sweep(self, trackings=None):
+        """
+        Aktif takipleri kanonik ürün URL'sine göre grupla.
+        Her grup tek bir scrape ile tüm takiplerine uygulanır; gruplar JSON
+        uyumludur (Celery chunk'larına olduğu gibi gönderilir).
+        """
+        from app.repositories import get_repository
+        from app.utils.url_canonical import product_key
 
-        # Her şeyi stringe çevir
-        s = str(value)
+        repo = get_repository()
+        if trackings is None:
+            trackings = repo.get_all_active_price_trackings()
+        if not trackings:
+            return []
 
-        # Sadece sayı, nokta ve virgül kalsın
-        s = re.sub(r"[^\d,\.]", "", s)
+        products = {p['id']: p for p in repo.get_products_by_ids([t.get('product_id') for t in trackings])}
+        groups = {}
+        for tracking in trackings:
+            product_id = tracking.get('product_id')
+            product = products.get(product_id)
+            if not product or not product.get('url'):
+                continue
 
-        # Hiç rakam yoksa boş say
-        if not re.search(r"\d", s):
-            return None
+            # Önceki fiyat takibin fiyatıdır (tarama ürün kaydını güncellemez); ürün yalnızca yedek
+            if tracking.get('current_price'):
+                old_price = tracking['current_price']
+                old_minor = tracking.get('current_price_minor')
+                if old_minor is None:
+                    old_minor = to_minor_units(old_price)
+            elif product.get('current_price'):
+                old_price = product['current_price']
+                old_minor = to_minor_units(old_price)
+            else:
+                old_price = product.get('price')
+                old_minor = product.get('price_minor')
 
-        # Örnek formatlar:
-        #  - "1.299,99" (TR)
-        #  - "1,299.99" (EN)
-        #  - "1299,99"
-        #  - "1299.99"
-        #  - "1 299,99 TL" vs.
+            key = product_key(product['url'])
+            group = groups.setdefault(key, {'key': key, 'url': product['url'], 'targets': []})
+            group['targets'].append({
+                'tracking_id': tracking.get('id'),
+                'product_id': product_id,
+                'user_id': tracking.get('user_id') or product.get('user_id'),
+                'name': product.get('name'),
+                'old_price': old_price,
+                'old_price_minor': old_minor,
+                'alert_price': tracking.get('alert_price'),
+                'alert_price_minor': tracking.get('alert_price_minor'),
+                'tracked_price_minor': tracking.get('current_price_minor'),
+            })
+        return list(groups.values())
 
-        if "," in s and "." in s:
-            # İkisi de varsa: varsayılan Türk formatı: 1.299,99 -> 1299.99
-            if s.rfind(",") > s.rfind("."):
-                s = s.replace(".", "").replace(",", ".")
+    def check_all_prices(self, dispatch=None, chunk_size=None, force=False):
+        """
+        Vadesi gelen takip edilen ürünlerin fiyatlarını kontrol et.
+        Aynı URL'yi takip eden tüm kullanıcılar için URL bir kez çekilir;
+        hangi URL'lerin vadesi geldiğine refresh_scheduler karar verir
+        (force=True: hepsi, bütçe yok sayılır). Vadesi gelmemiş ürünlerin
+        kayıtları hiç okunmaz.
+        dispatch verilirse (Celery) her chunk ona gönderilir, yoksa burada işlenir.
+        """
+        results = {'checked': 0, 'updated': 0, 'urls': 0, 'failed': 0, 'notifications': []}
+        try:
+            if force:
+                planned = self.plan_price_sweep()
             else:
-                # Çok istisnai durum, virgülleri at
-                s = s.replace(",", "")
-        elif "," in s and "." not in s:
-            # Tek virgül: 1299,99 -> 1299.99 gibi
-            s = s.replace(",", ".")
-        else:
-            # Sadece nokta veya düz sayı: 1,299.99 gibi durumlarda virgülü sil
-            s = s.replace(",", "")
+                from app.repositories import get_repository
 
-        try:
-            return float(s)
-        except ValueError:
-            return None
-    
-    def check_all_prices(self):
-        """Tüm takip edilen ürünlerin fiyatlarını kontrol et"""
-        try:
-            # Get all active tracking records
-            trackings = PriceTracking.get_all_active()
-            
-            results = {
-                'checked': 0,
-                'updated': 0,
-                'notifications': []
-            }
-            
-            for tracking in trackings:
-                try:
-                    result = self.check_product_price(tracking.product_id)
-                    results['checked'] += 1
-                    
-                    if result.get('price_changed'):
-                        results['updated'] += 1
-                        results['notifications'].append({
-                            'product_id': tracking.product_id,
-                            'old_price': result.get('old_price'),
-                            'new_price': result.get('new_price'),
-                            'change': result.get('price_change')
-                        })
-                except Exception as e:
-                    print(f"Error checking price for product {tracking.product_id}: {e}")
-                    continue
-            
+                trackings = get_repository().get_all_active_price_trackings()
+                pending = refresh_scheduler.pending_product_ids([t.get('product_id') for t in trackings])
+                candidates = [t for t in trackings if t.get('product_id') in pending]
+                results['skipped'] = len(trackings) - len(candidates)
+                planned = self.plan_price_sweep(candidates)
+            groups = planned if force else refresh_scheduler.select_due(planned)
+            results['deferred'] = len(planned) - len(groups)
+            chunk_size = chunk_size or PRICE_SWEEP_CHUNK_SIZE
+            chunks = [groups[i:i + chunk_size] for i in range(0, len(groups), chunk_size)]
+
+            if dispatch is not None:
+                for chunk in chunks:
+                    dispatch(chunk)
+                results['urls'] = len(groups)
+                results['dispatched_chunks'] = len(chunks)
+                return results
+
+            for chunk in chunks:
+                chunk_results = self.check_price_groups(chunk)
+                for name in ('checked', 'updated', 'urls', 'failed'):
+                    results[name] += chunk_results[name]
+                results['notifications'].extend(chunk_results['notifications'])
             return results
         except Exception as e:
             print(f"Error in check_all_prices: {e}")
-            return {'checked': 0, 'updated': 0, 'notifications': []}
-    
+            return results
+
+    def check_price_groups(self, groups):
+        """
+        Bir grup listesini paralel çek (batch_engine: global + domain limitli)
+        ve sonuçları tek seferde toplu yaz.
+        """
+        from batch_engine import batch_engine
+        from app.repositories import get_repository
+
+        results = {'checked': 0, 'updated': 0, 'urls': 0, 'failed': 0, 'notifications': []}
+        if not groups:
+            return results
+
+        by_url = {group['url']: group for group in groups}
+        scrape = functools.partial(self.scraping_service.scrape_product, allow_stale=False)
+
+        now = datetime.now()
+        tracking_updates, history_entries, notifications = [], [], []
+        for item in batch_engine.iter_sync(list(by_url), scrape):
+            group = by_url[item.url]
+            results['urls'] += 1
+            new_price = item.result.get('price') if item.ok else None
+            refresh_scheduler.record(group, new_price)
+            if not new_price:
+                results['failed'] += 1
+                print(f"Error checking price for {item.url}: {item.error or 'Could not scrape price'}")
+                continue
+
+            new_minor = to_minor_units(new_price)
+            alerts = self._evaluate_alerts(group, new_minor, now)
+            notifications.extend(alerts)
+            alerted = {json.loads(alert['payload'])['tracking_id'] for alert in alerts}
+            results['alerts'] = results.get('alerts', 0) + len(alerts)
+
+            history_products = set()
+            for target in group['targets']:
+                results['checked'] += 1
+                update = {'id': target['tracking_id'], 'last_checked': now}
+                tracking_updates.append(update)
+
+                old_price = target['old_price']
+                old_minor = target.get('old_price_minor')
+                if old_minor is None:
+                    old_minor = to_minor_units(old_price)
+                change_info = self._minor_change(old_minor, new_minor)
+                change_amount = change_info.get('amount', 0)
+
+                # Alarmı tetiklenen takibin fiyatı her durumda ilerler (aynı eşik tekrar tetiklenmesin)
+                if target['tracking_id'] in alerted:
+                    update['current_price'] = new_price
+                    update['current_price_minor'] = new_minor
+                    update['price_change'] = str(change_amount)
+
+                # Küçük oynamaları önemseme, en az 0.5 TL düşüş olsun
+                if change_amount >= -0.5:
+                    continue
+
+                update['current_price'] = new_price
+                update['current_price_minor'] = new_minor
+                update['price_change'] = str(change_amount)
+                if target['product_id'] not in history_products:
+                    history_products.add(target['product_id'])
+                    history_entries.append({'product_id': target['product_id'], 'price': new_price, 'recorded_at': now})
+
+                notifications.append({
+                    'user_id': target['user_id'],
+                    'product_id': target['product_id'],
+                    'notification_type': 'PRICE_DROP',
+                    'message': f"{target['name']} fiyatı değişti: {old_price} → {new_price}",
+                    'payload': json.dumps({
+                        "old_price": old_price,
+                        "new_price": new_price,
+                        "change": change_amount,
+                        "percentage": change_info.get('percentage', 0)
+                    }, ensure_ascii=False),
+                    'created_at': now,
+                })
+                results['updated'] += 1
+                results['notifications'].append({
+                    'product_id': target['product_id'],
+                    'old_price': old_price,
+                    'new_price': new_price,
+                    'change': change_info
+                })
+
+        if tracking_updates:
+            get_repository().record_price_checks(tracking_updates, history_entries, notifications)
+        return results
+
+    def _evaluate_alerts(self, group, new_minor, now):
+        """Gruptaki her ürün için eşiği geçilen alarmları indeksten bul (bildirim argümanları)"""
+        seen, names = {}, {}
+        for target in group['targets']:
+            tracked = target.get('tracked_price_minor')
+            if tracked is None:
+                tracked = target.get('old_price_minor')
+            names[target['product_id']] = target.get('name')
+            if tracked is not None:
+                seen.setdefault(target['product_id'], []).append(tracked)
+        notifications = []
+        for product_id, name in names.items():
+            # Ürünün önceki fiyatı: takiplerinin gördüğü en yüksek fiyat (bilinmiyorsa None)
+            old_minor = max(seen[product_id]) if product_id in seen else None
+            notifications.extend(alert_engine.evaluate(product_id, old_minor, new_minor, name=name, now=now))
+        return notifications
+
     def check_product_price(self, product_id):
-        """Belirli bir ürünün fiyatını kontrol et"""
+        """
+        Belirli bir ürünün fiyatını kontrol et.
+        Önceki fiyat takip kaydının fiyatıdır (ürün kaydı bu yolda güncellenmez);
+        fiyat düştüğünde veya alarm tetiklendiğinde takip ilerletilir, böylece
+        aynı eşik sonraki kontrollerde tekrar bildirim üretmez (toplu taramadaki gibi).
+        """
         try:
             from app.models.product import Product
+            from app.repositories import get_repository
             
             product = Product.get_by_id(product_id)
             if not product:
                 return {'error': 'Product not found'}
             
             # Scrape current price
-            scraped_data = self.scraping_service.scrape_product(product.url)
+            scraped_data = self.scraping_service.scrape_product(product.url, allow_stale=False)
             
             if not scraped_data or not scraped_data.get('price'):
                 return {'error': 'Could not scrape price'}
             
+            repo = get_repository()
+            tracking = repo.get_price_tracking_by_product_and_user(product_id, product.user_id)
             new_price = scraped_data['price']
-            old_price = product.current_price or product.price
+            new_minor = to_minor_units(new_price)
+            if tracking and tracking.get('current_price'):
+                old_price = tracking['current_price']
+                old_minor = tracking.get('current_price_minor')
+                if old_minor is None:
+                    old_minor = to_minor_units(old_price)
+            else:
+                old_price = product.current_price or product.price
+                old_minor = to_minor_units(old_price)
 
-            # Fiyat değişimini hesapla (numeric)
-            change_info = self._calculate_price_change(old_price, new_price)
+            # Fiyat değişimini hesapla (kuruş)
+            change_info = self._minor_change(old_minor, new_minor)
             change_amount = change_info.get('amount', 0)
 
             # Küçük oynamaları önemseme, en az 0.5 TL düşüş olsun
             price_changed = change_amount < -0.5
-            
-            if price_changed:
-                # Takip kaydını bul ve fiyatı güncelle
-                tracking = PriceTracking.get_by_product_and_user(product_id, product.user_id)
-                if tracking:
-                    PriceTracking.update_price(tracking[0], new_price)
-
-                    # Fiyat düşüşü bildirimi oluştur
-                    Notification.create(
-                        user_id=product.user_id,
-                        product_id=product.id,
-                        type='PRICE_DROP' if change_amount < 0 else 'PRICE_CHANGE',
-                        message=f"{product.name} fiyatı değişti: {old_price} → {new_price}",
-                        payload={
+
+            # Eşiği geçilen alarmlar (indeks üzerinden)
+            now = datetime.now()
+            alerts = alert_engine.evaluate(product.id, old_minor, new_minor, name=product.name, now=now)
+            if not tracking:
+                alert_engine.dispatch(alerts)
+            else:
+                update = {'id': tracking['id'], 'last_checked': now}
+                history_entries, notifications = [], list(alerts)
+                if alerts or price_changed:
+                    # Alarmı tetiklenen takibin fiyatı her durumda ilerler (aynı eşik tekrar tetiklenmesin)
+                    update['current_price'] = new_price
+                    update['current_price_minor'] = new_minor
+                    update['price_change'] = str(change_amount)
+                if price_changed:
+                    history_entries.append({'product_id': product.id, 'price': new_price, 'recorded_at': now})
+                    notifications.append({
+                        'user_id': product.user_id,
+                        'product_id': product.id,
+                        'notification_type': 'PRICE_DROP',
+                        'message': f"{product.name} fiyatı değişti: {old_price} → {new_price}",
+                        'payload': json.dumps({
                             "old_price": old_price,
                             "new_price": new_price,
                             "change": change_amount,
                             "percentage": change_info.get('percentage', 0)
-                        }
-                    )
+                        }, ensure_ascii=False),
+                        'created_at': now,
+                    })
+                # Takip, geçmiş ve bildirimler tek transaction'da
+                repo.record_price_checks([update], history_entries, notifications)
             
             return {
                 'product_id': product_id,
                 'old_price': old_price,
                 'new_price': new_price,
                 'price_changed': price_changed,
-                'price_change': change_info
+                'price_change': change_info,
+                'alerts': len(alerts)
             }
         except Exception as e:
             print(f"Error in check_product_price: {e}")
             return {'error': str(e)}
     
     def _calculate_price_change(self, old_price, new_price):
-        """Fiyat değişimini hesapla (daha dayanıklı parsing ile)."""
-        try:
-            old_num = self._parse_price(old_price)
-            new_num = self._parse_price(new_price)
-
-            # Parse edemediysek veya eski fiyat saçmaysa
-            if old_num is None or new_num is None or old_num <= 0:
-                return {'amount': 0, 'percentage': 0}
-
-            change = new_num - old_num
-            percentage = (change / old_num) * 100
+        """Fiyat değişimini hesapla (string fiyatlar price_parser ile çözülür)."""
+        return self._minor_change(to_minor_units(old_price), to_minor_units(new_price))
 
-            return {
-                'amount': round(change, 2),
-                'percentage': round(percentage, 2)
-            }
-        except Exception:
+    @staticmethod
+    def _minor_change(old_minor, new_minor):
+        """Kuruş cinsinden iki fiyat arasındaki değişim: {'amount': TL, 'percentage': %}"""
+        # Parse edemediysek veya eski fiyat saçmaysa
+        if old_minor is None or new_minor is None or old_minor <= 0:
             return {'amount': 0, 'percentage': 0}
 
+        change = new_minor - old_minor
+        return {
+            'amount': change / 100,
+            'percentage': round(change * 100 / old_minor, 2)
+        }
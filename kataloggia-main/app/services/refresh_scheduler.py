@@ -0,0 +1,339 @@
+"""
+Refresh Scheduler
+Fiyat takibi için ürün (URL grubu) bazlı uyarlanabilir kontrol aralıkları
+
+Her URL grubu için bir sonraki kontrol zamanı bir öncelik kuyruğunda
+tutulur (Redis varsa sorted set, yoksa process içi heap). Aralık:
+
+- gözlenen fiyat oynaklığına (değişim olaylarının EWMA'sı) göre
+  MIN_INTERVAL ile MAX_INTERVAL arasında seçilir,
+- fiyat bir alert_price eşiğine yaklaştıkça kısalır,
+- domain'in tarama maliyetiyle (site_registry) uzar,
+- kampanya dönemlerinde (11.11, Efsane Cuma, yılbaşı...) kısalır.
+
+Saatlik global bütçe (PRICE_SCRAPE_BUDGET_PER_HOUR) aşılırsa vadesi gelen
+gruplar en gecikmiş olandan başlayarak bir sonraki tura ertelenir.
+
+select_due seçtiği grupları kiralar (Redis'te SET NX EX); üst üste binen
+bir tarama turu aynı grubu tekrar göndermez. Kira record() ile bırakılır,
+worker çökerse LEASE_TTL sonunda kendiliğinden düşer.
+
+record() ürün -> grup anahtarı eşlemesini de saklar; pending_product_ids bu
+eşlemeyle vadesi gelmemiş ürünleri, ürün kayıtları okunmadan önce eler
+(her beat tüm ürünleri repository'den çekmez).
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from app.services.cache_service import cache_service
+from price_parser import to_float
+
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = 48 * 3600
+FAILURE_RETRY = 3600
+# Yeni ürün için oynaklık tahmini (henüz gözlem yok)
+INITIAL_VOLATILITY = 0.5
+VOLATILITY_ALPHA = 0.3
+# alert_price'ın bu oran kadar üstündeki fiyatlar "yakın" sayılır
+ALERT_PROXIMITY = 0.10
+CAMPAIGN_FACTOR = 0.5
+
+# (başlangıç AA-GG, bitiş AA-GG) - PRICE_CAMPAIGN_PERIODS="11-20:11-30,12-20:12-31" ile değiştirilebilir
+DEFAULT_CAMPAIGN_PERIODS = (
+    ('11-10', '11-12'),   # 11.11
+    ('11-20', '11-30'),   # Efsane Cuma / Black Friday
+    ('12-20', '12-31'),   # Yılbaşı
+    ('02-07', '02-14'),   # Sevgililer Günü
+)
+
+STATE_TTL = 30 * 24 * 3600
+# Seçilen grubun kira süresi: tarama chunk'ının bitmesi için üst sınır
+LEASE_TTL = 30 * 60
+
+
+def _parse_campaigns(value):
+    periods = []
+    for part in (value or '').split(','):
+        if ':' in part:
+            start, end = part.strip().split(':', 1)
+            periods.append((start.strip(), end.strip()))
+    return tuple(periods)
+
+
+def in_campaign(now=None, periods=None):
+    """Tarih bir kampanya döneminde mi"""
+    day = (now or datetime.now()).strftime('%m-%d')
+    return any(start <= day <= end for start, end in (periods or DEFAULT_CAMPAIGN_PERIODS))
+
+
+def domain_cost(url):
+    """site_registry'deki göreli tarama maliyeti (kayıt yoksa 1)"""
+    try:
+        from scraper import site_registry
+    except ImportError:
+        return 1.0
+    handler = site_registry.resolve(url)
+    return handler.scrape_cost_factor if handler else 1.0
+
+
+def compute_interval(volatility, price=None, alert_prices=(), cost=1.0, campaign=False):
+    """Oynaklık, alarm yakınlığı, domain maliyeti ve kampanyaya göre kontrol aralığı (sn)"""
+    volatility = min(1.0, max(0.0, volatility))
+    # Oynaklık 0 -> MAX, 1 -> MIN (geometrik ara değer)
+    interval = MAX_INTERVAL * (MIN_INTERVAL / MAX_INTERVAL) ** volatility
+
+    if price:
+        gaps = [(price - alert) / price for alert in alert_prices if alert and alert < price]
+        if gaps and min(gaps) <= ALERT_PROXIMITY:
+            interval *= max(0.25, min(gaps) / ALERT_PROXIMITY)
+
+    interval *= max(0.25, cost)
+    if campaign:
+        interval *= CAMPAIGN_FACTOR
+    return int(min(MAX_INTERVAL, max(MIN_INTERVAL, interval)))
+
+
+class _MemoryBackend:
+    """Process içi kuyruk / durum / bütçe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._due = {}
+        self._state = {}
+        self._budget = {}
+        self._leases = {}
+        self._product_keys = {}
+
+    def due_times(self, keys):
+        with self._lock:
+            return {key: self._due.get(key) for key in keys}
+
+    def product_keys(self, product_ids):
+        with self._lock:
+            return {product_id: self._product_keys.get(product_id) for product_id in product_ids}
+
+    def map_products(self, mapping):
+        with self._lock:
+            self._product_keys.update(mapping)
+
+    def schedule(self, key, due_at, state):
+        with self._lock:
+            self._due[key] = due_at
+            self._state[key] = state
+            heapq.heappush(self._heap, (due_at, key))
+
+    def peek(self):
+        with self._lock:
+            # Yeniden planlanan anahtarların eski kayıtları tembel şekilde atılır
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0] if self._heap else None
+
+    def state(self, key):
+        with self._lock:
+            return self._state.get(key)
+
+    def claim(self, keys, now, ttl):
+        with self._lock:
+            claimed = [key for key in keys if self._leases.get(key, 0) <= now]
+            for key in claimed:
+                self._leases[key] = now + ttl
+            return claimed
+
+    def release(self, keys):
+        with self._lock:
+            for key in keys:
+                self._leases.pop(key, None)
+
+    def take_budget(self, hour, wanted, limit):
+        with self._lock:
+            used = self._budget.get(hour, 0)
+            granted = max(0, min(wanted, limit - used))
+            self._budget = {hour: used + granted}
+            return granted
+
+
+class _RedisBackend:
+    """Tüm worker'ların paylaştığı Redis kuyruğu"""
+
+    PREFIX = 'refresh'
+
+    def __init__(self, client):
+        self.client = client
+
+    def due_times(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.zscore(f"{self.PREFIX}:queue", key)
+        return dict(zip(keys, pipe.execute()))
+
+    def product_keys(self, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        return dict(zip(product_ids, self.client.hmget(f"{self.PREFIX}:product_keys", product_ids)))
+
+    def map_products(self, mapping):
+        if mapping:
+            self.client.hset(f"{self.PREFIX}:product_keys", mapping=mapping)
+
+    def schedule(self, key, due_at, state):
+        pipe = self.client.pipeline()
+        pipe.zadd(f"{self.PREFIX}:queue", {key: due_at})
+        pipe.setex(f"{self.PREFIX}:state:{key}", STATE_TTL, json.dumps(state))
+        pipe.execute()
+
+    def peek(self):
+        first = self.client.zrange(f"{self.PREFIX}:queue", 0, 0, withscores=True)
+        return (first[0][1], first[0][0]) if first else None
+
+    def state(self, key):
+        value = self.client.get(f"{self.PREFIX}:state:{key}")
+        return json.loads(value) if value else None
+
+    def claim(self, keys, now, ttl):
+        keys = list(keys)
+        if not keys:
+            return []
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.set(f"{self.PREFIX}:lease:{key}", int(now), nx=True, ex=max(1, int(ttl)))
+        return [key for key, ok in zip(keys, pipe.execute()) if ok]
+
+    def release(self, keys):
+        if keys:
+            self.client.delete(*[f"{self.PREFIX}:lease:{key}" for key in keys])
+
+    def take_budget(self, hour, wanted, limit):
+        budget_key = f"{self.PREFIX}:budget:{hour}"
+        pipe = self.client.pipeline()
+        pipe.incrby(budget_key, wanted)
+        pipe.expire(budget_key, 7200)
+        used = int(pipe.execute()[0])
+        granted = max(0, min(wanted, limit - (used - wanted)))
+        if granted < wanted:
+            self.client.decrby(budget_key, wanted - granted)
+        return granted
+
+
+class RefreshScheduler:
+    """URL grubu bazlı sonraki-kontrol kuyruğu + saatlik tarama bütçesi"""
+
+    def __init__(self, redis_client=None, budget_per_hour=600, campaign_periods=None, lease_ttl=LEASE_TTL):
+        self.budget_per_hour = budget_per_hour
+        self.lease_ttl = lease_ttl
+        self.campaign_periods = campaign_periods or DEFAULT_CAMPAIGN_PERIODS
+        self._memory = _MemoryBackend()
+        self._redis = _RedisBackend(redis_client) if redis_client else None
+
+    def _call(self, method, *args):
+        """Redis varsa onu, hata olursa process içi durumu kullan"""
+        if self._redis is not None:
+            try:
+                return getattr(self._redis, method)(*args)
+            except Exception as e:
+                print(f"[WARNING] Refresh scheduler Redis error: {e}")
+        return getattr(self._memory, method)(*args)
+
+    def select_due(self, groups, now=None):
+        """
+        Vadesi gelmiş grupları en gecikmiş olandan başlayarak saatlik bütçe
+        kadar döndür. Kuyrukta hiç olmayan (yeni) gruplar hemen vadelidir.
+        Dönen gruplar record() çağrılana kadar kiralıdır; başka bir tur
+        (ör. üst üste binen beat) onları tekrar seçmez.
+        """
+        now = now or time.time()
+        due_times = self._call('due_times', [group['key'] for group in groups])
+        due = [group for group in groups if (due_times.get(group['key']) or 0) <= now]
+        due.sort(key=lambda group: due_times.get(group['key']) or 0)
+        if not due:
+            return []
+
+        claimed = set(self._call('claim', [group['key'] for group in due], now, self.lease_ttl))
+        if len(claimed) < len(due):
+            print(f"[INFO] Price sweep: {len(due) - len(claimed)} groups already claimed by another sweep")
+        due = [group for group in due if group['key'] in claimed]
+        if not due:
+            return []
+
+        hour = datetime.fromtimestamp(now).strftime('%Y%m%d%H')
+        granted = self._call('take_budget', hour, len(due), self.budget_per_hour)
+        if granted < len(due):
+            print(f"[INFO] Price sweep budget reached: {len(due) - granted} groups deferred")
+            self._call('release', [group['key'] for group in due[granted:]])
+        return due[:granted]
+
+    def pending_product_ids(self, product_ids, now=None):
+        """
+        Kontrolü gerekebilecek ürünler: grup anahtarı henüz bilinmeyen (yeni)
+        veya anahtarının vadesi gelmiş olanlar. Ürün kayıtlarını okumadan önce
+        vadesi gelmeyenleri elemek için; kesin seçim yine select_due'dadır.
+        """
+        now = now or time.time()
+        product_ids = [product_id for product_id in product_ids if product_id]
+        keys = self._call('product_keys', product_ids)
+        due_times = self._call('due_times', {key for key in keys.values() if key})
+        return {product_id for product_id in product_ids
+                if not keys.get(product_id) or (due_times.get(keys[product_id]) or 0) <= now}
+
+    def record(self, group, price=None, now=None):
+        """
+        Grubun kontrol sonucunu işle ve sonraki kontrolü planla; sonraki
+        kontrole kalan süreyi (sn) döndürür. price=None: tarama başarısız.
+        """
+        now = now or time.time()
+        key = group['key']
+        state = self._call('state', key) or {'volatility': INITIAL_VOLATILITY, 'last_price': None, 'checks': 0}
+
+        if price is None:
+            interval = FAILURE_RETRY
+        else:
+            price_num = to_float(price)
+            last_price = to_float(state.get('last_price'))
+            if last_price is not None and price_num is not None:
+                changed = 1.0 if abs(price_num - last_price) >= 0.01 else 0.0
+                state['volatility'] = (1 - VOLATILITY_ALPHA) * state['volatility'] + VOLATILITY_ALPHA * changed
+            state['last_price'] = price_num
+            state['checks'] = state.get('checks', 0) + 1
+
+            alerts = [target['alert_price_minor'] / 100 if target.get('alert_price_minor') is not None
+                      else to_float(target.get('alert_price')) for target in group.get('targets', [])]
+            interval = compute_interval(
+                state['volatility'],
+                price=price_num,
+                alert_prices=[alert for alert in alerts if alert],
+                cost=domain_cost(group['url']),
+                campaign=in_campaign(datetime.fromtimestamp(now), self.campaign_periods),
+            )
+
+        state['interval'] = interval
+        self._call('map_products', {target['product_id']: key for target in group.get('targets', [])
+                                    if target.get('product_id')})
+        self._call('schedule', key, now + interval, state)
+        self._call('release', [key])
+        return interval
+
+    def stats(self):
+        nxt = self._call('peek')
+        return {
+            'budget_per_hour': self.budget_per_hour,
+            'next_key': nxt[1] if nxt else None,
+            'next_due_in': round(max(0.0, nxt[0] - time.time()), 1) if nxt else None,
+        }
+
+
+# Global zamanlayıcı (PriceTrackingService kullanır)
+refresh_scheduler = RefreshScheduler(
+    redis_client=cache_service.redis_client,
+    budget_per_hour=int(os.environ.get('PRICE_SCRAPE_BUDGET_PER_HOUR', 600)),
+    campaign_periods=_parse_campaigns(os.environ.get('PRICE_CAMPAIGN_PERIODS')),
+    lease_ttl=int(os.environ.get('PRICE_SWEEP_LEASE_SECONDS', LEASE_TTL)),
+)
@@ -0,0 +1,194 @@
+"""
+Scrape Cache
+Scrape sonuçları için katmanlı cache: process içi LRU + Redis
+
+- Anahtar kanonik URL'dir (url_canonical.url_hash), tracking parametreleri
+  aynı kayda düşer.
+- Süre domain bazlıdır: fiyatı sık değişen pazaryerleri daha kısa tutulur.
+- Süresi dolan kayıt `stale_ttl` boyunca "stale" olarak döner; isim/görsel
+  değişmediği için sadece fiyat eskimiş olabilir, çağıran arka planda
+  yeniler (stale-while-revalidate).
+- Kalıcı hatalar (ürün verisi çıkarılamadı) kısa süreliğine negatif
+  cache'lenir, aynı bozuk link tekrar tekrar tarayıcı açtırmaz.
+"""
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from app.services.cache_service import cache_service
+from app.utils.url_canonical import url_hash
+
+KEY_PREFIX = 'scrape'
+
+DEFAULT_TTL = 3600
+# Host suffix -> taze kalma süresi (sn)
+DOMAIN_TTLS = {
+    'trendyol.com': 900,
+    'hepsiburada.com': 900,
+    'amazon.com.tr': 900,
+    'n11.com': 900,
+    'mediamarkt.com.tr': 1800,
+    'teknosa.com': 1800,
+}
+STALE_TTL = 6 * 3600
+NEGATIVE_TTL = 300
+
+FRESH = 'fresh'
+STALE = 'stale'
+NEGATIVE = 'negative'
+
+
+def domain_ttl(url):
+    """URL'nin domain'i için taze kalma süresi"""
+    host = (urlparse(url).hostname or '').lower()
+    for suffix, ttl in DOMAIN_TTLS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return ttl
+    return DEFAULT_TTL
+
+
+class ScrapeCache:
+    """LRU (L1) + Redis (L2) scrape sonucu cache'i"""
+
+    def __init__(self, max_entries=1024, stale_ttl=STALE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._refreshing = set()
+        self._counters = {
+            'hits_memory': 0, 'hits_redis': 0, 'misses': 0, 'stale': 0,
+            'negative_hits': 0, 'sets': 0, 'negative_sets': 0, 'evictions': 0,
+        }
+
+    def _key(self, url):
+        return f"{KEY_PREFIX}:{url_hash(url)}"
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, key, envelope):
+        with self._lock:
+            self._lru[key] = envelope
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _classify(self, envelope, now):
+        if now < envelope['fresh_until']:
+            return NEGATIVE if envelope.get('negative') else FRESH
+        if not envelope.get('negative') and now < envelope['stale_until']:
+            return STALE
+        return None
+
+    def get(self, url, record=True):
+        """(değer, durum) döndür; durum 'fresh' | 'stale' | 'negative' | None (miss)"""
+        key = self._key(url)
+        now = time.time()
+
+        with self._lock:
+            envelope = self._lru.get(key)
+            if envelope is not None:
+                self._lru.move_to_end(key)
+        source = 'hits_memory'
+        state = self._classify(envelope, now) if envelope else None
+
+        # L1'de yok, süresi dolmuş veya stale: başka bir worker Redis'i tazelemiş olabilir
+        if state not in (FRESH, NEGATIVE) and cache_service.redis_client:
+            remote = cache_service.get(key)
+            remote_state = None
+            if isinstance(remote, dict) and 'fresh_until' in remote:
+                remote_state = self._classify(remote, now)
+            # Stale L1 yalnızca taze kayıtla değişir (negatif kayıt stale değeri gizlemez)
+            if remote_state is not None and (state is None or remote_state == FRESH):
+                self._remember(key, remote)
+                envelope, state, source = remote, remote_state, 'hits_redis'
+        if envelope is not None and state is None:
+            with self._lock:
+                if self._lru.get(key) is envelope:
+                    del self._lru[key]
+        if record:
+            if state is None:
+                self._count('misses')
+            elif state == NEGATIVE:
+                self._count('negative_hits')
+            else:
+                self._count(source if state == FRESH else 'stale')
+        if state is None or state == NEGATIVE:
+            return None, state
+        return envelope['value'], state
+
+    def _store(self, url, envelope, expiration):
+        key = self._key(url)
+        self._remember(key, envelope)
+        if cache_service.redis_client:
+            cache_service.set(key, envelope, expiration=max(1, int(expiration)))
+
+    def set(self, url, value):
+        """Başarılı scrape sonucunu domain TTL'i + stale penceresi ile sakla"""
+        now = time.time()
+        ttl = domain_ttl(url)
+        envelope = {
+            'value': value,
+            'stored_at': now,
+            'fresh_until': now + ttl,
+            'stale_until': now + ttl + self.stale_ttl,
+        }
+        self._store(url, envelope, ttl + self.stale_ttl)
+        self._count('sets')
+
+    def set_negative(self, url):
+        """Kalıcı hatayı kısa süreliğine hatırla"""
+        now = time.time()
+        envelope = {
+            'value': None,
+            'negative': True,
+            'stored_at': now,
+            'fresh_until': now + self.negative_ttl,
+            'stale_until': now + self.negative_ttl,
+        }
+        self._store(url, envelope, self.negative_ttl)
+        self._count('negative_sets')
+
+    def delete(self, url):
+        key = self._key(url)
+        with self._lock:
+            self._lru.pop(key, None)
+        cache_service.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        cache_service.clear(f"{KEY_PREFIX}:*")
+
+    def begin_refresh(self, url):
+        """Stale kayıt için arka plan yenilemesini tek seferde başlat (True: bu çağıran yenilesin)"""
+        key = self._key(url)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, url):
+        with self._lock:
+            self._refreshing.discard(self._key(url))
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['memory_entries'] = len(self._lru)
+        lookups = counters['hits_memory'] + counters['hits_redis'] + counters['stale'] + \
+            counters['negative_hits'] + counters['misses']
+        hits = lookups - counters['misses']
+        counters['hit_rate'] = round(hits / lookups, 3) if lookups else 0.0
+        return counters
+
+
+# Global scrape cache
+scrape_cache = ScrapeCache()
@@ -2,13 +2,20 @@
 Scraping Service
 Web scraping business logic with caching
 """
-import asyncio
-import hashlib
 import sys
 import os
+import threading
 from urllib.parse import urlparse
 
-from app.services.cache_service import cache_service, cached
+from app.services.cache_service import cache_service
+from app.services.scrape_cache import FRESH, NEGATIVE, STALE, scrape_cache
+from app.utils.single_flight import SingleFlight
+from app.utils.url_canonical import url_hash
+from http_fetcher import NOT_FOUND_STATUSES, PermanentScrapeError
+from price_parser import format_price, parse_price
+
+# Eşzamanlı aynı-URL scrape'lerini birleştirir
+scrape_flight = SingleFlight(cache_service.redis_client, prefix='singleflight:scrape')
 
 
 class ScrapingService:
@@ -21,177 +28,199 @@ class ScrapingService:
         if parent_dir not in sys.path:
             sys.path.insert(0, parent_dir)
 
-    @cached(expiration=3600, key_prefix='scrape')
-    def scrape_product(self, url):
-        """Tek bir ürünü çek (cached) - güvenli ve filtreli"""
+    def scrape_product(self, url, allow_stale=True):
+        """
+        Tek bir ürünü çek (cached) - güvenli ve filtreli.
+        allow_stale=False: süresi dolmuş cache kaydı kabul edilmez (fiyat kontrolü için).
+        """
         try:
-            # clear_scraping_cache ile uyumlu manual cache key
-            cache_key = f"scrape:{hashlib.md5(url.encode()).hexdigest()}"
-            cached_result = cache_service.get(cache_key)
-            if cached_result:
+            value, state = scrape_cache.get(url)
+            if state == FRESH:
                 print(f"[DEBUG] Using cached result for: {url}")
-                return cached_result
+                return value
+            if state == NEGATIVE:
+                print(f"[DEBUG] Recent scraping failure cached for: {url}")
+                return None
+            if state == STALE and allow_stale:
+                # Eski fiyatla hemen dön, arka planda yenile
+                print(f"[DEBUG] Using stale cached result for: {url}")
+                self._refresh_in_background(url)
+                return value
+
+            # Aynı URL için eşzamanlı çağrılar tek bir scrape'i bekler (process içi + Redis)
+            return scrape_flight.do(url_hash(url), lambda: self._scrape_and_cache(url))
+
+        except Exception as e:
+            print(f"[ERROR] Scraping error: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            print(f"[DEBUG] Scraping URL: {url}")
+    def _refresh_in_background(self, url):
+        """Stale cache kaydını arka planda tek bir scrape ile yenile"""
+        if not scrape_cache.begin_refresh(url):
+            return
 
-            # 1) Domain kontrolü - Artık tüm siteleri destekliyoruz
-            parsed = urlparse(url)
-            domain = (parsed.netloc or "").lower().replace("www.", "")
-            
-            # 2) scraper.py içindeki scrape_product fonksiyonunu çağır
+        def _run():
             try:
-                from scraper import scrape_product as base_scrape
-            except ImportError as e:
-                print(f"[ERROR] Could not import scraper: {e}")
+                scrape_flight.do(url_hash(url), lambda: self._scrape_and_cache(url))
+            finally:
+                scrape_cache.end_refresh(url)
+
+        threading.Thread(target=_run, name='scrape-refresh', daemon=True).start()
+
+    def _scrape_and_cache(self, url):
+        """
+        Scraper'ı çalıştır; başarıyı cache'e, kesin hatayı (404/410, yüklenen
+        sayfada ürün yok) negatif cache'e yaz. Geçici hatalar (timeout, engel,
+        DomainPausedError -> None) cache'lenmez, sonraki istek tekrar dener.
+        """
+        # Lider olana kadar başka bir worker sonucu cache'e yazmış olabilir
+        value, state = scrape_cache.get(url, record=False)
+        if state == FRESH:
+            return value
+        if state == NEGATIVE:
+            return None
+
+        try:
+            result = self._scrape_uncached(url)
+        except PermanentScrapeError as e:
+            if e.status not in NOT_FOUND_STATUSES:
+                print(f"[ERROR] Scraping error: {e}")
                 return None
+            print(f"[WARNING] Page not found, caching: {e}")
+            scrape_cache.set_negative(url)
+            return None
+        except Exception as e:
+            # Geçici hata (timeout, bağlantı): negatif cache'leme
+            print(f"[ERROR] Scraping error: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            result = base_scrape(url)
-            print(f"[DEBUG] Raw scraping result: {result}")
+        if result:
+            scrape_cache.set(url, result)
+        return result
 
-            if not result:
-                print(f"[ERROR] Scraping returned no result for: {url}")
-                return None
+    def _scrape_uncached(self, url):
+        """
+        Scraper'ı çalıştır, sonucu doğrula ve formatla. Başlık/fiyat/görsel
+        eksikse None (çoğu zaman geçici render / consent / bot duvarı);
+        PermanentScrapeError yalnızca doğrulanmış 404/410'da scraper'dan gelir.
+        """
+        print(f"[DEBUG] Scraping URL: {url}")
 
-            # 3) Title kontrolü
-            raw_title = (result.get("title") or "").strip()
-            if not raw_title:
-                print(f"[ERROR] Product title not found in result: {result}")
-                return None
+        # 1) Domain kontrolü - Artık tüm siteleri destekliyoruz
+        parsed = urlparse(url)
+        domain = (parsed.netloc or "").lower().replace("www.", "")
 
-            upper_title = raw_title.upper()
-            if ("ACCESS DENIED" in upper_title or
-                "FORBIDDEN" in upper_title or
-                "BOT DETECTED" in upper_title):
-                print(f"[ERROR] Access denied / bot page detected for: {url}")
-                return None
+        # 2) scraper.py içindeki scrape_product fonksiyonunu çağır
+        try:
+            from scraper import scrape_product as base_scrape
+        except ImportError as e:
+            print(f"[ERROR] Could not import scraper: {e}")
+            return None
 
-            # 4) Fiyat
-            raw_price = result.get("price")
-            if not raw_price or not str(raw_price).strip():
-                print(f"[ERROR] Price not found in result: {result}")
-                return None
+        result = base_scrape(url)
+        print(f"[DEBUG] Raw scraping result: {result}")
 
-            price = self._clean_price(raw_price)
-            if not price:
-                print(f"[ERROR] Price cleaning failed for: {raw_price}")
-                return None
+        if not result:
+            print(f"[ERROR] Scraping returned no result for: {url}")
+            return None
 
-            # 5) Görsel zorunlu
-            image = result.get("image")
-            if not image or not str(image).strip():
-                print(f"[ERROR] Image not found in result: {result}")
-                return None
+        # 3) Title kontrolü
+        raw_title = (result.get("title") or "").strip()
+        if not raw_title:
+            print(f"[ERROR] Product title not found in result: {result}")
+            return None
+
+        upper_title = raw_title.upper()
+        if ("ACCESS DENIED" in upper_title or
+            "FORBIDDEN" in upper_title or
+            "BOT DETECTED" in upper_title):
+            print(f"[ERROR] Access denied / bot page detected for: {url}")
+            return None
 
-            # 6) Marka yoksa domain'den üret
-            brand = result.get("brand")
-            if not brand or not str(brand).strip() or brand == "UNKNOWN":
-                brand = domain.split('.')[0].upper() if domain else "UNKNOWN"
-            
-            # Clean old_price if exists
-            old_price = result.get("original_price")
-            if old_price:
-                old_price = self._clean_price(old_price)
-
-            formatted_result = {
-                "name": raw_title,
-                "price": price,
-                "image": image,
-                "brand": brand,
-                "url": url,
-                "images": result.get("images", [image]),
-                "old_price": old_price,
-                "discount_message": result.get("discount_message")
-            }
-
-            # Manual cache + decorator cache beraber çalışacak, sorun değil
-            cache_service.set(cache_key, formatted_result, expiration=3600)
-            print(
-                f"[DEBUG] Scraping successful - Name: {formatted_result.get('name')}, "
-                f"Price: {formatted_result.get('price')}, Brand: {formatted_result.get('brand')}"
-            )
-            return formatted_result
+        # 4) Fiyat
+        raw_price = result.get("price")
+        if not raw_price or not str(raw_price).strip():
+            print(f"[ERROR] Price not found in result: {result}")
+            return None
 
-        except Exception as e:
-            print(f"[ERROR] Scraping error: {e}")
-            import traceback
-            traceback.print_exc()
+        parsed_price = parse_price(raw_price)
+        if not parsed_price or parsed_price.minor <= 0:
+            print(f"[ERROR] Price cleaning failed for: {raw_price}")
             return None
+        price = format_price(parsed_price.minor, parsed_price.currency)
+
+        # 5) Görsel zorunlu
+        image = result.get("image")
+        if not image or not str(image).strip():
+            print(f"[ERROR] Image not found in result: {result}")
+            return None
+
+        # 6) Marka yoksa domain'den üret
+        brand = result.get("brand")
+        if not brand or not str(brand).strip() or brand == "UNKNOWN":
+            brand = domain.split('.')[0].upper() if domain else "UNKNOWN"
+
+        # Clean old_price if exists
+        old_price = result.get("original_price")
+        if old_price:
+            old_price = self._clean_price(old_price)
+
+        formatted_result = {
+            "name": raw_title,
+            "price": price,
+            "price_minor": parsed_price.minor,
+            "currency": parsed_price.currency,
+            "image": image,
+            "brand": brand,
+            "url": url,
+            "images": result.get("images", [image]),
+            "old_price": old_price,
+            "discount_message": result.get("discount_message")
+        }
+
+        print(
+            f"[DEBUG] Scraping successful - Name: {formatted_result.get('name')}, "
+            f"Price: {formatted_result.get('price')}, Brand: {formatted_result.get('brand')}"
+        )
+        return formatted_result
+
+    def iter_scrape_multiple(self, urls):
+        """
+        Toplu ürün çekme (akış): URL'ler eşzamanlı çekilir, her biri bittiğinde
+        {'index', 'url', 'success', 'data', 'error', 'elapsed_ms'} döner.
+        """
+        from batch_engine import batch_engine
+
+        for item in batch_engine.iter_sync(urls, self.scrape_product):
+            yield item.to_dict()
 
     def scrape_multiple(self, urls):
-        """Toplu ürün çekme"""
-        results = []
-        for url in urls:
-            result = self.scrape_product(url)
-            if result:
-                results.append(result)
-        return results
+        """Toplu ürün çekme (eşzamanlı, başarılı sonuçlar giriş sırasıyla)"""
+        outcomes = sorted(self.iter_scrape_multiple(urls), key=lambda o: o['index'])
+        for outcome in outcomes:
+            if not outcome['success']:
+                print(f"[ERROR] Batch scraping failed for {outcome['url']}: {outcome['error']}")
+        return [outcome['data'] for outcome in outcomes if outcome['success']]
 
     def clear_scraping_cache(self, url=None):
-        """Scraping cache'ini temizle"""
+        """Scraping cache'ini temizle (LRU + Redis)"""
         if url:
-            cache_key = f"scrape:{hashlib.md5(url.encode()).hexdigest()}"
-            cache_service.delete(cache_key)
+            scrape_cache.delete(url)
         else:
-            cache_service.clear("scrape:*")
+            scrape_cache.clear()
+
+    def cache_stats(self):
+        """Scrape cache hit/miss/stale sayaçları"""
+        return scrape_cache.stats()
 
     def _clean_price(self, raw_price):
-        """Helper method to clean and format price strings"""
-        if not raw_price:
+        """Fiyatı çöz ve '1.299,99 TL' biçiminde döndür (price_parser); geçersizse None"""
+        parsed = parse_price(raw_price)
+        if not parsed or parsed.minor <= 0:
+            print(f"[DEBUG] Price could not be parsed: {raw_price}")
             return None
-            
-        price_clean = str(raw_price).strip()
-        
-        try:
-            import re
-            # Sadece sayı ve virgül/nokta kalsın
-            # Para birimi sembollerini temizle
-            price_str = re.sub(r"[^\d,\.]", "", price_clean)
-
-            if not price_str:
-                print(f"[DEBUG] Price string empty after cleaning: {price_clean}")
-                return None
-
-            # Basit mantık:
-            # Eğer hem nokta hem virgül varsa: sondaki ondalıktır, ortadaki binliktir
-            # Eğer sadece virgül varsa: genelde ondalıktır (TR), ama bazen binliktir (US)
-            # Eğer sadece nokta varsa: genelde binliktir (TR), ama bazen ondalıktır (US)
-            
-            price_num = 0.0
-            if "," in price_str and "." in price_str:
-                if price_str.rfind(",") > price_str.rfind("."):
-                    # 1.299,99 formatı (TR/EU) -> Noktaları sil, virgülü nokta yap
-                    price_num = float(price_str.replace(".", "").replace(",", "."))
-                else:
-                    # 1,299.99 formatı (US) -> Virgülleri sil
-                    price_num = float(price_str.replace(",", ""))
-            elif "," in price_str:
-                # Sadece virgül var: 129,90 veya 1,299
-                parts = price_str.split(",")
-                if len(parts[-1]) == 2:
-                    # 129,90 -> 129.90
-                    price_num = float(price_str.replace(",", "."))
-                else:
-                    # 1,299 -> 1299
-                    price_num = float(price_str.replace(",", "."))
-            elif "." in price_str:
-                # Sadece nokta var: 1.299 veya 12.99
-                parts = price_str.split(".")
-                if len(parts[-1]) == 3:
-                     price_num = float(price_str.replace(".", ""))
-                else:
-                     price_num = float(price_str)
-            else:
-                price_num = float(price_str)
-
-            if price_num == 0:
-                return None
-
-            # Türk Lirası formatla
-            if price_num >= 1000:
-                return f"{price_num:,.2f} TL".replace(",", "X").replace(".", ",").replace("X", ".")
-            else:
-                return f"{price_num:.2f} TL".replace(".", ",")
-        except Exception as e:
-            print(f"[DEBUG] Price formatting error: {e}, using raw: {price_clean}")
-            # Fallback: just return raw but stripped
-            return f"{price_clean} TL"
+        return format_price(parsed.minor, parsed.currency)
@@ -0,0 +1,534 @@
+"""
+Search Index
+Kullanıcı başına artımlı inverted index'ler (/api/v1/search/products, /collections)
+
+- Metin alanları Türkçe katlanmış token'lara ayrılır (bkz. app/utils/turkish_text.py);
+  her token ve önekleri (min 2 harf) posting listelerine yazılır, böylece
+  'ayak' sorgusu 'ayakkabı'yı bulur.
+- Metin sorgusu token'ların posting listelerinin kesişimi (en kısa listeden
+  başlanır); marka filtresi marka alanının kendi posting listelerinden.
+- Fiyat aralığı kuruş cinsinden sıralı fiyat kolonundan (bisect) veya aday
+  küme küçükse aday başına kontrolle cevaplanır; hangisi daha ucuzsa.
+- Tam/önek eşleşmesi yoksa yazım hatası toleranslı arama: index'teki tekil
+  token sözlüğü trigram'larına göre ayrıca indekslenir; sorgu token'ı yalnızca
+  trigram paylaşan sözlük token'larıyla karşılaştırılır (katalog boyutundan
+  bağımsız) ve benzerliği SEARCH_FUZZY_CUTOFF altında kalanlar elenir
+  ('adidsa' -> 'adidas', 'masimo duti' -> 'massimo dutti').
+- Facet'ler (marka sayıları, fiyat histogramı, indirimli/indirimsiz) ürün
+  eklenip çıkarıldıkça sayaçlarda tutulur; filtresiz facet isteği sayaçlardan,
+  filtreli istek yalnızca eşleşen ürünler üzerinden toplanır.
+- Sıralama: eşleşme skoru, eşitlikte en yeni kayıt; limit verilirse tamamı
+  sıralanmaz, sınırlı heap ile ilk k alınır.
+- Product/Collection yazımları index'i anında günceller; diğer process'lerin
+  yazımları için index SEARCH_INDEX_TTL_SECONDS sonunda yeniden kurulur.
+  Bellekte en fazla SEARCH_INDEX_MAX_USERS kullanıcı index'i (LRU).
+"""
+import heapq
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+
+from app.utils.turkish_text import prefixes, tokenize, trigrams
+from price_parser import to_minor_units
+
+SEARCH_INDEX_TTL = int(os.environ.get('SEARCH_INDEX_TTL_SECONDS', 300))
+SEARCH_INDEX_MAX_USERS = int(os.environ.get('SEARCH_INDEX_MAX_USERS', 256))
+SEARCH_FUZZY_CUTOFF = float(os.environ.get('SEARCH_FUZZY_CUTOFF', 0.3))
+# Fiyat histogramı sınırları (TL): 0-250, 250-500, ..., 10000+
+PRICE_BUCKET_EDGES = [
+    int(edge) * 100
+    for edge in os.environ.get('SEARCH_PRICE_BUCKETS', '250,500,1000,2500,5000,10000').split(',')
+]
+FACET_BRAND_LIMIT = 20
+
+# Eşleşme ağırlıkları (tam token > önek, ad > marka/açıklama)
+NAME_EXACT = 4
+BRAND_EXACT = 3
+NAME_PREFIX = 2
+BRAND_PREFIX = 1
+DESCRIPTION_EXACT = 2
+DESCRIPTION_PREFIX = 1
+
+
+def _field_terms(text, exact_weight, prefix_weight, terms):
+    for token in tokenize(text):
+        if terms.get(token, 0) < exact_weight:
+            terms[token] = exact_weight
+        for prefix in prefixes(token):
+            if terms.get(prefix, 0) < prefix_weight:
+                terms[prefix] = prefix_weight
+
+
+def _intersect(lists):
+    """Posting listelerinin kesişimi; liste yoksa None (filtre yok)"""
+    if not lists:
+        return None
+    if any(not posting for posting in lists):
+        return set()
+    lists = sorted(lists, key=len)
+    candidates = set(lists[0])
+    for posting in lists[1:]:
+        candidates = {doc_id for doc_id in candidates if doc_id in posting}
+        if not candidates:
+            break
+    return candidates
+
+
+def _price_bucket(price_minor):
+    """Fiyat -> histogram kovası (fiyatsız ürün için None)"""
+    if price_minor is None:
+        return None
+    return bisect_right(PRICE_BUCKET_EDGES, price_minor)
+
+
+def _price_buckets():
+    """Kova sırasıyla (index, etiket, alt sınır, üst sınır) - sınırlar kuruş"""
+    bounds = [0] + PRICE_BUCKET_EDGES
+    buckets = []
+    for i, low in enumerate(bounds):
+        high = bounds[i + 1] if i + 1 < len(bounds) else None
+        label = f"{low // 100}-{high // 100}" if high is not None else f"{low // 100}+"
+        buckets.append((i, label, low, high))
+    return buckets
+
+
+def _is_discounted(product):
+    """İndirim yüzdesi > 0 veya eski fiyat güncel fiyattan yüksek"""
+    percentage = getattr(product, 'discount_percentage', None)
+    if percentage:
+        try:
+            if float(str(percentage).replace('%', '').replace(',', '.').strip()) > 0:
+                return True
+        except ValueError:
+            pass
+    old_price = getattr(product, 'old_price', None)
+    old_minor = to_minor_units(old_price) if old_price else None
+    return old_minor is not None and product.price_minor is not None and old_minor > product.price_minor
+
+
+class TextIndex:
+    """Alan ağırlıklı token/önek posting listeleri + bulanık eşleşme için trigram sözlüğü"""
+
+    # (alan, tam token ağırlığı, önek ağırlığı)
+    FIELDS = ()
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self._terms = {}
+        self._doc_tokens = {}
+        # tam token -> doküman ID'leri; sözlükten düşen token trigram'lardan da çıkar
+        self._token_docs = {}
+        self._trigram_tokens = {}
+        self._trigram_counts = {}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, obj):
+        """Kaydı (yeniden) indeksle"""
+        doc_id = obj.id
+        self.remove(doc_id)
+
+        terms = {}
+        tokens = set()
+        for field, exact_weight, prefix_weight in self.FIELDS:
+            text = getattr(obj, field, None)
+            _field_terms(text, exact_weight, prefix_weight, terms)
+            tokens.update(tokenize(text))
+
+        for term, weight in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = weight
+        for token in tokens:
+            docs = self._token_docs.get(token)
+            if docs is None:
+                docs = self._token_docs[token] = set()
+                grams = trigrams(token)
+                for gram in grams:
+                    self._trigram_tokens.setdefault(gram, set()).add(token)
+                self._trigram_counts[token] = len(grams)
+            docs.add(doc_id)
+
+        self._terms[doc_id] = terms
+        self._doc_tokens[doc_id] = tokens
+        self.docs[doc_id] = obj.to_dict()
+        self._add_extra(obj)
+
+    def remove(self, doc_id):
+        if doc_id not in self.docs:
+            return
+        for term in self._terms.pop(doc_id, {}):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        for token in self._doc_tokens.pop(doc_id, ()):
+            docs = self._token_docs.get(token)
+            if docs is None:
+                continue
+            docs.discard(doc_id)
+            if not docs:
+                del self._token_docs[token]
+                del self._trigram_counts[token]
+                for gram in trigrams(token):
+                    bucket = self._trigram_tokens.get(gram)
+                    if bucket is not None:
+                        bucket.discard(token)
+                        if not bucket:
+                            del self._trigram_tokens[gram]
+        self._remove_extra(doc_id)
+        del self.docs[doc_id]
+
+    def _add_extra(self, obj):
+        """Alt sınıfların ek kolonları (marka, fiyat)"""
+
+    def _remove_extra(self, doc_id):
+        pass
+
+    def similar_tokens(self, token, cutoff=SEARCH_FUZZY_CUTOFF):
+        """Sözlükte token'a trigram benzerliği >= cutoff olan token'lar -> benzerlik"""
+        grams = trigrams(token)
+        shared = {}
+        for gram in grams:
+            for other in self._trigram_tokens.get(gram, ()):
+                shared[other] = shared.get(other, 0) + 1
+        similar = {}
+        for other, count in shared.items():
+            similarity = count / (len(grams) + self._trigram_counts[other] - count)
+            if similarity >= cutoff:
+                similar[other] = similarity
+        return similar
+
+    def fuzzy_scores(self, query, cutoff=SEARCH_FUZZY_CUTOFF):
+        """Doküman ID -> sorgu token'larının en iyi benzerliklerinin ortalaması"""
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return {}
+        best = {}
+        for i, token in enumerate(query_tokens):
+            for other, similarity in self.similar_tokens(token, cutoff).items():
+                for doc_id in self._token_docs[other]:
+                    row = best.get(doc_id)
+                    if row is None:
+                        row = best[doc_id] = [0.0] * len(query_tokens)
+                    if similarity > row[i]:
+                        row[i] = similarity
+        scores = {}
+        for doc_id, row in best.items():
+            score = sum(row) / len(row)
+            if score >= cutoff:
+                scores[doc_id] = score
+        return scores
+
+    def text_match(self, query):
+        """Tüm sorgu token'larını (tam veya önek) içeren kayıtlar -> skor"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        candidates = _intersect([self.postings.get(term) for term in query_terms])
+        return self.text_scores(query_terms, candidates) if candidates else {}
+
+    def text_scores(self, query_terms, candidates):
+        return {
+            doc_id: sum(self.postings[term].get(doc_id, 0) for term in query_terms)
+            for doc_id in candidates
+        }
+
+    def rank(self, scores, limit=None):
+        """Skor, sonra yenilik sırasıyla doküman dict'leri"""
+        docs = self.docs
+
+        def key(doc_id):
+            return (scores[doc_id], docs[doc_id].get('created_at') or '', doc_id)
+
+        if limit is None or limit >= len(scores):
+            ranked = sorted(scores, key=key, reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, scores, key=key)
+        return [docs[doc_id] for doc_id in ranked]
+
+
+class UserProductIndex(TextIndex):
+    """Tek kullanıcının ürünleri için posting listeleri + sıralı fiyat kolonu"""
+
+    FIELDS = (('name', NAME_EXACT, NAME_PREFIX), ('brand', BRAND_EXACT, BRAND_PREFIX))
+
+    def __init__(self):
+        super().__init__()
+        self.brand_postings = {}
+        self.prices = []
+        self.unpriced = set()
+        self._brand_terms = {}
+        self._price_of = {}
+        # Facet sayaçları: ürün başına (marka anahtarı, fiyat kovası, indirimli mi)
+        self._facets_of = {}
+        self.brand_counts = Counter()
+        self.brand_labels = {}
+        self.price_counts = Counter()
+        self.discount_counts = Counter()
+
+    def _add_extra(self, product):
+        product_id = product.id
+        brand_terms = {}
+        _field_terms(product.brand, 1, 1, brand_terms)
+        for term in brand_terms:
+            self.brand_postings.setdefault(term, set()).add(product_id)
+        if product.price_minor is None:
+            self.unpriced.add(product_id)
+        else:
+            insort(self.prices, (product.price_minor, product_id))
+            self._price_of[product_id] = product.price_minor
+        self._brand_terms[product_id] = brand_terms
+
+        brand_label = (product.brand or '').strip()
+        brand_key = ' '.join(tokenize(brand_label)) or None
+        if brand_key:
+            self.brand_counts[brand_key] += 1
+            self.brand_labels.setdefault(brand_key, brand_label)
+        bucket = _price_bucket(product.price_minor)
+        discounted = _is_discounted(product)
+        self.price_counts[bucket] += 1
+        self.discount_counts[discounted] += 1
+        self._facets_of[product_id] = (brand_key, bucket, discounted)
+
+    def _remove_extra(self, product_id):
+        for term in self._brand_terms.pop(product_id, {}):
+            posting = self.brand_postings.get(term)
+            if posting is not None:
+                posting.discard(product_id)
+                if not posting:
+                    del self.brand_postings[term]
+        price = self._price_of.pop(product_id, None)
+        if price is not None:
+            i = bisect_left(self.prices, (price, product_id))
+            if i < len(self.prices) and self.prices[i] == (price, product_id):
+                self.prices.pop(i)
+        self.unpriced.discard(product_id)
+
+        brand_key, bucket, discounted = self._facets_of.pop(product_id)
+        if brand_key:
+            self.brand_counts[brand_key] -= 1
+            if not self.brand_counts[brand_key]:
+                del self.brand_counts[brand_key]
+                self.brand_labels.pop(brand_key, None)
+        for counts, value in ((self.price_counts, bucket), (self.discount_counts, discounted)):
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+
+    def _price_range(self, min_minor, max_minor):
+        lo = 0 if min_minor is None else bisect_left(self.prices, (min_minor,))
+        hi = len(self.prices) if max_minor is None else bisect_left(self.prices, (max_minor + 1,))
+        return lo, hi
+
+    def _price_filter(self, candidates, min_minor, max_minor):
+        """Aday küme (None = tüm ürünler) ∩ fiyat aralığı"""
+        if min_minor is None and max_minor is None:
+            return set(self.docs) if candidates is None else candidates
+        lo, hi = self._price_range(min_minor, max_minor)
+        # Fiyatı çözülemeyen ürün fiyat filtresine takılmaz (eski davranış)
+        if candidates is None or hi - lo < len(candidates):
+            in_range = {pid for _, pid in self.prices[lo:hi]} | self.unpriced
+            return in_range if candidates is None else candidates & in_range
+        return {
+            pid for pid in candidates
+            if pid in self.unpriced
+            or ((min_minor is None or self._price_of[pid] >= min_minor)
+                and (max_minor is None or self._price_of[pid] <= max_minor))
+        }
+
+    def match(self, query='', brand='', min_minor=None, max_minor=None):
+        """Eşleşen ürün ID'leri -> skor"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        brand_terms = list(dict.fromkeys(tokenize(brand)))
+        if (query and not query_terms) or (brand and not brand_terms):
+            return {}
+
+        lists = [self.postings.get(term) for term in query_terms]
+        lists += [self.brand_postings.get(term) for term in brand_terms]
+        candidates = _intersect(lists)
+        if candidates is not None and not candidates:
+            return {}
+        candidates = self._price_filter(candidates, min_minor, max_minor)
+        return self.text_scores(query_terms, candidates)
+
+    def fuzzy_match(self, query, brand='', min_minor=None, max_minor=None, cutoff=SEARCH_FUZZY_CUTOFF):
+        """Yazım hatası toleranslı metin eşleşmesi; marka ve fiyat filtreleri aynen uygulanır"""
+        scores = self.fuzzy_scores(query, cutoff)
+        if not scores:
+            return {}
+        brand_terms = list(dict.fromkeys(tokenize(brand)))
+        candidates = _intersect([scores] + [self.brand_postings.get(term) for term in brand_terms])
+        candidates = self._price_filter(candidates, min_minor, max_minor)
+        return {pid: scores[pid] for pid in candidates}
+
+    def _search_scores(self, query, brand, min_minor, max_minor):
+        scores = self.match(query, brand, min_minor, max_minor)
+        if not scores and query:
+            scores = self.fuzzy_match(query, brand, min_minor, max_minor)
+        return scores
+
+    def search(self, query='', brand='', min_minor=None, max_minor=None, limit=None):
+        """(sonuç dict'leri, toplam eşleşme) - skor, sonra yenilik sırasıyla"""
+        scores = self._search_scores(query, brand, min_minor, max_minor)
+        return self.rank(scores, limit), len(scores)
+
+    def facets(self, product_ids=None, brand_limit=FACET_BRAND_LIMIT):
+        """Marka, fiyat kovası ve indirim sayıları (product_ids=None: tüm ürünler, sayaçlardan)"""
+        if product_ids is None or len(product_ids) == len(self.docs):
+            brand_counts, price_counts, discount_counts = self.brand_counts, self.price_counts, self.discount_counts
+        else:
+            brand_counts, price_counts, discount_counts = Counter(), Counter(), Counter()
+            for product_id in product_ids:
+                brand_key, bucket, discounted = self._facets_of[product_id]
+                if brand_key:
+                    brand_counts[brand_key] += 1
+                price_counts[bucket] += 1
+                discount_counts[discounted] += 1
+
+        top_brands = heapq.nsmallest(brand_limit, brand_counts.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            'brands': [
+                {'value': self.brand_labels.get(key, key), 'key': key, 'count': count}
+                for key, count in top_brands
+            ],
+            'price': [
+                {'bucket': label, 'min_minor': low, 'max_minor': high, 'count': price_counts.get(i, 0)}
+                for i, label, low, high in _price_buckets()
+            ],
+            'unpriced': price_counts.get(None, 0),
+            'discount': {
+                'discounted': discount_counts.get(True, 0),
+                'not_discounted': discount_counts.get(False, 0),
+            },
+        }
+
+    def search_with_facets(self, query='', brand='', min_minor=None, max_minor=None, limit=None,
+                           brand_limit=FACET_BRAND_LIMIT):
+        """(ilk sonuçlar, toplam eşleşme, eşleşen kümenin facet'leri)"""
+        scores = self._search_scores(query, brand, min_minor, max_minor)
+        return self.rank(scores, limit), len(scores), self.facets(scores, brand_limit)
+
+
+class UserCollectionIndex(TextIndex):
+    """Tek kullanıcının koleksiyonları (ad + açıklama)"""
+
+    FIELDS = (('name', NAME_EXACT, NAME_PREFIX), ('description', DESCRIPTION_EXACT, DESCRIPTION_PREFIX))
+
+    def search(self, query, limit=None):
+        """(sonuç dict'leri, toplam eşleşme); tam/önek eşleşme yoksa bulanık"""
+        if not tokenize(query):
+            return [], 0
+        scores = self.text_match(query) or self.fuzzy_scores(query)
+        return self.rank(scores, limit), len(scores)
+
+
+class SearchIndex:
+    """(tür, user_id) -> kullanıcı index'i (LRU, TTL ile yeniden kurulum)"""
+
+    PRODUCTS = 'products'
+    COLLECTIONS = 'collections'
+
+    def __init__(self, ttl=SEARCH_INDEX_TTL, max_users=SEARCH_INDEX_MAX_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._lock = threading.RLock()
+        self._indexes = OrderedDict()
+        self.stats = {'builds': 0, 'hits': 0, 'updates': 0}
+
+    def _build(self, kind, user_id):
+        if kind == self.COLLECTIONS:
+            from app.models.collection import Collection
+
+            index = UserCollectionIndex()
+            for collection in Collection.get_user_collections(user_id):
+                index.add(collection)
+        else:
+            from app.models.product import Product
+
+            index = UserProductIndex()
+            for product in Product.get_by_user_id(user_id):
+                index.add(product)
+        self.stats['builds'] += 1
+        return index
+
+    def _get(self, kind, user_id):
+        key = (kind, user_id)
+        with self._lock:
+            entry = self._indexes.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._indexes.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+        index = self._build(kind, user_id)
+        with self._lock:
+            self._indexes[key] = (time.time(), index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def for_user(self, user_id):
+        return self._get(self.PRODUCTS, user_id)
+
+    def collections_for_user(self, user_id):
+        return self._get(self.COLLECTIONS, user_id)
+
+    def _loaded(self, kind, user_id):
+        entry = self._indexes.get((kind, user_id))
+        return entry[1] if entry is not None else None
+
+    def _saved(self, kind, obj):
+        """Kayıt oluşturuldu/güncellendi (index yüklü değilse ilk aramada kurulur)"""
+        if obj is None:
+            return
+        with self._lock:
+            index = self._loaded(kind, obj.user_id)
+            if index is not None:
+                index.add(obj)
+                self.stats['updates'] += 1
+
+    def _removed(self, kind, doc_id, user_id):
+        with self._lock:
+            index = self._loaded(kind, user_id)
+            if index is not None:
+                index.remove(doc_id)
+                self.stats['updates'] += 1
+
+    def product_saved(self, product):
+        self._saved(self.PRODUCTS, product)
+
+    def product_removed(self, product_id, user_id):
+        self._removed(self.PRODUCTS, product_id, user_id)
+
+    def collection_saved(self, collection):
+        self._saved(self.COLLECTIONS, collection)
+
+    def collection_removed(self, collection_id, user_id):
+        self._removed(self.COLLECTIONS, collection_id, user_id)
+
+    def invalidate(self, user_id, kind=None):
+        with self._lock:
+            for k in ((kind,) if kind else (self.PRODUCTS, self.COLLECTIONS)):
+                self._indexes.pop((k, user_id), None)
+
+    def search(self, user_id, query='', brand='', min_minor=None, max_minor=None, limit=None):
+        index = self.for_user(user_id)
+        with self._lock:
+            return index.search(query, brand, min_minor, max_minor, limit)
+
+    def search_with_facets(self, user_id, query='', brand='', min_minor=None, max_minor=None, limit=None,
+                           brand_limit=FACET_BRAND_LIMIT):
+        index = self.for_user(user_id)
+        with self._lock:
+            return index.search_with_facets(query, brand, min_minor, max_minor, limit, brand_limit)
+
+    def search_collections(self, user_id, query, limit=None):
+        index = self.collections_for_user(user_id)
+        with self._lock:
+            return index.search(query, limit)
+
+
+# Global arama index'i (Product/Collection modelleri ve search API kullanır)
+search_index = SearchIndex()
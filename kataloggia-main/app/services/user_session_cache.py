@@ -0,0 +1,156 @@
+"""
+User Session Cache
+Flask-Login user_loader için kısa ömürlü kullanıcı önbelleği
+
+- Process içi LRU (sınırlı boyut, TTL) + opsiyonel Redis katmanı.
+- Önbellekte User nesnesi değil, alanlarının anlık görüntüsü tutulur;
+  her istek kendi User nesnesini alır (route'ların yaptığı değişiklikler
+  diğer isteklere sızmaz) ve strptime fallback'leri tekrar çalışmaz.
+- password_hash önbelleğe yazılmaz; check_password gerektiğinde
+  repository'den okur.
+- User.save / set_password kaydı hem bu process'ten hem Redis'ten düşürür.
+  Diğer process'lerin LRU kopyaları en geç TTL sonunda yenilenir.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from app.services.cache_service import cache_service
+
+USER_SESSION_TTL = int(os.environ.get('USER_SESSION_CACHE_TTL', 60))
+USER_SESSION_MAX_ENTRIES = int(os.environ.get('USER_SESSION_CACHE_SIZE', 2048))
+
+_DATETIME_FIELDS = ('created_at', 'last_read_notifications_at')
+
+
+def _snapshot(user):
+    """User -> JSON'a yazılabilir dict (password_hash hariç)"""
+    data = {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'profile_url': user.profile_url,
+        'avatar_url': user.avatar_url,
+    }
+    for field in _DATETIME_FIELDS:
+        value = getattr(user, field, None)
+        data[field] = value.isoformat() if isinstance(value, datetime) else None
+    return data
+
+
+def _to_user(data):
+    from models import User
+
+    values = dict(data)
+    for field in _DATETIME_FIELDS:
+        if values.get(field):
+            values[field] = datetime.fromisoformat(values[field])
+    return User(
+        values['id'],
+        values.get('username'),
+        values.get('email'),
+        None,
+        values.get('created_at'),
+        values.get('profile_url'),
+        values.get('last_read_notifications_at'),
+        values.get('avatar_url'),
+    )
+
+
+class UserSessionCache:
+    """user_id -> kullanıcı anlık görüntüsü (LRU + TTL, opsiyonel Redis)"""
+
+    def __init__(self, redis_client=None, ttl=USER_SESSION_TTL,
+                 max_entries=USER_SESSION_MAX_ENTRIES, prefix='user_session'):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.stats = {'memory_hits': 0, 'redis_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _key(self, user_id):
+        return f"{self.prefix}:{user_id}"
+
+    def _remember(self, user_id, data):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_snapshot(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, data = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.stats['memory_hits'] += 1
+                    return data
+                del self._entries[user_id]
+
+        if self.redis_client:
+            try:
+                raw = self.redis_client.get(self._key(user_id))
+                if raw:
+                    data = json.loads(raw)
+                    self._remember(user_id, data)
+                    self.stats['redis_hits'] += 1
+                    return data
+            except Exception as e:
+                print(f"[ERROR] User session cache Redis get error: {e}")
+        return None
+
+    def get(self, user_id):
+        """Önbellekteki kullanıcı (yoksa None, repository'ye gitmez)"""
+        data = self._get_snapshot(user_id)
+        return _to_user(data) if data is not None else None
+
+    def set(self, user):
+        data = _snapshot(user)
+        self._remember(user.id, data)
+        if self.redis_client:
+            try:
+                self.redis_client.setex(self._key(user.id), self.ttl, json.dumps(data))
+            except Exception as e:
+                print(f"[ERROR] User session cache Redis set error: {e}")
+
+    def load(self, user_id):
+        """user_loader: önbellek, yoksa User.get_by_id ve önbelleğe yaz"""
+        if not user_id:
+            return None
+        user = self.get(user_id)
+        if user is not None:
+            return user
+
+        from models import User
+
+        self.stats['misses'] += 1
+        user = User.get_by_id(user_id)
+        if user is not None:
+            self.set(user)
+        return user
+
+    def invalidate(self, user_id):
+        """Profil değişikliğinden sonra kaydı düşür"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        self.stats['invalidations'] += 1
+        if self.redis_client:
+            try:
+                self.redis_client.delete(self._key(user_id))
+            except Exception as e:
+                print(f"[ERROR] User session cache Redis delete error: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global önbellek (create_app'teki user_loader ve User modeli kullanır)
+user_session_cache = UserSessionCache(cache_service.redis_client)
@@ -44,10 +44,17 @@ if CELERY_AVAILABLE:
     
     @celery_app.task(name='price_tracking.check_prices')
     def check_prices_task():
-        """Check price changes for tracked products"""
+        """Plan the price sweep and fan URL groups out as chunk tasks"""
         from app.services.price_tracking_service import PriceTrackingService
         service = PriceTrackingService()
-        return service.check_all_prices()
+        return service.check_all_prices(dispatch=check_price_chunk_task.delay)
+    
+    @celery_app.task(name='price_tracking.check_price_chunk')
+    def check_price_chunk_task(groups):
+        """Scrape a chunk of URL groups and apply results to all their trackings"""
+        from app.services.price_tracking_service import PriceTrackingService
+        service = PriceTrackingService()
+        return service.check_price_groups(groups)
     
     @celery_app.task(name='price_tracking.check_product_price')
     def check_product_price_task(product_id):
@@ -55,6 +62,12 @@ if CELERY_AVAILABLE:
         from app.services.price_tracking_service import PriceTrackingService
         service = PriceTrackingService()
         return service.check_product_price(product_id)
+    
+    @celery_app.task(name='discovery.rebuild_index')
+    def rebuild_discovery_index_task():
+        """Rebuild the discovery snapshot; web processes reload it within DISCOVERY_RELOAD_SECONDS"""
+        from app.services.discovery_index import rebuild_snapshot
+        return rebuild_snapshot()
 else:
     # Fallback: synchronous tasks
     def scrape_product_task(url):
@@ -72,10 +85,22 @@ else:
     def check_prices_task():
         """Synchronous fallback"""
         print("[INFO] Price checking (synchronous mode)")
-        return {"status": "completed", "checked": 0}
+        from app.services.price_tracking_service import PriceTrackingService
+        service = PriceTrackingService()
+        return service.check_all_prices()
+    
+    def check_price_chunk_task(groups):
+        """Synchronous fallback"""
+        from app.services.price_tracking_service import PriceTrackingService
+        service = PriceTrackingService()
+        return service.check_price_groups(groups)
     
     def check_product_price_task(product_id):
         """Synchronous fallback"""
         print(f"[INFO] Price check for product {product_id} (synchronous mode)")
         return {"status": "completed", "product_id": product_id}
-
+    
+    def rebuild_discovery_index_task():
+        """Synchronous fallback"""
+        from app.services.discovery_index import rebuild_snapshot
+        return rebuild_snapshot()
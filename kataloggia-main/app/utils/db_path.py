@@ -3,6 +3,8 @@ Database path utility
 Veritabanı yolunu tutarlı şekilde belirlemek için yardımcı fonksiyon
 """
 import os
+import threading
+from contextlib import contextmanager
 
 
 def get_db_path():
@@ -36,8 +38,157 @@ def get_db_path():
 
     return db_path
 
+# Bağlantı ayarları (WAL: okuyucular yazarı, yazar okuyucuları bekletmez)
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_CACHED_STATEMENTS = int(os.environ.get('SQLITE_CACHED_STATEMENTS', 256))
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),       # WAL ile güvenli, her commit'te fsync yok
+    ('busy_timeout', SQLITE_BUSY_TIMEOUT_MS),
+    ('cache_size', -16000),          # ~16 MB sayfa önbelleği
+    ('temp_store', 'MEMORY'),
+    ('mmap_size', 134217728),        # 128 MB
+)
+
+
+class PooledConnection:
+    """
+    sqlite3.Connection vekili. close() bağlantıyı kapatmaz, havuza bırakır;
+    commit edilmemiş iş (eski davranıştaki gibi) geri alınır.
+    pool.connection() bloğundan gelen vekilde close() etkisizdir, iade
+    bloğun sonunda yapılır.
+    """
+
+    def __init__(self, pool, conn, scoped=False):
+        self._pool = pool
+        self._conn = conn
+        self._scoped = scoped
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if not self._scoped:
+            self._pool.release()
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+
+class _ThreadState:
+    def __init__(self, conn, path):
+        self.conn = conn
+        self.path = path
+        self.pid = os.getpid()
+        self.depth = 0
+        self.scopes = 0     # açık pool.connection() blokları
+
+
+class SQLitePool:
+    """
+    Thread (veya eventlet greenlet) başına tek kalıcı bağlantı.
+
+    Aynı thread'de iç içe get_db_connection() çağrıları aynı bağlantıyı
+    paylaşır (ayrı bağlantılar birbirinin yazma kilidini beklerdi).
+    Kalıcı bağlantı sayesinde sqlite3'ün prepared statement önbelleği
+    (cached_statements) çağrılar arasında korunur.
+
+    Tercih edilen kullanım `with pool.connection() as conn:` — blok hata
+    ile çıksa da transaction geri alınır ve bağlantı iade edilir. Açık bir
+    blok yokken gelen acquire() en dış kullanım sayılır: önceki
+    kullanıcının close() çağırmadan bıraktığı transaction geri alınır ve
+    derinlik sıfırlanır (yoksa yazma kilidi thread'de asılı kalır).
+    """
+
+    def __init__(self, path_fn, readonly=False):
+        self._path_fn = path_fn
+        self.readonly = readonly
+        self._local = threading.local()
+        self.stats = {'opened': 0, 'reused': 0}
+
+    def _open(self, path):
+        import sqlite3
+
+        if self.readonly:
+            conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True,
+                                   cached_statements=SQLITE_CACHED_STATEMENTS)
+        else:
+            conn = sqlite3.connect(path, cached_statements=SQLITE_CACHED_STATEMENTS)
+        for name, value in SQLITE_PRAGMAS:
+            if self.readonly and name in ('journal_mode', 'synchronous'):
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        conn.row_factory = sqlite3.Row
+        self.stats['opened'] += 1
+        return conn
+
+    def acquire(self, scoped=False):
+        path = self._path_fn()
+        state = getattr(self._local, 'state', None)
+        # Fork sonrası veya DB yolu değiştiyse (testler) yeni bağlantı
+        if state is None or state.path != path or state.pid != os.getpid():
+            if state is not None and state.pid == os.getpid():
+                state.conn.close()
+            state = self._local.state = _ThreadState(self._open(path), path)
+        else:
+            self.stats['reused'] += 1
+        if state.scopes == 0:
+            # En dış kullanım: önceki kullanıcı hata ile/close() çağırmadan çıkmış olabilir
+            if state.conn.in_transaction:
+                state.conn.rollback()
+            state.depth = 0
+        state.depth += 1
+        if scoped:
+            state.scopes += 1
+        return PooledConnection(self, state.conn, scoped=scoped)
+
+    def release(self, state=None):
+        state = state or getattr(self._local, 'state', None)
+        if state is None or state.depth == 0:
+            return
+        state.depth -= 1
+        if state.depth == 0 and state.conn.in_transaction:
+            state.conn.rollback()
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: — hata olsa da rollback + iade"""
+        conn = self.acquire(scoped=True)
+        state = self._local.state
+        try:
+            yield conn
+        except BaseException:
+            if state.conn.in_transaction:
+                state.conn.rollback()
+            raise
+        finally:
+            state.scopes -= 1
+            self.release(state)
+
+    def close(self):
+        """Bu thread'in bağlantısını gerçekten kapat"""
+        state = getattr(self._local, 'state', None)
+        if state is not None:
+            self._local.state = None
+            if state.pid == os.getpid():
+                state.conn.close()
+
+
+def get_read_replica_path():
+    """Raporlama sorguları için okuma kopyası (SQLITE_READ_REPLICA_PATH), yoksa ana DB"""
+    return os.environ.get('SQLITE_READ_REPLICA_PATH') or get_db_path()
+
+
+_pool = SQLitePool(get_db_path)
+_read_pool = SQLitePool(get_read_replica_path, readonly=True)
+
+
 def get_db_connection():
-    """Veritabanı bağlantısı oluştur (SQLite only, deprecated)"""
+    """Veritabanı bağlantısı (SQLite only, deprecated) - thread başına havuzlanmış"""
     try:
         import sqlite3
     except ImportError:
@@ -45,6 +196,33 @@ def get_db_connection():
             "SQLite is not available. "
             "This function is deprecated. Use Firestore instead by setting DB_BACKEND=firestore."
         )
-    db_path = get_db_path()
-    return sqlite3.connect(db_path)
+    return _pool.acquire()
+
+
+def db_connection():
+    """
+    Repository'lerin kullandığı bağlantı bloğu:
+
+        with db_connection() as conn:
+            ...
 
+    Blok içindeki istisnada commit edilmemiş iş geri alınır, bağlantı her
+    durumda havuza döner.
+    """
+    try:
+        import sqlite3
+    except ImportError:
+        raise ImportError(
+            "SQLite is not available. "
+            "This function is deprecated. Use Firestore instead by setting DB_BACKEND=firestore."
+        )
+    return _pool.connection()
+
+
+def get_read_connection():
+    """
+    Salt okunur bağlantı (raporlama). SQLITE_READ_REPLICA_PATH verilmişse
+    oradaki kopyayı (ör. litestream/rsync ile güncellenen) açar; değilse
+    ana DB'ye mode=ro ile bağlanır, WAL sayesinde yazarları bekletmez.
+    """
+    return _read_pool.acquire()
@@ -0,0 +1,131 @@
+"""
+İstek kapsamlı identity map + toplu yükleyici (DataLoader benzeri)
+
+Bir istek boyunca her (tür, id) için model nesnesi bir kez okunur:
+
+- Aynı ID'nin tekrar istenmesi bellekten döner (aynı nesne).
+- prime() ile sıraya alınan farklı ID'ler ilk load()'da tek bir toplu
+  okumayla (get_*_by_ids) birlikte çekilir.
+- Repository yazımları forget() ile ilgili kaydı düşürür.
+
+Map flask.g üzerinde yaşar ve teardown_request'te atılır; istek dışında
+(scheduler, script) current_identity_map() None döner ve çağıranlar
+doğrudan repository'ye gider.
+"""
+from flask import g, has_request_context
+
+_MISSING = object()
+
+
+class BatchLoader:
+    """Tek bir tür için id -> nesne önbelleği ve bekleyen ID kuyruğu"""
+
+    def __init__(self, fetch_many, hydrate):
+        self._fetch_many = fetch_many
+        self._hydrate = hydrate
+        self._cache = {}
+        self._pending = {}
+        self.stats = {'hits': 0, 'batches': 0, 'fetched': 0}
+
+    def prime(self, ids):
+        """ID'leri bir sonraki toplu okumaya ekle (okuma yapmaz)"""
+        for item_id in ids:
+            if item_id and item_id not in self._cache:
+                self._pending[item_id] = True
+
+    def dispatch(self):
+        """Bekleyen tüm ID'leri tek toplu okumayla yükle"""
+        if not self._pending:
+            return
+        ids = list(self._pending)
+        self._pending = {}
+        self.stats['batches'] += 1
+        found = {}
+        for data in self._fetch_many(ids):
+            found[data['id']] = self._hydrate(data)
+        self.stats['fetched'] += len(found)
+        for item_id in ids:
+            self._cache[item_id] = found.get(item_id)
+
+    def load(self, item_id):
+        cached = self._cache.get(item_id, _MISSING)
+        if cached is not _MISSING:
+            self.stats['hits'] += 1
+            return cached
+        self.prime([item_id])
+        self.dispatch()
+        return self._cache.get(item_id)
+
+    def load_many(self, ids):
+        """Bulunanları giriş sırasında döndür"""
+        self.stats['hits'] += sum(1 for item_id in ids if item_id in self._cache)
+        self.prime(ids)
+        self.dispatch()
+        return [obj for obj in (self._cache.get(item_id) for item_id in ids if item_id) if obj is not None]
+
+    def forget(self, item_id):
+        self._cache.pop(item_id, None)
+
+
+class IdentityMap:
+    """Tür adı ('users', 'products', 'collections') -> BatchLoader"""
+
+    def __init__(self):
+        self._loaders = {}
+
+    def loader(self, kind):
+        loader = self._loaders.get(kind)
+        if loader is None:
+            loader = self._loaders[kind] = _build_loader(kind)
+        return loader
+
+    def forget(self, kind, item_id):
+        loader = self._loaders.get(kind)
+        if loader is not None:
+            loader.forget(item_id)
+
+    def stats(self):
+        return {kind: dict(loader.stats) for kind, loader in self._loaders.items()}
+
+
+def _build_loader(kind):
+    from app.repositories import get_repository
+    from models import User, Product, Collection
+
+    repo = get_repository()
+    if kind == 'users':
+        return BatchLoader(repo.get_users_by_ids, User._from_data)
+    if kind == 'products':
+        return BatchLoader(repo.get_products_by_ids, Product._from_data)
+    if kind == 'collections':
+        return BatchLoader(repo.get_collections_by_ids, Collection._from_data)
+    raise ValueError(f"Unknown identity map kind: {kind}")
+
+
+def current_identity_map():
+    """Bu isteğin identity map'i; istek dışında None"""
+    if not has_request_context():
+        return None
+    identity_map = g.get('_identity_map')
+    if identity_map is None:
+        identity_map = g._identity_map = IdentityMap()
+    return identity_map
+
+
+def loader_for(kind):
+    identity_map = current_identity_map()
+    return identity_map.loader(kind) if identity_map is not None else None
+
+
+def forget(kind, item_id):
+    """Yazım sonrası kaydı bu isteğin map'inden düşür"""
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.forget(kind, item_id)
+
+
+def init_identity_map(app):
+    """Her isteğin sonunda map'i at (g app context'e bağlı olduğundan açıkça)"""
+    @app.teardown_request
+    def _drop_identity_map(exc=None):
+        g.pop('_identity_map', None)
@@ -0,0 +1,91 @@
+"""
+Cursor (keyset) tabanlı sayfalama yardımcıları
+
+Listeler (created_at DESC, id DESC) sırasıyla okunur. Bir sonraki sayfa,
+önceki sayfanın son kaydından sonrası için sorgulanır (start_after). Hangi
+sayfada olunursa olunsun sayfa başına okunan kayıt sayısı sabittir
+(offset gibi baştaki kayıtları okuyup atmak yok).
+
+Cursor istemciye opak bir token olarak verilir:
+
+    encode_cursor('2026-10-17 12:00:00.123456', 'abc') -> 'eyJ0cyI6...'
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Bozuk veya bu listeye ait olmayan cursor"""
+
+
+def _serialize_ts(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return str(value)
+
+
+def encode_cursor(created_at, item_id: str) -> str:
+    payload = json.dumps({'ts': _serialize_ts(created_at), 'id': item_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[Optional[str], str]]:
+    """Token -> (created_at string, id); token yoksa None"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return payload.get('ts'), str(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+
+def encode_rank_cursor(score: float, created_at, item_id: str, mode: str = '') -> str:
+    """Alaka sıralı listeler için: (skor, created_at, id) + eşleşme modu"""
+    payload = json.dumps({'s': score, 'ts': _serialize_ts(created_at), 'id': item_id, 'm': mode},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_rank_cursor(token: Optional[str]) -> Optional[Tuple[float, str, str, str]]:
+    """Token -> (skor, created_at string, id, mod); token yoksa None"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return float(payload['s']), payload.get('ts') or '', str(payload['id']), str(payload.get('m') or '')
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+
+def page_size(value, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """İstekten gelen limit'i 1..MAX_PAGE_SIZE aralığına sıkıştır"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(MAX_PAGE_SIZE, size))
+
+
+def wants_page(args) -> bool:
+    """İstek sayfalama istiyor mu? (limit veya cursor parametresi var mı)"""
+    return 'limit' in args or 'cursor' in args
+
+
+def make_page(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """limit+1 okunan satırlardan sayfa + bir sonraki cursor"""
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.get('created_at'), last['id'])
+    return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,160 @@
+"""
+Fiyat geçmişi için kompakt zaman serisi formatı
+
+Her ürün için ayda tek bir kayıt (bucket) tutulur. Örnekler tamsayı alt
+birim (kuruş) ve epoch saniye olarak, ilk değer mutlak, sonrakiler bir
+öncekine göre fark (delta) şeklinde saklanır:
+
+    {'product_id': 'p1', 'month': '2026-10',
+     'ts': [1791000000, 3600, 3600], 'p': [129999, 0, -5000],
+     'last_ts': 1791007200, 'last_p': 124999, 'n': 3}
+
+Grafik okumak bir-iki bucket okumak, yazmak ilgili bucket'ı güncellemek
+demektir.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from price_parser import to_minor_units
+
+Sample = Tuple[int, int]  # (epoch saniye, kuruş)
+
+
+def format_minor_units(minor: int) -> str:
+    """129999 -> '1299.99'"""
+    sign = '-' if minor < 0 else ''
+    whole, cents = divmod(abs(int(minor)), 100)
+    return f"{sign}{whole}.{cents:02d}"
+
+
+def to_epoch(value) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    if hasattr(value, 'timestamp'):
+        return int(value.timestamp())
+    return int(datetime.fromisoformat(str(value)).timestamp())
+
+
+def month_of(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m')
+
+
+def months_between(start: int, end: int) -> List[str]:
+    """start..end aralığındaki aylar ('2026-09', '2026-10', ...)"""
+    first, last = datetime.fromtimestamp(start), datetime.fromtimestamp(end)
+    year, month = first.year, first.month
+    months = []
+    while (year, month) <= (last.year, last.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def bucket_id(product_id: str, month: str) -> str:
+    return f"{product_id}_{month.replace('-', '')}"
+
+
+def _delta_encode(values: List[int]) -> List[int]:
+    return [v - values[i - 1] if i else v for i, v in enumerate(values)]
+
+
+def _delta_decode(deltas: List[int]) -> List[int]:
+    values, running = [], 0
+    for delta in deltas:
+        running += delta
+        values.append(running)
+    return values
+
+
+def decode_bucket(bucket: Dict) -> Tuple[List[int], List[int]]:
+    """Bucket -> (epoch saniyeler, kuruşlar)"""
+    return _delta_decode(bucket.get('ts') or []), _delta_decode(bucket.get('p') or [])
+
+
+def encode_bucket(product_id: str, month: str, samples: List[Sample]) -> Dict:
+    samples = sorted(samples)
+    timestamps = [ts for ts, _ in samples]
+    prices = [p for _, p in samples]
+    return {
+        'product_id': product_id,
+        'month': month,
+        'ts': _delta_encode(timestamps),
+        'p': _delta_encode(prices),
+        'last_ts': timestamps[-1] if timestamps else None,
+        'last_p': prices[-1] if prices else None,
+        'n': len(samples),
+    }
+
+
+def append_to_bucket(bucket: Optional[Dict], product_id: str, month: str,
+                     samples: Iterable[Sample]) -> Dict:
+    """Örnekleri bucket'a ekle; sıralı eklemede sadece delta'lar uzar"""
+    samples = sorted(samples)
+    if not bucket or not bucket.get('n'):
+        return encode_bucket(product_id, month, samples)
+
+    if samples and samples[0][0] < bucket['last_ts']:
+        # Sıra dışı örnek: bucket'ı çöz, birleştir, yeniden kodla
+        timestamps, prices = decode_bucket(bucket)
+        return encode_bucket(product_id, month, list(zip(timestamps, prices)) + samples)
+
+    bucket = dict(bucket, ts=list(bucket['ts']), p=list(bucket['p']))
+    for ts, price in samples:
+        bucket['ts'].append(ts - bucket['last_ts'])
+        bucket['p'].append(price - bucket['last_p'])
+        bucket['last_ts'], bucket['last_p'] = ts, price
+        bucket['n'] += 1
+    return bucket
+
+
+def merge_samples(bucket: Optional[Dict], product_id: str, month: str,
+                  samples: Iterable[Sample]) -> Dict:
+    """
+    append_to_bucket gibi, ama bucket'ta zaten bulunan zaman damgalarını
+    atlar: yarıda kalmış bir taşıma tekrar çalıştırılınca örnek çoğalmaz.
+    """
+    seen = set(decode_bucket(bucket)[0]) if bucket else set()
+    fresh = []
+    for ts, price in sorted(samples):
+        if ts not in seen:
+            seen.add(ts)
+            fresh.append((ts, price))
+    if not fresh and bucket:
+        return bucket
+    return append_to_bucket(bucket, product_id, month, fresh)
+
+
+def overlay_samples(buckets: Iterable[Dict], grouped: Dict[Tuple[str, str], List[Sample]]) -> List[Dict]:
+    """Taşınmamış eski örnekleri (group_samples çıktısı) aynı ayın bucket'ıyla birleştir"""
+    by_month = {bucket.get('month'): bucket for bucket in buckets}
+    for (product_id, month), items in grouped.items():
+        by_month[month] = merge_samples(by_month.get(month), product_id, month, items)
+    return list(by_month.values())
+
+
+def group_samples(samples: Iterable[Dict]) -> Dict[Tuple[str, str], List[Sample]]:
+    """{product_id, price, recorded_at} kayıtlarını (product_id, ay) bucket'larına ayır"""
+    grouped: Dict[Tuple[str, str], List[Sample]] = {}
+    for sample in samples:
+        minor = to_minor_units(sample.get('price'))
+        if minor is None:
+            continue
+        ts = to_epoch(sample.get('recorded_at') or datetime.now())
+        grouped.setdefault((str(sample['product_id']), month_of(ts)), []).append((ts, minor))
+    return grouped
+
+
+def merge_buckets(buckets: Iterable[Dict], start: Optional[int] = None,
+                  end: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, List[int]]:
+    """Bucket'ları birleştirip aralığa göre filtrele; limit varsa en yeni N örnek"""
+    timestamps: List[int] = []
+    prices: List[int] = []
+    for bucket in sorted(buckets, key=lambda b: b.get('month') or ''):
+        ts_list, price_list = decode_bucket(bucket)
+        for ts, price in zip(ts_list, price_list):
+            if (start is None or ts >= start) and (end is None or ts <= end):
+                timestamps.append(ts)
+                prices.append(price)
+    if limit is not None and len(timestamps) > limit:
+        timestamps, prices = timestamps[-limit:], prices[-limit:]
+    return {'timestamps': timestamps, 'prices': prices}
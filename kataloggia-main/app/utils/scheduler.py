@@ -16,10 +16,11 @@ if CELERY_AVAILABLE:
     
     # Configure periodic tasks
     celery_app.conf.beat_schedule = {
-        # Fiyat kontrolü - her 15 dakikada bir
+        # Fiyat kontrolü turu - her 5 dakikada bir; hangi ürünlerin vadesi
+        # geldiğine refresh_scheduler (oynaklık / alarm / bütçe) karar verir
         'check-prices-periodic': {
             'task': 'price_tracking.check_prices',
-            'schedule': 900.0,  # Her 15 dakikada bir (900 saniye)
+            'schedule': 300.0,
         },
         # Her gün gece 2'de temizlik
         'cleanup-old-data': {
@@ -31,6 +32,11 @@ if CELERY_AVAILABLE:
             'task': 'maintenance.clear_old_cache',
             'schedule': crontab(minute=0, hour='*/6'),  # Her 6 saatte bir
         },
+        # Keşif index'i snapshot'ı (web process'leri dosya değişince yeniden yükler)
+        'rebuild-discovery-index': {
+            'task': 'discovery.rebuild_index',
+            'schedule': float(os.environ.get('DISCOVERY_REBUILD_SECONDS', 900)),
+        },
     }
     
     print("[INFO] Celery Beat schedule configured")
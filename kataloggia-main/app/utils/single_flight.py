@@ -0,0 +1,127 @@
+"""
+Single-flight: aynı anahtar için eşzamanlı çağrıları tek bir çalıştırmada birleştirir.
+
+Process içinde aynı anahtarla gelen çağrılar ilk çağrının (lider) bitmesini
+bekler ve onun sonucunu paylaşır. Redis varsa lider ayrıca bir Redis kilidi
+alır; kilidi alamayan diğer worker'lar liderin Redis'e yazdığı sonucu
+bekler. Lider ölür veya kilit süresi dolarsa bekleyen çağıran işi kendisi
+yapar, yani Redis sadece bir optimizasyondur.
+"""
+import json
+import threading
+import time
+import uuid
+
+# Kilidi sadece sahibi silebilsin
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Anahtar bazlı çağrı birleştirici (process içi + Redis)"""
+
+    def __init__(self, redis_client=None, prefix='singleflight', lock_ttl=180,
+                 result_ttl=30, poll_interval=0.25):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'leader': 0, 'local_shared': 0, 'remote_shared': 0}
+
+    def do(self, key, fn):
+        """fn'i anahtar için bir kez çalıştır; eşzamanlı çağıranlar sonucu paylaşır"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats['local_shared'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_distributed(key, fn)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def _run_distributed(self, key, fn):
+        if self.redis_client is None:
+            self.stats['leader'] += 1
+            return fn()
+
+        lock_key = f"{self.prefix}:lock:{key}"
+        result_key = f"{self.prefix}:result:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis_client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            print(f"[WARNING] Single-flight Redis lock error: {e}")
+            self.stats['leader'] += 1
+            return fn()
+
+        if acquired:
+            self.stats['leader'] += 1
+            try:
+                result = fn()
+                try:
+                    self.redis_client.setex(result_key, self.result_ttl, json.dumps(result))
+                except Exception as e:
+                    print(f"[WARNING] Single-flight result publish error: {e}")
+                return result
+            finally:
+                try:
+                    self.redis_client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    print(f"[WARNING] Single-flight Redis unlock error: {e}")
+
+        # Başka bir worker çalışıyor: sonucunu bekle
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            try:
+                published = self.redis_client.get(result_key)
+                if published is not None:
+                    self.stats['remote_shared'] += 1
+                    return json.loads(published)
+                if not self.redis_client.exists(lock_key):
+                    # Lider bitti; sonucu kilit silinmeden hemen önce yazmış olabilir
+                    published = self.redis_client.get(result_key)
+                    if published is not None:
+                        self.stats['remote_shared'] += 1
+                        return json.loads(published)
+                    # Lider sonuç yazmadan bitti / öldü: kendimiz yapalım
+                    break
+            except Exception as e:
+                print(f"[WARNING] Single-flight Redis wait error: {e}")
+                break
+            time.sleep(self.poll_interval)
+
+        self.stats['leader'] += 1
+        return fn()
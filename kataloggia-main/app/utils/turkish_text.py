@@ -0,0 +1,55 @@
+"""
+Türkçe metin normalizasyonu (arama için)
+
+str.lower() Türkçe'de yanlış sonuç verir: 'İ'.lower() -> 'i̇' (i + birleşik
+nokta), 'I'.lower() -> 'i' (doğrusu 'ı'). Burada önce Türkçe büyük/küçük harf
+dönüşümü yapılır, sonra aksanlar katlanır; böylece 'IŞIK', 'ışık' ve 'isik'
+aynı anahtara düşer:
+
+    fold('IŞIK Çanta')      -> 'isik canta'
+    tokenize('İpek-Gömlek') -> ['ipek', 'gomlek']
+"""
+import re
+import unicodedata
+
+_TURKISH_LOWER = str.maketrans({'İ': 'i', 'I': 'ı'})
+# Aksan katlama: ı ve ş/ğ gibi NFKD ile ayrışmayanlar elle
+_ASCII_FOLD = str.maketrans({'ı': 'i', 'ş': 's', 'ğ': 'g', 'ü': 'u', 'ö': 'o', 'ç': 'c', 'ß': 'ss'})
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+MIN_PREFIX_LENGTH = 2
+
+
+def turkish_lower(text):
+    return (text or '').translate(_TURKISH_LOWER).lower()
+
+
+def fold(text):
+    """Türkçe küçük harf + aksansız form"""
+    lowered = turkish_lower(text).translate(_ASCII_FOLD)
+    decomposed = unicodedata.normalize('NFKD', lowered)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+def prefixes(token, min_length=MIN_PREFIX_LENGTH):
+    """Tam token hariç önekler: 'canta' -> ['ca', 'can', 'cant']"""
+    return [token[:i] for i in range(min_length, len(token))]
+
+
+def trigrams(token):
+    """pg_trgm gibi boşlukla doldurulmuş 3'lüler: 'zara' -> {'  z', ' za', 'zar', 'ara', 'ra '}"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a, b):
+    """İki token'ın trigram Jaccard benzerliği (0..1)"""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    shared = len(ta & tb)
+    return shared / (len(ta) + len(tb) - shared)
@@ -0,0 +1,131 @@
+"""
+Ürün URL'lerini kanonik hale getirme
+
+Cache anahtarları, veritabanı aramaları ve tekilleştirme aynı ürünü aynı
+anahtarla görmeli. Bu modül:
+  - şema/host'u küçük harfe çevirir, www. ve varsayılan portu atar
+  - fragment'ı, sondaki / işaretini ve bilinen tracking parametrelerini siler
+  - kalan query parametrelerini sıralar
+  - bilinen mağazalarda URL'den ürün ID'sini çıkarır
+
+product_key() ürün ID'si bulunabiliyorsa "host:id" (+ kalan parametreler),
+bulunamazsa kanonik URL döndürür; products.url_key alanı ve scrape cache
+anahtarları buna dayanır.
+"""
+import hashlib
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Tüm sitelerde atılan parametreler (önek eşleşmesi için sonu '*')
+TRACKING_PARAMS = (
+    'utm_*', 'gclid', 'gclsrc', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid',
+    'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'srsltid', 'ref', 'ref_',
+    'referrer', 'affiliate', 'aff_id', 'adjust_*', 'pk_*', 'mtm_*',
+)
+
+# Site bazlı ek tracking parametreleri (host suffix -> parametreler)
+SITE_TRACKING_PARAMS = {
+    'trendyol.com': ('boutiqueid', 'sav', 'adjust_campaign'),
+    'hepsiburada.com': ('wt_af', 'wt_gl', 'wt_mc'),
+    'n11.com': ('gclsrc', 'n11_source'),
+    'amazon': ('qid', 'sr', 'keywords', 'crid', 'sprefix', 'dib', 'dib_tag',
+               'content-id', 'pd_rd_*', 'pf_rd_*', '_encoding', 'linkcode', 'tag'),
+}
+
+# Host suffix -> ürün ID regex'i (ilk grup ID)
+PRODUCT_ID_PATTERNS = {
+    'trendyol.com': re.compile(r'-p-(\d+)'),
+    'hepsiburada.com': re.compile(r'-p-([A-Za-z0-9]+)$'),
+    'amazon': re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})'),
+    'zara.com': re.compile(r'-p(\d{6,})\.html'),
+    'n11.com': re.compile(r'-P(\d+)$'),
+}
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def _matches_site(host: str, key: str) -> bool:
+    """Noktalı anahtar suffix, noktasız anahtar etiket olarak eşleşir (site_registry ile aynı)"""
+    if '.' in key:
+        return host == key or host.endswith('.' + key)
+    return key in host.split('.')
+
+
+def _is_tracking(param: str, patterns) -> bool:
+    param = param.lower()
+    for pattern in patterns:
+        if pattern.endswith('*'):
+            if param.startswith(pattern[:-1]):
+                return True
+        elif param == pattern:
+            return True
+    return False
+
+
+def _split(url: str):
+    url = (url or '').strip()
+    if url and '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    port = parts.port
+    if port and str(port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return scheme, host, parts.path, parts.query
+
+
+def canonicalize_url(url: str) -> str:
+    """URL'nin kanonik halini döndür (karşılaştırma / anahtar için, yönlendirme için değil)"""
+    scheme, host, path, query = _split(url)
+    if not host:
+        return (url or '').strip()
+
+    bare_host = host.split(':', 1)[0]
+    patterns = TRACKING_PARAMS
+    for site, extra in SITE_TRACKING_PARAMS.items():
+        if _matches_site(bare_host, site):
+            patterns = patterns + extra
+
+    # Amazon path'indeki /ref=... parçası da tracking
+    if _matches_site(bare_host, 'amazon'):
+        path = re.sub(r'/ref=[^/]*$', '', path)
+
+    path = re.sub(r'/{2,}', '/', path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+              if not _is_tracking(k, patterns)]
+    params.sort()
+    return urlunsplit((scheme, host, path, urlencode(params), ''))
+
+
+def extract_product_id(url: str) -> Optional[str]:
+    """Bilinen mağazalarda URL'deki ürün ID'sini döndür"""
+    _, host, path, _ = _split(url)
+    bare_host = host.split(':', 1)[0]
+    for site, pattern in PRODUCT_ID_PATTERNS.items():
+        if _matches_site(bare_host, site):
+            match = pattern.search(path.rstrip('/'))
+            return match.group(1) if match else None
+    return None
+
+
+def product_key(url: str) -> str:
+    """Aynı ürünü gösteren tüm URL'ler için ortak anahtar"""
+    canonical = canonicalize_url(url)
+    product_id = extract_product_id(url)
+    if not product_id:
+        return canonical
+    # Slug değişse de aynı ürün; kalan (tracking olmayan) parametreler varyant/satıcı seçer
+    _, host, _, query = _split(canonical)
+    return f"{host}:{product_id}" + (f"?{query}" if query else '')
+
+
+def url_hash(url: str) -> str:
+    """product_key'in md5'i (cache / kilit anahtarları için)"""
+    return hashlib.md5(product_key(url).encode()).hexdigest()
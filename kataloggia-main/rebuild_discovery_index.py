@@ -0,0 +1,40 @@
+"""
+Discovery Index Snapshot
+Repository'den global keşif index'inin snapshot'ını üretir (elle; düzenli
+üretim Celery beat 'discovery.rebuild_index' görevindedir)
+
+Web process'leri snapshot'ı DISCOVERY_INDEX_PATH'ten yükler ve dosya
+değişince yeniden okur; sorgular Firestore'u taramaz.
+
+    python rebuild_discovery_index.py [çıktı_yolu]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Path ve .env yükle
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+dotenv_path = parent_dir / '.env'
+
+if dotenv_path.exists():
+    load_dotenv(dotenv_path)
+
+sys.path.insert(0, str(current_dir))
+sys.path.insert(0, str(parent_dir))
+
+from app import create_app
+from app.services.discovery_index import DISCOVERY_INDEX_PATH, rebuild_snapshot
+
+path = sys.argv[1] if len(sys.argv) > 1 else DISCOVERY_INDEX_PATH
+
+app = create_app(os.environ.get('FLASK_ENV', 'production'))
+with app.app_context():
+    started = time.time()
+    counts = rebuild_snapshot(path=path)
+
+print(f"[INFO] Discovery snapshot written to {path}: "
+      f"{counts.get('user', 0)} users, {counts.get('collection', 0)} public collections "
+      f"in {time.time() - started:.1f}s")
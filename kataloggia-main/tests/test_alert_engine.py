@@ -0,0 +1,72 @@
+"""
+Tests for the indexed price-alert engine.
+"""
+import json
+import uuid
+
+from models import init_db, PriceTracking, User
+from app.models.product import Product
+from app.repositories import get_repository
+from app.services.alert_engine import AlertEngine, AlertIndex
+
+
+def test_index_range_lookup_returns_only_crossed_thresholds():
+    index = AlertIndex()
+    index.load([
+        {'id': 't1', 'product_id': 'p1', 'user_id': 'u1', 'alert_price_minor': 9000},
+        {'id': 't2', 'product_id': 'p1', 'user_id': 'u2', 'alert_price': '95,00 TL'},
+        {'id': 't3', 'product_id': 'p1', 'user_id': 'u3', 'alert_price_minor': 7000},
+        {'id': 't4', 'product_id': 'p2', 'user_id': 'u4', 'alert_price_minor': 9000},
+        {'id': 't5', 'product_id': 'p1', 'user_id': 'u5', 'alert_price': None},
+    ])
+    assert len(index) == 4
+
+    # 100 -> 85: 95 ve 90 eşikleri geçildi, 70 henüz değil
+    crossed = index.crossed('p1', 10000, 8500)
+    assert sorted(t for t, _, _ in crossed) == ['t1', 't2']
+    # Eşiğe tam inmek de tetikler; zaten altındayken tekrar tetiklemez
+    assert [t for t, _, _ in index.crossed('p1', 9100, 9000)] == ['t1']
+    assert index.crossed('p1', 8500, 8000) == []
+    # Önceki fiyat bilinmiyorsa yeni fiyatın üstündeki tüm alarmlar
+    assert len(index.crossed('p1', None, 6000)) == 3
+
+    index.upsert('t1', 'p1', 'u1', 8000)
+    index.discard('t2')
+    assert [t for t, _, _ in index.crossed('p1', 10000, 8500)] == []
+    assert [t for t, _, _ in index.crossed('p1', 8500, 8000)] == ['t1']
+
+
+def test_engine_notifies_crossed_watchers_in_one_write(app):
+    """Trackings created through the model are indexed and notified with one batched write."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.create(f'alert_{suffix}', f'alert_{suffix}@test.com', 'password123')
+        product = Product.create(user_id=owner.id, name='Alarm Ürün', price='100,00 TL',
+                                 image='https://img.example.com/1.jpg',
+                                 url=f'https://shop.example.com/alarm-{suffix}', brand='Brand')
+        tracking_hit = PriceTracking.create(user_id=owner.id, product_id=product.id,
+                                            current_price='100,00 TL', alert_price='90,00 TL')
+        PriceTracking.create(user_id=owner.id, product_id=product.id,
+                             current_price='100,00 TL', alert_price='50,00 TL')
+
+        engine = AlertEngine()
+        engine.ensure_loaded(force=True)
+        writes = []
+        original = repo.record_price_checks
+        repo.record_price_checks = lambda *args: writes.append(args) or original(*args)
+        try:
+            notifications = engine.evaluate(product.id, '100,00 TL', '89,90 TL', name=product.name)
+            assert len(notifications) == 1
+            assert json.loads(notifications[0]['payload'])['tracking_id'] == tracking_hit
+            assert engine.dispatch(notifications)
+        finally:
+            repo.record_price_checks = original
+        assert len(writes) == 1
+
+        stored = [n for n in repo.get_notifications_by_user_id(owner.id) if n.get('type') == 'PRICE_ALERT']
+        assert len(stored) == 1
+        assert 'hedef fiyatınıza ulaştı' in stored[0]['message']
+
+        assert PriceTracking.remove_tracking(tracking_hit)
@@ -0,0 +1,74 @@
+"""
+Tests for the concurrent batch scraping engine.
+"""
+import asyncio
+import time
+
+from batch_engine import BatchEngine
+
+
+def test_batch_runs_concurrently_and_isolates_failures():
+    """Wall time tracks the slowest URL and one failure does not affect the others."""
+    engine = BatchEngine(max_concurrency=8, per_domain_limit=8)
+    urls = [f'https://shop{i}.com/p' for i in range(6)] + ['https://broken.com/p']
+
+    async def worker(url):
+        await asyncio.sleep(0.1)
+        if 'broken' in url:
+            raise RuntimeError('boom')
+        return {'url': url}
+
+    started = time.perf_counter()
+    items = asyncio.run(engine.run(urls, worker))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert [item.url for item in items] == urls
+    assert all(item.ok for item in items[:-1])
+    assert items[-1].error == 'boom'
+    assert items[-1].to_dict()['success'] is False
+
+
+def test_per_domain_limit():
+    """No more than per_domain_limit requests hit the same domain at once."""
+    engine = BatchEngine(max_concurrency=10, per_domain_limit=2)
+    active, peak = {}, {}
+
+    async def worker(url):
+        domain = url.split('/')[2]
+        active[domain] = active.get(domain, 0) + 1
+        peak[domain] = max(peak.get(domain, 0), active[domain])
+        await asyncio.sleep(0.02)
+        active[domain] -= 1
+        return url
+
+    urls = [f'https://www.a.com/{i}' for i in range(5)] + [f'https://b.com/{i}' for i in range(5)]
+    asyncio.run(engine.run(urls, worker))
+    assert peak == {'www.a.com': 2, 'b.com': 2}
+
+
+def test_iter_sync_streams_blocking_workers():
+    """Blocking workers run in threads and results stream in completion order."""
+    engine = BatchEngine(max_concurrency=4, per_domain_limit=4)
+
+    def worker(url):
+        time.sleep(0.15 if url.endswith('slow') else 0.01)
+        return url
+
+    order = [item.url for item in engine.iter_sync(['https://x.com/slow', 'https://x.com/fast'], worker)]
+    assert order == ['https://x.com/fast', 'https://x.com/slow']
+
+
+def test_render_scraper_batch_reports_empty_results_as_errors(monkeypatch):
+    """A worker that returns None yields an error entry instead of crashing the batch."""
+    from render_scraper import RenderScraper
+
+    scraper = RenderScraper()
+
+    async def fake_scrape(url, use_advanced=True):
+        return None if 'empty' in url else {'site': 'Shop', 'title': 'Ürün'}
+
+    monkeypatch.setattr(scraper, 'scrape_product_async', fake_scrape)
+    results = scraper.scrape_multiple_products_sync(['https://a.com/p', 'https://b.com/empty'])
+    assert results[0] == {'site': 'Shop', 'title': 'Ürün'}
+    assert results[1]['url'] == 'https://b.com/empty' and results[1]['error']
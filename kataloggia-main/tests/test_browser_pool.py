@@ -0,0 +1,230 @@
+"""
+Tests for the shared browser pool (leasing, page cap, recycling) with a fake Playwright.
+"""
+import asyncio
+
+import pytest
+
+import browser_pool as module
+from browser_pool import BrowserPool
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.scripts = []
+        self.closed = False
+
+    async def add_init_script(self, script):
+        self.scripts.append(script)
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+        self.browser.open_contexts -= 1
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.open_contexts = 0
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def new_context(self, **options):
+        context = FakeContext(self)
+        self.open_contexts += 1
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.stopped = False
+        self.chromium = self
+
+    async def launch(self, headless=True, args=None):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+
+    class _Starter:
+        async def start(self):
+            return fake
+
+    monkeypatch.setattr(module, 'async_playwright', lambda: _Starter())
+    return fake
+
+
+def _pool(**kwargs):
+    kwargs.setdefault('max_memory_mb', None)
+    return BrowserPool(**kwargs)
+
+
+def test_lease_reuses_browser_and_closes_context(playwright):
+    pool = _pool()
+
+    async def run():
+        async with pool.lease(init_scripts=['window.x = 1'], locale='tr-TR') as lease:
+            assert lease.page is not None
+            assert lease.context.scripts == ['window.x = 1']
+            assert pool.stats()['active_leases'] == 1
+        async with pool.lease():
+            pass
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(playwright.browsers) == 1
+    browser = playwright.browsers[0]
+    assert all(context.closed for context in browser.contexts) and browser.open_contexts == 0
+    assert browser.closed and playwright.stopped
+    stats = pool.stats()
+    assert stats['leases_total'] == 2 and stats['active_leases'] == 0
+
+
+def test_page_cap_recycles_browser(playwright):
+    pool = _pool(max_pages_per_browser=2)
+
+    async def run():
+        generations = []
+        for _ in range(3):
+            async with pool.lease() as lease:
+                generations.append(lease.timings.browser_generation)
+        await pool.close()
+        return generations
+
+    assert asyncio.run(run()) == [1, 1, 2]
+    first, second = playwright.browsers
+    assert first.closed and second.closed
+    assert pool.stats()['recycles'] == 2    # sayfa sınırı + kapanış
+
+
+def test_retired_browser_stays_open_until_its_last_lease_ends(playwright):
+    pool = _pool(max_pages_per_browser=1)
+
+    async def run():
+        first_done, second_entered = asyncio.Event(), asyncio.Event()
+
+        async def first():
+            async with pool.lease():
+                await second_entered.wait()
+            first_done.set()
+
+        async def second():
+            async with pool.lease():
+                second_entered.set()
+                await first_done.wait()
+                # Sayfa sınırına ulaşıldı ama bu kiralama hâlâ tarayıcıyı kullanıyor
+                assert pool.stats()['retiring_browsers'] == 1
+                assert not playwright.browsers[0].closed
+
+        await asyncio.gather(first(), second())
+        assert playwright.browsers[0].closed
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_disconnected_browser_is_replaced(playwright):
+    pool = _pool()
+
+    async def run():
+        async with pool.lease():
+            pass
+        playwright.browsers[0].connected = False
+        async with pool.lease() as lease:
+            assert lease.timings.browser_generation == 2
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(playwright.browsers) == 2
+
+
+def test_concurrency_is_capped(playwright):
+    pool = _pool(max_concurrency=2)
+    active = peak = 0
+
+    async def run():
+        async def one():
+            nonlocal active, peak
+            async with pool.lease():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(one() for _ in range(5)))
+        await pool.close()
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_new_loop_is_refused_while_old_browsers_are_open(playwright):
+    pool = _pool()
+
+    async def lease_once(close):
+        async with pool.lease():
+            pass
+        if close:
+            await pool.close()
+
+    asyncio.run(lease_once(close=False))
+    with pytest.raises(RuntimeError):
+        asyncio.run(lease_once(close=False))
+    assert not playwright.browsers[0].closed
+
+    # Temiz kapatılan havuz yeni loop'a bağlanabilir
+    pool = _pool()
+    asyncio.run(lease_once(close=True))
+    asyncio.run(lease_once(close=True))
+    assert len(playwright.browsers) == 3 and all(b.closed for b in playwright.browsers[1:])
+
+
+def test_run_sync_uses_the_pool_loop(playwright):
+    pool = _pool()
+
+    async def job():
+        async with pool.lease() as lease:
+            return lease.timings.browser_generation
+
+    assert pool.run_sync(job(), timeout=5) == 1
+    assert pool.run_sync(job(), timeout=5) == 1
+    pool.shutdown()
+    assert playwright.browsers[0].closed
+
+
+def test_run_from_another_loop_uses_the_pool_loop(playwright):
+    """Callers on their own loop (batch_engine, asyncio.run) share the pool's browser."""
+    pool = _pool()
+
+    async def job():
+        async with pool.lease():
+            return asyncio.get_running_loop()
+
+    async def caller():
+        return await asyncio.gather(pool.run(job()), pool.run(job()))
+
+    first = asyncio.run(caller())
+    second = asyncio.run(caller())
+    assert len({*first, *second}) == 1 and first[0] is pool._thread_loop
+    assert len(playwright.browsers) == 1
+    pool.shutdown()
+    assert playwright.browsers[0].closed
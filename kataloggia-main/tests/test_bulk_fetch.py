@@ -0,0 +1,79 @@
+"""
+Tests for the bulk product fetch (get_products_by_ids).
+"""
+import uuid
+
+from models import init_db, User
+from app.models.product import Product
+from app.repositories import get_repository
+from app.repositories import firestore_repository
+from app.repositories.firestore_repository import FirestoreRepository
+
+
+class _Snapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _Ref:
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+
+class _Collection:
+    def document(self, doc_id):
+        return _Ref(doc_id)
+
+
+class _FakeDb:
+    """Only what get_products_by_ids touches: collection().document() and get_all()"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.get_all_calls = []
+
+    def collection(self, name):
+        return _Collection()
+
+    def get_all(self, refs):
+        self.get_all_calls.append(len(refs))
+        # get_all sırayı garanti etmez
+        return [_Snapshot(ref.id, self.docs.get(ref.id)) for ref in reversed(refs)]
+
+
+def test_sqlite_get_products_by_ids_preserves_order(app):
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'bulk_{suffix}', f'bulk_{suffix}@test.com', 'password123')
+        ids = [
+            Product.create(user_id=user.id, name=f'Ürün {i}', price='10,00 TL',
+                           image='https://img.example.com/1.jpg',
+                           url=f'https://shop.example.com/{suffix}-{i}', brand='Brand').id
+            for i in range(3)
+        ]
+
+        wanted = [ids[2], 'missing-id', ids[0], ids[1]]
+        assert [p['id'] for p in repo.get_products_by_ids(wanted)] == [ids[2], ids[0], ids[1]]
+        assert [p['id'] for p in repo.get_products_by_ids(ids, chunk_size=2)] == ids
+        assert repo.get_products_by_ids([]) == []
+
+
+def test_firestore_get_products_by_ids_uses_chunked_get_all(monkeypatch):
+    monkeypatch.setattr(firestore_repository, 'GET_ALL_CHUNK_SIZE', 10)
+    docs = {f'p{i}': {'name': f'Ürün {i}'} for i in range(25)}
+    repo = FirestoreRepository.__new__(FirestoreRepository)
+    repo.db = _FakeDb(docs)
+
+    wanted = [f'p{i}' for i in reversed(range(25))] + ['nope', 'p3']
+    products = repo.get_products_by_ids(wanted)
+    assert [p['id'] for p in products] == [f'p{i}' for i in reversed(range(25))] + ['p3']
+    assert products[0]['name'] == 'Ürün 24'
+    # 26 tekil ID -> 10'luk 3 get_all çağrısı (sıralı 'in' sorguları yerine)
+    assert sorted(repo.db.get_all_calls) == [6, 10, 10]
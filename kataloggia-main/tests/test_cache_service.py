@@ -0,0 +1,96 @@
+"""
+Tests for the bounded in-memory tier of CacheService.
+"""
+import json
+
+from app.services.cache_service import CacheService, MemoryCache
+
+
+def _set(cache, key, value, expiration=60):
+    return cache.set(key, json.dumps(value), expiration)
+
+
+def _size(key, value):
+    return len(key.encode('utf-8')) + len(json.dumps(value).encode('utf-8'))
+
+
+def test_lru_eviction_keeps_total_bytes_under_cap():
+    cache = MemoryCache(max_bytes=3 * _size('k0', 'x' * 20))
+    for i in range(3):
+        _set(cache, f'k{i}', 'x' * 20)
+    assert cache.get('k0') == 'x' * 20
+    _set(cache, 'k3', 'x' * 20)
+
+    # k1 en eski kullanılan
+    assert cache.get('k1') is None
+    assert [cache.get(k) is not None for k in ('k0', 'k2', 'k3')] == [True, True, True]
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 3
+    assert stats['bytes'] <= stats['max_bytes']
+
+    # Tek başına sınırı aşan değer yazılmaz, eski değeri de düşer
+    assert not _set(cache, 'k0', 'x' * 500)
+    assert cache.get('k0') is None and len(cache) == 2
+
+
+def test_ttl_expires_lazily_and_by_periodic_sweep(monkeypatch):
+    from app.services import cache_service as module
+
+    now = [1000.0]
+    monkeypatch.setattr(module.time, 'monotonic', lambda: now[0])
+    cache = MemoryCache(max_bytes=10_000, sweep_interval=30)
+    _set(cache, 'short', 1, expiration=10)
+    _set(cache, 'never-read', 2, expiration=10)
+    _set(cache, 'long', 3, expiration=3600)
+
+    now[0] += 11
+    assert cache.get('short') is None
+    assert not cache.exists('never-read')
+    assert len(cache) == 2
+
+    # Hiç okunmayan kayıt da süpürmede düşer
+    now[0] += 30
+    _set(cache, 'other', 4)
+    assert 'never-read' not in cache._entries
+    assert cache.get_stats()['expirations'] == 2
+    assert cache.get('long') == 3
+
+
+def test_prefix_and_glob_invalidation():
+    cache = MemoryCache()
+    for key in ('scrape:a', 'scrape:b', 'scraper:c', 'products:user:1', 'product:9:1'):
+        _set(cache, key, key)
+    assert cache.delete_matching('scrape:*') == 2
+    assert sorted(cache._keys) == ['product:9:1', 'products:user:1', 'scraper:c']
+    assert cache.delete_matching('product*:1') == 2
+    assert cache._keys == ['scraper:c']
+    assert cache.get_stats()['bytes'] == _size('scraper:c', 'scraper:c')
+
+
+def test_cache_service_memory_fallback():
+    service = CacheService()
+    service.redis_client = None
+    service.memory_cache = MemoryCache(max_bytes=10_000)
+
+    value = {'items': [1, 2]}
+    assert service.set('products:user:1', value, expiration=60)
+    cached = service.get('products:user:1')
+    assert cached == value
+    cached['items'].append(3)
+    assert service.get('products:user:1') == value
+    assert service.exists('products:user:1')
+
+    # JSON'a çevrilemeyen değer yazılmaz
+    assert not service.set('bad', object())
+    assert service.get('missing') is None
+
+    key = service._get_key('cache:fn', 1, a=2)
+    assert key.startswith('cache:fn:')
+    service.set(key, 'x')
+    service.clear('cache:*')
+    assert not service.exists(key) and service.exists('products:user:1')
+
+    stats = service.get_stats()
+    assert stats['backend'] == 'memory'
+    assert stats['memory']['hits'] == 2 and stats['memory']['misses'] == 1
+    assert stats['memory']['hit_ratio'] == 2 / 3
@@ -0,0 +1,163 @@
+"""
+Tests for the sharded global discovery index.
+"""
+import os
+import uuid
+
+import pytest
+
+from models import init_db, User, Collection
+from app.models.product import Product
+from app.repositories import get_repository
+from app.services.discovery_index import (
+    COLLECTION, USER, DiscoveryIndex, build_snapshot, collection_entry, read_snapshot,
+    rebuild_snapshot, save_snapshot, user_entry,
+)
+from app.utils.pagination import InvalidCursor
+
+
+class _User:
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+        self.profile_url = f'user_{id}'
+        self.avatar_url = None
+        self.created_at = '2026-10-01 10:00:00'
+
+
+def _snapshot():
+    ayse = {'id': 'u1', 'username': 'ayse', 'created_at': '2026-10-01 10:00:00'}
+    mehmet = {'id': 'u2', 'username': 'mehmet_stil', 'created_at': '2026-10-02 10:00:00'}
+    entries = [user_entry(ayse), user_entry(mehmet)]
+    entries.append(collection_entry(
+        {'id': 'c1', 'user_id': 'u1', 'name': 'Kış Montları', 'description': 'Sıcak tutanlar',
+         'created_at': '2026-10-03 10:00:00'},
+        ayse,
+        [{'id': 'p1', 'name': 'Kaban', 'brand': 'Massimo Dutti'}],
+    ))
+    entries.append(collection_entry(
+        {'id': 'c2', 'user_id': 'u2', 'name': 'Ofis Kombinleri', 'description': '',
+         'created_at': '2026-10-04 10:00:00'},
+        mehmet,
+        [{'id': 'p2', 'name': 'Mont', 'brand': 'Zara'}, {'id': 'p3', 'name': 'Gömlek', 'brand': 'Mavi'}],
+    ))
+    return {'version': 1, 'entries': entries}
+
+
+def _index(tmp_path, shards=4):
+    index = DiscoveryIndex(shards=shards, snapshot_path=str(tmp_path / 'missing.json'))
+    index.load_snapshot(_snapshot())
+    return index
+
+
+def test_ranking_kind_filter_and_fuzzy_fallback(tmp_path):
+    index = _index(tmp_path)
+    # Koleksiyon adı eşleşmesi ürün metni eşleşmesinden önce gelir
+    results, next_cursor = index.search('mont')
+    assert [(r['kind'], r['id']) for r in results] == [(COLLECTION, 'c1'), (COLLECTION, 'c2')]
+    assert next_cursor is None
+    assert results[0]['username'] == 'ayse' and 'email' not in results[0]
+
+    assert [r['id'] for r in index.search('ayse')[0]] == ['u1', 'c1']
+    assert [r['id'] for r in index.search('ayse', kind=USER)[0]] == ['u1']
+    assert [r['id'] for r in index.search('masimo duti')[0]] == ['c1']
+    assert index.search('   ') == ([], None)
+
+
+def test_cursor_pages_through_all_shards(tmp_path):
+    index = _index(tmp_path, shards=3)
+    for i in range(7):
+        index.put(user_entry({'id': f'x{i}', 'username': f'stil_{i}', 'created_at': f'2026-10-1{i} 10:00:00'}))
+
+    seen, cursor = [], None
+    while True:
+        results, cursor = index.search('stil', kind=USER, limit=3, cursor=cursor)
+        seen.extend(r['id'] for r in results)
+        if not cursor:
+            break
+    # 'stil_N' ve 'mehmet_stil' aynı skorda, yenilik sırasıyla
+    assert seen == [f'x{i}' for i in reversed(range(7))] + ['u2']
+
+    with pytest.raises(InvalidCursor):
+        index.search('stil', cursor='bozuk')
+
+
+def test_incremental_updates(tmp_path):
+    index = _index(tmp_path)
+    index.user_saved(_User('u1', 'ayse_moda'))
+    assert index.search('ayse_moda', kind=USER)[0][0]['username'] == 'ayse_moda'
+    # Sahip adı koleksiyon kaydında da güncellenir
+    assert [r['username'] for r in index.search('montlari')[0]] == ['ayse_moda']
+
+    index.collection_removed('c1')
+    assert index.search('kis montlari')[0] == []
+    assert 'c1' not in str(index._owned) and 'p1' not in index._product_collections
+
+
+def test_snapshot_roundtrip_and_reload(tmp_path, monkeypatch):
+    from app.services import discovery_index as module
+
+    path = str(tmp_path / 'discovery.json')
+    save_snapshot(_snapshot(), path)
+    assert len(read_snapshot(path)['entries']) == 4
+
+    monkeypatch.setattr(module, 'DISCOVERY_RELOAD_SECONDS', 0)
+    index = DiscoveryIndex(shards=2, snapshot_path=path)
+    assert [r['id'] for r in index.search('kombinleri')[0]] == ['c2']
+    assert index.stats['loads'] == 1
+
+    snapshot = _snapshot()
+    snapshot['entries'] = [e for e in snapshot['entries'] if e['key'] != f'{COLLECTION}:c2']
+    save_snapshot(snapshot, path)
+    os.utime(path, (1, 1))
+    assert index.search('kombinleri')[0] == []
+    assert index.stats['loads'] == 2
+
+
+def test_missing_snapshot_returns_empty_without_building(tmp_path, monkeypatch):
+    import app.repositories as repositories
+
+    def forbidden():
+        raise AssertionError('request path must not scan the repository')
+
+    monkeypatch.setattr(repositories, 'get_repository', forbidden)
+    index = DiscoveryIndex(shards=2, snapshot_path=str(tmp_path / 'missing.json'))
+    assert index.search('ayse') == ([], None)
+    assert not index.loaded and index.stats['loads'] == 0
+    # Yazım kancaları index yüklenene kadar etkisiz
+    index.user_saved(_User('u9', 'ayse'))
+    assert index.search('ayse') == ([], None)
+
+
+def test_repository_snapshot_and_model_hooks(app, tmp_path, monkeypatch):
+    from app.services import discovery_index as module
+
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'kesif_{suffix}', f'kesif_{suffix}@test.com', 'password123')
+        public = Collection.create(user.id, f'Vitrin {suffix}', 'Seçmeler', 'genel')
+        private = Collection.create(user.id, f'Gizli {suffix}', '', 'genel', is_public=False)
+
+        keys = {entry['key'] for entry in build_snapshot(get_repository(), page_size=2)['entries']}
+        assert f'{USER}:{user.id}' in keys and f'{COLLECTION}:{public.id}' in keys
+        assert f'{COLLECTION}:{private.id}' not in keys
+
+        path = str(tmp_path / 'discovery.json')
+        counts = rebuild_snapshot(path=path)
+        assert counts[USER] >= 1 and counts[COLLECTION] >= 1
+        index = DiscoveryIndex(shards=2, snapshot_path=path)
+        monkeypatch.setattr(module, 'discovery_index', index)
+        assert [r['id'] for r in index.search(f'vitrin {suffix}')[0]] == [public.id]
+        assert private.id not in [r['id'] for r in index.search(f'gizli {suffix}')[0]]
+
+        product = Product.create(user_id=user.id, name=f'Trençkot {suffix}', price='1.299,90 TL',
+                                 image='https://img.example.com/1.jpg',
+                                 url=f'https://shop.example.com/{suffix}', brand='Ipekyol')
+        assert public.add_product(product.id)
+        assert [r['id'] for r in index.search(f'trenckot {suffix}')[0]] == [public.id]
+
+        Product.update(product.id, user.id, name=f'Yağmurluk {suffix}')
+        assert 'Trençkot' not in index._entry(f'{COLLECTION}:{public.id}')['products']
+        assert [r['id'] for r in index.search(f'yagmurluk {suffix}')[0]] == [public.id]
+        assert index.stats['loads'] == 1
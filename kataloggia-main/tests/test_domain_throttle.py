@@ -0,0 +1,51 @@
+"""
+Tests for the per-domain token bucket, backoff and circuit breaker (in-process backend).
+"""
+import time
+
+import pytest
+
+from domain_throttle import DomainPausedError, DomainThrottle
+
+
+def test_token_bucket_spaces_requests():
+    """After the burst is spent, the next request waits about 1/rate seconds."""
+    throttle = DomainThrottle()
+    assert throttle.acquire('shop.com', rate=20, burst=2) == 0
+    assert throttle.acquire('shop.com', rate=20, burst=2) == 0
+
+    started = time.perf_counter()
+    throttle.acquire('shop.com', rate=20, burst=2)
+    assert 0.03 < time.perf_counter() - started < 0.2
+
+    # Other domains have their own bucket
+    assert throttle.acquire('other.com', rate=20, burst=2) == 0
+
+
+def test_backoff_on_429_and_reset_on_success():
+    """A 429 pauses the domain; a successful response clears the strikes."""
+    throttle = DomainThrottle(base_backoff=10)
+    throttle.report('shop.com', status=429)
+    assert throttle.stats('shop.com')['state'] == 'backoff'
+    with pytest.raises(DomainPausedError):
+        throttle.acquire('shop.com', max_wait=1)
+
+    throttle.report('shop.com', status=200)
+    assert throttle.stats('shop.com') == {'domain': 'shop.com', 'state': 'closed', 'strikes': 0, 'paused_for': 0.0}
+
+
+def test_retry_after_and_circuit_breaker():
+    """Retry-After extends the backoff; repeated blocks open the breaker."""
+    throttle = DomainThrottle(base_backoff=1, breaker_threshold=3, breaker_cooldown=600)
+    throttle.report('zara.com', status=403, retry_after=120)
+    assert throttle.paused_for('zara.com') > 100
+
+    throttle.report('zara.com', blocked=True)
+    throttle.report('zara.com', blocked=True)
+    stats = throttle.stats('zara.com')
+    assert stats['state'] == 'open'
+    assert stats['paused_for'] > 500
+
+    # 404 is neither a block nor a success
+    throttle.report('zara.com', status=404)
+    assert throttle.stats('zara.com')['strikes'] == 3
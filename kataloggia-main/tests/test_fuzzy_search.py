@@ -0,0 +1,113 @@
+"""
+Tests for typo-tolerant (trigram) product and collection search.
+"""
+import uuid
+
+from models import init_db, User, Collection
+from app.services.search_index import SearchIndex, UserCollectionIndex, UserProductIndex
+from app.utils.turkish_text import trigram_similarity, trigrams
+
+
+class _Product:
+    def __init__(self, id, name, brand, price_minor=None, created_at='2026-10-01'):
+        self.id = id
+        self.user_id = 'u1'
+        self.name = name
+        self.brand = brand
+        self.price_minor = price_minor
+        self.created_at = created_at
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name, 'created_at': self.created_at}
+
+
+class _Collection:
+    def __init__(self, id, name, description='', created_at='2026-10-01'):
+        self.id = id
+        self.user_id = 'u1'
+        self.name = name
+        self.description = description
+        self.created_at = created_at
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name, 'created_at': self.created_at}
+
+
+def test_trigram_similarity():
+    assert trigrams('zara') == {'  z', ' za', 'zar', 'ara', 'ra '}
+    assert trigram_similarity('adidas', 'adidas') == 1.0
+    assert trigram_similarity('adidsa', 'adidas') >= 0.4
+    assert trigram_similarity('masimo', 'massimo') > 0.6
+    assert trigram_similarity('nike', 'zara') == 0.0
+
+
+def _products():
+    index = UserProductIndex()
+    index.add(_Product('p1', 'Superstar Sneaker', 'Adidas', 300000, '2026-10-01'))
+    index.add(_Product('p2', 'Keten Gömlek', 'Massimo Dutti', 150000, '2026-10-02'))
+    index.add(_Product('p3', 'Slim Pantolon', 'Massimo Dutti', None, '2026-10-03'))
+    index.add(_Product('p4', 'Basic Tişört', 'Zara', 40000, '2026-10-04'))
+    return index
+
+
+def test_typos_fall_back_to_fuzzy_matching():
+    index = _products()
+    assert [r['id'] for r in index.search('adidsa')[0]] == ['p1']
+    results, total = index.search('masimo duti')
+    assert [r['id'] for r in results] == ['p3', 'p2'] and total == 2
+    # Marka ve fiyat filtreleri bulanık eşleşmede de uygulanır
+    assert [r['id'] for r in index.search('masimo duti', max_minor=100000)[0]] == ['p3']
+    assert index.search('adidsa', brand='zara')[0] == []
+    # Tam eşleşme varsa bulanık arama devreye girmez, alakasız sorgu boş döner
+    assert index.match('adidsa') == {}
+    assert index.search('buzdolabi')[0] == []
+
+
+def test_fuzzy_vocabulary_follows_updates_and_bounded_top_k():
+    index = _products()
+    index.remove('p1')
+    assert index.search('adidsa')[0] == []
+    assert 'adidas' not in index._token_docs and not index._trigram_tokens.get(' ad')
+    # Paylaşılan token diğer ürün silinince sözlükte kalır
+    index.remove('p2')
+    assert [r['id'] for r in index.search('masimo')[0]] == ['p3']
+
+    for i in range(10):
+        index.add(_Product(f'x{i}', f'Zara Ürün {i}', 'Zara', created_at=f'2026-10-1{i}'))
+    results, total = index.search('zarra', limit=3)
+    assert total == 11
+    assert [r['id'] for r in results] == ['x9', 'x8', 'x7']
+
+
+def test_collection_index_matches_name_description_and_typos():
+    index = UserCollectionIndex()
+    index.add(_Collection('c1', 'Yaz Kombinleri', 'Plaj ve tatil için', '2026-10-01'))
+    index.add(_Collection('c2', 'Kış Gardırobu', 'Mont ve bot', '2026-10-02'))
+    index.add(_Collection('c3', 'Tatil Listesi', '', '2026-10-03'))
+
+    # Ad eşleşmesi açıklamadan önce gelir
+    assert [r['id'] for r in index.search('tatil')[0]] == ['c3', 'c1']
+    assert [r['id'] for r in index.search('gardirob')[0]] == ['c2']
+    assert [r['id'] for r in index.search('kombnleri')[0]] == ['c1']
+    assert index.search('   ') == ([], 0)
+
+
+def test_collection_writes_update_a_loaded_index(app, monkeypatch):
+    from app.services import search_index as module
+
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'fuzzy_{suffix}', f'fuzzy_{suffix}@test.com', 'password123')
+        first = Collection.create(user.id, 'Hediye Fikirleri', 'Doğum günü', 'genel')
+
+        index = SearchIndex()
+        monkeypatch.setattr(module, 'search_index', index)
+        assert [r['id'] for r in index.search_collections(user.id, 'hediey')[0]] == [first.id]
+        builds = index.stats['builds']
+
+        second = Collection.create(user.id, 'Ev Dekorasyonu', '', 'genel')
+        assert [r['id'] for r in index.search_collections(user.id, 'dekorasyon')[0]] == [second.id]
+        assert second.delete()
+        assert index.search_collections(user.id, 'dekorasyon')[0] == []
+        assert index.stats['builds'] == builds
@@ -0,0 +1,112 @@
+"""
+Tests for the browser-less HTTP tier parsers and per-domain tier tracking.
+"""
+import pytest
+
+import scraper
+from http_fetcher import PermanentScrapeError, TierTracker, extract_jsonld_from_html, parse_product_html
+
+
+SAMPLE_HTML = """
+<html><head>
+<title>Sample Product</title>
+<meta property="og:title" content="OG Title">
+<meta property="og:image" content="https://cdn.example.com/og.jpg">
+<meta property="product:price:amount" content="199.90">
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "BreadcrumbList", "itemListElement": []},
+  {"@type": ["Product", "Thing"], "name": "Graph Product",
+   "offers": {"price": "149.90", "priceCurrency": "TRY"}}
+]}
+</script>
+</head><body>
+<div itemscope itemtype="https://schema.org/Product">
+  <span itemprop="name">Microdata Product</span>
+  <div itemprop="brand" itemscope><span itemprop="name">ACME</span></div>
+  <meta itemprop="price" content="129.90">
+  <img itemprop="image" src="https://cdn.example.com/md.jpg">
+</div>
+</body></html>
+"""
+
+
+def test_jsonld_product_inside_graph():
+    """Product nodes are found inside @graph, including list-valued @type."""
+    product = extract_jsonld_from_html(SAMPLE_HTML)
+    assert product['name'] == 'Graph Product'
+    assert product['offers']['price'] == '149.90'
+    assert extract_jsonld_from_html('<script type="application/ld+json">{bad json</script>') is None
+
+
+def test_parse_product_html_sources():
+    """Microdata and meta tags are returned separately from JSON-LD."""
+    parsed = parse_product_html(SAMPLE_HTML)
+    assert parsed['jsonld']['name'] == 'Graph Product'
+    assert parsed['microdata'] == {
+        'title': 'Microdata Product',
+        'brand': 'ACME',
+        'price': '129.90',
+        'image': 'https://cdn.example.com/md.jpg',
+    }
+    assert parsed['meta'] == {
+        'title': 'OG Title',
+        'image': 'https://cdn.example.com/og.jpg',
+        'price': '199.90',
+    }
+
+
+def test_tier_tracker_skips_failing_tier():
+    """A tier that failed for the whole window is skipped until the reprobe delay passes."""
+    tracker = TierTracker(window=3, reprobe_seconds=3600)
+    for _ in range(3):
+        assert tracker.should_try('example.com', 'http')
+        tracker.record('example.com', 'http', False)
+    assert not tracker.should_try('example.com', 'http')
+    assert tracker.should_try('other.com', 'http')
+
+    tracker.reprobe_seconds = 0
+    assert tracker.should_try('example.com', 'http')
+    tracker.record('example.com', 'http', True)
+    assert tracker.stats()['example.com']['http'] == {'recent_successes': 1, 'recent_attempts': 3}
+
+
+def test_http_tier_404_is_a_miss_confirmed_by_the_browser(monkeypatch):
+    """Shops often 404/403 plain clients: the HTTP tier steps aside and the browser decides."""
+    reports = []
+    monkeypatch.setattr(scraper.domain_throttle, 'report', lambda domain, **kw: reports.append(kw.get('status')))
+    monkeypatch.setattr(scraper, 'acquire_scrape_slot', lambda url, site=None: True)
+    monkeypatch.setattr(scraper, 'tier_tracker', TierTracker())
+
+    monkeypatch.setattr(scraper, 'fetch_page', lambda url: (404, None, {}))
+    assert scraper.scrape_product_http('https://shop.example.com/urun') is None
+
+    def browser(result):
+        def run_sync(coro, timeout=None):
+            coro.close()
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return run_sync
+
+    found = {'title': 'Ürün', 'price': '10,00 TL', 'image': 'https://img.example.com/1.jpg'}
+    monkeypatch.setattr(scraper.browser_pool, 'run_sync', browser(found))
+    assert scraper.scrape_product('https://shop.example.com/urun')['tier'] == 'browser'
+
+    monkeypatch.setattr(scraper.browser_pool, 'run_sync',
+                        browser(PermanentScrapeError('https://shop.example.com/urun', 'page not found', 410)))
+    with pytest.raises(PermanentScrapeError) as info:
+        scraper.scrape_product('https://shop.example.com/urun')
+    assert info.value.status == 410
+
+    # Bot/challenge sayfası (403) tarayıcı katmanı için ceza sayılmaz; 429 sayılır
+    reports.clear()
+    monkeypatch.setattr(scraper, 'fetch_page', lambda url: (403, None, {}))
+    assert scraper.scrape_product_http('https://shop.example.com/urun') is None
+    monkeypatch.setattr(scraper, 'fetch_page', lambda url: (429, None, {'Retry-After': '30'}))
+    assert scraper.scrape_product_http('https://shop.example.com/urun') is None
+    assert reports == [429]
+
+    # Bağlantı hatası geçicidir
+    monkeypatch.setattr(scraper, 'fetch_page', lambda url: (None, None, {}))
+    assert scraper.scrape_product_http('https://shop.example.com/eski-urun') is None
@@ -0,0 +1,70 @@
+"""
+Tests for the request-scoped identity map and batch loader.
+"""
+import uuid
+
+from models import init_db, User
+from app.models.product import Product
+from app.repositories import get_repository
+from app.utils.identity_map import BatchLoader, current_identity_map
+
+
+def test_batch_loader_merges_pending_ids_and_caches_misses():
+    calls = []
+
+    def fetch_many(ids):
+        calls.append(list(ids))
+        return [{'id': item_id} for item_id in ids if item_id != 'missing']
+
+    loader = BatchLoader(fetch_many, lambda data: dict(data, hydrated=True))
+    loader.prime(['a', 'b', 'missing'])
+    first = loader.load('c')
+    assert first == {'id': 'c', 'hydrated': True}
+    assert calls == [['a', 'b', 'missing', 'c']]
+
+    assert loader.load('c') is first
+    assert loader.load('missing') is None
+    assert [obj['id'] for obj in loader.load_many(['b', 'missing', 'a'])] == ['b', 'a']
+    assert len(calls) == 1
+    assert loader.stats == {'hits': 5, 'batches': 1, 'fetched': 3}
+
+    loader.forget('c')
+    loader.load('c')
+    assert calls[-1] == ['c']
+
+
+def test_models_share_one_read_per_request(app):
+    """Repeated get_by_id in a request is served from memory; writes evict the entry."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'imap_{suffix}', f'imap_{suffix}@test.com', 'password123')
+        product_ids = [
+            Product.create(user_id=user.id, name=f'Ürün {i}', price='10,00 TL',
+                           image='https://img.example.com/1.jpg',
+                           url=f'https://shop.example.com/{suffix}-{i}', brand='Brand').id
+            for i in range(3)
+        ]
+
+        reads = []
+        original_user, original_products = repo.get_users_by_ids, repo.get_products_by_ids
+        repo.get_users_by_ids = lambda ids: reads.append(('users', list(ids))) or original_user(ids)
+        repo.get_products_by_ids = lambda ids: reads.append(('products', list(ids))) or original_products(ids)
+        try:
+            with app.test_request_context('/'):
+                assert User.get_by_id(user.id) is User.get_by_id(user.id)
+                assert [p.id for p in Product.get_many(product_ids)] == product_ids
+                assert Product.get_by_id(product_ids[1]).name == 'Ürün 1'
+                assert reads == [('users', [user.id]), ('products', product_ids)]
+
+                Product.update(product_ids[1], user.id, name='Yeni Ad')
+                assert Product.get_by_id(product_ids[1]).name == 'Yeni Ad'
+                assert current_identity_map().stats()['users']['hits'] == 1
+
+            # Yeni istek -> yeni map
+            with app.test_request_context('/'):
+                User.get_by_id(user.id)
+            assert reads[-1] == ('users', [user.id])
+        finally:
+            repo.get_users_by_ids, repo.get_products_by_ids = original_user, original_products
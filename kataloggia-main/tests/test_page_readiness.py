@@ -0,0 +1,63 @@
+"""
+Tests for the readiness signals that replaced the fixed post-navigation sleep.
+"""
+import asyncio
+
+from page_readiness import default_signals, jsonld, network_idle, selector, state_key, wait_until_ready
+from site_registry import SiteHandler
+
+
+class FakePage:
+    """Resolves each wait after a fixed delay; None means the wait times out."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.cancelled = []
+
+    async def _wait(self, kind, timeout):
+        delay = self.delays.get(kind)
+        try:
+            if delay is None or delay * 1000 > timeout:
+                await asyncio.sleep(timeout / 1000)
+                raise TimeoutError(kind)
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(kind)
+            raise
+
+    async def wait_for_selector(self, css, state=None, timeout=None):
+        await self._wait('selector', timeout)
+
+    async def wait_for_function(self, expression, timeout=None):
+        await self._wait('state' if 'try' in expression else 'jsonld', timeout)
+
+    async def wait_for_load_state(self, state, timeout=None):
+        await self._wait('network_idle', timeout)
+
+
+def test_first_signal_wins_and_others_are_cancelled():
+    """The fastest signal decides readiness; slower waits are cancelled."""
+    page = FakePage({'jsonld': 0.01, 'network_idle': 0.5})
+    ready = asyncio.run(wait_until_ready(page, [jsonld(1000), network_idle(1000)]))
+    assert ready == 'jsonld'
+    assert page.cancelled == ['network_idle']
+
+
+def test_timeouts_fall_through():
+    """If no signal fires the scrape continues after the timeouts with None."""
+    page = FakePage({})
+    ready = asyncio.run(wait_until_ready(page, [selector('.price', 20), state_key('window.__X', 30)]))
+    assert ready is None
+
+
+def test_default_signals_depend_on_extractor():
+    """Sites with a dedicated extractor wait for network idle; others race JSON-LD and selectors."""
+    plain = SiteHandler('example.com')
+    plain.selectors = {'price': ['.price', '.amount']}
+    assert [s['type'] for s in default_signals(plain)] == ['jsonld', 'network_idle', 'selector']
+    assert default_signals(plain)[-1]['value'] == '.price, .amount'
+
+    custom = SiteHandler('n11.com')
+    custom.extractor = lambda page: None
+    assert [s['type'] for s in default_signals(custom)] == ['network_idle']
+    assert [s['type'] for s in default_signals(None)] == ['jsonld', 'network_idle']
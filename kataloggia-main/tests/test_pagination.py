@@ -0,0 +1,106 @@
+"""
+Tests for cursor (keyset) pagination.
+"""
+import uuid
+
+import pytest
+
+from models import init_db, get_db_connection, Notification, User
+from app.models.product import Product
+from app.utils.pagination import (
+    InvalidCursor, MAX_PAGE_SIZE, decode_cursor, encode_cursor, make_page, page_size,
+)
+
+
+def test_cursor_round_trip_and_validation():
+    token = encode_cursor('2026-10-17 12:00:00.123456', 'abc')
+    assert decode_cursor(token) == ('2026-10-17 12:00:00.123456', 'abc')
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+    with pytest.raises(InvalidCursor):
+        decode_cursor('bozuk-cursor')
+
+    assert page_size(None) == 20
+    assert page_size('abc', default=50) == 50
+    assert page_size('0') == 1
+    assert page_size(10_000) == MAX_PAGE_SIZE
+
+    page = make_page([{'id': 'a', 'created_at': 't2'}, {'id': 'b', 'created_at': 't1'}], 1)
+    assert [r['id'] for r in page['items']] == ['a']
+    assert decode_cursor(page['next_cursor']) == ('t2', 'a')
+    assert make_page([{'id': 'a', 'created_at': 't2'}], 1)['next_cursor'] is None
+
+
+def _walk(fetch, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        items, cursor = fetch(limit=limit, cursor=cursor)
+        seen.extend(item.id for item in items)
+        pages += 1
+        if cursor is None:
+            return seen, pages
+
+
+def test_sqlite_pages_have_no_gaps_or_overlap(app):
+    """Rows created within the same second are still ordered by the id tie-break."""
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'page_{suffix}', f'page_{suffix}@test.com', 'password123')
+        product_ids = {
+            Product.create(user_id=user.id, name=f'Ürün {i}', price='10,00 TL',
+                           image='https://img.example.com/1.jpg',
+                           url=f'https://shop.example.com/{suffix}-{i}', brand='Brand').id
+            for i in range(5)
+        }
+        for i in range(3):
+            Notification.create(user.id, type='SYSTEM', message=f'Bildirim {i}')
+
+        seen, pages = _walk(lambda **kw: Product.get_page_by_user_id(user.id, **kw), 2)
+        assert len(seen) == len(set(seen)) == 5
+        assert set(seen) == product_ids
+        assert pages == 3
+        assert [p.id for p in Product.get_by_user_id(user.id)][:5] == seen
+
+        seen, _ = _walk(lambda **kw: Notification.get_page_for_user(user.id, **kw), 2)
+        assert len(set(seen)) == 3
+
+
+def test_rows_without_created_at_are_paged_last(app):
+    """Legacy rows with NULL created_at are neither dropped nor repeated."""
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'nullts_{suffix}', f'nullts_{suffix}@test.com', 'password123')
+        dated = [Product.create(user_id=user.id, name=f'Ürün {i}', price='10,00 TL',
+                                image='https://img.example.com/1.jpg',
+                                url=f'https://shop.example.com/{suffix}-{i}', brand='Brand').id
+                 for i in range(2)]
+        with get_db_connection() as conn:
+            conn.execute('UPDATE products SET created_at = NULL WHERE id = ?', (dated.pop(),))
+            conn.commit()
+
+        seen, _ = _walk(lambda **kw: Product.get_page_by_user_id(user.id, **kw), 1)
+        assert len(seen) == len(set(seen)) == 2
+        assert seen[0] == dated[0]
+
+
+def test_products_api_returns_full_list_without_page_params(app, client):
+    with app.app_context():
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'apilist_{suffix}', f'apilist_{suffix}@test.com', 'password123')
+        for i in range(3):
+            Product.create(user_id=user.id, name=f'Ürün {i}', price='10,00 TL',
+                           image='https://img.example.com/1.jpg',
+                           url=f'https://shop.example.com/{suffix}-{i}', brand='Brand')
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+        session['_fresh'] = True
+
+    body = client.get('/api/v1/products').get_json()
+    assert body['count'] == 3 and 'next_cursor' not in body
+
+    body = client.get('/api/v1/products?limit=2').get_json()
+    assert body['count'] == 2 and body['next_cursor']
+    body = client.get(f"/api/v1/products?cursor={body['next_cursor']}").get_json()
+    assert body['count'] == 1 and body['next_cursor'] is None
@@ -0,0 +1,73 @@
+"""
+Tests for the shared price parser and the numeric (minor-unit) price columns.
+"""
+import uuid
+
+from models import init_db, get_db_connection, PriceTracking, User
+from app.models.product import Product
+from app.repositories import get_repository
+from price_parser import find_prices, format_price, parse_price, to_float, to_minor_units
+
+
+def test_parse_price_locales_and_currencies():
+    assert parse_price('1.299,99 TL') == (129999, 'TRY')
+    assert parse_price('$1,299.99') == (129999, 'USD')
+    assert parse_price('€ 49,90') == (4990, 'EUR')
+    assert parse_price('1 299,99 ₺') == (129999, 'TRY')
+    assert parse_price('1.299.000') == (129900000, 'TRY')
+    assert to_minor_units('1.299') == 129900
+    assert to_minor_units('1,299') == 129900
+    assert to_minor_units('129,9') == 12990
+    assert to_minor_units('12.99') == 1299
+    assert to_minor_units('-50.0') == -5000
+    assert to_minor_units(19.9) == 1990
+    assert to_float('80') == 80.0
+    # Binlik grubu olamayan tam kısım: tek ayırıcı + 3 rakam ondalıktır
+    assert to_minor_units('1299.990') == 129999
+    assert to_minor_units('1 299,990') == 129999
+    assert to_minor_units('0,990') == 99
+    assert to_minor_units('1299.995') == 130000
+    # Para birimine en yakın sayı fiyattır
+    assert parse_price('%20 indirim 1.299 TL') == (129900, 'TRY')
+    assert parse_price('%20 1.299 TL') == (129900, 'TRY')
+    assert parse_price('1\u00a0299\u202f000 TL') == (129900000, 'TRY')
+    assert parse_price('3 taksit, $1,299.99') == (129999, 'USD')
+    assert parse_price('fiyat yok') is None
+    assert parse_price('') is None
+    assert parse_price(None) is None
+
+
+def test_format_and_find_prices():
+    assert format_price(129999) == '1.299,99 TL'
+    assert format_price(990, 'USD') == '9,90 USD'
+    assert format_price(-5000) == '-50,00 TL'
+    assert find_prices('Eski: 1.499,99 TL Yeni: 1.299,99 TL') == ['1.499,99', '1.299,99']
+
+
+def test_numeric_price_columns_are_written_and_backfilled(app):
+    """Products and trackings store kuruş next to the display string; init_db fills old rows."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'parser_{suffix}', f'parser_{suffix}@test.com', 'password123')
+        product = Product.create(user_id=user.id, name='Parser Ürün', price='1.299,99 TL',
+                                 image='https://img.example.com/1.jpg',
+                                 url=f'https://shop.example.com/{suffix}', brand='Brand')
+        assert (product.price_minor, product.currency) == (129999, 'TRY')
+
+        tracking_id = PriceTracking.create(user_id=user.id, product_id=product.id,
+                                           current_price='1.299,99 TL', original_price='1.299,99 TL',
+                                           alert_price='1.000 TL')
+        tracking = repo.get_price_tracking_by_id(tracking_id)
+        assert (tracking['current_price_minor'], tracking['alert_price_minor']) == (129999, 100000)
+
+        repo.update_product(product.id, user.id, price='999,90 TL')
+        assert repo.get_product_by_id(product.id)['price_minor'] == 99990
+
+        conn = get_db_connection()
+        conn.execute('UPDATE products SET price_minor = NULL, currency = NULL WHERE id = ?', (product.id,))
+        conn.commit()
+        conn.close()
+        init_db()
+        assert repo.get_product_by_id(product.id)['price_minor'] == 99990
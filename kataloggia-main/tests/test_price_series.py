@@ -0,0 +1,129 @@
+"""
+Tests for bucketed, delta-encoded price history.
+"""
+import uuid
+from datetime import datetime
+
+from models import init_db, get_db_connection
+from app.repositories import get_repository
+from app.utils.price_series import (
+    append_to_bucket, decode_bucket, encode_bucket, format_minor_units, group_samples,
+    merge_buckets, merge_samples, months_between, overlay_samples, to_minor_units,
+)
+
+
+def test_to_minor_units_and_format():
+    assert to_minor_units('1.299,99 TL') == 129999
+    assert to_minor_units('1,299.99') == 129999
+    assert to_minor_units('₺ 80') == 8000
+    assert to_minor_units(19.9) == 1990
+    assert to_minor_units('fiyat yok') is None
+    assert format_minor_units(129999) == '1299.99'
+    assert format_minor_units(5) == '0.05'
+
+
+def test_bucket_append_is_delta_encoded():
+    """In-order appends only extend the delta arrays; out-of-order ones are merged."""
+    bucket = append_to_bucket(None, 'p1', '2026-10', [(1000, 129999)])
+    bucket = append_to_bucket(bucket, 'p1', '2026-10', [(4600, 124999), (8200, 124999)])
+    assert bucket['ts'] == [1000, 3600, 3600]
+    assert bucket['p'] == [129999, -5000, 0]
+    assert bucket['n'] == 3
+
+    bucket = append_to_bucket(bucket, 'p1', '2026-10', [(2000, 110000)])
+    assert decode_bucket(bucket) == ([1000, 2000, 4600, 8200], [129999, 110000, 124999, 124999])
+    assert (bucket['last_ts'], bucket['last_p']) == (8200, 124999)
+
+
+def test_merge_buckets_range_and_limit():
+    """Reads span months, filter by range and keep the newest samples under a limit."""
+    sept = encode_bucket('p1', '2026-09', [(100, 1), (200, 2)])
+    octo = encode_bucket('p1', '2026-10', [(300, 3), (400, 4)])
+    assert merge_buckets([octo, sept]) == {'timestamps': [100, 200, 300, 400], 'prices': [1, 2, 3, 4]}
+    assert merge_buckets([octo, sept], limit=3)['prices'] == [2, 3, 4]
+    assert merge_buckets([octo, sept], start=150, end=350)['timestamps'] == [200, 300]
+
+    start = datetime(2025, 11, 15).timestamp()
+    end = datetime(2026, 2, 1).timestamp()
+    assert months_between(start, end) == ['2025-11', '2025-12', '2026-01', '2026-02']
+
+
+def test_merge_samples_skips_known_timestamps():
+    """Re-running a migration does not duplicate samples already in the bucket."""
+    bucket = encode_bucket('p1', '2026-10', [(100, 1), (300, 3)])
+    merged = merge_samples(bucket, 'p1', '2026-10', [(100, 1), (200, 2), (200, 2), (300, 3)])
+    assert decode_bucket(merged) == ([100, 200, 300], [1, 2, 3])
+    assert merge_samples(merged, 'p1', '2026-10', [(200, 2)]) is merged
+
+    legacy = group_samples([{'product_id': 'p1', 'price': '5,00', 'recorded_at': datetime(2026, 9, 1)}])
+    months = {b['month']: b['n'] for b in overlay_samples([bucket], legacy)}
+    assert months == {'2026-10': 2, '2026-09': 1}
+
+
+def test_sqlite_series_roundtrip_and_legacy_migration(app):
+    """Samples land in one row per product-month; legacy rows are read and migrated."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        product_id = f'series-{uuid.uuid4().hex[:8]}'
+
+        assert repo.append_price_samples([
+            {'product_id': product_id, 'price': '100,00', 'recorded_at': datetime(2026, 9, 30, 12)},
+            {'product_id': product_id, 'price': '90,00', 'recorded_at': datetime(2026, 10, 1, 12)},
+            {'product_id': product_id, 'price': '85,50', 'recorded_at': datetime(2026, 10, 2, 12)},
+        ]) == 3
+
+        conn = get_db_connection()
+        rows = conn.execute('SELECT month FROM price_series WHERE product_id = ? ORDER BY month',
+                            (product_id,)).fetchall()
+        conn.close()
+        assert [r[0] for r in rows] == ['2026-09', '2026-10']
+
+        series = repo.get_price_series(product_id)
+        assert series['prices'] == [10000, 9000, 8550]
+        assert repo.get_price_series(product_id, limit=2)['prices'] == [9000, 8550]
+        assert repo.get_price_series(product_id, start=datetime(2026, 10, 1))['prices'] == [9000, 8550]
+        assert [h['price'] for h in repo.get_price_history_by_product_id(product_id)] == ['100,00 TL', '90,00 TL', '85,50 TL']
+
+        legacy_id = f'legacy-{uuid.uuid4().hex[:8]}'
+        conn = get_db_connection()
+        conn.execute('INSERT INTO price_history (id, product_id, price, recorded_at) VALUES (?, ?, ?, ?)',
+                     (str(uuid.uuid4()), legacy_id, '1.250,00 TL', '2026-08-01 10:00:00'))
+        conn.commit()
+        conn.close()
+        assert repo.get_price_series(legacy_id)['prices'] == [125000]
+
+        repo.migrate_legacy_price_history()
+        conn = get_db_connection()
+        remaining = conn.execute('SELECT COUNT(*) FROM price_history').fetchone()[0]
+        conn.close()
+        assert remaining == 0
+        assert repo.get_price_series(legacy_id)['prices'] == [125000]
+
+
+def test_legacy_history_is_merged_with_new_samples_and_migration_is_rerunnable(app):
+    """Pre-migration rows stay visible after the first bucketed sample; a rerun adds nothing."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        product_id = f'mixed-{uuid.uuid4().hex[:8]}'
+        conn = get_db_connection()
+        conn.executemany('INSERT INTO price_history (id, product_id, price, recorded_at) VALUES (?, ?, ?, ?)', [
+            (str(uuid.uuid4()), product_id, '120,00 TL', '2026-09-15 10:00:00'),
+            (str(uuid.uuid4()), product_id, '110,00 TL', '2026-10-01 10:00:00'),
+        ])
+        conn.commit()
+        conn.close()
+
+        repo.add_price_history(product_id, '99,00 TL', datetime(2026, 10, 5, 10))
+        assert repo.get_price_series(product_id)['prices'] == [12000, 11000, 9900]
+        assert repo.get_price_series(product_id, limit=2)['prices'] == [11000, 9900]
+
+        # Yarıda kalmış taşıma: örnekler bucket'a yazıldı ama eski satırlar silinmedi
+        conn = get_db_connection()
+        rows = conn.execute('SELECT product_id, price, recorded_at FROM price_history WHERE product_id = ?',
+                            (product_id,)).fetchall()
+        conn.close()
+        repo.append_price_samples([dict(row) for row in rows])
+        repo.migrate_legacy_price_history()
+        assert repo.get_price_series(product_id)['prices'] == [12000, 11000, 9900]
@@ -0,0 +1,191 @@
+"""
+Tests for the URL-grouped price sweep (PriceTrackingService.check_all_prices).
+"""
+import uuid
+
+from models import init_db, PriceTracking, User
+from app.models.product import Product
+from app.repositories import get_repository
+from app.services.price_tracking_service import PriceTrackingService
+
+
+def _user(prefix):
+    suffix = uuid.uuid4().hex[:8]
+    return User.create(f'{prefix}_{suffix}', f'{prefix}_{suffix}@test.com', 'password123')
+
+
+def _tracked_product(user, url, price='100.00'):
+    product = Product.create(user_id=user.id, name='Sweep Ürün', price=price,
+                             image='https://img.example.com/1.jpg', url=url, brand='Brand')
+    tracking_id = PriceTracking.create(
+        user_id=user.id, product_id=product.id, current_price=price, original_price=price
+    )
+    return product, tracking_id
+
+
+def test_sweep_scrapes_each_url_once_and_applies_to_all(app, monkeypatch):
+    """Trackings of the same canonical URL share one scrape and get batched writes."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        base = f'https://shop.example.com/urun-{uuid.uuid4().hex[:6]}'
+        user_a, user_b = _user('sweep_a'), _user('sweep_b')
+        product_a, tracking_a = _tracked_product(user_a, base)
+        product_b, tracking_b = _tracked_product(user_b, base + '?utm_source=newsletter')
+
+        service = PriceTrackingService()
+        calls = []
+
+        def fake_scrape(url, allow_stale=True):
+            calls.append((url, allow_stale))
+            return {'name': 'Sweep Ürün', 'price': '80.00'}
+
+        monkeypatch.setattr(service.scraping_service, 'scrape_product', fake_scrape)
+
+        mine = {tracking_a, tracking_b}
+        trackings = [t for t in repo.get_all_active_price_trackings() if t['id'] in mine]
+        groups = service.plan_price_sweep(trackings)
+        assert len(groups) == 1
+        assert len(groups[0]['targets']) == 2
+
+        results = service.check_price_groups(groups)
+        assert calls == [(groups[0]['url'], False)]
+        assert results['urls'] == 1
+        assert results['checked'] == 2
+        assert results['updated'] == 2
+
+        for tracking_id in (tracking_a, tracking_b):
+            assert repo.get_price_tracking_by_id(tracking_id)['current_price'] == '80.00'
+        for product, user in ((product_a, user_a), (product_b, user_b)):
+            history = repo.get_price_history_by_product_id(product.id)
+            assert history[-1]['price'] == '80,00 TL'
+            notifications = repo.get_notifications_by_user_id(user.id)
+            assert [n['type'] for n in notifications] == ['PRICE_DROP']
+
+
+def test_sweep_skips_failed_scrapes_and_small_changes(app, monkeypatch):
+    """A failed scrape leaves trackings untouched; a tiny change creates no notification."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        user = _user('sweep_c')
+        _, tracking_ok = _tracked_product(user, f'https://a.example.com/{uuid.uuid4().hex[:6]}')
+        _, tracking_bad = _tracked_product(user, f'https://b.example.com/{uuid.uuid4().hex[:6]}')
+
+        service = PriceTrackingService()
+
+        def fake_scrape(url, allow_stale=True):
+            return {'price': '99.80'} if 'a.example.com' in url else None
+
+        monkeypatch.setattr(service.scraping_service, 'scrape_product', fake_scrape)
+
+        mine = {tracking_ok, tracking_bad}
+        trackings = [t for t in repo.get_all_active_price_trackings() if t['id'] in mine]
+        results = service.check_price_groups(service.plan_price_sweep(trackings))
+
+        assert results['urls'] == 2
+        assert results['failed'] == 1
+        assert results['checked'] == 1
+        assert results['updated'] == 0
+        assert repo.get_price_tracking_by_id(tracking_ok)['current_price'] == '100.00'
+        assert repo.get_notifications_by_user_id(user.id) == []
+
+
+def test_check_all_prices_dispatches_chunks(app, monkeypatch):
+    """With a dispatcher (Celery), groups are sent in chunks instead of scraped inline."""
+    with app.app_context():
+        service = PriceTrackingService()
+        groups = [{'key': str(i), 'url': f'https://x.com/{i}', 'targets': []} for i in range(5)]
+        monkeypatch.setattr(service, 'plan_price_sweep', lambda: groups)
+
+        sent = []
+        results = service.check_all_prices(dispatch=sent.append, chunk_size=2, force=True)
+        assert [len(chunk) for chunk in sent] == [2, 2, 1]
+        assert results['dispatched_chunks'] == 3
+        assert results['urls'] == 5
+
+
+def test_single_product_check_alerts_once_and_advances_tracking(app, monkeypatch):
+    """Checking the same below-target price twice sends one PRICE_ALERT, not one per check."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        user = _user('single')
+        product = Product.create(user_id=user.id, name='Tekil Ürün', price='100,00 TL',
+                                 image='https://img.example.com/1.jpg',
+                                 url=f'https://shop.example.com/tekil-{uuid.uuid4().hex[:6]}', brand='Brand')
+        tracking_id = PriceTracking.create(user_id=user.id, product_id=product.id,
+                                           current_price='90,20 TL', alert_price='90,00 TL')
+
+        service = PriceTrackingService()
+        monkeypatch.setattr(service.scraping_service, 'scrape_product',
+                            lambda url, allow_stale=True: {'name': 'Tekil Ürün', 'price': '89,90 TL'})
+
+        first = service.check_product_price(product.id)
+        second = service.check_product_price(product.id)
+        assert first['old_price'] == '90,20 TL' and first['alerts'] == 1
+        # 0.30 TL düşüş: PRICE_DROP yok, ama takip alarmla birlikte ilerledi
+        assert not first['price_changed']
+        assert second['old_price'] == '89,90 TL' and second['alerts'] == 0
+
+        tracking = repo.get_price_tracking_by_id(tracking_id)
+        assert tracking['current_price'] == '89,90 TL'
+        assert tracking['current_price_minor'] == 8990
+        types = [n['type'] for n in repo.get_notifications_by_user_id(user.id)]
+        assert types == ['PRICE_ALERT']
+
+
+def test_repeated_sweeps_notify_a_drop_once(app, monkeypatch):
+    """The sweep compares against the tracking's price, which it advances; the product row is not."""
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        user = _user('sweep_twice')
+        product, tracking_id = _tracked_product(user, f'https://shop.example.com/{uuid.uuid4().hex[:6]}')
+
+        service = PriceTrackingService()
+        monkeypatch.setattr(service.scraping_service, 'scrape_product',
+                            lambda url, allow_stale=True: {'name': 'Sweep Ürün', 'price': '80.00'})
+
+        updated = []
+        for _ in range(3):
+            trackings = [t for t in repo.get_all_active_price_trackings() if t['id'] == tracking_id]
+            updated.append(service.check_price_groups(service.plan_price_sweep(trackings))['updated'])
+
+        assert updated == [1, 0, 0]
+        assert Product.get_by_id(product.id).price == '100.00'
+        assert [n['type'] for n in repo.get_notifications_by_user_id(user.id)] == ['PRICE_DROP']
+        assert [h['price'] for h in repo.get_price_history_by_product_id(product.id)].count('80,00 TL') == 1
+
+
+def test_sweep_does_not_load_products_that_are_not_due(app, monkeypatch):
+    """After a check, the next beat skips the product read for groups that are not due yet."""
+    from app.services import price_tracking_service as module
+    from app.services.refresh_scheduler import RefreshScheduler
+
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        user = _user('sweep_due')
+        product, _ = _tracked_product(user, f'https://shop.example.com/{uuid.uuid4().hex[:6]}')
+
+        monkeypatch.setattr(module, 'refresh_scheduler', RefreshScheduler(budget_per_hour=10_000))
+        service = PriceTrackingService()
+        monkeypatch.setattr(service.scraping_service, 'scrape_product',
+                            lambda url, allow_stale=True: {'name': 'Sweep Ürün', 'price': '100.00'})
+
+        loaded = []
+        original = type(repo).get_products_by_ids
+
+        def counting(self, product_ids, *args, **kwargs):
+            loaded.append(list(product_ids))
+            return original(self, product_ids, *args, **kwargs)
+
+        monkeypatch.setattr(type(repo), 'get_products_by_ids', counting)
+
+        first = service.check_all_prices()
+        assert product.id in loaded[-1] and first['urls'] >= 1
+        loaded.clear()
+        second = service.check_all_prices()
+        assert all(product.id not in ids for ids in loaded)
+        assert second['skipped'] >= 1
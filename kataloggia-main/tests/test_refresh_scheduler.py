@@ -0,0 +1,119 @@
+"""
+Tests for adaptive per-product refresh intervals.
+"""
+from datetime import datetime
+
+from app.services import refresh_scheduler as scheduler_module
+from app.services.refresh_scheduler import (
+    MAX_INTERVAL, MIN_INTERVAL, RefreshScheduler, compute_interval, in_campaign,
+)
+
+
+def _group(key, alert_price=None):
+    return {'key': key, 'url': f'https://shop.example.com/{key}', 'targets': [{'alert_price': alert_price}]}
+
+
+def test_interval_shrinks_with_volatility():
+    """Stable prices are checked rarely, volatile ones often."""
+    assert compute_interval(0.0) == MAX_INTERVAL
+    assert compute_interval(1.0) == MIN_INTERVAL
+    assert compute_interval(0.2) > compute_interval(0.6)
+
+
+def test_alert_proximity_campaign_and_cost():
+    """Near an alert threshold or during a campaign the interval shrinks; costly domains wait longer."""
+    base = compute_interval(0.3, price=200.0)
+    assert compute_interval(0.3, price=200.0, alert_prices=[195.0]) < base
+    assert compute_interval(0.3, price=200.0, alert_prices=[100.0]) == base
+    assert compute_interval(0.3, price=200.0, campaign=True) < base
+    assert compute_interval(0.3, price=200.0, cost=2.0) > base
+
+
+def test_in_campaign():
+    assert in_campaign(datetime(2026, 11, 11))
+    assert not in_campaign(datetime(2026, 6, 1))
+    assert in_campaign(datetime(2026, 6, 1), periods=(('05-30', '06-02'),))
+
+
+def test_select_due_orders_by_due_time_and_respects_budget(monkeypatch):
+    """New groups are due at once; scheduled ones wait; the hourly budget caps a sweep."""
+    monkeypatch.setattr(scheduler_module, 'domain_cost', lambda url: 1.0)
+    scheduler = RefreshScheduler(budget_per_hour=3, campaign_periods=(('01-01', '01-01'),))
+    now = datetime(2026, 6, 1, 12, 0).timestamp()
+
+    stable = _group('stable')
+    interval = scheduler.record(stable, '100,00', now=now)
+    assert interval > MIN_INTERVAL
+
+    due = scheduler.select_due([stable, _group('a'), _group('b')], now=now + 60)
+    assert [g['key'] for g in due] == ['a', 'b']
+
+    # 2 of 3 already used this hour
+    assert len(scheduler.select_due([_group('c'), _group('d')], now=now + 120)) == 1
+
+    # Next hour: fresh budget, never-checked groups first, then the overdue one
+    later = now + max(interval, 3600) + 1
+    assert [g['key'] for g in scheduler.select_due([stable, _group('e')], now=later)] == ['e', 'stable']
+    assert scheduler.stats()['next_key'] == 'stable'
+
+
+def test_volatility_tracks_price_changes(monkeypatch):
+    """Repeated price changes shorten the interval; failures retry after a fixed delay."""
+    monkeypatch.setattr(scheduler_module, 'domain_cost', lambda url: 1.0)
+    scheduler = RefreshScheduler(campaign_periods=(('01-01', '01-01'),))
+    group = _group('volatile')
+    now = datetime(2026, 6, 1, 12, 0).timestamp()
+
+    first = scheduler.record(group, '100', now=now)
+    for i, price in enumerate(['90', '80', '70', '60']):
+        last = scheduler.record(group, price, now=now + i + 1)
+    assert last < first
+
+    steady = scheduler.record(_group('steady'), '100', now=now)
+    for i in range(4):
+        steady_last = scheduler.record(_group('steady'), '100', now=now + i + 1)
+    assert steady_last > steady
+
+    assert scheduler.record(group, None, now=now) == scheduler_module.FAILURE_RETRY
+
+
+def test_selected_groups_are_leased_until_recorded(monkeypatch):
+    """An overlapping sweep does not dispatch a group that is still being checked."""
+    monkeypatch.setattr(scheduler_module, 'domain_cost', lambda url: 1.0)
+    scheduler = RefreshScheduler(campaign_periods=(('01-01', '01-01'),), lease_ttl=600)
+    now = datetime(2026, 6, 1, 12, 0).timestamp()
+    a, b = _group('a'), _group('b')
+
+    assert [g['key'] for g in scheduler.select_due([a, b], now=now)] == ['a', 'b']
+    # 300 sn sonraki beat: ikisi de hâlâ kiralı
+    assert scheduler.select_due([a, b], now=now + 300) == []
+
+    # Başarısız tarama kirayı bırakır, tekrar deneme FAILURE_RETRY sonra
+    scheduler.record(a, None, now=now + 310)
+    assert scheduler.select_due([a, b], now=now + 320) == []
+    assert [g['key'] for g in scheduler.select_due([a], now=now + 310 + scheduler_module.FAILURE_RETRY)] == ['a']
+
+    # Sonucu hiç gelmeyen grubun kirası süresi dolunca düşer
+    assert [g['key'] for g in scheduler.select_due([b], now=now + 601)] == ['b']
+
+
+def test_budget_deferred_groups_are_not_left_leased():
+    scheduler = RefreshScheduler(budget_per_hour=1)
+    now = datetime(2026, 6, 1, 12, 0).timestamp()
+    assert [g['key'] for g in scheduler.select_due([_group('a'), _group('b')], now=now)] == ['a']
+    assert scheduler._memory._leases.keys() == {'a'}
+
+
+def test_pending_products_skip_groups_that_are_not_due(monkeypatch):
+    """Products mapped to a scheduled group are not loaded again until that group is due."""
+    monkeypatch.setattr(scheduler_module, 'domain_cost', lambda url: 1.0)
+    scheduler = RefreshScheduler(campaign_periods=(('01-01', '01-01'),))
+    now = datetime(2026, 6, 1, 12, 0).timestamp()
+
+    group = {'key': 'k', 'url': 'https://shop.example.com/k',
+             'targets': [{'product_id': 'p1'}, {'product_id': 'p2'}]}
+    assert scheduler.pending_product_ids(['p1', 'p2', None], now=now) == {'p1', 'p2'}
+
+    interval = scheduler.record(group, '100,00', now=now)
+    assert scheduler.pending_product_ids(['p1', 'p2', 'p3'], now=now + 60) == {'p3'}
+    assert scheduler.pending_product_ids(['p1', 'p3'], now=now + interval) == {'p1', 'p3'}
@@ -0,0 +1,65 @@
+"""
+Tests for the Playwright request blocking rules and bytes-saved counter.
+"""
+import asyncio
+
+from resource_blocker import ResourceBlocker
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = type('Request', (), {'resource_type': resource_type, 'url': url})()
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = 'abort'
+
+    async def continue_(self):
+        self.outcome = 'continue'
+
+
+class FakePage:
+    def __init__(self):
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+def test_default_rules():
+    """Images, fonts, media and tracker hosts are blocked; documents and first-party scripts load."""
+    blocker = ResourceBlocker()
+    assert blocker.should_block('image', 'https://cdn.shop.com/a.jpg')
+    assert blocker.should_block('font', 'https://shop.com/a.woff2')
+    assert blocker.should_block('script', 'https://www.googletagmanager.com/gtm.js')
+    assert not blocker.should_block('script', 'https://shop.com/app.js')
+    assert not blocker.should_block('document', 'https://shop.com/p/1')
+    assert not blocker.should_block('xhr', 'https://api.shop.com/price')
+
+
+def test_site_allow_and_deny_lists():
+    """Dotless entries are resource types, dotted entries are hosts; allow wins over deny."""
+    blocker = ResourceBlocker()
+    assert not blocker.should_block('image', 'https://cdn.shop.com/a.jpg', allow=['image'])
+    assert not blocker.should_block('font', 'https://fonts.shop.com/a.woff', allow=['shop.com'])
+    assert blocker.should_block('stylesheet', 'https://shop.com/a.css', deny=['stylesheet'])
+    assert blocker.should_block('script', 'https://widgets.chat.io/w.js', deny=['chat.io'])
+
+
+def test_install_counts_blocked_bytes():
+    """The installed route aborts blocked requests and updates the counters."""
+    blocker = ResourceBlocker()
+    page = FakePage()
+    asyncio.run(blocker.install(page))
+
+    image = FakeRoute('image', 'https://cdn.shop.com/a.jpg')
+    script = FakeRoute('script', 'https://shop.com/app.js')
+    asyncio.run(page.handler(image))
+    asyncio.run(page.handler(script))
+
+    assert image.outcome == 'abort'
+    assert script.outcome == 'continue'
+    stats = blocker.stats()
+    assert stats['blocked_by_type'] == {'image': 1}
+    assert stats['allowed_total'] == 1
+    assert stats['estimated_bytes_saved'] > 0
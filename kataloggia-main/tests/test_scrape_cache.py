@@ -0,0 +1,215 @@
+"""
+Tests for the tiered scrape cache and ScrapingService cache handling.
+"""
+import json
+import time
+
+from app.services.scrape_cache import (
+    DEFAULT_TTL, FRESH, NEGATIVE, STALE, ScrapeCache, domain_ttl,
+)
+from app.services.scraping_service import ScrapingService
+from http_fetcher import PermanentScrapeError
+
+
+PRODUCT = {'name': 'Ceket', 'price': 100.0, 'image': 'https://img/1.jpg'}
+
+
+def _expire(cache, url, fresh=True, stale=False):
+    """Move an entry's fresh/stale deadlines into the past."""
+    envelope = cache._lru[cache._key(url)]
+    now = time.time()
+    if fresh:
+        envelope['fresh_until'] = now - 1
+    if stale:
+        envelope['stale_until'] = now - 1
+
+
+def test_fresh_then_stale_then_miss():
+    """An entry is fresh until its TTL, then stale, then gone."""
+    cache = ScrapeCache()
+    url = 'https://www.zara.com/tr/tr/ceket-p01234567.html'
+    assert cache.get(url) == (None, None)
+
+    cache.set(url, PRODUCT)
+    assert cache.get(url) == (PRODUCT, FRESH)
+
+    _expire(cache, url)
+    assert cache.get(url) == (PRODUCT, STALE)
+
+    _expire(cache, url, stale=True)
+    assert cache.get(url) == (None, None)
+
+
+def test_negative_entry_expires_without_stale_window():
+    """Failures are remembered briefly and never served as stale."""
+    cache = ScrapeCache()
+    url = 'https://example.com/broken'
+    cache.set_negative(url)
+    assert cache.get(url) == (None, NEGATIVE)
+
+    _expire(cache, url)
+    assert cache.get(url) == (None, None)
+
+
+def test_tracking_params_share_one_entry():
+    """URLs differing only in tracking parameters hit the same entry."""
+    cache = ScrapeCache()
+    cache.set('https://www.trendyol.com/marka/urun-p-123456', PRODUCT)
+    value, state = cache.get('https://trendyol.com/marka/urun-p-123456?utm_source=x&boutiqueId=9')
+    assert state == FRESH
+    assert value == PRODUCT
+
+
+def test_lru_eviction_and_stats():
+    """The memory tier is bounded and evicts the least recently used entry."""
+    cache = ScrapeCache(max_entries=2)
+    cache.set('https://a.com/1', PRODUCT)
+    cache.set('https://a.com/2', PRODUCT)
+    cache.get('https://a.com/1')
+    cache.set('https://a.com/3', PRODUCT)
+
+    assert cache.get('https://a.com/2') == (None, None)
+    assert cache.get('https://a.com/1')[1] == FRESH
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['memory_entries'] == 2
+    assert stats['hits_memory'] == 2
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == round(2 / 3, 3)
+
+
+def test_expired_or_stale_memory_entry_falls_through_to_redis(monkeypatch):
+    """Another worker's fresh Redis entry wins over an expired or stale L1 entry."""
+    from app.services.scrape_cache import cache_service
+
+    redis = {}
+    monkeypatch.setattr(cache_service, 'redis_client', object())
+    # Redis gibi her okumada yeni kopya
+    monkeypatch.setattr(cache_service, 'get', lambda key: json.loads(redis[key]) if key in redis else None)
+    monkeypatch.setattr(cache_service, 'set',
+                        lambda key, value, expiration=None: redis.__setitem__(key, json.dumps(value)))
+
+    url = 'https://shop.com/ceket'
+    worker_a, worker_b = ScrapeCache(), ScrapeCache()
+    worker_a.set(url, PRODUCT)
+    assert worker_b.get(url) == (PRODUCT, FRESH)
+
+    # A'nın L1 kaydı eskidi, B yeni fiyatı Redis'e yazdı
+    _expire(worker_a, url)
+    updated = dict(PRODUCT, price=80.0)
+    worker_b.set(url, updated)
+    assert worker_a.get(url) == (updated, FRESH)
+    assert worker_a._lru[worker_a._key(url)]['value'] == updated
+
+    _expire(worker_a, url, stale=True)
+    assert worker_a.get(url) == (updated, FRESH)
+    assert worker_a.stats()['hits_redis'] == 2
+
+    # Redis'te de süresi dolmuşsa miss; süresi dolan L1 kaydı düşer
+    redis.clear()
+    _expire(worker_a, url, stale=True)
+    assert worker_a.get(url) == (None, None)
+    assert worker_a._key(url) not in worker_a._lru
+
+
+def test_domain_ttl():
+    """Fast-moving marketplaces get a shorter freshness window."""
+    assert domain_ttl('https://www.trendyol.com/x-p-1') == 900
+    assert domain_ttl('https://m.hepsiburada.com/x') == 900
+    assert domain_ttl('https://www.zara.com/tr/x') == DEFAULT_TTL
+
+
+def test_service_caches_once_and_negative_caches_failures(monkeypatch):
+    """A successful scrape is cached once; a definitive failure is negatively cached."""
+    cache = ScrapeCache()
+    monkeypatch.setattr('app.services.scraping_service.scrape_cache', cache)
+
+    calls = []
+    service = ScrapingService()
+
+    def fake_uncached(url):
+        calls.append(url)
+        if 'good' in url:
+            return dict(PRODUCT)
+        raise PermanentScrapeError(url, 'page not found', 404)
+
+    monkeypatch.setattr(service, '_scrape_uncached', fake_uncached)
+
+    assert service.scrape_product('https://shop.com/good') == PRODUCT
+    assert service.scrape_product('https://shop.com/good?utm_medium=mail') == PRODUCT
+    assert service.scrape_product('https://shop.com/bad') is None
+    assert service.scrape_product('https://shop.com/bad') is None
+    assert calls == ['https://shop.com/good', 'https://shop.com/bad']
+    assert cache.stats()['sets'] == 1
+    assert cache.stats()['negative_sets'] == 1
+
+
+def test_service_does_not_negative_cache_unexplained_failures(monkeypatch):
+    """A None result (timeout, block, paused domain) is retried on the next call."""
+    cache = ScrapeCache()
+    monkeypatch.setattr('app.services.scraping_service.scrape_cache', cache)
+
+    calls = []
+    service = ScrapingService()
+    monkeypatch.setattr(service, '_scrape_uncached', lambda url: calls.append(url))
+
+    assert service.scrape_product('https://shop.com/paused') is None
+    assert service.scrape_product('https://shop.com/paused') is None
+    assert len(calls) == 2
+    assert cache.stats()['negative_sets'] == 0
+
+
+def test_incomplete_scrape_result_is_not_negative_cached(monkeypatch):
+    """Missing fields are usually a transient render / consent / bot wall; only 404/410 is cached."""
+    import scraper
+
+    cache = ScrapeCache()
+    monkeypatch.setattr('app.services.scraping_service.scrape_cache', cache)
+    service = ScrapingService()
+    page = {'title': 'Ceket', 'price': None, 'image': 'https://img/1.jpg'}
+    monkeypatch.setattr(scraper, 'scrape_product', lambda url: dict(page))
+    assert service._scrape_uncached('https://shop.com/ceket') is None
+    assert service.scrape_product('https://shop.com/ceket') is None
+
+    page['title'] = 'Access Denied'
+    assert service._scrape_uncached('https://shop.com/ceket') is None
+
+    def no_status(url):
+        raise PermanentScrapeError(url, 'no product data on page')
+
+    monkeypatch.setattr(scraper, 'scrape_product', no_status)
+    assert service.scrape_product('https://shop.com/ceket') is None
+    assert cache.stats()['negative_sets'] == 0
+
+
+def test_service_price_check_bypasses_stale(monkeypatch):
+    """allow_stale=False re-scrapes instead of returning an expired price."""
+    cache = ScrapeCache()
+    monkeypatch.setattr('app.services.scraping_service.scrape_cache', cache)
+
+    service = ScrapingService()
+    url = 'https://shop.com/good'
+    cache.set(url, PRODUCT)
+    _expire(cache, url)
+
+    updated = dict(PRODUCT, price=80.0)
+    monkeypatch.setattr(service, '_scrape_uncached', lambda u: updated)
+
+    assert service.scrape_product(url, allow_stale=False) == updated
+    assert cache.get(url) == (updated, FRESH)
+
+
+def test_service_transient_errors_are_not_negative_cached(monkeypatch):
+    """Exceptions (timeouts etc.) are not remembered as permanent failures."""
+    cache = ScrapeCache()
+    monkeypatch.setattr('app.services.scraping_service.scrape_cache', cache)
+
+    service = ScrapingService()
+
+    def boom(url):
+        raise TimeoutError('timeout')
+
+    monkeypatch.setattr(service, '_scrape_uncached', boom)
+    assert service.scrape_product('https://shop.com/slow') is None
+    assert cache.get('https://shop.com/slow') == (None, None)
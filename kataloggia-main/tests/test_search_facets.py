@@ -0,0 +1,82 @@
+"""
+Tests for incrementally maintained search facets.
+"""
+import uuid
+
+from models import init_db, User
+from app.models.product import Product
+from app.services.search_index import SearchIndex, UserProductIndex
+
+
+class _Doc:
+    def __init__(self, id, name, brand, price_minor, old_price=None, discount_percentage=None,
+                 created_at='2026-10-01'):
+        self.id = id
+        self.user_id = 'u1'
+        self.name = name
+        self.brand = brand
+        self.price_minor = price_minor
+        self.old_price = old_price
+        self.discount_percentage = discount_percentage
+        self.created_at = created_at
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name, 'created_at': self.created_at}
+
+
+def _index():
+    index = UserProductIndex()
+    index.add(_Doc('p1', 'Deri Çanta', 'Mavi', 15000, old_price='200,00 TL'))
+    index.add(_Doc('p2', 'Spor Ayakkabı', 'Nike', 320000, discount_percentage='%15'))
+    index.add(_Doc('p3', 'Sırt Çantası', 'IŞIK Deri', 90000))
+    index.add(_Doc('p4', 'Kışlık Bot', 'Işık Deri', None))
+    index.add(_Doc('p5', 'Koşu Ayakkabısı', 'Nike', 1500000, discount_percentage='0'))
+    return index
+
+
+def _counts(facets):
+    return {bucket['bucket']: bucket['count'] for bucket in facets['price'] if bucket['count']}
+
+
+def test_catalog_facets_come_from_counters():
+    facets = _index().facets()
+    assert facets['brands'][:2] == [
+        {'value': 'IŞIK Deri', 'key': 'isik deri', 'count': 2},
+        {'value': 'Nike', 'key': 'nike', 'count': 2},
+    ]
+    assert _counts(facets) == {'0-250': 1, '500-1000': 1, '2500-5000': 1, '10000+': 1}
+    assert facets['price'][0] == {'bucket': '0-250', 'min_minor': 0, 'max_minor': 25000, 'count': 1}
+    assert facets['unpriced'] == 1
+    assert facets['discount'] == {'discounted': 2, 'not_discounted': 3}
+
+
+def test_facets_follow_updates_and_match_set():
+    index = _index()
+    index.add(_Doc('p2', 'Spor Ayakkabı', 'Adidas', 320000))
+    index.remove('p5')
+    facets = index.facets()
+    assert {b['key']: b['count'] for b in facets['brands']} == {'isik deri': 2, 'mavi': 1, 'adidas': 1}
+    assert facets['discount'] == {'discounted': 1, 'not_discounted': 3}
+    assert '10000+' not in _counts(facets)
+
+    results, total, facets = index.search_with_facets('canta', limit=1)
+    assert total == 2 and len(results) == 1
+    assert [b['key'] for b in facets['brands']] == ['isik deri', 'mavi']
+    assert _counts(facets) == {'0-250': 1, '500-1000': 1}
+    assert index.facets(brand_limit=1)['brands'] == [{'value': 'IŞIK Deri', 'key': 'isik deri', 'count': 2}]
+
+
+def test_search_index_facets_for_user(app):
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'facet_{suffix}', f'facet_{suffix}@test.com', 'password123')
+        for i, (brand, price) in enumerate([('Koton', '199,90 TL'), ('Koton', '749,90 TL'), ('LC Waikiki', '99,90 TL')]):
+            Product.create(user_id=user.id, name=f'Gömlek {i}', price=price,
+                           image='https://img.example.com/1.jpg',
+                           url=f'https://shop.example.com/{suffix}-{i}', brand=brand)
+
+        results, total, facets = SearchIndex().search_with_facets(user.id, limit=2)
+        assert total == 3 and len(results) == 2
+        assert [(b['value'], b['count']) for b in facets['brands']] == [('Koton', 2), ('LC Waikiki', 1)]
+        assert _counts(facets) == {'0-250': 2, '500-1000': 1}
@@ -0,0 +1,103 @@
+"""
+Tests for the Turkish-aware product search index.
+"""
+import uuid
+
+from models import init_db, User
+from app.models.product import Product
+from app.services.search_index import SearchIndex, UserProductIndex, search_index
+from app.utils.turkish_text import fold, prefixes, tokenize
+
+
+class _Doc:
+    def __init__(self, id, name, brand, price_minor, created_at='2026-10-01'):
+        self.id = id
+        self.user_id = 'u1'
+        self.name = name
+        self.brand = brand
+        self.price_minor = price_minor
+        self.created_at = created_at
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name, 'created_at': self.created_at}
+
+
+def test_turkish_folding():
+    assert fold('IŞIK') == fold('ışık') == 'isik'
+    assert fold('İSTANBUL') == 'istanbul'
+    assert fold('Çağrı Ürün Öğe') == 'cagri urun oge'
+    assert fold('Café') == 'cafe'
+    assert tokenize('İpek-Gömlek, 2 adet') == ['ipek', 'gomlek', '2', 'adet']
+    assert prefixes('canta') == ['ca', 'can', 'cant']
+
+
+def _index():
+    index = UserProductIndex()
+    index.add(_Doc('p1', 'Deri Çanta', 'Mavi', 150000, '2026-10-01'))
+    index.add(_Doc('p2', 'Spor Ayakkabı', 'Nike', 320000, '2026-10-02'))
+    index.add(_Doc('p3', 'Çantalı Sırt Çantası', 'IŞIK Deri', 90000, '2026-10-03'))
+    index.add(_Doc('p4', 'Kışlık Bot', 'Işık Deri', None, '2026-10-04'))
+    return index
+
+
+def test_text_brand_and_prefix_queries():
+    index = _index()
+    # Tam token eşleşmesi önekten önce gelir
+    results, total = index.search('çanta')
+    assert [r['id'] for r in results] == ['p1', 'p3'] and total == 2
+    assert [r['id'] for r in index.search('AYAK')[0]] == ['p2']
+    assert [r['id'] for r in index.search('deri canta')[0]] == ['p1', 'p3']
+    assert index.search('olmayan')[0] == []
+    # Marka filtresi Türkçe katlamayla, metin sorgusu markada da arar
+    assert sorted(r['id'] for r in index.search(brand='isik')[0]) == ['p3', 'p4']
+    assert [r['id'] for r in index.search('nike')[0]] == ['p2']
+
+
+def test_price_range_uses_both_plans_and_keeps_unpriced():
+    index = _index()
+    # Aday küme büyük, aralık küçük -> sıralı fiyat kolonu
+    assert sorted(index.match(brand='deri', min_minor=80000, max_minor=100000)) == ['p3', 'p4']
+    # Aday küme küçük -> aday başına kontrol
+    assert sorted(index.match('spor', min_minor=0, max_minor=400000)) == ['p2']
+    assert index.match('spor', max_minor=300000) == {}
+    assert sorted(index.match(min_minor=300000)) == ['p2', 'p4']
+
+
+def test_update_and_remove_keep_postings_consistent():
+    index = _index()
+    index.add(_Doc('p1', 'Deri Cüzdan', 'Mavi', 50000))
+    assert [r['id'] for r in index.search('çanta')[0]] == ['p3']
+    assert [r['id'] for r in index.search('cuzdan', max_minor=60000)[0]] == ['p1']
+    index.remove('p1')
+    index.remove('p1')
+    assert index.search('mavi')[0] == [] and 'mavi' not in index.brand_postings
+    assert len(index) == 3
+
+
+def test_model_writes_update_a_loaded_index(app):
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'search_{suffix}', f'search_{suffix}@test.com', 'password123')
+        first = Product.create(user_id=user.id, name='Keten Gömlek', price='499,90 TL',
+                               image='https://img.example.com/1.jpg',
+                               url=f'https://shop.example.com/{suffix}-1', brand='Koton')
+
+        assert [r['id'] for r in search_index.search(user.id, 'GÖMLEK')[0]] == [first.id]
+        builds = search_index.stats['builds']
+
+        second = Product.create(user_id=user.id, name='İpek Gömlek', price='899,90 TL',
+                                image='https://img.example.com/2.jpg',
+                                url=f'https://shop.example.com/{suffix}-2', brand='Koton')
+        results, _ = search_index.search(user.id, 'gomlek', min_minor=60000)
+        assert [r['id'] for r in results] == [second.id]
+
+        Product.update(first.id, user.id, name='Keten Pantolon')
+        assert [r['id'] for r in search_index.search(user.id, 'gömlek')[0]] == [second.id]
+        assert Product.delete(second.id, user.id)
+        assert search_index.search(user.id, 'gömlek')[0] == []
+        assert search_index.stats['builds'] == builds
+
+        # Yüklü olmayan index ilk aramada repository'den kurulur
+        fresh = SearchIndex()
+        assert [r['id'] for r in fresh.search(user.id, 'pantolon')[0]] == [first.id]
@@ -0,0 +1,78 @@
+"""
+Tests for single-flight coalescing of concurrent scrapes.
+"""
+import threading
+import time
+
+from app.utils.single_flight import SingleFlight
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis calls SingleFlight makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+
+def test_concurrent_callers_share_one_call():
+    """Threads asking for the same key while it is in flight get the leader's result."""
+    flight = SingleFlight()
+    calls = []
+
+    def slow_scrape():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'name': 'Shared'}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow_scrape))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{'name': 'Shared'}] * 5
+    assert flight.stats['local_shared'] == 4
+
+
+def test_follower_reads_result_published_by_other_worker():
+    """A worker that loses the Redis lock waits for the published result instead of scraping."""
+    redis_client = FakeRedis()
+    worker_a = SingleFlight(redis_client, prefix='sf', poll_interval=0.01)
+    worker_b = SingleFlight(redis_client, prefix='sf', poll_interval=0.01)
+
+    redis_client.set('sf:lock:k', 'other-token', nx=True)
+
+    def publish_later():
+        time.sleep(0.05)
+        redis_client.setex('sf:result:k', 30, '{"name": "Remote"}')
+        redis_client.eval(None, 1, 'sf:lock:k', 'other-token')
+
+    threading.Thread(target=publish_later).start()
+    assert worker_b.do('k', lambda: {'name': 'Local'}) == {'name': 'Remote'}
+    assert worker_b.stats['remote_shared'] == 1
+
+    # Once the lock is free the caller becomes the leader and releases the lock afterwards
+    del redis_client.data['sf:result:k']
+    assert worker_a.do('k', lambda: {'name': 'Local'}) == {'name': 'Local'}
+    assert 'sf:lock:k' not in redis_client.data
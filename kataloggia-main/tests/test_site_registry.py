@@ -0,0 +1,89 @@
+"""
+Tests for the domain -> extractor/selector registry used by scraper.fetch_data.
+"""
+from site_registry import SiteRegistry, normalize_host
+
+
+async def _dummy_extractor(page):
+    return None
+
+
+def test_normalize_host():
+    """Hostnames are lowercased and lose scheme, port and www."""
+    assert normalize_host('https://WWW.Zara.com:443/tr/x?y=1') == 'zara.com'
+    assert normalize_host('shop.mango.com/tr') == 'shop.mango.com'
+    assert normalize_host('') == ''
+
+
+def test_suffix_and_label_matching():
+    """Subdomains fall back to the registered parent; dotless keys match any label."""
+    registry = SiteRegistry()
+    registry.register_extractor(['mango.com'], _dummy_extractor)
+    registry.register_selectors('amazon', {'title': ['h1']})
+
+    assert registry.resolve('https://shop.mango.com/tr/p/1').domain == 'mango.com'
+    assert registry.resolve('https://www.amazon.com.tr/dp/1').domain == 'amazon'
+    assert registry.resolve('https://notmango.com/x') is None
+    assert registry.resolve('https://example.com') is None
+
+
+def test_duplicate_owner_rejected():
+    """A domain can only be owned by one extractor."""
+    registry = SiteRegistry()
+    registry.register_extractor(['n11.com'], _dummy_extractor)
+
+    async def other(page):
+        return None
+
+    try:
+        registry.register_extractor(['n11.com'], other)
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+
+def test_scraper_domain_owners():
+    """Every site-specific extractor in scraper.py is owned by the expected domain."""
+    import scraper
+
+    owners = scraper.site_registry.owners()
+    expected = {
+        'defacto.com.tr': 'extract_defacto_data',
+        'lcw.com': 'extract_lcw_data',
+        'mango.com': 'extract_mango_data',
+        'reflectstudio.com': 'extract_reflectstudio_data',
+        'n11.com': 'extract_n11_data',
+        'opus3a.com': 'extract_opus3a_data',
+        'atewear.com.tr': 'extract_atewear_data',
+        'dr.com.tr': 'extract_dr_data',
+        'mavi.com': 'extract_mavi_data',
+        'lego.tr': 'extract_lego_data',
+        'mediamarkt.com.tr': 'extract_mediamarkt_data',
+        'beymen.com': 'extract_beymen_data',
+        'jerf.com.tr': 'extract_jerf_data',
+        'vakkorama.com.tr': 'extract_vakkorama_data',
+        'massimodutti.com': 'extract_massimodutti_data',
+        'victoriassecret.com.tr': 'extract_victoriassecret_data',
+        'gratis.com': 'extract_gratis_data',
+        'decathlon.com.tr': 'extract_decathlon_data',
+        'teknosa.com': 'extract_teknosa_data',
+        'boyner.com.tr': 'extract_boyner_data',
+    }
+    for domain, extractor in expected.items():
+        assert owners[domain] == extractor, domain
+
+    # Selector-only sites resolve but have no extractor
+    assert owners['zara.com'] is None
+    assert scraper.get_site_selectors('https://www.zara.com/tr/x')['brand'] == ['ZARA']
+
+
+def test_context_options_come_from_the_registry():
+    """Per-site browser context overrides are registry settings, not URL substring checks."""
+    import scraper
+
+    mango = scraper.site_registry.resolve('https://shop.mango.com/tr/p/1')
+    assert mango.context_options['extra_http_headers'] is scraper.BROWSER_NAVIGATION_HEADERS
+    assert scraper.site_registry.resolve('https://www.depop.com/products/x').context_options
+    assert scraper.site_registry.resolve('https://www.zara.com/tr/x').context_options is None
+    # Host eşleşmesi: sorgu parametresindeki alan adı ayarı tetiklemez
+    assert scraper.site_registry.resolve('https://example.com/?ref=mango.com') is None
@@ -0,0 +1,137 @@
+"""
+Tests for the pooled SQLite connections.
+"""
+import sqlite3
+import threading
+import uuid
+
+import pytest
+
+from app.utils.db_path import SQLitePool
+from models import init_db, Collection, User
+from app.models.product import Product
+from app.repositories import get_repository
+
+
+def test_connection_is_reused_per_thread_with_wal_and_row_factory(tmp_path):
+    pool = SQLitePool(lambda: str(tmp_path / 'pool.db'))
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE items (id TEXT PRIMARY KEY, name TEXT)')
+    conn.commit()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
+
+    again = pool.acquire()
+    assert again._conn is conn._conn
+    again.execute("INSERT INTO items VALUES ('a', 'Ürün')")
+    again.commit()
+    row = again.execute('SELECT * FROM items').fetchone()
+    assert dict(row) == {'id': 'a', 'name': 'Ürün'}
+    again.close()
+    assert pool.stats == {'opened': 1, 'reused': 1}
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(pool.acquire()._conn))
+    thread.start()
+    thread.join()
+    assert others[0] is not conn._conn
+
+
+def test_uncommitted_work_is_rolled_back_on_release_but_not_by_nested_use(tmp_path):
+    pool = SQLitePool(lambda: str(tmp_path / 'pool.db'))
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE items (id TEXT PRIMARY KEY)')
+        conn.commit()
+
+        conn.execute("INSERT INTO items VALUES ('outer')")
+        with pool.connection() as inner:
+            inner.execute('SELECT COUNT(*) FROM items').fetchone()
+        legacy = pool.acquire()
+        legacy.close()
+        conn.close()    # blok içinde etkisiz
+        assert conn.in_transaction
+
+    with pool.connection() as fresh:
+        assert fresh.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+
+
+def test_failed_write_does_not_leave_database_locked(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    pool = SQLitePool(lambda: path)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE items (id TEXT PRIMARY KEY)')
+        conn.execute("INSERT INTO items VALUES ('a')")
+        conn.commit()
+
+    def failing_write():
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO items VALUES ('b')")
+            conn.execute("INSERT INTO items VALUES ('a')")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        failing_write()
+    assert not pool._local.state.conn.in_transaction
+    assert pool._local.state.depth == 0
+
+    # Başka bir thread yazabilmeli ('database is locked' yok)
+    errors = []
+
+    def other_writer():
+        try:
+            other = sqlite3.connect(path, timeout=0.5)
+            other.execute("INSERT INTO items VALUES ('c')")
+            other.commit()
+            other.close()
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=other_writer)
+    thread.start()
+    thread.join()
+    assert errors == []
+
+
+def test_top_level_acquire_discards_leaked_state(tmp_path):
+    pool = SQLitePool(lambda: str(tmp_path / 'pool.db'))
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE items (id TEXT PRIMARY KEY)')
+    conn.commit()
+    conn.execute("INSERT INTO items VALUES ('leak')")
+    pool.acquire()      # close() hiç çağrılmadı, derinlik 2
+
+    again = pool.acquire()
+    assert not again.in_transaction
+    assert pool._local.state.depth == 1
+    again.close()
+    assert pool._local.state.depth == 0
+    assert again.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+
+
+def test_read_connection_is_read_only(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    writer = SQLitePool(lambda: path).acquire()
+    writer.execute('CREATE TABLE items (id TEXT PRIMARY KEY)')
+    writer.commit()
+
+    reader = SQLitePool(lambda: path, readonly=True).acquire()
+    assert reader.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("INSERT INTO items VALUES ('x')")
+
+
+def test_bulk_collection_insert(app):
+    with app.app_context():
+        init_db()
+        repo = get_repository()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'pool_{suffix}', f'pool_{suffix}@test.com', 'password123')
+        collection = Collection.create(user.id, f'Koleksiyon {suffix}', '', 'genel')
+        product_ids = [
+            Product.create(user_id=user.id, name=f'Ürün {i}', price='10,00 TL',
+                           image='https://img.example.com/1.jpg',
+                           url=f'https://shop.example.com/{suffix}-{i}', brand='Brand').id
+            for i in range(3)
+        ]
+
+        assert repo.add_products_to_collection(collection.id, product_ids + product_ids[:1])
+        assert sorted(p['id'] for p in repo.get_products_by_collection_id(collection.id)) == sorted(product_ids)
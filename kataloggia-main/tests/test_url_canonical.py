@@ -0,0 +1,36 @@
+"""
+Tests for the canonical product URL helpers used by cache keys and DB lookups.
+"""
+from app.utils.url_canonical import canonicalize_url, extract_product_id, product_key, url_hash
+
+
+def test_tracking_params_fragment_and_host_are_normalized():
+    """utm/gclid/fbclid, fragments, www, default ports and trailing slashes do not change the key."""
+    variants = [
+        'https://www.shop.com/urun/abc/?utm_source=ig&utm_medium=story',
+        'HTTPS://shop.com:443/urun/abc#reviews',
+        'https://shop.com/urun/abc?fbclid=XYZ&gclid=123',
+        'shop.com/urun//abc',
+    ]
+    assert {canonicalize_url(u) for u in variants} == {'https://shop.com/urun/abc'}
+
+
+def test_remaining_params_are_sorted_and_kept():
+    """Non-tracking params (variants, sellers) are kept in a stable order."""
+    assert canonicalize_url('https://shop.com/p?size=M&color=red&utm_campaign=x') == \
+        'https://shop.com/p?color=red&size=M'
+
+
+def test_product_id_extraction():
+    """Known shops key on their product ID so slug changes still match."""
+    assert extract_product_id('https://www.trendyol.com/marka/urun-p-123456?boutiqueId=1') == '123456'
+    assert extract_product_id('https://www.amazon.com.tr/x/dp/B0ABCDEFGH/ref=sr_1_1') == 'B0ABCDEFGH'
+    assert extract_product_id('https://www.hepsiburada.com/urun-p-HBCV00001ABCD') == 'HBCV00001ABCD'
+    assert extract_product_id('https://shop.com/urun-p-123') is None
+
+    assert product_key('https://www.trendyol.com/a/eski-isim-p-123456?boutiqueId=9&merchantId=5') == \
+        'trendyol.com:123456?merchantId=5'
+    assert product_key('https://trendyol.com/a/yeni-isim-p-123456?merchantId=5') == \
+        'trendyol.com:123456?merchantId=5'
+    assert url_hash('https://www.amazon.com.tr/a/dp/B0ABCDEFGH?qid=1&sr=2') == \
+        url_hash('https://amazon.com.tr/b/dp/B0ABCDEFGH/ref=xyz')
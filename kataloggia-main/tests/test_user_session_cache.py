@@ -0,0 +1,89 @@
+"""
+Tests for the Flask-Login user session cache.
+"""
+import uuid
+
+from models import init_db, User
+from app.services.user_session_cache import UserSessionCache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+def test_returning_user_is_served_without_repository_read(app, monkeypatch):
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'session_{suffix}', f'session_{suffix}@test.com', 'password123')
+
+        reads = []
+        original = User.get_by_id
+        monkeypatch.setattr(User, 'get_by_id', staticmethod(lambda user_id: reads.append(user_id) or original(user_id)))
+
+        cache = UserSessionCache(ttl=60)
+        first = cache.load(user.id)
+        second = cache.load(user.id)
+        assert reads == [user.id]
+        assert second is not first
+        assert (second.username, second.created_at) == (first.username, first.created_at)
+        assert cache.stats['memory_hits'] == 1
+
+        # Hash önbellekte tutulmaz, şifre kontrolü yine çalışır
+        assert second.password_hash is None
+        assert second.check_password('password123')
+
+
+def test_save_and_set_password_invalidate(app, monkeypatch):
+    from app.services import user_session_cache as module
+
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.create(f'inval_{suffix}', f'inval_{suffix}@test.com', 'password123')
+
+        cache = UserSessionCache(ttl=60)
+        monkeypatch.setattr(module, 'user_session_cache', cache)
+
+        cached = cache.load(user.id)
+        cached.username = f'renamed_{suffix}'
+        cached.save()
+        assert cache.load(user.id).username == f'renamed_{suffix}'
+
+        cached = cache.load(user.id)
+        assert cached.check_password('password123')
+        assert cached.set_password('newpass456')
+        assert cache.stats['invalidations'] == 2
+        assert cache.load(user.id).check_password('newpass456')
+
+
+def test_lru_bound_and_shared_redis_tier(app):
+    with app.app_context():
+        init_db()
+        suffix = uuid.uuid4().hex[:8]
+        users = [User.create(f'lru{i}_{suffix}', f'lru{i}_{suffix}@test.com', 'password123')
+                 for i in range(3)]
+
+        redis_client = _FakeRedis()
+        cache = UserSessionCache(redis_client=redis_client, ttl=60, max_entries=2)
+        for user in users:
+            cache.load(user.id)
+        assert list(cache._entries) == [users[1].id, users[2].id]
+
+        # Başka bir process: LRU boş, kayıt Redis'ten gelir
+        other = UserSessionCache(redis_client=redis_client, ttl=60)
+        assert other.get(users[0].id).username == users[0].username
+        assert other.stats['redis_hits'] == 1
+
+        cache.invalidate(users[0].id)
+        assert UserSessionCache(redis_client=redis_client).get(users[0].id) is None
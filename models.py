@@ -8,12 +8,26 @@ from flask_login import UserMixin
 # SQLite imports are optional (deprecated, only for backward compatibility)
 try:
     import sqlite3
-    from app.utils.db_path import get_db_path, get_db_connection
+    from app.utils.db_path import get_db_path, get_db_connection, db_connection
     SQLITE_AVAILABLE = True
 except ImportError:
     sqlite3 = None
     SQLITE_AVAILABLE = False
 
+def _backfill_price_minor(cursor, table, source, target, with_currency=False):
+    """Eski kayıtlarda boş kalan sayısal fiyat kolonunu display string'den doldur"""
+    from price_parser import parse_price
+    cursor.execute(f'SELECT id, {source} FROM {table} WHERE {target} IS NULL AND {source} IS NOT NULL')
+    updates = []
+    for row_id, display in cursor.fetchall():
+        parsed = parse_price(display)
+        if parsed is None:
+            continue
+        updates.append((parsed.minor, parsed.currency, row_id) if with_currency else (parsed.minor, row_id))
+    if updates:
+        extra = ', currency = ?' if with_currency else ''
+        cursor.executemany(f'UPDATE {table} SET {target} = ?{extra} WHERE id = ?', updates)
+
 def init_db():
     """Veritabanını başlat"""
     import os
@@ -40,210 +54,256 @@ def init_db():
             "Please set DB_BACKEND=firestore or install SQLite dependencies. "
             "SQLite support is deprecated."
         )
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with db_connection() as conn:
+        cursor = conn.cursor()
     
-    # Kullanıcılar tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id TEXT PRIMARY KEY,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            profile_url TEXT UNIQUE,
-            last_read_notifications_at TIMESTAMP,
-            avatar_url TEXT
-        )
-    ''')
+        # Kullanıcılar tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                profile_url TEXT UNIQUE,
+                last_read_notifications_at TIMESTAMP,
+                avatar_url TEXT
+            )
+        ''')
     
-    # Ürünler tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS products (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            name TEXT NOT NULL,
-            price TEXT NOT NULL,
-            image TEXT,
-            brand TEXT NOT NULL,
-            url TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            old_price TEXT,
-            current_price TEXT,
-            discount_percentage TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+        # Ürünler tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS products (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                price TEXT NOT NULL,
+                image TEXT,
+                brand TEXT NOT NULL,
+                url TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                old_price TEXT,
+                current_price TEXT,
+                discount_percentage TEXT,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
     
-    # Eksik kolonları ekle (eğer yoksa)
-    try:
-        cursor.execute('ALTER TABLE products ADD COLUMN old_price TEXT')
-    except:
-        pass  # Kolon zaten varsa hata vermez
+        # Eksik kolonları ekle (eğer yoksa)
+        try:
+            cursor.execute('ALTER TABLE products ADD COLUMN old_price TEXT')
+        except:
+            pass  # Kolon zaten varsa hata vermez
     
-    try:
-        cursor.execute('ALTER TABLE products ADD COLUMN current_price TEXT')
-    except:
-        pass  # Kolon zaten varsa hata vermez
+        try:
+            cursor.execute('ALTER TABLE products ADD COLUMN current_price TEXT')
+        except:
+            pass  # Kolon zaten varsa hata vermez
     
-    try:
-        cursor.execute('ALTER TABLE products ADD COLUMN discount_percentage TEXT')
-    except:
-        pass  # Kolon zaten varsa hata vermez
+        try:
+            cursor.execute('ALTER TABLE products ADD COLUMN discount_percentage TEXT')
+        except:
+            pass  # Kolon zaten varsa hata vermez
     
-    try:
-        cursor.execute('ALTER TABLE products ADD COLUMN images TEXT')
-    except:
-        pass  # Kolon zaten varsa hata vermez
+        try:
+            cursor.execute('ALTER TABLE products ADD COLUMN images TEXT')
+        except:
+            pass  # Kolon zaten varsa hata vermez
     
-    try:
-        cursor.execute('ALTER TABLE products ADD COLUMN discount_info TEXT')
-    except:
-        pass  # Kolon zaten varsa hata vermez
+        try:
+            cursor.execute('ALTER TABLE products ADD COLUMN discount_info TEXT')
+        except:
+            pass  # Kolon zaten varsa hata vermez
 
-    # Users tablosuna last_read_notifications_at ekle (backward compatibility)
-    try:
-        cursor.execute('ALTER TABLE users ADD COLUMN last_read_notifications_at TIMESTAMP')
-    except:
-        pass
+        # Kanonik URL anahtarı (tracking parametresiz, get_product_by_url bununla arar)
+        try:
+            cursor.execute('ALTER TABLE products ADD COLUMN url_key TEXT')
+        except:
+            pass  # Kolon zaten varsa hata vermez
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_url_key ON products(url_key, created_at)')
 
-    # Users tablosuna avatar_url ekle (backward compatibility)
-    try:
-        cursor.execute('ALTER TABLE users ADD COLUMN avatar_url TEXT')
-    except:
-        pass
+        # Eski kayıtların url_key'ini doldur (sadece boş olanlar)
+        from app.utils.url_canonical import product_key
+        cursor.execute('SELECT id, url FROM products WHERE url_key IS NULL')
+        missing = [(product_key(url or ''), product_id) for product_id, url in cursor.fetchall()]
+        if missing:
+            cursor.executemany('UPDATE products SET url_key = ? WHERE id = ?', missing)
 
-    # Collections tablosuna cover_image ekle (backward compatibility)
-    try:
-        cursor.execute('ALTER TABLE collections ADD COLUMN cover_image TEXT')
-    except:
-        pass
+        # Sayısal fiyat (kuruş) + para birimi; filtre/sıralama string parse etmez
+        for column in ('price_minor INTEGER', 'currency TEXT'):
+            try:
+                cursor.execute(f'ALTER TABLE products ADD COLUMN {column}')
+            except:
+                pass  # Kolon zaten varsa hata vermez
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_user_price ON products(user_id, price_minor)')
+        _backfill_price_minor(cursor, 'products', 'price', 'price_minor', with_currency=True)
 
-    # Koleksiyonlar tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS collections (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            name TEXT NOT NULL,
-            description TEXT,
-            type TEXT NOT NULL,
-            is_public BOOLEAN DEFAULT 1,
-            share_url TEXT UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+        # Users tablosuna last_read_notifications_at ekle (backward compatibility)
+        try:
+            cursor.execute('ALTER TABLE users ADD COLUMN last_read_notifications_at TIMESTAMP')
+        except:
+            pass
+
+        # Users tablosuna avatar_url ekle (backward compatibility)
+        try:
+            cursor.execute('ALTER TABLE users ADD COLUMN avatar_url TEXT')
+        except:
+            pass
+
+        # Collections tablosuna cover_image ekle (backward compatibility)
+        try:
+            cursor.execute('ALTER TABLE collections ADD COLUMN cover_image TEXT')
+        except:
+            pass
+
+        # Koleksiyonlar tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS collections (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                description TEXT,
+                type TEXT NOT NULL,
+                is_public BOOLEAN DEFAULT 1,
+                share_url TEXT UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
     
-    # Koleksiyon ürünleri tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS collection_products (
-            id TEXT PRIMARY KEY,
-            collection_id TEXT NOT NULL,
-            product_id TEXT NOT NULL,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (collection_id) REFERENCES collections (id),
-            FOREIGN KEY (product_id) REFERENCES products (id)
-        )
-    ''')
+        # Koleksiyon ürünleri tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS collection_products (
+                id TEXT PRIMARY KEY,
+                collection_id TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (collection_id) REFERENCES collections (id),
+                FOREIGN KEY (product_id) REFERENCES products (id)
+            )
+        ''')
     
-    # Fiyat takip tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS price_tracking (
-            id TEXT PRIMARY KEY,
-            product_id TEXT NOT NULL,
-            user_id TEXT NOT NULL,
-            current_price TEXT NOT NULL,
-            original_price TEXT NOT NULL,
-            price_change TEXT DEFAULT '0',
-            is_active BOOLEAN DEFAULT 1,
-            alert_price TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (product_id) REFERENCES products (id),
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+        # Fiyat takip tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_tracking (
+                id TEXT PRIMARY KEY,
+                product_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                current_price TEXT NOT NULL,
+                original_price TEXT NOT NULL,
+                price_change TEXT DEFAULT '0',
+                is_active BOOLEAN DEFAULT 1,
+                alert_price TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (product_id) REFERENCES products (id),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+
+        # Fiyat takibine sayısal fiyatlar (kuruş); değişim/alarm kontrolü bunlarla yapılır
+        for column in ('current_price_minor INTEGER', 'alert_price_minor INTEGER'):
+            try:
+                cursor.execute(f'ALTER TABLE price_tracking ADD COLUMN {column}')
+            except:
+                pass  # Kolon zaten varsa hata vermez
+        _backfill_price_minor(cursor, 'price_tracking', 'current_price', 'current_price_minor')
+        _backfill_price_minor(cursor, 'price_tracking', 'alert_price', 'alert_price_minor')
     
-    # Fiyat geçmişi tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS price_history (
-            id TEXT PRIMARY KEY,
-            product_id TEXT NOT NULL,
-            price TEXT NOT NULL,
-            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (product_id) REFERENCES products (id)
-        )
-    ''')
+        # Fiyat geçmişi tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_history (
+                id TEXT PRIMARY KEY,
+                product_id TEXT NOT NULL,
+                price TEXT NOT NULL,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (product_id) REFERENCES products (id)
+            )
+        ''')
     
-    # Beğeni ve yorum tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS likes (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            collection_id TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (collection_id) REFERENCES collections (id)
-        )
-    ''')
+        # Fiyat geçmişi: ürün başına aylık delta kodlu bucket (app/utils/price_series.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_series (
+                product_id TEXT NOT NULL,
+                month TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (product_id, month)
+            )
+        ''')
     
-    # Takip tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS follows (
-            id TEXT PRIMARY KEY,
-            follower_id TEXT NOT NULL,
-            following_id TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (follower_id) REFERENCES users (id),
-            FOREIGN KEY (following_id) REFERENCES users (id)
-        )
-    ''')
+        # Beğeni ve yorum tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS likes (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                collection_id TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (collection_id) REFERENCES collections (id)
+            )
+        ''')
+    
+        # Takip tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS follows (
+                id TEXT PRIMARY KEY,
+                follower_id TEXT NOT NULL,
+                following_id TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (follower_id) REFERENCES users (id),
+                FOREIGN KEY (following_id) REFERENCES users (id)
+            )
+        ''')
 
-    # Favoriler tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS favorites (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            product_id TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (product_id) REFERENCES products (id),
-            UNIQUE(user_id, product_id)
-        )
-    ''')
+        # Favoriler tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS favorites (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (product_id) REFERENCES products (id),
+                UNIQUE(user_id, product_id)
+            )
+        ''')
 
-    # Bildirimler tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS notifications (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            product_id TEXT,
-            type TEXT NOT NULL,
-            message TEXT NOT NULL,
-            payload TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            read_at TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (product_id) REFERENCES products (id)
-        )
-    ''')
+        # Bildirimler tablosu
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notifications (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                product_id TEXT,
+                type TEXT NOT NULL,
+                message TEXT NOT NULL,
+                payload TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                read_at TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (product_id) REFERENCES products (id)
+            )
+        ''')
 
-    # Ürün import sorunları tablosu (başarısız veya eksik bilgiyle yüklenenler)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS product_import_issues (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            url TEXT NOT NULL,
-            status TEXT NOT NULL, -- failed | partial
-            reason TEXT,
-            raw_data TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+        # Ürün import sorunları tablosu (başarısız veya eksik bilgiyle yüklenenler)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS product_import_issues (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL, -- failed | partial
+                reason TEXT,
+                raw_data TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+
+        # Cursor sayfalama (app/utils/pagination.py): (created_at DESC, id DESC) keyset indeksleri
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at, id)')
+        for table in ('products', 'collections', 'notifications', 'product_import_issues'):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_user_created ON {table}(user_id, created_at, id)')
     
-    conn.commit()
-    conn.close()
+        conn.commit()
 
 class User(UserMixin):
     def __init__(self, id, username, email, password_hash, created_at, profile_url, last_read_notifications_at=None, avatar_url=None):
@@ -256,62 +316,94 @@ class User(UserMixin):
         self.last_read_notifications_at = last_read_notifications_at
         self.avatar_url = avatar_url
     
+    @staticmethod
+    def _from_data(user_data):
+        """Repository kaydından User nesnesi"""
+        # Handle timestamp conversion
+        created_at = user_data.get('created_at')
+        if hasattr(created_at, 'timestamp') and not hasattr(created_at, 'strftime'):  # Firestore Timestamp
+            # Convert Firestore timestamp to Python datetime
+            created_at = datetime.fromtimestamp(created_at.timestamp())
+        elif isinstance(created_at, str):
+            try:
+                created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+                except:
+                    created_at = datetime.now()
+        elif created_at is None:
+            created_at = datetime.now()
+        
+        last_read = user_data.get('last_read_notifications_at')
+        if last_read and hasattr(last_read, 'timestamp') and not hasattr(last_read, 'strftime'):  # Firestore Timestamp
+            # Convert Firestore timestamp to Python datetime
+            last_read = datetime.fromtimestamp(last_read.timestamp())
+        elif isinstance(last_read, str):
+            try:
+                last_read = datetime.strptime(last_read, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    last_read = datetime.strptime(last_read, '%Y-%m-%d %H:%M:%S')
+                except:
+                    last_read = None
+        
+        return User(
+            user_data.get('id'),
+            user_data.get('username'),
+            user_data.get('email'),
+            user_data.get('password_hash'),
+            created_at,
+            user_data.get('profile_url'),
+            last_read,
+            user_data.get('avatar_url')
+        )
+
     @staticmethod
     def get_by_id(user_id):
         """Kullanıcı ID'sine göre kullanıcı getir (Repository pattern)"""
         try:
             from app.repositories import get_repository
+            from app.utils.identity_map import loader_for
+            
+            # İstek içinde aynı kullanıcı bir kez okunur (load_user, şablonlar, servisler)
+            loader = loader_for('users')
+            if loader is not None:
+                return loader.load(user_id)
             
             repo = get_repository()
             user_data = repo.get_user_by_id(user_id)
             
             if user_data:
-                # Handle timestamp conversion
-                created_at = user_data.get('created_at')
-                if hasattr(created_at, 'timestamp') and not hasattr(created_at, 'strftime'):  # Firestore Timestamp
-                    # Convert Firestore timestamp to Python datetime
-                    from datetime import datetime
-                    created_at = datetime.fromtimestamp(created_at.timestamp())
-                elif isinstance(created_at, str):
-                    try:
-                        created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            created_at = datetime.now()
-                elif created_at is None:
-                    created_at = datetime.now()
-                
-                last_read = user_data.get('last_read_notifications_at')
-                if last_read and hasattr(last_read, 'timestamp') and not hasattr(last_read, 'strftime'):  # Firestore Timestamp
-                    # Convert Firestore timestamp to Python datetime
-                    from datetime import datetime
-                    last_read = datetime.fromtimestamp(last_read.timestamp())
-                elif isinstance(last_read, str):
-                    try:
-                        last_read = datetime.strptime(last_read, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            last_read = datetime.strptime(last_read, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            last_read = None
-                
-                return User(
-                    user_data.get('id'),
-                    user_data.get('username'),
-                    user_data.get('email'),
-                    user_data.get('password_hash'),
-                    created_at,
-                    user_data.get('profile_url'),
-                    last_read,
-                    user_data.get('avatar_url')
-                )
+                return User._from_data(user_data)
             return None
         except Exception as e:
             print(f"[ERROR] Get user by id error: {e}")
             return None
     
+    @staticmethod
+    def get_many(user_ids):
+        """Kullanıcıları tek toplu okumayla getir (giriş sırasında, bulunamayanlar atlanır)"""
+        try:
+            from app.repositories import get_repository
+            from app.utils.identity_map import loader_for
+            
+            loader = loader_for('users')
+            if loader is not None:
+                return loader.load_many(user_ids)
+            return [User._from_data(user_data) for user_data in get_repository().get_users_by_ids(user_ids)]
+        except Exception as e:
+            print(f"[ERROR] Get users by ids error: {e}")
+            return []
+    
+    @staticmethod
+    def get_page(limit=20, cursor=None):
+        """Kullanıcı listesinden bir sayfa: (kullanıcılar, next_cursor)"""
+        from app.repositories import get_repository
+        
+        page = get_repository().get_users_page(limit=limit, cursor=cursor)
+        return [User._from_data(user_data) for user_data in page['items']], page['next_cursor']
+    
     @staticmethod
     def get_by_username(username):
         """Kullanıcı adına göre kullanıcı getir (Repository pattern)"""
@@ -535,7 +627,7 @@ class User(UserMixin):
                     except:
                         last_read = None
             
-            return User(
+            user = User(
                 user_data.get('id'),
                 user_data.get('username'),
                 user_data.get('email'),
@@ -545,12 +637,23 @@ class User(UserMixin):
                 last_read,
                 user_data.get('avatar_url')
             )
+            from app.services.discovery_index import discovery_index
+            discovery_index.user_saved(user)
+            return user
         except Exception as e:
             print(f"[HATA] Kullanıcı oluşturma hatası: {e}")
             raise Exception(f"Kullanıcı oluşturulamadı: {str(e)}")
     
     def check_password(self, password):
         """Şifre kontrolü"""
+        if self.password_hash is None:
+            # Oturum önbelleğinden gelen kullanıcıda hash tutulmaz
+            from app.repositories import get_repository
+            
+            user_data = get_repository().get_user_by_id(self.id) or {}
+            self.password_hash = user_data.get('password_hash')
+            if self.password_hash is None:
+                return False
         return check_password_hash(self.password_hash, password)
     
     def get_products(self):
@@ -626,6 +729,8 @@ class User(UserMixin):
             
             if result:
                 self.password_hash = new_hash
+                from app.services.user_session_cache import user_session_cache
+                user_session_cache.invalidate(self.id)
                 return True
             return False
         except Exception as e:
@@ -647,6 +752,11 @@ class User(UserMixin):
 
             if not success:
                 raise Exception("User update failed in repository")
+            
+            from app.services.user_session_cache import user_session_cache
+            user_session_cache.invalidate(self.id)
+            from app.services.discovery_index import discovery_index
+            discovery_index.user_saved(self)
 
         except Exception as e:
             print(f"[HATA] Kullanıcı kaydetme hatası: {e}")
@@ -811,6 +921,63 @@ class ProductImportIssue:
             print(f"[ERROR] Create import issue error: {e}")
             raise
 
+    @staticmethod
+    def _from_data(issue_data):
+        """Repository kaydından ProductImportIssue nesnesi"""
+        # Handle timestamp conversion
+        created_at = issue_data.get('created_at')
+        if hasattr(created_at, 'timestamp'):
+            created_at = created_at
+        elif isinstance(created_at, str):
+            try:
+                created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+                except:
+                    created_at = datetime.now()
+        elif created_at is None:
+            created_at = datetime.now()
+        
+        # Handle last_retry_at timestamp
+        last_retry_at = issue_data.get('last_retry_at')
+        if last_retry_at and hasattr(last_retry_at, 'timestamp'):
+            last_retry_at = last_retry_at
+        elif isinstance(last_retry_at, str):
+            try:
+                last_retry_at = datetime.strptime(last_retry_at, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    last_retry_at = datetime.strptime(last_retry_at, '%Y-%m-%d %H:%M:%S')
+                except:
+                    last_retry_at = None
+        else:
+            last_retry_at = None
+        
+        return ProductImportIssue(
+            issue_data.get('id'),
+            issue_data.get('user_id'),
+            issue_data.get('url'),
+            issue_data.get('status'),
+            issue_data.get('reason'),
+            issue_data.get('raw_data'),
+            created_at,
+            error_code=issue_data.get('error_code'),
+            error_category=issue_data.get('error_category'),
+            domain=issue_data.get('domain'),
+            retry_count=issue_data.get('retry_count', 0),
+            resolved=issue_data.get('resolved', False),
+            last_retry_at=last_retry_at
+        )
+
+    @staticmethod
+    def get_page_by_user_id(user_id, limit=50, cursor=None):
+        """Kullanıcının import sorunlarından bir sayfa: (sorunlar, next_cursor)"""
+        from app.repositories import get_repository
+        
+        page = get_repository().get_import_issues_page(user_id, limit=limit, cursor=cursor)
+        return [ProductImportIssue._from_data(issue_data) for issue_data in page['items']], page['next_cursor']
+
     @staticmethod
     def get_by_user_id(user_id, limit=50):
         """Kullanıcının son import sorunlarını getir (Repository pattern)"""
@@ -820,65 +987,25 @@ class ProductImportIssue:
             repo = get_repository()
             issues_data = repo.get_import_issues_by_user_id(user_id, limit)
             
-            issues = []
-            for issue_data in issues_data:
-                # Handle timestamp conversion
-                created_at = issue_data.get('created_at')
-                if hasattr(created_at, 'timestamp'):
-                    created_at = created_at
-                elif isinstance(created_at, str):
-                    try:
-                        created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            created_at = datetime.now()
-                elif created_at is None:
-                    created_at = datetime.now()
-                
-                # Handle last_retry_at timestamp
-                last_retry_at = issue_data.get('last_retry_at')
-                if last_retry_at and hasattr(last_retry_at, 'timestamp'):
-                    last_retry_at = last_retry_at
-                elif isinstance(last_retry_at, str):
-                    try:
-                        last_retry_at = datetime.strptime(last_retry_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            last_retry_at = datetime.strptime(last_retry_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            last_retry_at = None
-                else:
-                    last_retry_at = None
-                
-                issues.append(ProductImportIssue(
-                    issue_data.get('id'),
-                    issue_data.get('user_id'),
-                    issue_data.get('url'),
-                    issue_data.get('status'),
-                    issue_data.get('reason'),
-                    issue_data.get('raw_data'),
-                    created_at,
-                    error_code=issue_data.get('error_code'),
-                    error_category=issue_data.get('error_category'),
-                    domain=issue_data.get('domain'),
-                    retry_count=issue_data.get('retry_count', 0),
-                    resolved=issue_data.get('resolved', False),
-                    last_retry_at=last_retry_at
-                ))
-            
-            return issues
+            return [ProductImportIssue._from_data(issue_data) for issue_data in issues_data]
         except Exception as e:
             print(f"[ERROR] Get import issues by user id error: {e}")
             return []
 
 class Product:
-    def __init__(self, id, user_id, name, price, image, brand, url, created_at, old_price=None, current_price=None, discount_percentage=None, images=None, discount_info=None):
+    def __init__(self, id, user_id, name, price, image, brand, url, created_at, old_price=None, current_price=None, discount_percentage=None, images=None, discount_info=None, price_minor=None, currency=None):
         self.id = id
         self.user_id = user_id
         self.name = name
         self.price = price
+        # Sayısal fiyat (kuruş); eski kayıtlarda yoksa display string'den çöz
+        if price_minor is None:
+            from price_parser import parse_price
+            parsed = parse_price(price)
+            if parsed is not None:
+                price_minor, currency = parsed.minor, currency or parsed.currency
+        self.price_minor = price_minor
+        self.currency = currency
         self.image = image
         self.brand = brand
         self.url = url
@@ -938,64 +1065,18 @@ class Product:
             if not product_data:
                 raise Exception("Ürün oluşturuldu ama veritabanından okunamadı")
             
-            # Handle images - repository returns as list for Firestore, but SQLite might be JSON string
-            images_data = product_data.get('images')
-            if isinstance(images_data, str):
-                import json
-                try:
-                    images_data = json.loads(images_data)
-                except:
-                    images_data = [product_data.get('image')] if product_data.get('image') else []
-            elif not images_data:
-                images_data = [product_data.get('image')] if product_data.get('image') else []
+            product = Product._from_data(product_data)
             
-            # Handle timestamp conversion
-            created_at_data = product_data.get('created_at')
-            if hasattr(created_at_data, 'timestamp'):  # Firestore Timestamp
-                created_at_data = created_at_data
-            elif isinstance(created_at_data, str):
-                try:
-                    created_at_data = datetime.strptime(created_at_data, '%Y-%m-%d %H:%M:%S.%f')
-                except ValueError:
-                    try:
-                        created_at_data = datetime.strptime(created_at_data, '%Y-%m-%d %H:%M:%S')
-                    except:
-                        created_at_data = datetime.now()
-            elif created_at_data is None:
-                created_at_data = datetime.now()
-            
-            return Product(
-                product_data.get('id'),
-                product_data.get('user_id'),
-                product_data.get('name'),
-                product_data.get('price'),
-                product_data.get('image'),
-                product_data.get('brand'),
-                product_data.get('url'),
-                created_at_data,
-                product_data.get('old_price'),
-                product_data.get('current_price'),
-                product_data.get('discount_percentage'),
-                images_data,
-                product_data.get('discount_info')
-            )
+            from app.services.search_index import search_index
+            search_index.product_saved(product)
+            return product
         except Exception as e:
             print(f"[HATA] Ürün oluşturma hatası: {e}")
             raise Exception(f"Ürün oluşturulamadı: {str(e)}")
     
-    @staticmethod
-    def get_by_id(product_id):
-        """ID ile ürün getir (Repository pattern)"""
-        from app.repositories import get_repository
-        from datetime import datetime
-        import json
-        
-        repo = get_repository()
-        product_data = repo.get_product_by_id(product_id)
-        
-        if not product_data:
-            return None
-        
+    @classmethod
+    def _from_data(cls, product_data):
+        """Repository kaydından Product nesnesi"""
         # Handle images
         images_data = product_data.get('images')
         if isinstance(images_data, str):
@@ -1021,7 +1102,7 @@ class Product:
         elif created_at is None:
             created_at = datetime.now()
         
-        return Product(
+        return cls(
             product_data.get('id'),
             product_data.get('user_id'),
             product_data.get('name'),
@@ -1034,9 +1115,35 @@ class Product:
             product_data.get('current_price'),
             product_data.get('discount_percentage'),
             images_data,
-            product_data.get('discount_info')
+            product_data.get('discount_info'),
+            price_minor=product_data.get('price_minor'),
+            currency=product_data.get('currency')
         )
     
+    @staticmethod
+    def get_by_id(product_id):
+        """ID ile ürün getir (Repository pattern)"""
+        from app.repositories import get_repository
+        from app.utils.identity_map import loader_for
+        
+        loader = loader_for('products')
+        if loader is not None:
+            return loader.load(product_id)
+        
+        product_data = get_repository().get_product_by_id(product_id)
+        return Product._from_data(product_data) if product_data else None
+    
+    @staticmethod
+    def get_many(product_ids):
+        """Ürünleri tek toplu okumayla getir (giriş sırasında, bulunamayanlar atlanır)"""
+        from app.repositories import get_repository
+        from app.utils.identity_map import loader_for
+        
+        loader = loader_for('products')
+        if loader is not None:
+            return loader.load_many(product_ids)
+        return [Product._from_data(product_data) for product_data in get_repository().get_products_by_ids(product_ids)]
+    
     @staticmethod
     def get_by_url(url):
         """URL ile ürün getir (Repository pattern) - en yeni olanı döndürür"""
@@ -1088,7 +1195,9 @@ class Product:
             product_data.get('current_price'),
             product_data.get('discount_percentage'),
             images_data,
-            product_data.get('discount_info')
+            product_data.get('discount_info'),
+            price_minor=product_data.get('price_minor'),
+            currency=product_data.get('currency')
         )
     
     @staticmethod
@@ -1130,7 +1239,13 @@ class Product:
             return None
 
         # Güncel ürünü tekrar çekip döndür
-        return Product.get_by_id(product_id)
+        product = Product.get_by_id(product_id)
+        
+        from app.services.search_index import search_index
+        from app.services.discovery_index import discovery_index
+        search_index.product_saved(product)
+        discovery_index.product_changed(product_id)
+        return product
     
     @staticmethod
     def delete(product_id, user_id):
@@ -1147,6 +1262,10 @@ class Product:
                 print(f"[HATA] Ürün silinemedi: {product_id} (kullanıcı: {user_id})")
                 return False
             
+            from app.services.search_index import search_index
+            from app.services.discovery_index import discovery_index
+            search_index.product_removed(product_id, user_id)
+            discovery_index.product_changed(product_id)
             return True
         except Exception as e:
             print(f"[HATA] Ürün silme hatası: {e}")
@@ -1202,7 +1321,12 @@ class Collection:
             
             print(f"[DEBUG Collection.create] Collection created: {created_id}")
             
-            return Collection(created_id, user_id, name, description, type, is_public, share_url, created_at, cover_image)
+            collection = Collection(created_id, user_id, name, description, type, is_public, share_url, created_at, cover_image)
+            from app.services.search_index import search_index
+            from app.services.discovery_index import discovery_index
+            search_index.collection_saved(collection)
+            discovery_index.collection_changed(created_id)
+            return collection
         except Exception as e:
             print(f"[ERROR] Create collection error: {e}")
             import traceback
@@ -1214,42 +1338,33 @@ class Collection:
         """ID ile koleksiyon getir (Repository pattern)"""
         try:
             from app.repositories import get_repository
+            from app.utils.identity_map import loader_for
             
-            repo = get_repository()
-            collection_data = repo.get_collection_by_id(collection_id)
+            loader = loader_for('collections')
+            if loader is not None:
+                return loader.load(collection_id)
             
-            if collection_data:
-                # Handle timestamp conversion
-                created_at = collection_data.get('created_at')
-                if hasattr(created_at, 'timestamp'):
-                    created_at = created_at
-                elif isinstance(created_at, str):
-                    try:
-                        created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            created_at = datetime.now()
-                elif created_at is None:
-                    created_at = datetime.now()
-                
-                return Collection(
-                    collection_data.get('id'),
-                    collection_data.get('user_id'),
-                    collection_data.get('name'),
-                    collection_data.get('description'),
-                    collection_data.get('type'),
-                    collection_data.get('is_public', True),
-                    collection_data.get('share_url'),
-                    created_at,
-                    collection_data.get('cover_image')
-                )
-            return None
+            collection_data = get_repository().get_collection_by_id(collection_id)
+            return Collection._from_data(collection_data) if collection_data else None
         except Exception as e:
             print(f"[ERROR] Get collection by id error: {e}")
             return None
     
+    @staticmethod
+    def get_many(collection_ids):
+        """Koleksiyonları tek toplu okumayla getir (giriş sırasında, bulunamayanlar atlanır)"""
+        try:
+            from app.repositories import get_repository
+            from app.utils.identity_map import loader_for
+            
+            loader = loader_for('collections')
+            if loader is not None:
+                return loader.load_many(collection_ids)
+            return [Collection._from_data(col_data) for col_data in get_repository().get_collections_by_ids(collection_ids)]
+        except Exception as e:
+            print(f"[ERROR] Get collections by ids error: {e}")
+            return []
+    
     @staticmethod
     def get_by_share_url(share_url):
         """Share URL ile koleksiyon getir (Repository pattern)"""
@@ -1292,6 +1407,44 @@ class Collection:
             print(f"[ERROR] Get collection by share url error: {e}")
             return None
     
+    @staticmethod
+    def _from_data(col_data):
+        """Repository kaydından Collection nesnesi"""
+        # Handle timestamp conversion
+        created_at = col_data.get('created_at')
+        if hasattr(created_at, 'timestamp'):
+            created_at = created_at
+        elif isinstance(created_at, str):
+            try:
+                created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+                except:
+                    created_at = datetime.now()
+        elif created_at is None:
+            created_at = datetime.now()
+        
+        return Collection(
+            col_data.get('id'),
+            col_data.get('user_id'),
+            col_data.get('name'),
+            col_data.get('description'),
+            col_data.get('type'),
+            col_data.get('is_public', True),
+            col_data.get('share_url'),
+            created_at,
+            col_data.get('cover_image')
+        )
+
+    @staticmethod
+    def get_page_for_user(user_id, limit=20, cursor=None):
+        """Kullanıcının koleksiyonlarından bir sayfa: (koleksiyonlar, next_cursor)"""
+        from app.repositories import get_repository
+        
+        page = get_repository().get_collections_page(user_id, limit=limit, cursor=cursor)
+        return [Collection._from_data(col_data) for col_data in page['items']], page['next_cursor']
+
     @staticmethod
     def get_user_collections(user_id):
         """Kullanıcının koleksiyonlarını getir (Repository pattern)"""
@@ -1301,36 +1454,7 @@ class Collection:
             repo = get_repository()
             collections_data = repo.get_collections_by_user_id(user_id)
             
-            collections = []
-            for col_data in collections_data:
-                # Handle timestamp conversion
-                created_at = col_data.get('created_at')
-                if hasattr(created_at, 'timestamp'):
-                    created_at = created_at
-                elif isinstance(created_at, str):
-                    try:
-                        created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            created_at = datetime.now()
-                elif created_at is None:
-                    created_at = datetime.now()
-                
-                collections.append(Collection(
-                    col_data.get('id'),
-                    col_data.get('user_id'),
-                    col_data.get('name'),
-                    col_data.get('description'),
-                    col_data.get('type'),
-                    col_data.get('is_public', True),
-                    col_data.get('share_url'),
-                    created_at,
-                    col_data.get('cover_image')
-                ))
-            
-            return collections
+            return [Collection._from_data(col_data) for col_data in collections_data]
         except Exception as e:
             print(f"[ERROR] Get user collections error: {e}")
             return []
@@ -1411,6 +1535,9 @@ class Collection:
             print(f"[DEBUG Collection.add_product] Adding product {product_id} to collection {self.id}")
             result = repo.add_product_to_collection(self.id, product_id)
             print(f"[DEBUG Collection.add_product] Result: {result}")
+            if result:
+                from app.services.discovery_index import discovery_index
+                discovery_index.collection_changed(self.id)
             return result
         except Exception as e:
             print(f"[HATA] Koleksiyona ürün ekleme hatası: {e}")
@@ -1427,6 +1554,9 @@ class Collection:
             print(f"[DEBUG Collection.remove_product] Removing product {product_id} from collection {self.id}")
             result = repo.remove_product_from_collection(self.id, product_id)
             print(f"[DEBUG Collection.remove_product] Result: {result}")
+            if result:
+                from app.services.discovery_index import discovery_index
+                discovery_index.collection_changed(self.id)
             return result
         except Exception as e:
             print(f"[HATA] Koleksiyondan ürün çıkarma hatası: {e}")
@@ -1443,6 +1573,11 @@ class Collection:
             print(f"[DEBUG Collection.delete] Deleting collection {self.id}")
             result = repo.delete_collection(self.id, self.user_id)
             print(f"[DEBUG Collection.delete] Result: {result}")
+            if result:
+                from app.services.search_index import search_index
+                from app.services.discovery_index import discovery_index
+                search_index.collection_removed(self.id, self.user_id)
+                discovery_index.collection_removed(self.id)
             return result
         except Exception as e:
             print(f"[HATA] Koleksiyon silme hatası: {e}")
@@ -1495,6 +1630,11 @@ class PriceTracking:
             # Add to price history
             from datetime import datetime
             repo.add_price_history(product_id, current_price, datetime.now())
+
+            # Alarm indeksine ekle (diğer process'ler periyodik yeniden yüklemeyle görür)
+            if alert_price:
+                from app.services.alert_engine import alert_engine
+                alert_engine.track(tracking_id, product_id, user_id, alert_price)
             
             print(f"[DEBUG PriceTracking.create] Tracking created: {tracking_id}")
             return tracking_id
@@ -1597,6 +1737,9 @@ class PriceTracking:
             # Deactivate tracking
             result = repo.update_price_tracking(tracking_id, is_active=False)
             print(f"[DEBUG PriceTracking.remove_tracking] Result: {result}")
+            if result:
+                from app.services.alert_engine import alert_engine
+                alert_engine.untrack(tracking_id)
             return result
         except Exception as e:
             print(f"[ERROR] Remove tracking error: {e}")
@@ -1676,44 +1819,38 @@ class PriceTracking:
     @staticmethod
     def update_price(tracking_id, new_price):
         """Fiyat güncelle"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Mevcut fiyatı ve ürün bilgisini al
-        cursor.execute('SELECT product_id, current_price, original_price FROM price_tracking WHERE id = ?', (tracking_id,))
-        current_data = cursor.fetchone()
-        
-        if current_data:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Mevcut fiyatı ve ürün bilgisini al
+            cursor.execute('SELECT product_id, current_price, original_price FROM price_tracking WHERE id = ?', (tracking_id,))
+            current_data = cursor.fetchone()
+            if not current_data:
+                return False
+            
             product_id, current_price, original_price = current_data
             
             # Fiyat değişimini hesapla
-            try:
-                current_num = float(str(current_price).replace('₺', '').replace('TL', '').replace(',', '').strip())
-                new_num = float(str(new_price).replace('₺', '').replace('TL', '').replace(',', '').strip())
-                price_change = new_num - current_num
-            except Exception:
+            from price_parser import to_minor_units
+            current_minor = to_minor_units(current_price)
+            new_minor = to_minor_units(new_price)
+            if current_minor is not None and new_minor is not None:
+                price_change = (new_minor - current_minor) / 100
+            else:
                 price_change = 0
             
             # Fiyat takibini güncelle
             cursor.execute('''
                 UPDATE price_tracking 
-                SET current_price = ?, price_change = ?, last_checked = ?
+                SET current_price = ?, current_price_minor = ?, price_change = ?, last_checked = ?
                 WHERE id = ?
-            ''', (new_price, str(price_change), datetime.now(), tracking_id))
-            
-            # Fiyat geçmişine doğru product_id ile kayıt ekle
-            history_id = str(uuid.uuid4())
-            cursor.execute('''
-                INSERT INTO price_history (id, product_id, price)
-                VALUES (?, ?, ?)
-            ''', (history_id, product_id, new_price))
-            
+            ''', (new_price, new_minor, str(price_change), datetime.now(), tracking_id))
             conn.commit()
-            conn.close()
-            return True
-        
-        conn.close()
-        return False
+
+        # Fiyat geçmişine doğru product_id ile kayıt ekle (aylık bucket)
+        from app.repositories import get_repository
+        get_repository().add_price_history(product_id, new_price, datetime.now())
+        return True
 
 
 class Notification:
@@ -1765,6 +1902,55 @@ class Notification:
             traceback.print_exc()
             raise
 
+    @staticmethod
+    def _from_data(notif_data):
+        """Repository kaydından Notification nesnesi"""
+        # Handle timestamp conversion
+        created_at = notif_data.get('created_at')
+        if hasattr(created_at, 'timestamp'):
+            created_at = created_at
+        elif isinstance(created_at, str):
+            try:
+                created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+                except:
+                    created_at = datetime.now()
+        elif created_at is None:
+            created_at = datetime.now()
+        
+        read_at = notif_data.get('read_at')
+        if read_at and hasattr(read_at, 'timestamp'):
+            read_at = read_at
+        elif isinstance(read_at, str):
+            try:
+                read_at = datetime.strptime(read_at, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                try:
+                    read_at = datetime.strptime(read_at, '%Y-%m-%d %H:%M:%S')
+                except:
+                    read_at = None
+        
+        return Notification(
+            notif_data.get('id'),
+            notif_data.get('user_id'),
+            notif_data.get('product_id'),
+            notif_data.get('type'),
+            notif_data.get('message'),
+            notif_data.get('payload'),
+            created_at,
+            read_at
+        )
+
+    @staticmethod
+    def get_page_for_user(user_id, limit=50, cursor=None):
+        """Kullanıcının bildirimlerinden bir sayfa: (bildirimler, next_cursor)"""
+        from app.repositories import get_repository
+        
+        page = get_repository().get_notifications_page(user_id, limit=limit, cursor=cursor)
+        return [Notification._from_data(notif_data) for notif_data in page['items']], page['next_cursor']
+
     @staticmethod
     def get_for_user(user_id, limit=50):
         """Kullanıcının bildirimlerini getir (Repository pattern)"""
@@ -1774,47 +1960,7 @@ class Notification:
             repo = get_repository()
             notifications_data = repo.get_notifications_by_user_id(user_id, limit)
             
-            notifications = []
-            for notif_data in notifications_data:
-                # Handle timestamp conversion
-                created_at = notif_data.get('created_at')
-                if hasattr(created_at, 'timestamp'):
-                    created_at = created_at
-                elif isinstance(created_at, str):
-                    try:
-                        created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            created_at = datetime.now()
-                elif created_at is None:
-                    created_at = datetime.now()
-                
-                read_at = notif_data.get('read_at')
-                if read_at and hasattr(read_at, 'timestamp'):
-                    read_at = read_at
-                elif isinstance(read_at, str):
-                    try:
-                        read_at = datetime.strptime(read_at, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            read_at = datetime.strptime(read_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            read_at = None
-                
-                notifications.append(Notification(
-                    notif_data.get('id'),
-                    notif_data.get('user_id'),
-                    notif_data.get('product_id'),
-                    notif_data.get('type'),
-                    notif_data.get('message'),
-                    notif_data.get('payload'),
-                    created_at,
-                    read_at
-                ))
-            
-            return notifications
+            return [Notification._from_data(notif_data) for notif_data in notifications_data]
         except Exception as e:
             print(f"[ERROR] Get notifications for user error: {e}")
             return []
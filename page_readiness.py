@@ -0,0 +1,125 @@
+"""
+Sayfa hazır olma sinyalleri
+
+page.goto sonrası sabit/rastgele bekleme yerine sayfanın gerçekten
+hazır olduğunu gösteren sinyaller beklenir. Bir site için birden fazla
+sinyal tanımlanabilir; hepsi aynı anda başlatılır ve İLK gerçekleşen
+kazanır (diğerleri iptal edilir). Her sinyalin kendi timeout'u vardır,
+hiçbiri gerçekleşmezse en uzun timeout kadar beklenip devam edilir.
+
+Sinyaller site_registry üzerinden domain bazında ayarlanır:
+    site_registry.configure("decathlon.com.tr",
+                            readiness=[state_key("window.__DKT._ctx.data")])
+
+Jitter (rastgele ek bekleme) sadece bot tespiti için ihtiyaç duyan
+sitelerde, yine site ayarı ile (jitter_ms=(min, max)) açılır.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_SIGNAL_TIMEOUT_MS = 8000
+
+# Product JSON-LD'si fiyatıyla birlikte DOM'da mı
+_JSONLD_PRODUCT_JS = '''() => {
+    const scripts = document.querySelectorAll('script[type="application/ld+json"]');
+    for (const s of scripts) {
+        const text = s.textContent || '';
+        if (/"@type"\\s*:\\s*\\[?[^\\]}]*"Product"/.test(text) && /"price"/.test(text)) return true;
+    }
+    return false;
+}'''
+
+
+def selector(css: str, timeout: int = DEFAULT_SIGNAL_TIMEOUT_MS) -> Dict[str, Any]:
+    """CSS selector DOM'a eklendiğinde hazır"""
+    return {"type": "selector", "value": css, "timeout": timeout}
+
+
+def jsonld(timeout: int = DEFAULT_SIGNAL_TIMEOUT_MS) -> Dict[str, Any]:
+    """Fiyat içeren Product JSON-LD script'i geldiğinde hazır"""
+    return {"type": "jsonld", "value": None, "timeout": timeout}
+
+
+def network_idle(timeout: int = DEFAULT_SIGNAL_TIMEOUT_MS) -> Dict[str, Any]:
+    """Ağ trafiği durduğunda (500 ms istek yok) hazır"""
+    return {"type": "network_idle", "value": None, "timeout": timeout}
+
+
+def state_key(expression: str, timeout: int = DEFAULT_SIGNAL_TIMEOUT_MS) -> Dict[str, Any]:
+    """window üzerindeki bir state anahtarı (örn. window.__DKT._ctx.data) dolduğunda hazır"""
+    return {"type": "state", "value": expression, "timeout": timeout}
+
+
+def default_signals(site=None) -> List[Dict[str, Any]]:
+    """
+    Site için özel ayar yoksa kullanılacak sinyaller.
+
+    Özel extractor'ı olan siteler DOM'un tamamen oturmasını beklediği için
+    sadece network idle kullanılır; diğerlerinde JSON-LD, fiyat selector'ı
+    veya network idle'dan hangisi önce gelirse.
+    """
+    if site is not None and site.extractor is not None:
+        return [network_idle()]
+
+    signals = [jsonld(), network_idle()]
+    if site is not None and site.selectors and site.selectors.get("price"):
+        signals.append(selector(", ".join(site.selectors["price"])))
+    return signals
+
+
+async def _wait_signal(page, signal: Dict[str, Any]):
+    kind = signal["type"]
+    timeout = signal.get("timeout", DEFAULT_SIGNAL_TIMEOUT_MS)
+
+    if kind == "selector":
+        await page.wait_for_selector(signal["value"], state="attached", timeout=timeout)
+    elif kind == "jsonld":
+        await page.wait_for_function(_JSONLD_PRODUCT_JS, timeout=timeout)
+    elif kind == "network_idle":
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+    elif kind == "state":
+        expression = signal["value"]
+        await page.wait_for_function(
+            f"() => {{ try {{ return !!({expression}); }} catch (e) {{ return false; }} }}",
+            timeout=timeout
+        )
+    else:
+        raise ValueError(f"Bilinmeyen hazır olma sinyali: {kind}")
+
+
+async def wait_until_ready(page, signals: Sequence[Dict[str, Any]],
+                           jitter_ms: Optional[Tuple[int, int]] = None) -> Optional[str]:
+    """
+    Sinyallerden ilki gerçekleşene kadar bekle.
+    Gerçekleşen sinyalin tipini, hiçbiri gerçekleşmezse None döndürür.
+    """
+    started = time.perf_counter()
+    ready = None
+
+    tasks = {asyncio.ensure_future(_wait_signal(page, s)): s for s in signals}
+    try:
+        pending = set(tasks)
+        while pending and ready is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    ready = tasks[task]["type"]
+                    break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        # İptal edilen Playwright beklemelerinin hatalarını topla (uyarı basmasın)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if jitter_ms:
+        await asyncio.sleep(random.randint(*jitter_ms) / 1000)
+
+    logging.info(
+        f"Page ready via {ready or 'timeout'} in "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return ready
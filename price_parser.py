@@ -0,0 +1,144 @@
+"""
+Tek, derlenmiş (precompiled) fiyat parser'ı
+
+Scraper'lar, servisler ve API filtreleri fiyat metnini hep bu modülle
+çözer. Sonuç tamsayı alt birim (kuruş / cent) + ISO para birimidir;
+float yuvarlama hatası olmaz ve aynı metin tekrar parse edilmez (LRU).
+
+    parse_price("1.299,99 TL")  -> ParsedPrice(minor=129999, currency='TRY')
+    parse_price("$1,299.99")    -> ParsedPrice(minor=129999, currency='USD')
+    format_price(129999)        -> "1.299,99 TL"
+
+Ayırıcı kuralları (tr-TR öncelikli):
+  - hem '.' hem ',' varsa sondaki ondalıktır
+  - tek ayırıcı birden fazla geçiyorsa binliktir (1.299.000)
+  - tek ayırıcı bir kez geçip arkasında tam 3 rakam varsa binliktir (1.299 / 1,299);
+    ancak önündeki tam kısım binlik grubu olamıyorsa (3'ten fazla rakam, 0 ile
+    başlıyor veya boşlukla gruplanmış) ondalıktır (1299.990 / 0,990 / 1 299,990)
+  - aksi halde ondalıktır (129,9 / 12.99)
+
+Metinde birden fazla sayı varsa para birimi simgesine en yakın olanı alınır
+("%20 indirim 1.299 TL" -> 1.299).
+"""
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+DEFAULT_CURRENCY = 'TRY'
+
+_CURRENCY_CODES = {
+    '₺': 'TRY', 'TL': 'TRY', 'TRY': 'TRY',
+    '$': 'USD', 'USD': 'USD',
+    '€': 'EUR', 'EUR': 'EUR',
+    '£': 'GBP', 'GBP': 'GBP',
+}
+_CURRENCY_SUFFIX = {'TRY': ' TL', 'USD': ' USD', 'EUR': ' EUR', 'GBP': ' GBP'}
+
+_CURRENCY_RE = re.compile(r'₺|\$|€|£|\b(?:TL|TRY|USD|EUR|GBP)\b', re.IGNORECASE)
+# Binlik ayırıcı olarak boşluk / NBSP / dar NBSP de kabul edilir; yalnızca ardından
+# tam 3 rakam geliyorsa (yan yana iki sayı birleşmesin: '%20 1.299 TL')
+_NUMBER_RE = re.compile(r'(-)?\s*(\d+(?:(?:[.,]|[   ](?=\d{3}(?!\d)))\d+)*)')
+_SPACES_RE = re.compile(r'[\s  ]')
+# Metindeki tüm fiyat adayları (find_prices)
+_CANDIDATE_RE = re.compile(r'\d{1,3}(?:[.,  ]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?')
+
+
+class ParsedPrice(NamedTuple):
+    minor: int
+    currency: str
+
+    @property
+    def amount(self) -> float:
+        return self.minor / 100
+
+
+def _split_number(digits: str):
+    """'1.299,99' -> ('1299', '99'); kuralları modül docstring'inde"""
+    space_grouped = _SPACES_RE.search(digits) is not None
+    digits = _SPACES_RE.sub('', digits)
+    has_dot, has_comma = '.' in digits, ',' in digits
+    if has_dot and has_comma:
+        decimal = '.' if digits.rfind('.') > digits.rfind(',') else ','
+    elif has_dot or has_comma:
+        sep = '.' if has_dot else ','
+        head, _, tail = digits.rpartition(sep)
+        if digits.count(sep) > 1:
+            return digits.replace(sep, ''), ''
+        # '1.299' binlik; '1299.990', '0,990', '1 299,990' ondalık
+        if len(tail) == 3 and len(head) <= 3 and not head.startswith('0') and not space_grouped:
+            return head + tail, ''
+        decimal = sep
+    else:
+        return digits, ''
+
+    whole, _, fraction = digits.rpartition(decimal)
+    return whole.replace('.', '').replace(',', ''), fraction
+
+
+def _price_number(text: str, currency_match):
+    """Fiyat sayısı: para birimi varsa ona en yakın sayı, yoksa ilk sayı"""
+    if currency_match is None:
+        return _NUMBER_RE.search(text)
+    start, end = currency_match.span()
+    # Eşit uzaklıkta olanlardan ilki (min kararlıdır)
+    return min(_NUMBER_RE.finditer(text), key=lambda m: max(start - m.end(), m.start() - end, 0), default=None)
+
+
+@lru_cache(maxsize=8192)
+def _parse_text(text: str, default_currency: str) -> Optional[ParsedPrice]:
+    currency_match = _CURRENCY_RE.search(text)
+    match = _price_number(text, currency_match)
+    if not match:
+        return None
+    whole, fraction = _split_number(match.group(2))
+    if not whole.isdigit() or (fraction and not fraction.isdigit()):
+        return None
+
+    # Kuruşa yuvarla (3+ haneli ondalık nadir ama mümkün: 1299.995 -> 130000, 12,3456 -> 1235)
+    fraction = fraction.ljust(3, '0')
+    minor = int(whole) * 100 + int(fraction[:2])
+    if int(fraction[2]) >= 5:
+        minor += 1
+    if match.group(1):
+        minor = -minor
+
+    currency = _CURRENCY_CODES[currency_match.group(0).upper()] if currency_match else default_currency
+    return ParsedPrice(minor, currency)
+
+
+def parse_price(value, default_currency: str = DEFAULT_CURRENCY) -> Optional[ParsedPrice]:
+    """Fiyat metnini/sayısını (kuruş, para birimi) olarak çöz; çözülemezse None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return ParsedPrice(value * 100, default_currency)
+    if isinstance(value, float):
+        return ParsedPrice(int(round(value * 100)), default_currency)
+    text = str(value).strip()
+    if not text:
+        return None
+    return _parse_text(text, default_currency)
+
+
+def to_minor_units(value) -> Optional[int]:
+    parsed = parse_price(value)
+    return parsed.minor if parsed else None
+
+
+def to_float(value) -> Optional[float]:
+    parsed = parse_price(value)
+    return parsed.amount if parsed else None
+
+
+def format_price(minor: int, currency: str = DEFAULT_CURRENCY) -> str:
+    """129999 -> '1.299,99 TL' (tr-TR gösterim)"""
+    sign = '-' if minor < 0 else ''
+    whole, cents = divmod(abs(int(minor)), 100)
+    return f"{sign}{whole:,}".replace(',', '.') + f",{cents:02d}" + _CURRENCY_SUFFIX.get(currency, f" {currency}")
+
+
+def find_prices(text: str) -> List[str]:
+    """Metindeki fiyat adaylarını (ham string) sırayla döndür"""
+    if not text:
+        return []
+    return list(dict.fromkeys(_CANDIDATE_RE.findall(text)))
@@ -7,7 +7,9 @@ Async/await sorunlarını çözer ve Render'da çalışacak şekilde ayarlanmı
 import asyncio
 import logging
 import os
+from functools import partial
 from typing import Dict, Any, Optional
+from batch_engine import batch_engine
 from site_specific_scrapers import SiteSpecificScrapers
 from advanced_site_scrapers import AdvancedSiteScrapers
 
@@ -83,32 +85,20 @@ class RenderScraper:
     
     def scrape_multiple_products_sync(self, urls: list, use_advanced: bool = True) -> list:
         """
-        Birden fazla ürünü sync olarak scrape eder
+        Birden fazla ürünü eşzamanlı scrape eder (sonuçlar giriş sırasıyla)
         """
-        results = []
-        
-        for i, url in enumerate(urls, 1):
-            logging.info(f"[{i}/{len(urls)}] Scraping: {url}")
-            
-            try:
-                result = self.scrape_product_sync(url, use_advanced)
-                results.append(result)
-                
-                if "error" in result:
-                    logging.warning(f"❌ Hata: {result['error']}")
-                else:
-                    logging.info(f"✅ Başarılı: {result.get('site', 'N/A')} - {result.get('title', 'N/A')[:30]}...")
-                
-            except Exception as e:
-                logging.error(f"❌ Beklenmeyen hata: {e}")
-                results.append({
-                    "error": str(e),
-                    "url": url
-                })
-            
-            # Rate limiting
-            import time
-            time.sleep(1)
+        worker = partial(self.scrape_product_async, use_advanced=use_advanced)
+        results = [None] * len(urls)
+
+        for item in batch_engine.iter_sync(urls, worker):
+            # Başarısız öğede result None olabilir; hata sözlüğüne çevir
+            result = item.result if item.ok else {"error": item.error or "Ürün bilgileri çekilemedi", "url": item.url}
+            results[item.index] = result
+
+            if "error" in result:
+                logging.warning(f"❌ Hata: {item.url} - {result['error']}")
+            else:
+                logging.info(f"✅ Başarılı ({item.elapsed_ms:.0f} ms): {result.get('site', 'N/A')} - {(result.get('title') or 'N/A')[:30]}...")
         
         return results
     
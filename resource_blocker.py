@@ -0,0 +1,156 @@
+"""
+Playwright istek engelleme katmanı
+
+Scraper ürün sayfasından sadece DOM'daki metinleri ve görsel URL'lerini
+okuyor; görsellerin, videoların, fontların ve üçüncü parti analitik
+script'lerinin indirilmesine gerek yok. Bu modül context/page üzerine bir
+route kurar ve bu istekleri ağa çıkmadan iptal eder.
+
+Allow / deny listeleri site_registry ile aynı anahtar kuralını kullanır:
+nokta içeren girdiler host (suffix eşleşmesi), nokta içermeyenler
+Playwright resource type'ıdır ("image", "font", "media", "script" ...).
+
+    resource_blocker.install(page, allow=["image"], deny=["hotjar.com"])
+
+Engellenen isteklerin boyutu bilinmediği için kazanılan byte miktarı
+resource type başına ortalama boyutlarla tahmin edilir.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_BLOCKED_TYPES = frozenset({"image", "media", "font"})
+
+# Analitik / reklam / oturum kaydı servisleri
+DEFAULT_BLOCKED_HOSTS = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "criteo.net",
+    "mc.yandex.ru",
+    "useinsider.com",
+    "segment.io",
+    "analytics.tiktok.com",
+    "bat.bing.com",
+    "adjust.com",
+    "newrelic.com",
+    "nr-data.net",
+})
+
+# Engellenen istek başına tahmini boyut (byte)
+ESTIMATED_BYTES = {
+    "image": 80 * 1024,
+    "media": 500 * 1024,
+    "font": 40 * 1024,
+    "script": 60 * 1024,
+    "stylesheet": 30 * 1024,
+}
+DEFAULT_ESTIMATED_BYTES = 10 * 1024
+
+
+def _split_entries(entries: Optional[Iterable[str]]) -> Tuple[Set[str], Set[str]]:
+    """Girdileri (resource type'lar, host'lar) olarak ayır"""
+    types, hosts = set(), set()
+    for entry in entries or ():
+        entry = entry.strip().lower()
+        if not entry:
+            continue
+        (hosts if "." in entry else types).add(entry)
+    return types, hosts
+
+
+def _host_matches(host: str, hosts: Iterable[str]) -> bool:
+    return any(host == h or host.endswith("." + h) for h in hosts)
+
+
+class ResourceBlocker:
+    """Route tabanlı kaynak engelleyici ve byte tasarruf sayacı"""
+
+    def __init__(self, blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+                 blocked_hosts: Iterable[str] = DEFAULT_BLOCKED_HOSTS,
+                 enabled: bool = True):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = frozenset(blocked_hosts)
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._blocked_by_type: Dict[str, int] = {}
+        self._allowed = 0
+        self._bytes_saved = 0
+
+    def should_block(self, resource_type: str, url: str,
+                     allow: Optional[Iterable[str]] = None,
+                     deny: Optional[Iterable[str]] = None) -> bool:
+        """Bir isteğin engellenip engellenmeyeceğine karar ver (allow, deny'dan önceliklidir)"""
+        allow_types, allow_hosts = _split_entries(allow)
+        deny_types, deny_hosts = _split_entries(deny)
+        return self._decide(resource_type, url, allow_types, allow_hosts, deny_types, deny_hosts)
+
+    def _decide(self, resource_type, url, allow_types, allow_hosts, deny_types, deny_hosts) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        if resource_type in allow_types or _host_matches(host, allow_hosts):
+            return False
+        if resource_type == "document":
+            # Ana sayfa / iframe belgeleri sadece açıkça deny edilen host'larda engellenir
+            return _host_matches(host, deny_hosts)
+        if _host_matches(host, deny_hosts) or _host_matches(host, self.blocked_hosts):
+            return True
+        return resource_type in deny_types or resource_type in self.blocked_types
+
+    def _record(self, resource_type: str, blocked: bool):
+        with self._lock:
+            if blocked:
+                self._blocked_by_type[resource_type] = self._blocked_by_type.get(resource_type, 0) + 1
+                self._bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            else:
+                self._allowed += 1
+
+    async def install(self, target, allow: Optional[Iterable[str]] = None,
+                      deny: Optional[Iterable[str]] = None):
+        """Page veya BrowserContext üzerine engelleme route'unu kur"""
+        if not self.enabled:
+            return
+
+        allow_types, allow_hosts = _split_entries(allow)
+        deny_types, deny_hosts = _split_entries(deny)
+
+        async def _handle(route):
+            request = route.request
+            blocked = self._decide(request.resource_type, request.url,
+                                   allow_types, allow_hosts, deny_types, deny_hosts)
+            self._record(request.resource_type, blocked)
+            try:
+                if blocked:
+                    await route.abort("blockedbyclient")
+                else:
+                    await route.continue_()
+            except Exception as e:
+                # Sayfa/context kapanırken gelen istekler
+                logging.debug(f"[ResourceBlocker] Route handling failed for {request.url}: {e}")
+
+        await target.route("**/*", _handle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Engellenen istek sayıları ve tahmini byte tasarrufu"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "blocked_total": sum(self._blocked_by_type.values()),
+                "blocked_by_type": dict(self._blocked_by_type),
+                "allowed_total": self._allowed,
+                "estimated_bytes_saved": self._bytes_saved,
+            }
+
+
+# Global engelleyici (scraper.py ve AdvancedSiteScrapers paylaşır)
+resource_blocker = ResourceBlocker(
+    enabled=os.environ.get("SCRAPER_BLOCK_RESOURCES", "1").lower() not in ("0", "false", "no")
+)
@@ -2,11 +2,24 @@ import asyncio
 import logging
 import re
 import json
+import time
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright
+
+from browser_pool import browser_pool
+from site_registry import site_registry
+from http_fetcher import (
+    NOT_FOUND_STATUSES, PermanentScrapeError, fetch_page, is_blocked_title, parse_product_html,
+    tier_tracker,
+)
+from domain_throttle import DEFAULT_BURST, DEFAULT_RATE, DomainPausedError, domain_throttle
+from resource_blocker import resource_blocker
+from page_readiness import default_signals, network_idle, state_key, wait_until_ready
 
 logging.basicConfig(level=logging.DEBUG)
 
+# Tek bir fetch_data çağrısı için üst süre sınırı (goto 90 sn + bekleme payı)
+SCRAPE_TIMEOUT_SECONDS = 180
+
 # Site bazlı selector havuzu
 SITE_SELECTORS = {
     "zara.com": {
@@ -463,6 +476,46 @@ SITE_SELECTORS = {
     }
 }
 
+# Selector setlerini domain kayıt defterine bağla (tek aramada çözülür)
+for _site_key, _site_selectors in SITE_SELECTORS.items():
+    site_registry.register_selectors(_site_key, _site_selectors)
+
+# Fiyatı sadece render edilmiş DOM'da doğru olan siteler (HTTP katmanı atlanır)
+site_registry.configure("columbia.com.tr", http_first=False)
+
+# Sayfa hazır olma sinyalleri ve jitter (ayar yoksa page_readiness.default_signals)
+site_registry.configure("zara.com", readiness=[network_idle(30000)], jitter_ms=(1000, 3000))
+site_registry.configure("adidas.com", readiness=[network_idle(30000)], jitter_ms=(1000, 3000))
+site_registry.configure("adidas.com.tr", readiness=[network_idle(30000)], jitter_ms=(1000, 3000))
+site_registry.configure("vakkorama.com.tr", readiness=[network_idle(30000)])
+site_registry.configure("mango.com", jitter_ms=(1000, 3000))
+site_registry.configure("depop.com", jitter_ms=(1000, 3000))
+
+# Gerçek tarayıcı navigasyonu gibi görünmesi gereken siteler için istek başlıkları
+BROWSER_NAVIGATION_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": '"Windows"',
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "cross-site",
+    "Sec-Fetch-User": "?1"
+}
+
+# Bu sitelerin context'ine tarayıcı navigasyon başlıkları eklenir (fetch_data)
+site_registry.configure("mango.com", context_options={"extra_http_headers": BROWSER_NAVIGATION_HEADERS})
+site_registry.configure("depop.com", context_options={"extra_http_headers": BROWSER_NAVIGATION_HEADERS})
+
+# Bot koruması sıkı siteler için daha düşük istek hızı (token / saniye)
+for _strict_site in ("zara.com", "mango.com", "adidas.com", "adidas.com.tr", "depop.com"):
+    site_registry.configure(_strict_site, rate_per_second=0.2, burst=1)
+site_registry.configure("decathlon.com.tr", readiness=[state_key("window.__DKT._ctx.data"), network_idle()])
+site_registry.configure("decathlon.com", readiness=[state_key("window.__DKT._ctx.data"), network_idle()])
+site_registry.configure("reflectstudio.com", readiness=[state_key("window.ShopifyAnalytics.meta.product"), network_idle()])
+
 async def extract_jsonld(page):
     """JSON-LD verisini çeker"""
     try:
@@ -494,6 +547,77 @@ async def extract_jsonld(page):
         logging.debug(f"JSON-LD extraction failed: {e}")
         return None
 
+def apply_jsonld_data(result, json_data):
+    """Product JSON-LD objesindeki boş olmayan alanları result'a uygula"""
+    if not result["title"]:
+        result["title"] = json_data.get("name")
+
+    if not result["image"]:
+        img = json_data.get("image")
+        if isinstance(img, list):
+            result["image"] = img[0]
+        elif isinstance(img, dict):
+            result["image"] = img.get("url")
+        else:
+            result["image"] = img
+
+    # Les Benjamins specific fix for malformed JSON-LD image
+    if result["image"] and isinstance(result["image"], str):
+        if result["image"].startswith("https:files/"):
+            result["image"] = result["image"].replace("https:files/", "https://lesbenjamins.com/cdn/shop/files/")
+        elif result["image"].startswith("//"):
+            result["image"] = "https:" + result["image"]
+    elif isinstance(result["image"], list) and len(result["image"]) > 0:
+         # If it's a list, take the first element and apply fixes if needed
+         img = result["image"][0]
+         if isinstance(img, str):
+            if img.startswith("https:files/"):
+                result["image"] = img.replace("https:files/", "https://lesbenjamins.com/cdn/shop/files/")
+            elif img.startswith("//"):
+                result["image"] = "https:" + img
+            else:
+                result["image"] = img
+
+    if not result["price"]:
+        offers = json_data.get("offers")
+        if offers:
+            if isinstance(offers, list):
+                result["price"] = offers[0].get("price")
+            elif isinstance(offers, dict):
+                result["price"] = offers.get("price")
+                if offers.get("@type") == "AggregateOffer":
+                    result["original_price"] = offers.get("highPrice")
+
+    if not result["brand"]:
+        brand_data = json_data.get("brand")
+        if brand_data:
+            if isinstance(brand_data, dict):
+                result["brand"] = brand_data.get("name")
+            else:
+                result["brand"] = brand_data
+
+def apply_meta_data(result, meta_data):
+    """OG/product meta verisini sadece boş alanlara uygula"""
+    if not result["title"] and meta_data.get("title"):
+        result["title"] = meta_data["title"]
+    if not result["image"] and meta_data.get("image"):
+        result["image"] = meta_data["image"]
+    if not result["price"] and meta_data.get("price"):
+        result["price"] = meta_data["price"]
+
+
+def domain_brand(url):
+    """Marka bulunamazsa domain'den marka çıkar"""
+    domain = urlparse(url).netloc
+    if "amazon" in domain:
+        return "AMAZON"
+    elif "trendyol" in domain:
+        return "TRENDYOL"
+    elif "hepsiburada" in domain:
+        return "HEPSIBURADA"
+    return domain.replace("www.", "").split(".")[0].upper()
+
+
 async def extract_meta_tags(page):
     """Meta tag ve OG tag verilerini çeker"""
     return await page.evaluate('''() => {
@@ -517,6 +641,7 @@ async def extract_meta_tags(page):
         return data;
     }''')
 
+@site_registry.extractor("decathlon.com.tr", "decathlon.com", complete_fields=("title", "price"))
 async def extract_decathlon_data(page):
     """Decathlon özel veri çekme (window.__DKT)"""
     return await page.evaluate('''() => {
@@ -543,6 +668,7 @@ async def extract_decathlon_data(page):
         return null;
     }''')
 
+@site_registry.extractor("teknosa.com", complete_fields=None, merge="non_empty")
 async def extract_teknosa_data(page):
     """Teknosa özel veri çekme (window.insider_object)"""
     return await page.evaluate('''() => {
@@ -560,6 +686,7 @@ async def extract_teknosa_data(page):
     }''')
 
 
+@site_registry.extractor("boyner.com.tr", complete_fields=("title", "price"))
 async def extract_boyner_data(page):
     """Boyner özel veri çekme (JSON-LD öncelikli)"""
     return await page.evaluate('''() => {
@@ -609,10 +736,10 @@ async def extract_boyner_data(page):
     }''')
 
 def get_site_selectors(url):
-    domain = urlparse(url).netloc.lower()
-    for site, selectors in SITE_SELECTORS.items():
-        if site in domain:
-            return selectors
+    site = site_registry.resolve(url)
+    if site and site.selectors:
+        # Kopya döndür; fetch_data eksik anahtarları ekliyor
+        return dict(site.selectors)
     return None
 
 try:
@@ -620,6 +747,7 @@ try:
 except ImportError:
     Stealth = None
 
+@site_registry.extractor("defacto.com.tr", "defacto.com", complete_fields=("title", "price"))
 async def extract_defacto_data(page):
     """DeFacto özel veri çekme"""
     return await page.evaluate('''() => {
@@ -665,6 +793,7 @@ async def extract_defacto_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("lcw.com", "lcwaikiki.com", complete_fields=("title", "price"))
 async def extract_lcw_data(page):
     """LC Waikiki özel veri çekme"""
     return await page.evaluate('''() => {
@@ -730,6 +859,7 @@ async def extract_lcw_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("mango.com")
 async def extract_mango_data(page):
     """Mango özel veri çekme - JSON-LD, meta tag ve DOM selector'ları kullanır"""
     return await page.evaluate('''() => {
@@ -975,6 +1105,7 @@ async def extract_mango_data(page):
         }
     }''')
 
+@site_registry.extractor("reflectstudio.com", complete_fields=None)
 async def extract_reflectstudio_data(page):
     """Reflect Studio özel veri çekme - Shopify mağazası için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -1247,6 +1378,7 @@ async def extract_reflectstudio_data(page):
         }
     }''')
 
+@site_registry.extractor("dr.com.tr")
 async def extract_dr_data(page):
     """D&R özel veri çekme - Kitap ve ürün bilgileri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -1531,6 +1663,7 @@ async def extract_dr_data(page):
         }
     }''')
 
+@site_registry.extractor("mavi.com")
 async def extract_mavi_data(page):
     """Mavi özel veri çekme - Giyim ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -1816,6 +1949,7 @@ async def extract_mavi_data(page):
         }
     }''')
 
+@site_registry.extractor("lego.tr")
 async def extract_lego_data(page):
     """LEGO.tr özel veri çekme - Oyuncak ve set ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -2097,6 +2231,7 @@ async def extract_lego_data(page):
         }
     }''')
 
+@site_registry.extractor("jerf.com.tr")
 async def extract_jerf_data(page):
     """Jerf.com.tr özel veri çekme - Giyim ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -2406,6 +2541,7 @@ async def extract_jerf_data(page):
         }
     }''')
 
+@site_registry.extractor("vakkorama.com.tr")
 async def extract_vakkorama_data(page):
     """Vakkorama özel veri çekme - Giyim ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -2693,6 +2829,7 @@ async def extract_vakkorama_data(page):
         }
     }''')
 
+@site_registry.extractor("massimodutti.com")
 async def extract_massimodutti_data(page):
     """Massimo Dutti özel veri çekme - Lüks giyim ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -2994,6 +3131,7 @@ async def extract_massimodutti_data(page):
         }
     }''')
 
+@site_registry.extractor("victoriassecret.com.tr")
 async def extract_victoriassecret_data(page):
     """Victoria's Secret özel veri çekme - İç giyim ve kozmetik ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -3282,6 +3420,7 @@ async def extract_victoriassecret_data(page):
         }
     }''')
 
+@site_registry.extractor("n11.com")
 async def extract_n11_data(page):
     """N11 özel veri çekme"""
     return await page.evaluate('''() => {
@@ -3339,6 +3478,7 @@ async def extract_n11_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("opus3a.com")
 async def extract_opus3a_data(page):
     """Opus3a özel veri çekme"""
     return await page.evaluate('''() => {
@@ -3412,6 +3552,7 @@ async def extract_opus3a_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("atewear.com.tr")
 async def extract_atewear_data(page):
     """AteWear özel veri çekme (Shopify/Fallback)"""
     return await page.evaluate('''() => {
@@ -3473,6 +3614,7 @@ async def extract_atewear_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("mediamarkt.com.tr")
 async def extract_mediamarkt_data(page):
     """MediaMarkt özel veri çekme (JSON-LD öncelikli)"""
     return await page.evaluate('''() => {
@@ -3523,6 +3665,7 @@ async def extract_mediamarkt_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("beymen.com")
 async def extract_beymen_data(page):
     """Beymen özel veri çekme"""
     return await page.evaluate('''() => {
@@ -3596,6 +3739,7 @@ async def extract_beymen_data(page):
         } catch (e) { return null; }
     }''')
 
+@site_registry.extractor("gratis.com")
 async def extract_gratis_data(page):
     """Gratis.com özel veri çekme - Kozmetik ve kişisel bakım ürünleri için optimize edilmiş"""
     return await page.evaluate('''() => {
@@ -3955,50 +4099,66 @@ async def extract_gratis_data(page):
         }
     }''')
 
+def finalize_result(result, site_key):
+    """Site bazlı son düzeltmeler ve ortak temizlik (her iki katman için)"""
+    # Manuka Özel Kontrolü (Fiyat Formatlama)
+    if site_key == "manuka.com.tr" and result["price"]:
+        # 4299.90 -> 4299,90 TL
+        try:
+            price_text = result["price"].replace("TL", "").replace("₺", "").strip()
+            if "." in price_text and "," not in price_text:
+                 val = float(price_text)
+                 result["price"] = f"{val:.2f}".replace('.', ',') + " TL"
+        except Exception as e:
+            logging.debug(f"Manuka price formatting failed: {e}")
+
+    # Opus3a Title Cleanup
+    if site_key == "opus3a.com" and result["title"]:
+         result["title"] = result["title"].split(" | ")[0].strip()
+
+    # Son Temizlik ve Formatlama
+    if result["title"]:
+        result["title"] = result["title"].strip().upper()
+
+    if result["price"]:
+        result["price"] = str(result["price"]).strip()
+
+    if result["original_price"]:
+        result["original_price"] = str(result["original_price"]).strip()
+        if result["original_price"] == result["price"]:
+            result["original_price"] = None
+
 async def fetch_data(url):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-infobars',
-                '--window-position=0,0',
-                '--ignore-certificate-errors',
-                '--ignore-certificate-errors-spki-list',
-                '--disable-accelerated-2d-canvas',
-                '--no-zygote',
-                '--no-first-run',
-                '--disable-gpu',
-                '--disable-blink-features=AutomationControlled'
-            ]
+    site = site_registry.resolve(url)
+    site_key = site.domain if site else None
+
+    context_options = dict(
+        viewport={"width": 1920, "height": 1080},
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+        locale="tr-TR",
+        timezone_id="Europe/Istanbul",
+    )
+    # Site bazlı context ayarları (kayıt defterinden; örn. navigasyon başlıkları)
+    if site and site.context_options:
+        context_options.update(site.context_options)
+
+    # Anti-detection scripts
+    init_scripts = [
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})",
+        "Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})",
+        "Object.defineProperty(navigator, 'languages', {get: () => ['tr-TR', 'tr', 'en-US', 'en']})",
+    ]
+
+    # Paylaşımlı tarayıcıdan izole context kirala (her çağrıda yeni Chromium başlatılmaz)
+    async with browser_pool.lease(init_scripts=init_scripts, **context_options) as lease:
+        page = lease.page
+
+        # Görsel, font, medya ve tracker isteklerini ağa çıkmadan iptal et
+        await resource_blocker.install(
+            lease.context,
+            allow=site.resource_allow if site else None,
+            deny=site.resource_deny if site else None
         )
-        context = await browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-            locale="tr-TR",
-            timezone_id="Europe/Istanbul",
-
-            extra_http_headers={
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Upgrade-Insecure-Requests": "1",
-                "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-                "Sec-Ch-Ua-Mobile": "?0",
-                "Sec-Ch-Ua-Platform": '"Windows"',
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "cross-site",
-                "Sec-Fetch-User": "?1"
-            } if "mango.com" in url or "depop.com" in url else None
-        )
-        
-        # Anti-detection scripts
-        await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        await context.add_init_script("Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})")
-        await context.add_init_script("Object.defineProperty(navigator, 'languages', {get: () => ['tr-TR', 'tr', 'en-US', 'en']})")
-        
-        page = await context.new_page()
         
         # Apply stealth if available
         if Stealth:
@@ -4007,22 +4167,32 @@ async def fetch_data(url):
         try:
             logging.info(f"Navigating to {url}")
             
-            # Adidas ve Zara için özel timeout ve wait stratejisi
-            if "adidas.com" in url or "zara.com" in url or "vakkorama.com.tr" in url:
-                await page.goto(url, wait_until="domcontentloaded", timeout=90000)
-                try:
-                    await page.wait_for_load_state("networkidle", timeout=30000)
-                except:
-                    pass
-            else:
-                await page.goto(url, wait_until="domcontentloaded", timeout=90000)
-            
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=90000)
+            status = response.status if response else None
+            if status in NOT_FOUND_STATUSES:
+                raise PermanentScrapeError(url, "page not found", status)
+            if status in (403, 429, 503):
+                retry_after = response.headers.get("retry-after") if response else None
+                domain_throttle.report(throttle_key(url), status=status,
+                                       retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+                logging.warning(f"Blocked with HTTP {status}: {url}")
+                return None
+            if status is not None and status >= 500:
+                # Sunucu hatası geçicidir, boş sayfa sayılmaz
+                logging.warning(f"Server error HTTP {status}: {url}")
+                return None
+
+            # Sabit bekleme yerine site bazlı hazır olma sinyali (selector, JSON-LD, network idle, state)
+            signals = site.readiness if site and site.readiness else default_signals(site)
+            await wait_until_ready(page, signals, jitter_ms=site.jitter_ms if site else None)
+
             page_title = await page.title()
             logging.info(f"Page Title: {page_title}")
-
-            # Rastgele bekleme
-            import random
-            await page.wait_for_timeout(random.randint(3000, 7000))
+            if is_blocked_title(page_title):
+                domain_throttle.report(throttle_key(url), status=status, blocked=True)
+                logging.warning(f"Bot detection page: {url}")
+                return None
+            domain_throttle.report(throttle_key(url), status=status)
 
             result = {
                 "title": None,
@@ -4034,187 +4204,22 @@ async def fetch_data(url):
                 "url": url
             }
 
-            # 0. DeFacto ve LCW Özel Kontrolü
-            if "defacto" in url:
-                defacto_data = await extract_defacto_data(page)
-                if defacto_data:
-                    logging.info("DeFacto data found via DOM")
-                    # Fiyat temizleme işlemi gerekebilir, ama JS tarafında hallettik
-                    result.update(defacto_data)
-                    if result["title"] and result["price"]:
-                        return result
-
-            if "lcw" in url:
-                lcw_data = await extract_lcw_data(page)
-                if lcw_data:
-                    logging.info("LCW data found via window object")
-                    result.update(lcw_data)
-                    if result["title"] and result["price"]:
-                        return result
-
-            # 0.5. Mango Özel Kontrolü
-            if "mango.com" in url:
-                mango_data = await extract_mango_data(page)
-                if mango_data:
-                    logging.info("Mango data found via extractor")
-                    result.update(mango_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.6. Reflect Studio Özel Kontrolü
-            if "reflectstudio.com" in url:
-                reflect_data = await extract_reflectstudio_data(page)
-                if reflect_data:
-                    logging.info("Reflect Studio data found via extractor")
-                    result.update(reflect_data)
-            
-            # 0.7. N11 Özel Kontrolü
-            if "n11.com" in url:
-                n11_data = await extract_n11_data(page)
-                if n11_data:
-                    logging.info("N11 data found via extractor")
-                    result.update(n11_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.8. Opus3a Özel Kontrolü
-            if "opus3a.com" in url:
-                opus_data = await extract_opus3a_data(page)
-                if opus_data:
-                    logging.info("Opus3a data found via extractor")
-                    result.update(opus_data)
-                    if result["title"] and result["price"] and result["image"]:
-                         return result
-
-            # 0.9. AteWear Özel Kontrolü
-            if "atewear.com.tr" in url:
-                ate_data = await extract_atewear_data(page)
-                if ate_data:
-                    logging.info("AteWear data found via extractor")
-                    result.update(ate_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.7. D&R Özel Kontrolü
-            if "dr.com.tr" in url:
-                dr_data = await extract_dr_data(page)
-                if dr_data:
-                    logging.info("D&R data found via extractor")
-                    result.update(dr_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.8. Mavi Özel Kontrolü
-            if "mavi.com" in url:
-                mavi_data = await extract_mavi_data(page)
-                if mavi_data:
-                    logging.info("Mavi data found via extractor")
-                    result.update(mavi_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.9. LEGO.tr Özel Kontrolü
-            if "lego.tr" in url:
-                lego_data = await extract_lego_data(page)
-                if lego_data:
-                    logging.info("LEGO.tr data found via extractor")
-                    result.update(lego_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.10. MediaMarkt Özel Kontrolü
-            if "mediamarkt.com.tr" in url:
-                mm_data = await extract_mediamarkt_data(page)
-                if mm_data:
-                    logging.info("MediaMarkt data found via extractor")
-                    result.update(mm_data)
-                    if result["title"] and result["price"] and result["image"]:
-                         return result
-
-            # 0.11. Beymen Özel Kontrolü
-            if "beymen.com" in url:
-                beymen_data = await extract_beymen_data(page)
-                if beymen_data:
-                    logging.info("Beymen data found via extractor")
-                    result.update(beymen_data)
-                    if result["title"] and result["price"] and result["image"]:
-                         return result
-
-            # 0.11. Jerf.com.tr Özel Kontrolü
-            if "jerf.com.tr" in url:
-                jerf_data = await extract_jerf_data(page)
-                if jerf_data:
-                    logging.info("Jerf.com.tr data found via extractor")
-                    result.update(jerf_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.11. Vakkorama Özel Kontrolü
-            if "vakkorama.com.tr" in url:
-                vakkorama_data = await extract_vakkorama_data(page)
-                if vakkorama_data:
-                    logging.info("Vakkorama data found via extractor")
-                    result.update(vakkorama_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.12. Massimo Dutti Özel Kontrolü
-            if "massimodutti.com" in url:
-                massimodutti_data = await extract_massimodutti_data(page)
-                if massimodutti_data:
-                    logging.info("Massimo Dutti data found via extractor")
-                    result.update(massimodutti_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.13. Victoria's Secret Özel Kontrolü
-            if "victoriassecret.com.tr" in url:
-                victoriassecret_data = await extract_victoriassecret_data(page)
-                if victoriassecret_data:
-                    logging.info("Victoria's Secret data found via extractor")
-                    result.update(victoriassecret_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 0.14. Gratis Özel Kontrolü
-            if "gratis.com" in url:
-                gratis_data = await extract_gratis_data(page)
-                if gratis_data:
-                    logging.info("Gratis data found via extractor")
-                    result.update(gratis_data)
-                    if result["title"] and result["price"] and result["image"]:
-                        return result
-
-            # 1. Decathlon Özel Kontrolü
-            if "decathlon" in url:
-                decathlon_data = await extract_decathlon_data(page)
-                if decathlon_data:
-                    logging.info("Decathlon data found via window object")
-                    result.update(decathlon_data)
-                    # Decathlon verisi genelde tamdır, dönülebilir
-                    if result["title"] and result["price"]:
-                        return result
-            
-            # 2. Teknosa Özel Kontrolü
-            if "teknosa" in url:
-                teknosa_data = await extract_teknosa_data(page)
-                if teknosa_data:
-                    logging.info("Teknosa data found via window object")
-                    # Mevcut result ile birleştir (None olmayanları al)
-                    for k, v in teknosa_data.items():
-                        if v: result[k] = v
-
-            # 3. Boyner Özel Kontrolü
-            if "boyner" in url:
-                boyner_data = await extract_boyner_data(page)
-                if boyner_data:
-                    logging.info("Boyner data found via JSON-LD")
-                    result.update(boyner_data)
-                    if result["title"] and result["price"]:
+            # 0. Site özel extractor (domain kayıt defterinden tek aramada)
+            if site and site.extractor:
+                site_data = await site.extractor(page)
+                if site_data:
+                    logging.info(f"{site.name} data found via {site.extractor.__name__}")
+                    if site.merge == "non_empty":
+                        # Mevcut result ile birleştir (None olmayanları al)
+                        for k, v in site_data.items():
+                            if v: result[k] = v
+                    else:
+                        result.update(site_data)
+                    if site.complete_fields and all(result.get(f) for f in site.complete_fields):
                         return result
 
             # 4. Columbia Özel Kontrolü (DOM öncelikli)
-            if "columbia.com.tr" in url:
+            if site_key == "columbia.com.tr":
                 # DOM'dan "Sepette ... TL" içeren fiyatı bulmaya çalış
                 try:
                     columbia_price = await page.evaluate('''() => {
@@ -4240,7 +4245,7 @@ async def fetch_data(url):
                 # Fiyatı ezmesine izin verme
 
             # 5. Reflect Studio Özel Kontrolü (Script Data)
-            if "reflectstudio.com" in url:
+            if site_key == "reflectstudio.com":
                 try:
                     # Shopify script verisinden fiyatı çekmeye çalış
                     reflect_price = await page.evaluate('''() => {
@@ -4265,7 +4270,7 @@ async def fetch_data(url):
                     logging.debug(f"Reflect Studio script price extraction failed: {e}")
 
             # 6. Gratis Özel Kontrolü (Fiyat Formatlama)
-            if "gratis.com" in url and result["price"] and result["price"].isdigit():
+            if site_key == "gratis.com" and result["price"] and result["price"].isdigit():
                 # Gratis JSON-LD fiyatı kuruş cinsinden veya noktasız gelebiliyor (örn: 29900 -> 299.00)
                 try:
                     price_val = float(result["price"])
@@ -4278,55 +4283,10 @@ async def fetch_data(url):
             json_data = await extract_jsonld(page)
             if json_data:
                 logging.info("JSON-LD data found")
-                if not result["title"]:
-                    result["title"] = json_data.get("name")
-                
-                if not result["image"]:
-                    img = json_data.get("image")
-                    if isinstance(img, list):
-                        result["image"] = img[0]
-                    elif isinstance(img, dict):
-                        result["image"] = img.get("url")
-                    else:
-                        result["image"] = img
-                
-                # Les Benjamins specific fix for malformed JSON-LD image
-                if result["image"] and isinstance(result["image"], str):
-                    if result["image"].startswith("https:files/"):
-                        result["image"] = result["image"].replace("https:files/", "https://lesbenjamins.com/cdn/shop/files/")
-                    elif result["image"].startswith("//"):
-                        result["image"] = "https:" + result["image"]
-                elif isinstance(result["image"], list) and len(result["image"]) > 0:
-                     # If it's a list, take the first element and apply fixes if needed
-                     img = result["image"][0]
-                     if isinstance(img, str):
-                        if img.startswith("https:files/"):
-                            result["image"] = img.replace("https:files/", "https://lesbenjamins.com/cdn/shop/files/")
-                        elif img.startswith("//"):
-                            result["image"] = "https:" + img
-                        else:
-                            result["image"] = img
-                
-                if not result["price"]:
-                    offers = json_data.get("offers")
-                    if offers:
-                        if isinstance(offers, list):
-                            result["price"] = offers[0].get("price")
-                        elif isinstance(offers, dict):
-                            result["price"] = offers.get("price")
-                            if offers.get("@type") == "AggregateOffer":
-                                result["original_price"] = offers.get("highPrice")
-                
-                if not result["brand"]:
-                    brand_data = json_data.get("brand")
-                    if brand_data:
-                        if isinstance(brand_data, dict):
-                            result["brand"] = brand_data.get("name")
-                        else:
-                            result["brand"] = brand_data
+                apply_jsonld_data(result, json_data)
 
             # 6. Gratis Özel Kontrolü (Fiyat Formatlama - JSON-LD sonrası)
-            if "gratis.com" in url and result["price"]:
+            if site_key == "gratis.com" and result["price"]:
                 try:
                     price_val = float(result["price"])
                     if price_val > 1000: 
@@ -4339,12 +4299,7 @@ async def fetch_data(url):
             if not result["title"] or not result["price"] or not result["image"]:
                 meta_data = await extract_meta_tags(page)
                 if meta_data:
-                    if not result["title"] and meta_data.get("title"):
-                        result["title"] = meta_data["title"]
-                    if not result["image"] and meta_data.get("image"):
-                        result["image"] = meta_data["image"]
-                    if not result["price"] and meta_data.get("price"):
-                        result["price"] = meta_data["price"]
+                    apply_meta_data(result, meta_data)
 
             # 5. DOM Selectors (Site bazlı veya fallback)
             selectors = get_site_selectors(url)
@@ -4492,16 +4447,7 @@ async def fetch_data(url):
                     except: continue
 
             if not result["brand"]:
-                # Domain'den marka çıkar
-                domain = urlparse(url).netloc
-                if "amazon" in domain:
-                    result["brand"] = "AMAZON"
-                elif "trendyol" in domain:
-                    result["brand"] = "TRENDYOL"
-                elif "hepsiburada" in domain:
-                    result["brand"] = "HEPSIBURADA"
-                else:
-                    result["brand"] = domain.replace("www.", "").split(".")[0].upper()
+                result["brand"] = domain_brand(url)
 
             # 7. Regex Fallback for Price (Universal)
             if not result["price"]:
@@ -4530,56 +4476,144 @@ async def fetch_data(url):
                 except Exception as e:
                     logging.debug(f"Regex price fallback failed: {e}")
 
-            # Manuka Özel Kontrolü (Fiyat Formatlama)
-            if "manuka.com.tr" in url and result["price"]:
-                # 4299.90 -> 4299,90 TL
-                try:
-                    price_text = result["price"].replace("TL", "").replace("₺", "").strip()
-                    if "." in price_text and "," not in price_text:
-                         val = float(price_text)
-                         result["price"] = f"{val:.2f}".replace('.', ',') + " TL"
-                except Exception as e:
-                    logging.debug(f"Manuka price formatting failed: {e}")
-
-            # Opus3a Title Cleanup
-            if "opus3a.com" in url and result["title"]:
-                 result["title"] = result["title"].split(" | ")[0].strip()
-
-            # Son Temizlik ve Formatlama
-            if result["title"]:
-                result["title"] = result["title"].strip().upper()
-            
-            if result["price"]:
-                result["price"] = str(result["price"]).strip()
-            
-            if result["original_price"]:
-                result["original_price"] = str(result["original_price"]).strip()
-                if result["original_price"] == result["price"]:
-                    result["original_price"] = None
+            finalize_result(result, site_key)
 
             logging.info(f"Scraping result: {result}")
             return result
 
+        except PermanentScrapeError:
+            raise
         except Exception as e:
             logging.error(f"Error scraping {url}: {e}")
             return None
-        finally:
-            await browser.close()
+
+# Bir sonucun tam sayılması için gereken alanlar (ScrapingService de bunları ister)
+REQUIRED_FIELDS = ("title", "price", "image")
+
+
+def scrape_product_http(url):
+    """
+    Tarayıcısız katman: HTML'i düz HTTP ile indir, JSON-LD / microdata /
+    meta etiketlerinden ürünü çıkar. Zorunlu alanlar eksikse None döner.
+
+    Bu katmandaki 404/403 kesin değildir (birçok mağaza tarayıcı olmayan
+    istemcilere böyle döner): None döner, tarayıcı katmanı doğrular.
+    """
+    site = site_registry.resolve(url)
+    site_key = site.domain if site else None
+
+    status, html, headers = fetch_page(url)
+    if status in (429, 503):
+        # Hız sınırı / aşırı yük sunucunun kendisine ait, tarayıcı katmanı da beklemeli
+        retry_after = headers.get("Retry-After")
+        domain_throttle.report(throttle_key(url), status=status,
+                               retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+    elif status is not None and status != 403:
+        # 403 (bot/challenge sayfası dahil) düz istemciye özgüdür; domain'e ceza sayılmaz
+        domain_throttle.report(throttle_key(url), status=status)
+    if status in NOT_FOUND_STATUSES:
+        logging.debug(f"HTTP tier got {status} for {url}; leaving it to the browser tier")
+        return None
+    if not html:
+        return None
+
+    parsed = parse_product_html(html)
+    result = {
+        "title": None,
+        "price": None,
+        "original_price": None,
+        "discount_message": None,
+        "image": None,
+        "brand": None,
+        "url": url
+    }
+
+    # fetch_data ile aynı öncelik: JSON-LD > microdata > meta
+    if parsed["jsonld"]:
+        apply_jsonld_data(result, parsed["jsonld"])
+    for key, value in parsed["microdata"].items():
+        if not result.get(key):
+            result[key] = value
+    apply_meta_data(result, parsed["meta"])
+
+    if not all(result.get(f) for f in REQUIRED_FIELDS):
+        logging.debug(f"HTTP tier incomplete for {url}: {result}")
+        return None
+
+    if not result["brand"] and site and site.selectors:
+        # Selector listesindeki sabit marka adları (örn. "ZARA")
+        for sel in site.selectors.get("brand", []):
+            if not any(c in sel for c in [".", "#", "[", "]", ">", "+", ":"]):
+                result["brand"] = sel
+                break
+    if not result["brand"]:
+        result["brand"] = domain_brand(url)
+
+    finalize_result(result, site_key)
+    result["tier"] = "http"
+    return result
+
+
+def throttle_key(url):
+    """domain_throttle anahtarı (www'suz host)"""
+    return urlparse(url).netloc.lower().replace("www.", "")
+
+
+def acquire_scrape_slot(url, site=None):
+    """
+    Domain'in token bucket'ından bir istek hakkı al (gerekirse bekler).
+    Domain backoff / devre kesici nedeniyle duraklatılmışsa False döner.
+    """
+    rate = site.rate_per_second if site and site.rate_per_second else DEFAULT_RATE
+    burst = site.burst if site and site.burst else DEFAULT_BURST
+    try:
+        domain_throttle.acquire(throttle_key(url), rate=rate, burst=burst)
+        return True
+    except DomainPausedError as e:
+        logging.warning(f"Skipping {url}: {e}")
+        return False
+
 
 def scrape_product(url):
-    """Main entry point - 3 deneme hakkı"""
+    """
+    Main entry point - önce HTTP katmanı, sonra tarayıcı (3 deneme hakkı).
+    Tarayıcı sayfanın yokluğunu (404/410) doğrularsa PermanentScrapeError;
+    diğer tüm başarısızlıklarda (boş render, consent/bot duvarı dahil) None döner.
+    """
+    site = site_registry.resolve(url)
+    domain = throttle_key(url)
+
+    use_http = (site.use_http_first if site else True) and tier_tracker.should_try(domain, "http")
+    if use_http:
+        if not acquire_scrape_slot(url, site):
+            return None
+        try:
+            started = time.perf_counter()
+            result = scrape_product_http(url)
+            tier_tracker.record(domain, "http", bool(result))
+            if result:
+                logging.info(f"HTTP tier succeeded for {url} in {(time.perf_counter() - started) * 1000:.0f} ms")
+                return result
+        except Exception as e:
+            tier_tracker.record(domain, "http", False)
+            logging.debug(f"HTTP tier failed for {url}: {e}")
+
     for i in range(3):
+        # Denemeler arası bekleme domain_throttle'dan gelir (token / 403-429 backoff)
+        if not acquire_scrape_slot(url, site):
+            return None
         try:
             logging.debug(f"Attempt {i+1}/3 - {url}")
-            result = asyncio.run(fetch_data(url))
+            result = browser_pool.run_sync(fetch_data(url), timeout=SCRAPE_TIMEOUT_SECONDS)
             if result and result.get("title"): # En azından başlık olmalı
+                tier_tracker.record(domain, "browser", True)
+                result["tier"] = "browser"
                 return result
+        except PermanentScrapeError:
+            raise
         except Exception as e:
             logging.debug(f"Attempt {i+1} failed: {e}")
-            # Son deneme değilse bekle
-            if i < 2:
-                import time
-                time.sleep(2)
     
+    tier_tracker.record(domain, "browser", False)
     logging.error(f"All attempts failed for {url}")
     return None
@@ -0,0 +1,29 @@
+"""
+Firestore'daki ürün ve fiyat takiplerine sayısal fiyat alanlarını yaz
+
+products.price_minor/currency ve price_tracking.current_price_minor/
+alert_price_minor alanları eklenmeden önce oluşturulmuş kayıtlar için bir
+kez çalıştırılmalı. (SQLite'ta init_db bunu otomatik yapar.)
+"""
+import sys
+import os
+
+# Add project root to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+kataloggia_main = os.path.join(project_root, 'kataloggia-main')
+sys.path.insert(0, kataloggia_main)
+sys.path.insert(0, project_root)
+
+from app.repositories.firestore_repository import FirestoreRepository
+
+
+def main():
+    print("Firestore'a bağlanılıyor...")
+    repo = FirestoreRepository()
+    updated = repo.backfill_price_minor_units()
+    print(f"✓ {updated} kaydın sayısal fiyat alanları güncellendi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Firestore'daki ürünlere kanonik url_key alanını yaz
+
+get_product_by_url artık sadece url_key ile arıyor; bu alan eklenmeden önce
+oluşturulmuş ürünler için bir kez çalıştırılmalı. (SQLite'ta init_db bunu
+otomatik yapar.)
+"""
+import sys
+import os
+
+# Add project root to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+kataloggia_main = os.path.join(project_root, 'kataloggia-main')
+sys.path.insert(0, kataloggia_main)
+sys.path.insert(0, project_root)
+
+from app.repositories.firestore_repository import FirestoreRepository
+
+
+def main():
+    print("Firestore'a bağlanılıyor...")
+    repo = FirestoreRepository()
+    updated = repo.backfill_url_keys()
+    print(f"✓ {updated} ürünün url_key alanı güncellendi")
+
+
+if __name__ == "__main__":
+    main()
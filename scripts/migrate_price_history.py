@@ -0,0 +1,29 @@
+"""
+Eski price_history kayıtlarını aylık delta kodlu price_series bucket'larına taşı
+
+Yeni kayıtlar doğrudan bucket'lara yazılıyor; eski kayıtlar taşınana kadar
+her grafik okuması eski koleksiyona/tabloya da düşer. Bir kez çalıştırılmalı
+(DB_BACKEND'e göre Firestore veya SQLite).
+"""
+import sys
+import os
+
+# Add project root to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+kataloggia_main = os.path.join(project_root, 'kataloggia-main')
+sys.path.insert(0, kataloggia_main)
+sys.path.insert(0, project_root)
+
+from app.repositories import get_repository
+
+
+def main():
+    repo = get_repository()
+    print(f"{type(repo).__name__} ile price_history taşınıyor...")
+    moved = repo.migrate_legacy_price_history()
+    print(f"✓ {moved} fiyat kaydı price_series bucket'larına taşındı")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scraper import fetch_data
+from browser_pool import browser_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,5 +31,8 @@ async def test_urls():
         except Exception as e:
             print(f"Error: {e}")
 
+    # Havuz bu loop'a bağlı; loop kapanmadan tarayıcıyı kapat
+    await browser_pool.close()
+
 if __name__ == "__main__":
     asyncio.run(test_urls())
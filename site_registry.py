@@ -0,0 +1,164 @@
+"""
+Site bazlı extractor / selector kayıt defteri
+
+fetch_data'nın hangi özel extractor'ı çalıştıracağına ve hangi selector
+setini kullanacağına tek bir sözlük aramasıyla karar verir. Hostname
+sondan başa doğru etiket etiket denenir (suffix eşleşmesi), böylece
+"www.shop.mango.com" -> "mango.com" kaydına düşer. Arama maliyeti site
+sayısından bağımsızdır, sadece hostname'deki etiket sayısına bağlıdır.
+
+Nokta içermeyen anahtarlar (örn. "amazon") herhangi bir etikete eşleşir;
+bu, ülke uzantısı değişen siteler için eski substring davranışını korur.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class SiteHandler:
+    """Bir domain'e ait extractor eklentisi ve selector seti"""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.name = domain
+        self.extractor: Optional[Callable] = None
+        # Extractor sonrası bu alanların hepsi doluysa fetch_data erken döner
+        self.complete_fields: Optional[Tuple[str, ...]] = None
+        # 'update': dict.update, 'non_empty': sadece boş olmayan değerleri yaz
+        self.merge = 'update'
+        self.selectors: Optional[Dict[str, Any]] = None
+        # None: otomatik (özel extractor'ı olmayan sitelerde HTTP katmanı denenir)
+        self.http_first: Optional[bool] = None
+        # page_readiness sinyalleri (None: varsayılan sinyaller)
+        self.readiness: Optional[List[Dict[str, Any]]] = None
+        # Sadece bot tespiti yapan sitelerde açılan rastgele bekleme (ms aralığı)
+        self.jitter_ms: Optional[Tuple[int, int]] = None
+        # resource_blocker allow / deny listeleri (resource type veya host)
+        self.resource_allow: Optional[List[str]] = None
+        self.resource_deny: Optional[List[str]] = None
+        # domain_throttle token bucket ayarları (None: varsayılan)
+        self.rate_per_second: Optional[float] = None
+        self.burst: Optional[int] = None
+        # Fiyat takibi yenileme aralığı çarpanı (None: otomatik, bkz. scrape_cost_factor)
+        self.scrape_cost: Optional[float] = None
+        # Tarayıcı context ayarları; fetch_data'nın varsayılanlarının üzerine yazılır
+        # (örn. {'extra_http_headers': {...}})
+        self.context_options: Optional[Dict[str, Any]] = None
+
+    @property
+    def use_http_first(self) -> bool:
+        """Tarayıcısız HTTP katmanı bu site için denenmeli mi"""
+        if self.http_first is not None:
+            return self.http_first
+        return self.extractor is None
+
+    @property
+    def scrape_cost_factor(self) -> float:
+        """Göreli tarama maliyeti: HTTP katmanı 1, tarayıcı 2, sıkı limitli siteler x2"""
+        if self.scrape_cost is not None:
+            return self.scrape_cost
+        cost = 1.0 if self.use_http_first else 2.0
+        if self.rate_per_second is not None and self.rate_per_second < 1:
+            cost *= 2
+        return cost
+
+    def __repr__(self):
+        extractor = self.extractor.__name__ if self.extractor else None
+        return f"<SiteHandler {self.domain} extractor={extractor}>"
+
+
+def normalize_host(url_or_host: str) -> str:
+    """URL veya hostname'den küçük harfli, portsuz, www'suz host üret"""
+    value = (url_or_host or '').strip().lower()
+    if '//' in value:
+        host = urlparse(value).hostname or ''
+    else:
+        host = value.split('/', 1)[0].split(':', 1)[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return host.rstrip('.')
+
+
+class SiteRegistry:
+    """Hostname -> SiteHandler çözümleyici"""
+
+    def __init__(self):
+        self._by_domain: Dict[str, SiteHandler] = {}
+        self._by_label: Dict[str, SiteHandler] = {}
+
+    def _handler_for(self, key: str) -> SiteHandler:
+        key = normalize_host(key)
+        table = self._by_domain if '.' in key else self._by_label
+        handler = table.get(key)
+        if handler is None:
+            handler = SiteHandler(key)
+            table[key] = handler
+        return handler
+
+    def register_selectors(self, key: str, selectors: Dict[str, Any]):
+        """Bir domain'e (veya etikete) DOM selector seti bağla"""
+        self._handler_for(key).selectors = selectors
+
+    def configure(self, key: str, **options):
+        """Bir domain'in davranış ayarlarını güncelle (örn. http_first=False)"""
+        handler = self._handler_for(key)
+        for option, value in options.items():
+            if option.startswith('_') or not hasattr(handler, option) or callable(getattr(handler, option)):
+                raise AttributeError(f"Bilinmeyen site ayarı: {option}")
+            setattr(handler, option, value)
+        return handler
+
+    def register_extractor(self, domains: Iterable[str], extractor: Callable,
+                           complete_fields: Optional[Iterable[str]] = ('title', 'price', 'image'),
+                           merge: str = 'update', name: Optional[str] = None):
+        """Bir extractor'ı bir veya daha fazla domain'e bağla"""
+        if isinstance(domains, str):
+            domains = [domains]
+        for domain in domains:
+            handler = self._handler_for(domain)
+            if handler.extractor is not None and handler.extractor is not extractor:
+                raise ValueError(
+                    f"{handler.domain} zaten {handler.extractor.__name__} tarafından sahiplenilmiş"
+                )
+            handler.extractor = extractor
+            handler.name = name or handler.domain
+            handler.complete_fields = tuple(complete_fields) if complete_fields else None
+            handler.merge = merge
+
+    def extractor(self, *domains: str, complete_fields=('title', 'price', 'image'),
+                  merge: str = 'update', name: Optional[str] = None):
+        """Decorator: async extractor fonksiyonunu eklenti olarak kaydet"""
+        def decorator(func):
+            self.register_extractor(domains, func, complete_fields=complete_fields,
+                                    merge=merge, name=name)
+            return func
+        return decorator
+
+    def resolve(self, url_or_host: str) -> Optional[SiteHandler]:
+        """URL/hostname için en spesifik SiteHandler'ı döndür"""
+        host = normalize_host(url_or_host)
+        if not host:
+            return None
+
+        labels = host.split('.')
+        for i in range(len(labels)):
+            handler = self._by_domain.get('.'.join(labels[i:]))
+            if handler is not None:
+                return handler
+
+        for label in labels:
+            handler = self._by_label.get(label)
+            if handler is not None:
+                return handler
+        return None
+
+    def owners(self) -> Dict[str, Optional[str]]:
+        """Her kayıtlı domain/etiket için extractor adını döndür (test/debug)"""
+        owners = {}
+        for table in (self._by_domain, self._by_label):
+            for key, handler in table.items():
+                owners[key] = handler.extractor.__name__ if handler.extractor else None
+        return dict(sorted(owners.items()))
+
+
+# scraper.py'nin kullandığı global kayıt defteri
+site_registry = SiteRegistry()
@@ -8,6 +8,8 @@ import json
 from urllib.parse import urlparse
 from typing import Dict, List, Optional, Tuple
 
+from price_parser import find_prices, format_price, parse_price
+
 
 class UniversalScraper:
     """Evrensel ürün scraping sınıfı"""
@@ -667,77 +669,24 @@ class UniversalScraper:
         if not price_value:
             return None
         
-        price_str = str(price_value).strip()
+        parsed = parse_price(price_value)
+        if parsed is not None:
+            return format_price(parsed.minor, parsed.currency)
         
-        # Sayısal değeri float'a çevir
-        try:
-            price_float = self._price_to_float(price_str)
-            
-            # Türkçe formatına çevir
-            if price_float >= 1000:
-                formatted = f"{price_float:,.2f} TL".replace(',', 'X').replace('.', ',').replace('X', '.')
-            else:
-                formatted = f"{price_float:.2f} TL".replace('.', ',')
-            
-            return formatted
-        except:
-            # Eğer parse edilemezse, direkt TL ekle
-            if 'TL' not in price_str.upper() and '₺' not in price_str:
-                return f"{price_str} TL"
-            return price_str
+        # Eğer parse edilemezse, direkt TL ekle
+        price_str = str(price_value).strip()
+        if 'TL' not in price_str.upper() and '₺' not in price_str:
+            return f"{price_str} TL"
+        return price_str
     
     def _price_to_float(self, price_str: str) -> float:
-        """Fiyat string'ini float'a çevir"""
-        if not price_str:
-            return 0.0
-        
-        # Temizle
-        price_clean = re.sub(r'[^\d,\.]', '', str(price_str))
-        
-        # Türkçe format: 1.299,99
-        if ',' in price_clean and '.' in price_clean:
-            # Nokta binlik, virgül ondalık
-            price_clean = price_clean.replace('.', '').replace(',', '.')
-        # İngilizce format: 1,299.99 veya 1299.99
-        elif ',' in price_clean:
-            price_clean = price_clean.replace(',', '')
-        # Sadece nokta: 1299.99
-        elif '.' in price_clean:
-            # Son 2 haneyi ondalık olarak ayır
-            parts = price_clean.split('.')
-            if len(parts) == 2 and len(parts[1]) == 2:
-                price_clean = price_clean
-            else:
-                price_clean = price_clean.replace('.', '')
-        
-        try:
-            return float(price_clean)
-        except:
-            return 0.0
+        """Fiyat string'ini float'a çevir (price_parser); çözülemezse 0.0"""
+        parsed = parse_price(price_str)
+        return parsed.amount if parsed else 0.0
     
     def _parse_price_text(self, text: str) -> List[str]:
-        """Fiyat metninden fiyatları parse et"""
-        if not text:
-            return []
-        
-        prices = []
-        
-        # Türkçe format: 1.299,99 veya 1.299,99 TL
-        pattern1 = r'([0-9]{1,3}(?:\.[0-9]{3})*,[0-9]{2})'
-        matches1 = re.findall(pattern1, text)
-        prices.extend(matches1)
-        
-        # İngilizce format: 1,299.99 veya 1299.99
-        pattern2 = r'([0-9]{1,3}(?:\.[0-9]{3})*\.[0-9]{2})'
-        matches2 = re.findall(pattern2, text)
-        prices.extend(matches2)
-        
-        # Basit format: 199.99 veya 199 TL
-        pattern3 = r'([0-9]+(?:\.[0-9]{2})?)'
-        matches3 = re.findall(pattern3, text)
-        prices.extend(matches3)
-        
-        return list(set(prices))  # Duplicate'leri kaldır
+        """Fiyat metninden fiyat adaylarını çıkar"""
+        return find_prices(text)
     
     def _normalize_image_url(self, img_url: str, base_url: str) -> str:
         """Görsel URL'sini normalize et (relative -> absolute)"""